@@ -0,0 +1,408 @@
+"""Benchmark SIMH configuration variants through the vintage guest drivers.
+
+Each variant is a copy of a machine's checked-in ini file with its CPU model,
+memory size, idle mode, or throttle replaced. Every variant runs through the
+unchanged guest driver in a fresh container, several times, on throwaway disk
+overlays. The table reports median wall and SIMH CPU seconds per guest step.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TypedDict
+
+from resume_generator.build_log import load_step_metrics, resource_usage
+from resume_generator.journal import load_journal, stage_timings
+from resume_generator.tables import align_columns
+
+DEFAULT_OUTPUT_DIR = Path("build/bench")
+DEFAULT_RUNS = 3
+DEFAULT_SAMPLE_INTERVAL = 1.0
+# Where the overlay directory is mounted in each driver's container.
+GUEST_OVERLAY_DIR = "/overlays"
+# Applied in this order, because setting a PDP-11 CPU model resets its memory size.
+AXES = ("cpu-model", "memory", "idle", "throttle")
+# Keeps the template's own setting for an axis.
+TEMPLATE = "template"
+STEPS = ("boot", "compile", "nroff")
+
+_MEMORY = re.compile(r"[0-9]+[KMG]?", re.IGNORECASE)
+_CPU_MODEL = re.compile(r"11/[0-9]+|(?:micro|rt)?vax[0-9a-z]*", re.IGNORECASE)
+_SET_CPU = re.compile(r"^\s*set\s+cpu\s+(?P<args>.*?)\s*$", re.IGNORECASE)
+_THROTTLE = re.compile(r"^\s*set\s+(?:no)?throttle\b", re.IGNORECASE)
+_VARIANT_SLUG = re.compile(r"[^A-Za-z0-9.,=_-]+")
+
+
+@dataclass(frozen=True)
+class Machine:
+    """How to run one guest driver against a variant ini."""
+
+    name: str
+    template: Path
+    image: str
+    # Driver and session module paths inside the image.
+    driver: str
+    session: str
+    # SIMH working directory, where the template's relative disk paths resolve.
+    workdir: str
+    # Journaled driver steps reported in the boot, compile, and nroff columns.
+    steps: Mapping[str, str]
+
+
+MACHINES = {
+    "vax": Machine(
+        name="vax",
+        template=Path("vintage/machines/vax/configs/vax780-pexpect.ini"),
+        image="vax-pexpect",
+        driver="/opt/vax_pexpect.py",
+        session="/opt/simh_session.py",
+        workdir="/image",
+        steps={"boot": "vax-boot", "compile": "vax-compile"},
+    ),
+    "pdp11": Machine(
+        name="pdp11",
+        template=Path("vintage/machines/pdp11/configs/pdp11-pexpect.ini"),
+        image="pdp11-pexpect",
+        driver="/opt/pdp11/pdp11_pexpect.py",
+        session="/opt/pdp11/simh_session.py",
+        workdir="/opt/pdp11",
+        steps={"boot": "pdp11-boot", "nroff": "pdp11-nroff"},
+    ),
+}
+
+
+class RunRecord(TypedDict):
+    """One driver run of a variant."""
+
+    run: int
+    status: str
+    metrics: dict[str, float]
+
+
+class VariantResult(TypedDict):
+    """Every run of one variant and the medians of their metrics."""
+
+    machine: str
+    variant: str
+    runs: list[RunRecord]
+    summary: dict[str, float]
+
+
+@dataclass(frozen=True)
+class Sweep:
+    """Where a sweep keeps its files and how often each variant runs."""
+
+    root: Path
+    # Mounted at ``/bench``: driver inputs, variant inis, and each run's output.
+    bench_dir: Path
+    # Host directory under which the drivers create their throwaway disk overlays.
+    overlay_dir: Path
+    runs: int = DEFAULT_RUNS
+    sample_interval: float = DEFAULT_SAMPLE_INTERVAL
+
+
+@dataclass(frozen=True)
+class Variant:
+    """One machine configuration: the template with some axes replaced."""
+
+    machine: str
+    settings: tuple[tuple[str, str], ...]
+
+    @property
+    def name(self) -> str:
+        """Return the settings as ``axis=value`` pairs, or ``template``."""
+        return " ".join(f"{axis}={value}" for axis, value in self.settings) or TEMPLATE
+
+    @property
+    def slug(self) -> str:
+        """Return a directory name for the variant's files."""
+        return _VARIANT_SLUG.sub("_", self.name.replace(" ", ","))
+
+
+def _commands(axis: str, value: str) -> list[str]:
+    if axis == "idle":
+        return ["set cpu noidle" if value == "off" else f"set cpu idle={value}"]
+    if axis == "throttle":
+        return ["set nothrottle" if value == "off" else f"set throttle {value}"]
+    return [f"set cpu {value}"]
+
+
+def _token_axis(token: str) -> str | None:
+    if token.lower() == "noidle" or token.lower().startswith("idle"):
+        return "idle"
+    if _MEMORY.fullmatch(token):
+        return "memory"
+    if _CPU_MODEL.fullmatch(token):
+        return "cpu-model"
+    return None
+
+
+def render_ini(template: str, settings: Sequence[tuple[str, str]]) -> str:
+    """Return ``template`` with each named axis set to its value.
+
+    ``set cpu`` arguments and throttle lines for a replaced axis are removed,
+    and the new commands go where the template first configures the CPU. An
+    ``off`` idle mode or throttle disables it.
+
+    Raises:
+        ValueError: An axis is not one of ``AXES``.
+    """
+    replaced = {axis for axis, value in settings if value != TEMPLATE}
+    if unknown := replaced - set(AXES):
+        raise ValueError(f"unknown axes: {', '.join(sorted(unknown))}")
+
+    lines: list[str] = []
+    insert_at: int | None = None
+    for line in template.splitlines():
+        set_cpu = _SET_CPU.match(line)
+        if set_cpu is not None:
+            insert_at = len(lines) if insert_at is None else insert_at
+            kept = [token for token in set_cpu.group("args").split() if _token_axis(token) not in replaced]
+            if kept:
+                lines.append(f"set cpu {' '.join(kept)}")
+        elif not (_THROTTLE.match(line) and "throttle" in replaced):
+            lines.append(line)
+    if insert_at is None:
+        insert_at = next((i for i, line in enumerate(lines) if line.strip() and not line.startswith(";")), len(lines))
+
+    order = {axis: index for index, axis in enumerate(AXES)}
+    commands = [
+        command
+        for axis, value in sorted(settings, key=lambda setting: order.get(setting[0], len(order)))
+        if value != TEMPLATE
+        for command in _commands(axis, value)
+    ]
+    return "\n".join(lines[:insert_at] + commands + lines[insert_at:]) + "\n"
+
+
+def variants(machine: str, axes: Mapping[str, Sequence[str]]) -> list[Variant]:
+    """Return every combination of the axes' values, or the template alone when none are swept."""
+    names = [axis for axis in AXES if axis in axes]
+    return [
+        Variant(machine, tuple(zip(names, values, strict=True)))
+        for values in itertools.product(*(axes[axis] for axis in names))
+    ]
+
+
+def parse_axes(specs: Sequence[str], machines: Sequence[str]) -> dict[str, dict[str, list[str]]]:
+    """Parse ``MACHINE.AXIS=V1,V2`` specs into values per axis per machine.
+
+    Raises:
+        ValueError: A spec is malformed or names an unknown or unselected machine or axis.
+    """
+    parsed: dict[str, dict[str, list[str]]] = {machine: {} for machine in machines}
+    for spec in specs:
+        target, _, values = spec.partition("=")
+        machine, _, axis = target.partition(".")
+        if machine not in parsed or axis not in AXES or not values:
+            raise ValueError(f"{spec!r}: expected MACHINE.AXIS=V1,V2 with a machine of {', '.join(machines)}")
+        parsed[machine][axis] = [value.strip() for value in values.split(",") if value.strip()]
+    return parsed
+
+
+def run_metrics(events_path: Path, sections_path: Path, machine: Machine) -> dict[str, float]:
+    """Return wall and SIMH CPU seconds of one run's reported steps, plus its total CPU."""
+    durations = {t.stage: t.duration for t in stage_timings(load_journal(events_path)) if t.duration is not None}
+    usage = resource_usage(load_step_metrics(sections_path))
+    metrics: dict[str, float] = {}
+    for column, step in machine.steps.items():
+        if step in durations:
+            metrics[f"{column}_seconds"] = round(durations[step], 3)
+        if "cpu_seconds" in usage.get(step, {}):
+            metrics[f"{column}_cpu_seconds"] = usage[step]["cpu_seconds"]
+    if "total" in usage:
+        metrics["total_cpu_seconds"] = usage["total"]["cpu_seconds"]
+    return metrics
+
+
+def docker_command(machine: Machine, variant: Variant, sweep: Sweep, run_dir: Path) -> list[str]:
+    """Return the ``docker run`` argv for one driver run of a variant.
+
+    The sweep's ``bench_dir`` is mounted at ``/bench``; its ``inputs``
+    directory holds the driver inputs, and ``run_dir`` beneath it receives the
+    journals and output. Its ``overlay_dir`` is mounted at ``/overlays``.
+    """
+    bench_dir = sweep.bench_dir
+
+    def guest(path: Path) -> str:
+        return f"/bench/{path.relative_to(bench_dir).as_posix()}"
+
+    inputs = bench_dir / "inputs"
+    if machine.name == "vax":
+        driver_args = [
+            *("--bradman", guest(inputs / "bradman.c"), "--bio-yaml", guest(inputs / "bio.vintage.yaml")),
+            *("--output", guest(run_dir / "brad.bio.uu")),
+        ]
+    else:
+        driver_args = ["--input", guest(inputs / "brad.bio.uu"), "--output", guest(run_dir / "brad.bio.txt")]
+    return [
+        *("docker", "run", "--rm", "--init"),
+        *("-v", f"{bench_dir}:/bench"),
+        *("-v", f"{sweep.overlay_dir}:{GUEST_OVERLAY_DIR}"),
+        *("-v", f"{sweep.root / 'scripts' / f'{machine.name}_pexpect.py'}:{machine.driver}:ro"),
+        *("-v", f"{sweep.root / 'scripts' / 'simh_session.py'}:{machine.session}:ro"),
+        *("-e", f"EVENTS_LOG={guest(run_dir / 'events.jsonl')}"),
+        *("-e", f"SECTIONS_LOG={guest(run_dir / 'sections.jsonl')}"),
+        *("--entrypoint", "python3", machine.image, machine.driver),
+        *("--ini", guest(bench_dir / variant.slug / machine.template.name), "--workdir", machine.workdir),
+        *("--disk-overlay-dir", GUEST_OVERLAY_DIR, "--sample-interval", str(sweep.sample_interval)),
+        *driver_args,
+    ]
+
+
+def summarize(runs: Sequence[RunRecord]) -> dict[str, float]:
+    """Return the median of each metric across a variant's successful runs."""
+    ok = [run["metrics"] for run in runs if run["status"] == "ok"]
+    keys = sorted({key for metrics in ok for key in metrics})
+    return {key: round(statistics.median(m[key] for m in ok if key in m), 3) for key in keys}
+
+
+def _seconds(summary: Mapping[str, float], key: str) -> str:
+    return f"{summary[key]:.1f}" if key in summary else "-"
+
+
+def format_table(results: Sequence[VariantResult]) -> str:
+    """Return a fixed-width table of median wall and CPU seconds, fastest variant first per machine."""
+    header = (
+        *("machine", "variant", "ok"),
+        *(f"{step} wall" for step in STEPS),
+        "total wall",
+        *(f"{step} cpu" for step in STEPS),
+        "total cpu",
+    )
+    table = [header]
+    for result in sorted(results, key=lambda r: (r["machine"], r["summary"].get("total_seconds", float("inf")))):
+        summary = result["summary"]
+        ok = sum(1 for run in result["runs"] if run["status"] == "ok")
+        table.append(
+            (
+                *(result["machine"], result["variant"], f"{ok}/{len(result['runs'])}"),
+                *(_seconds(summary, f"{step}_seconds") for step in STEPS),
+                _seconds(summary, "total_seconds"),
+                *(_seconds(summary, f"{step}_cpu_seconds") for step in STEPS),
+                _seconds(summary, "total_cpu_seconds"),
+            )
+        )
+    return align_columns(table)
+
+
+def _prepare_inputs(bench_dir: Path, root: Path, build_dir: Path, machines: Sequence[str]) -> None:
+    inputs = bench_dir / "inputs"
+    inputs.mkdir(parents=True, exist_ok=True)
+    needed = {"vax": [root / "vintage/machines/vax/bradman.c", build_dir / "bio.vintage.yaml"]}
+    needed["pdp11"] = [build_dir / "brad.bio.uu"]
+    for machine in machines:
+        for source in needed[machine]:
+            (inputs / source.name).write_bytes(source.read_bytes())
+
+
+def run_variant(machine: Machine, variant: Variant, sweep: Sweep) -> VariantResult:
+    """Write a variant's ini, run its driver ``sweep.runs`` times, and return every run's metrics and their medians."""
+    ini = sweep.bench_dir / variant.slug / machine.template.name
+    ini.parent.mkdir(parents=True, exist_ok=True)
+    sweep.overlay_dir.mkdir(parents=True, exist_ok=True)
+    template = (sweep.root / machine.template).read_text(encoding="ascii")
+    header = f"; Benchmark variant of {machine.template}: {variant.name}\n"
+    ini.write_text(header + render_ini(template, variant.settings), encoding="ascii")
+
+    records: list[RunRecord] = []
+    for number in range(1, sweep.runs + 1):
+        run_dir = sweep.bench_dir / variant.slug / f"run-{number}"
+        run_dir.mkdir(parents=True, exist_ok=True)
+        for stale in ("events.jsonl", "sections.jsonl"):
+            (run_dir / stale).unlink(missing_ok=True)
+        command = docker_command(machine, variant, sweep, run_dir)
+        print(f"bench: {machine.name} {variant.name} run {number}/{sweep.runs}", file=sys.stderr)
+        started = time.monotonic()
+        returncode = subprocess.run(command, check=False).returncode  # noqa: S603 - fixed docker argv, never a shell
+        metrics = run_metrics(run_dir / "events.jsonl", run_dir / "sections.jsonl", machine)
+        metrics["total_seconds"] = round(time.monotonic() - started, 3)
+        records.append(RunRecord(run=number, status="ok" if returncode == 0 else "failed", metrics=metrics))
+    return VariantResult(machine=machine.name, variant=variant.name, runs=records, summary=summarize(records))
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run the sweep, write ``results.json``, print the table, and return the exit code."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--inputs",
+        type=Path,
+        required=True,
+        help="Finished build workspace holding bio.vintage.yaml and brad.bio.uu, such as build/vintage/<build-id>",
+    )
+    parser.add_argument(
+        "--machine",
+        action="append",
+        choices=sorted(MACHINES),
+        help="Machine to benchmark; repeat for both (default: both)",
+    )
+    parser.add_argument(
+        "--axis",
+        action="append",
+        default=[],
+        metavar="MACHINE.AXIS=V1,V2",
+        help=f"Values to sweep for one of {', '.join(AXES)}; 'off' disables idle or throttle, "
+        f"'{TEMPLATE}' keeps the template's setting",
+    )
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Runs per variant (default: %(default)s)")
+    parser.add_argument(
+        "--sample-interval",
+        type=float,
+        default=DEFAULT_SAMPLE_INTERVAL,
+        help="Seconds between SIMH resource samples (default: %(default)s)",
+    )
+    parser.add_argument("--output-dir", type=Path, default=DEFAULT_OUTPUT_DIR, help="Variant inis, journals, results")
+    parser.add_argument(
+        "--overlay-dir",
+        type=Path,
+        help="Host directory for the drivers' throwaway disk overlays (default: OUTPUT_DIR/overlays)",
+    )
+    args = parser.parse_args(argv)
+
+    # Without --machine, both run in pipeline order.
+    machines = args.machine or list(MACHINES)
+    try:
+        axes = parse_axes(args.axis, machines)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.runs < 1:
+        parser.error("--runs must be at least 1")
+
+    root = Path(__file__).resolve().parents[1]
+    bench_dir = args.output_dir.resolve()
+    overlay_dir = (args.overlay_dir or bench_dir / "overlays").resolve()
+    sweep = Sweep(root, bench_dir, overlay_dir, runs=args.runs, sample_interval=args.sample_interval)
+    try:
+        _prepare_inputs(bench_dir, root, args.inputs, machines)
+    except OSError as exc:
+        print(f"bench: cannot stage driver inputs: {exc}", file=sys.stderr)
+        return 1
+
+    results: list[VariantResult] = []
+    for name in machines:
+        for variant in variants(name, axes[name]):
+            try:
+                result = run_variant(MACHINES[name], variant, sweep)
+            except OSError as exc:
+                print(f"bench: cannot run {name} {variant.name}: {exc}", file=sys.stderr)
+                return 1
+            results.append(result)
+
+    (bench_dir / "results.json").write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    print(format_table(results))
+    print(f"\nWrote {bench_dir / 'results.json'}")
+    return 0 if all(run["status"] == "ok" for result in results for run in result["runs"]) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -10,6 +10,8 @@ import sys
 from collections.abc import Sequence
 from typing import TypedDict
 
+from resume_generator.tracing import traced
+
 
 class BioData(TypedDict, total=False):
     """Fields consumed by the Hugo landing page."""
@@ -96,9 +98,9 @@ def _read_successful_build_id(status_path: pathlib.Path) -> str:
     return build_id
 
 
-def main(argv: Sequence[str] | None = None) -> int:
-    """Convert one rendered bio file and return the process exit code."""
-    parser = argparse.ArgumentParser(description=__doc__)
+def build_parser(prog: str | None = None) -> argparse.ArgumentParser:
+    """Return the argument parser shared by this script and the build session's ``bio-yaml`` step."""
+    parser = argparse.ArgumentParser(prog=prog, description=__doc__)
     parser.add_argument("src", type=pathlib.Path, help="Rendered brad.bio.txt")
     parser.add_argument("dst", type=pathlib.Path, help="Destination hugo/data/bio.yaml")
     parser.add_argument(
@@ -109,18 +111,16 @@ def main(argv: Sequence[str] | None = None) -> int:
     )
     parser.add_argument("--pipeline-status", type=pathlib.Path, help="Structured pipeline-status.json")
     parser.add_argument("--build-run-url", default="", help="Enclosing GitHub Actions run URL")
-    arguments = list(argv) if argv is not None else sys.argv[1:]
-    if not arguments:
-        parser.print_usage(sys.stderr)
-        return 1
-    args = parser.parse_args(arguments)
+    return parser
+
 
-    if not args.src.exists() or args.src.stat().st_size == 0:
+def write_bio_yaml(args: argparse.Namespace, text: str) -> int:
+    """Write ``args.dst`` from the rendered bio ``text`` of ``args.src`` and return the process exit code."""
+    if not text:
         print(f"bio_yaml: {args.src} is missing or empty", file=sys.stderr)
         return 1
 
     try:
-        text = args.src.read_text(encoding="utf-8")
         data = parse_bio_txt(text)
         require_complete_bio(data)
 
@@ -147,5 +147,23 @@ def main(argv: Sequence[str] | None = None) -> int:
     return 0
 
 
+@traced("bio-yaml", source="bio_yaml")
+def main(argv: Sequence[str] | None = None) -> int:
+    """Convert one rendered bio file and return the process exit code."""
+    parser = build_parser()
+    arguments = list(argv) if argv is not None else sys.argv[1:]
+    if not arguments:
+        parser.print_usage(sys.stderr)
+        return 1
+    args = parser.parse_args(arguments)
+
+    try:
+        text = args.src.read_text(encoding="utf-8") if args.src.exists() else ""
+    except (OSError, UnicodeError) as exc:
+        print(f"bio_yaml: {exc}", file=sys.stderr)
+        return 1
+    return write_bio_yaml(args, text)
+
+
 if __name__ == "__main__":
     sys.exit(main())
@@ -4,14 +4,46 @@ from __future__ import annotations
 
 import argparse
 import html
-import json
+import io
 import re
-from collections.abc import Mapping
+import sys
+from collections.abc import Mapping, Sequence
+from datetime import UTC, datetime
 from pathlib import Path
+from typing import TextIO, TypedDict
+
+from resume_generator.journal import (
+    StageEvent,
+    StageTiming,
+    critical_path_seconds,
+    iter_json_lines,
+    load_journal,
+    stage_timings,
+)
+from resume_generator.tables import align_columns
 
-_TIMESTAMP = r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}"
 _MISSING_CONSOLE_OUTPUT = "<em>(no console output captured)</em>"
 
+# Each console section keeps at most this many bytes from its start and end.
+DEFAULT_SECTION_HEAD_BYTES = 32 * 1024
+DEFAULT_SECTION_TAIL_BYTES = 32 * 1024
+# With a fragment directory, larger sections load from static files on demand.
+DEFAULT_INLINE_SECTION_BYTES = 8 * 1024
+_FRAGMENT_NAME = re.compile(r"^[a-z0-9][a-z0-9-]*$")
+# Parsed from SHOW TIME and SHOW THROTTLE at the SIMH prompt when a driver quits,
+# or ``unavailable`` with the reason when SIMH never answered.
+SIMH_FIELDS = (
+    "simulated_instructions",
+    "host_seconds",
+    "mips",
+    "cpu_seconds",
+    "mips_per_cpu_second",
+    "throttle",
+    "unavailable",
+)
+# Step metrics written by the drivers' /proc sampler.
+RESOURCE_FIELDS = ("cpu_seconds", "peak_rss_kb", "voluntary_ctxt_switches", "nonvoluntary_ctxt_switches")
+
 _CSS = """
 * { box-sizing: border-box; }
 body { font-family: ui-monospace, SFMono-Regular, Menlo, 'Courier New', monospace;
@@ -48,6 +80,17 @@ pre { margin: 0; padding: 12px 16px; overflow-x: auto;
 .ok   { color: #97d1a4; }
 .info { color: #7fbf8e; }
 em { color: #9aa69b; font-style: normal; }
+.waterfall { border: 1px solid #334238; border-radius: 6px; margin: 0 0 12px; padding: 10px 14px; }
+.critical-path { color: #a7b2a5; margin: 0 0 8px; overflow-wrap: anywhere; }
+.wf-row { align-items: center; display: grid; gap: 10px; grid-template-columns: 15ch minmax(0, 1fr) 9ch; }
+.wf-name { color: #e7e3d4; overflow: hidden; text-overflow: ellipsis; white-space: nowrap; }
+.wf-row.guest .wf-name { color: #a7b2a5; padding-left: 2ch; }
+.wf-track { background: #172019; height: 10px; position: relative; }
+.wf-bar { background: #7fbf8e; height: 100%; min-width: 2px; position: absolute; }
+.wf-row.guest .wf-bar { background: #4f7d5a; }
+.wf-row.failed .wf-bar { background: #d9826b; }
+.wf-dur { color: #9aa69b; text-align: right; white-space: nowrap; }
+.fragment-link { margin-left: 1ch; }
 @media (max-width: 620px) {
   .log-header { display: block; }
   .log-links { margin-top: 14px; }
@@ -55,47 +98,201 @@ em { color: #9aa69b; font-style: normal; }
   .arrow { grid-row: 1 / span 3; margin-top: 3px; }
   .step-name, .step-meta, .step-ts { grid-column: 2; }
   .step-ts { white-space: normal; }
+  .wf-row { grid-template-columns: 12ch minmax(0, 1fr) 8ch; }
   pre { overflow-wrap: anywhere; padding: 12px; white-space: pre-wrap; }
 }
 """
 
 
-def load_console_sections(path: Path | None) -> dict[str, str]:
-    """Return valid named console sections, ignoring malformed records."""
-    if path is None or not path.is_file():
-        return {}
+# Loads each lazy console section the first time its block opens.
+_FRAGMENT_SCRIPT = """
+document.querySelectorAll("details").forEach(function (details) {
+  function load() {
+    details.querySelectorAll("[data-src]").forEach(function (target) {
+      var src = target.getAttribute("data-src");
+      target.removeAttribute("data-src");
+      fetch(src)
+        .then(function (response) {
+          if (!response.ok) { throw new Error(response.statusText); }
+          return response.text();
+        })
+        .then(function (text) { target.textContent = text.trim(); })
+        .catch(function () {
+          var link = document.createElement("a");
+          link.href = src;
+          link.textContent = src;
+          target.textContent = "(console output did not load) ";
+          target.appendChild(link);
+        });
+    });
+  }
+  if (details.open) { load(); }
+  details.addEventListener("toggle", function () { if (details.open) { load(); } });
+});
+"""
+
 
-    sections: dict[str, str] = {}
-    for line in path.read_text(encoding="utf-8").splitlines():
-        try:
-            entry = json.loads(line)
-        except json.JSONDecodeError:
-            continue
-        if not isinstance(entry, dict):
-            continue
+def cap_section(content: str, *, head_bytes: int, tail_bytes: int) -> str:
+    """Keep the first and last bytes of a console section and note what was elided."""
+    data = content.encode("utf-8")
+    if len(data) <= head_bytes + tail_bytes:
+        return content
+    # Cuts inside a multibyte character drop the partial character.
+    head = data[:head_bytes].decode("utf-8", errors="ignore")
+    tail = data[len(data) - tail_bytes :].decode("utf-8", errors="ignore") if tail_bytes > 0 else ""
+    elided = len(data) - len(head.encode("utf-8")) - len(tail.encode("utf-8"))
+    return f"{head}\n[... {elided:,} bytes elided ...]\n{tail}"
+
+
+class SectionRecords(TypedDict):
+    """What the guest drivers wrote to SECTIONS_LOG, grouped by record kind.
+
+    ``sections`` holds capped console text and ``fragments`` the href of each
+    section written out in full. ``metrics`` holds each guest step's console
+    I/O and resource counters, ``simh`` each machine's emulated speed at
+    session end, and ``commands`` the host and guest time of each timed guest
+    command in run order.
+    """
+
+    sections: dict[str, str]
+    fragments: dict[str, str]
+    metrics: dict[str, dict[str, float]]
+    simh: dict[str, dict[str, float | str]]
+    commands: list[dict[str, float | str]]
+
+
+def _numbers(values: Mapping[str, object]) -> dict[str, float]:
+    return {
+        key: float(value)
+        for key, value in values.items()
+        if isinstance(value, int | float) and not isinstance(value, bool)
+    }
+
+
+def _write_fragment(fragments: dict[str, str], fragment_dir: Path, section: str, content: str, limit: int) -> None:
+    if not _FRAGMENT_NAME.match(section):
+        return
+    content = content.strip()
+    if len(content.encode("utf-8")) <= limit:
+        # A later, smaller record for the same section renders inline, so its earlier fragment goes.
+        if fragments.pop(section, None) is not None:
+            (fragment_dir / f"{section}.txt").unlink(missing_ok=True)
+        return
+    fragment_dir.mkdir(parents=True, exist_ok=True)
+    (fragment_dir / f"{section}.txt").write_text(content + "\n", encoding="utf-8")
+    fragments[section] = f"{fragment_dir.name}/{section}.txt"
+
+
+def load_section_records(
+    path: Path | None,
+    *,
+    head_bytes: int = DEFAULT_SECTION_HEAD_BYTES,
+    tail_bytes: int = DEFAULT_SECTION_TAIL_BYTES,
+    fragment_dir: Path | None = None,
+    inline_bytes: int = DEFAULT_INLINE_SECTION_BYTES,
+) -> SectionRecords:
+    """Read every SECTIONS_LOG record in one pass, ignoring malformed records.
+
+    Records are read one line at a time, so only one uncapped console section
+    is held in memory at once. With ``fragment_dir``, each section larger than
+    ``inline_bytes`` is also written there in full, and its href is relative to
+    a page beside ``fragment_dir``.
+    """
+    records = SectionRecords(sections={}, fragments={}, metrics={}, simh={}, commands=[])
+    for entry in iter_json_lines(path):
+        kind = entry.get("kind")
+        machine = entry.get("machine")
         section = entry.get("section")
-        content = entry.get("content")
-        if isinstance(section, str) and isinstance(content, str):
-            sections[section] = content
-    return sections
+        if kind == "console":
+            content = entry.get("content")
+            if isinstance(section, str) and isinstance(content, str):
+                records["sections"][section] = cap_section(content, head_bytes=head_bytes, tail_bytes=tail_bytes)
+                if fragment_dir is not None:
+                    _write_fragment(records["fragments"], fragment_dir, section, content, inline_bytes)
+        elif kind == "metrics":
+            values = entry.get("metrics")
+            if isinstance(section, str) and isinstance(values, dict):
+                records["metrics"][section] = _numbers(values)
+        elif kind == "simh":
+            values = entry.get("simh")
+            if isinstance(machine, str) and isinstance(values, dict):
+                records["simh"][machine] = {
+                    key: value
+                    for key, value in values.items()
+                    if key in SIMH_FIELDS and isinstance(value, int | float | str) and not isinstance(value, bool)
+                }
+        elif kind == "timing":
+            label = entry.get("label")
+            values = entry.get("timing")
+            if isinstance(label, str) and isinstance(values, dict):
+                records["commands"].append({"machine": str(machine or ""), "label": label, **_numbers(values)})
+    return records
+
+
+def load_console_sections(
+    path: Path | None,
+    *,
+    head_bytes: int = DEFAULT_SECTION_HEAD_BYTES,
+    tail_bytes: int = DEFAULT_SECTION_TAIL_BYTES,
+) -> dict[str, str]:
+    """Return valid named console sections, capped."""
+    return load_section_records(path, head_bytes=head_bytes, tail_bytes=tail_bytes)["sections"]
+
+
+def load_step_metrics(path: Path | None) -> dict[str, dict[str, float]]:
+    """Return each guest step's console I/O and resource counters."""
+    return load_section_records(path)["metrics"]
+
 
+def load_simh_counters(path: Path | None) -> dict[str, dict[str, float | str]]:
+    """Return each machine's end-of-session SIMH speed counters."""
+    return load_section_records(path)["simh"]
 
-def _find_timestamp(log_lines: list[str], pattern: str) -> str:
-    for line in log_lines:
-        match = re.search(pattern, line)
-        if match:
-            return match.group(1)
-    return ""
 
+def load_command_timings(path: Path | None) -> list[dict[str, float | str]]:
+    """Return host and guest elapsed time of each timed guest command in run order."""
+    return load_section_records(path)["commands"]
 
-def _find_line(log_lines: list[str], pattern: str) -> str:
-    for line in log_lines:
-        if re.search(pattern, line):
-            return line.strip()
-    return ""
 
+def resource_usage(metrics: Mapping[str, Mapping[str, float]]) -> dict[str, dict[str, float]]:
+    """Return sampled SIMH resource usage per guest step, plus a ``total`` across steps.
 
-def _console_section(sections: Mapping[str, str], name: str) -> str:
+    The total sums CPU seconds and context switches and keeps the largest peak
+    resident memory.
+    """
+    usage = {
+        step: {field: values[field] for field in RESOURCE_FIELDS if field in values}
+        for step, values in metrics.items()
+        if "cpu_seconds" in values
+    }
+    if usage:
+        total = {field: round(sum(values.get(field, 0.0) for values in usage.values()), 3) for field in RESOURCE_FIELDS}
+        total["peak_rss_kb"] = max(values.get("peak_rss_kb", 0.0) for values in usage.values())
+        usage["total"] = total
+    return usage
+
+
+def _timestamp(event: StageEvent | None, field: str = "start") -> str:
+    if event is None:
+        return ""
+    value = event.get(field)
+    if not isinstance(value, float):
+        return ""
+    return datetime.fromtimestamp(value, tz=UTC).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _detail(event: StageEvent | None) -> str:
+    return event.get("detail", "").strip() if event is not None else ""
+
+
+def _console_section(sections: Mapping[str, str], fragments: Mapping[str, str], name: str) -> str:
+    href = fragments.get(name)
+    if href is not None:
+        escaped_href = html.escape(href)
+        return (
+            f'<span data-src="{escaped_href}"><em>(console output loads when opened)</em>'
+            f'<noscript><a class="fragment-link" href="{escaped_href}">{html.escape(name)}.txt</a></noscript></span>'
+        )
     raw = sections.get(name, "").strip()
     return html.escape(raw) if raw else _MISSING_CONSOLE_OUTPUT
 
@@ -104,6 +301,129 @@ def _timestamp_span(timestamp: str) -> str:
     return f'<span class="ts">{html.escape(timestamp)}</span>' if timestamp else ""
 
 
+def _format_seconds(seconds: float | None) -> str:
+    return "running" if seconds is None else f"{seconds:.1f} s"
+
+
+def _waterfall(timings: list[StageTiming]) -> str:
+    """Render stage bars positioned on the build's timeline."""
+    if not timings:
+        return ""
+    span = max(t.offset + (t.duration or 0.0) for t in timings) or 1.0
+    runner_path = " &rarr; ".join(
+        f"{html.escape(t.stage)} {_format_seconds(t.duration)}" for t in timings if t.source == "runner"
+    )
+    rows = [
+        '<section class="waterfall" aria-label="Stage durations">',
+        f'  <p class="critical-path">critical path {_format_seconds(critical_path_seconds(timings))}'
+        f" &middot; {runner_path}</p>",
+    ]
+    for timing in timings:
+        classes = ["wf-row"]
+        if timing.parent is not None:
+            classes.append("guest")
+        if timing.status == "failed":
+            classes.append("failed")
+        bar_style = f"left: {100 * timing.offset / span:.2f}%; width: {100 * (timing.duration or 0.0) / span:.2f}%"
+        rows.append(
+            f'  <div class="{" ".join(classes)}">'
+            f'<span class="wf-name">{html.escape(timing.stage)}</span>'
+            f'<span class="wf-track"><span class="wf-bar" style="{bar_style}"></span></span>'
+            f'<span class="wf-dur">{_format_seconds(timing.duration)}</span></div>'
+        )
+    rows.append("</section>\n")
+    return "\n".join(rows)
+
+
+def _console_io(metrics: Mapping[str, Mapping[str, float]]) -> str:
+    """Render per-step console and, when sampled, SIMH resource counters as a fixed-width table."""
+    sampled = any("cpu_seconds" in values for values in metrics.values())
+    header = ("step", "sent", "received", "lines", "expects", "expect wait", "line delay", "sent/s")
+    table = [header + (("cpu", "peak rss", "ctx switches") if sampled else ())]
+    for step, values in metrics.items():
+        seconds = values.get("seconds", 0.0)
+        sent = values.get("bytes_sent", 0.0)
+        row: tuple[str, ...] = (
+            step,
+            f"{int(sent):,} B",
+            f"{int(values.get('bytes_received', 0.0)):,} B",
+            f"{int(values.get('lines_sent', 0.0)):,}",
+            f"{int(values.get('expect_calls', 0.0)):,}",
+            _format_seconds(values.get("expect_seconds", 0.0)),
+            _format_seconds(values.get("line_delay_seconds", 0.0)),
+            f"{sent / seconds:,.0f} B/s" if seconds > 0 else "-",
+        )
+        if sampled:
+            switches = values.get("voluntary_ctxt_switches", 0.0) + values.get("nonvoluntary_ctxt_switches", 0.0)
+            row += (
+                _format_seconds(values.get("cpu_seconds", 0.0)),
+                f"{values.get('peak_rss_kb', 0.0) / 1024:,.1f} MiB",
+                f"{int(switches):,}",
+            )
+        table.append(row)
+    return html.escape(align_columns(table, left=(0,)))
+
+
+def _simh_speed(counters: Mapping[str, Mapping[str, float | str]], sections: Mapping[str, str]) -> str:
+    """Render emulated speed per machine, followed by the SIMH reports it was read from."""
+
+    def number(value: float | str | None, fmt: str) -> str:
+        return format(value, fmt) if isinstance(value, int | float) else "-"
+
+    table = [("machine", "instructions", "host s", "MIPS", "MIPS/cpu s", "throttle")]
+    for machine, values in counters.items():
+        table.append(
+            (
+                machine,
+                number(values.get("simulated_instructions"), ",.0f"),
+                number(values.get("host_seconds"), ".1f"),
+                number(values.get("mips"), ".2f"),
+                number(values.get("mips_per_cpu_second"), ".2f"),
+                f"not recorded: {values['unavailable']}"
+                if "unavailable" in values
+                else str(values.get("throttle", "-")),
+            )
+        )
+    rows = html.escape(align_columns(table, left=(0, 5)))
+    reports = [
+        html.escape(sections[f"{machine}-simh"].strip()) for machine in counters if f"{machine}-simh" in sections
+    ]
+    return "\n\n".join([rows, *reports])
+
+
+def _command_timing(timings: Sequence[Mapping[str, float | str]]) -> str:
+    """Render host and guest elapsed time per timed guest command as a fixed-width table."""
+
+    def seconds(value: float | str | None) -> str:
+        return f"{value:.1f} s" if isinstance(value, int | float) else "-"
+
+    table = [("machine", "command", "host", "guest", "overhead")]
+    table += [
+        (
+            str(timing["machine"]),
+            str(timing["label"]),
+            seconds(timing.get("host_seconds")),
+            seconds(timing.get("guest_seconds")),
+            seconds(timing.get("overhead_seconds")),
+        )
+        for timing in timings
+    ]
+    return html.escape(align_columns(table))
+
+
+def page_head(title: str, css: str) -> str:
+    """Return the doctype and ``<head>`` of a standalone, unindexed report page; ``title`` is escaped."""
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<meta name="robots" content="noindex, nofollow, noarchive, nosnippet, noimageindex">
+<title>{html.escape(title)}</title>
+<style>{css}</style>
+</head>
+"""
+
+
 def _details(
     title: str,
     meta: str,
@@ -124,21 +444,25 @@ def _details(
     )
 
 
-def render_build_log(*, log_text: str, build_id: str, sections: Mapping[str, str]) -> str:
-    """Render host and guest console records as standalone HTML."""
-    log_lines = log_text.splitlines()
+def write_build_log(out: TextIO, *, events: Mapping[str, StageEvent], build_id: str, records: SectionRecords) -> None:
+    """Write journaled stages and guest console records as standalone HTML, block by block.
 
-    host_timestamp = _find_timestamp(log_lines, rf"\[({_TIMESTAMP})\] prepare-host")
-    yaml_timestamp = _find_timestamp(log_lines, rf"\[({_TIMESTAMP})\] generate-vintage-yaml")
-    vax_timestamp = _find_timestamp(log_lines, rf"\[({_TIMESTAMP})\] stage-b-vax")
-    pdp11_timestamp = _find_timestamp(log_lines, rf"\[({_TIMESTAMP})\] stage-a-pdp11")
-    artifact_timestamp = _find_timestamp(log_lines, rf"\[({_TIMESTAMP})\] finalize-artifacts")
-    compile_timestamp = _find_timestamp(log_lines, rf"\[vax_pexpect\] ({_TIMESTAMP})\s+Compiling:")
-    nroff_timestamp = _find_timestamp(log_lines, rf"\[pdp11_pexpect\] ({_TIMESTAMP})\s+nroff complete")
+    Sections named in ``records["fragments"]`` render as links to static files
+    that the page fetches when their block opens.
+    """
+    sections, fragments = records["sections"], records["fragments"]
+    metrics, simh, commands = records["metrics"], records["simh"], records["commands"]
+    host_timestamp = _timestamp(events.get("prepare-host"))
+    yaml_timestamp = _timestamp(events.get("generate-vintage-yaml"))
+    vax_timestamp = _timestamp(events.get("stage-b-vax"))
+    pdp11_timestamp = _timestamp(events.get("stage-a-pdp11"))
+    artifact_timestamp = _timestamp(events.get("finalize-artifacts"))
+    compile_timestamp = _timestamp(events.get("vax-compile"))
+    nroff_timestamp = _timestamp(events.get("pdp11-nroff"), "end")
 
-    yaml_line = _find_line(log_lines, r"Wrote: build/vintage/bio")
-    spool_line = _find_line(log_lines, r"\[uucp\] Wrote spool:")
-    bio_txt_line = _find_line(log_lines, r"Wrote:.*brad\.bio\.txt")
+    yaml_line = _detail(events.get("generate-vintage-yaml"))
+    spool_line = _detail(events.get("stage-b-vax"))
+    bio_txt_line = _detail(events.get("stage-a-pdp11"))
 
     host_lines: list[str] = []
     if host_timestamp:
@@ -164,16 +488,9 @@ def render_build_log(*, log_text: str, build_id: str, sections: Mapping[str, str
     artifact_content = "\n".join(artifact_lines) if artifact_lines else "<em>(no events)</em>"
 
     escaped_build_id = html.escape(build_id)
-    parts = [
-        f"""<!DOCTYPE html>
-<html lang="en">
-<head><meta charset="UTF-8">
-<meta name="viewport" content="width=device-width, initial-scale=1">
-<meta name="robots" content="noindex, nofollow, noarchive, nosnippet, noimageindex">
-<title>{escaped_build_id}: vintage pipeline log</title>
-<style>{_CSS}</style>
-</head>
-<body>
+    out.write(page_head(f"{build_id}: vintage pipeline log", _CSS))
+    out.write(
+        f"""<body>
 <div class="log-shell">
 <header class="log-header">
   <div class="log-heading">
@@ -188,67 +505,135 @@ def render_build_log(*, log_text: str, build_id: str, sections: Mapping[str, str
 </header>
 <main id="build-log" aria-labelledby="log-title">
 """
-    ]
-    parts.append(_details("host", "pipeline setup", host_timestamp, host_content, open_by_default=True))
-    parts.append(
-        _details("VAX 4.3BSD", "SIMH vax780 &middot; boot", vax_timestamp, _console_section(sections, "vax-boot"))
     )
-    parts.append(
+    out.write(_waterfall(stage_timings(events)))
+    if metrics:
+        out.write(_details("console", "I/O per guest step", "", _console_io(metrics)))
+    if commands:
+        out.write(_details("commands", "host and guest time per command", "", _command_timing(commands)))
+    if simh:
+        out.write(_details("emulator", "SIMH speed at session end", "", _simh_speed(simh, sections)))
+    out.write(_details("host", "pipeline setup", host_timestamp, host_content, open_by_default=True))
+    out.write(
+        _details(
+            "VAX 4.3BSD",
+            "SIMH vax780 &middot; boot",
+            vax_timestamp,
+            _console_section(sections, fragments, "vax-boot"),
+        )
+    )
+    out.write(
         _details(
             "VAX 4.3BSD",
             "compile bradman.c &rarr; brad.bio.roff &rarr; uuencode",
             compile_timestamp,
-            _console_section(sections, "vax-compile") + "\n\n" + _console_section(sections, "vax-run"),
+            _console_section(sections, fragments, "vax-compile")
+            + "\n\n"
+            + _console_section(sections, fragments, "vax-run"),
             open_by_default=True,
         )
     )
-    parts.append(_details("host", "UUCP routing brad.bio.uu &rarr; PDP-11", pdp11_timestamp, routing_content))
-    parts.append(
+    out.write(_details("host", "UUCP routing brad.bio.uu &rarr; PDP-11", pdp11_timestamp, routing_content))
+    out.write(
         _details(
             "PDP-11 2.11BSD",
             "SIMH pdp11 &middot; boot",
             pdp11_timestamp,
-            _console_section(sections, "pdp11-boot"),
+            _console_section(sections, fragments, "pdp11-boot"),
         )
     )
-    parts.append(
+    out.write(
         _details(
             "PDP-11 2.11BSD",
             "nroff &rarr; brad.bio.txt",
             nroff_timestamp,
-            _console_section(sections, "pdp11-nroff"),
+            _console_section(sections, fragments, "pdp11-nroff"),
             open_by_default=True,
         )
     )
-    parts.append(_details("host", "artifact finalization", artifact_timestamp, artifact_content, open_by_default=True))
-    parts.append("</main>\n</div>\n</body>\n</html>\n")
-    return "".join(parts)
+    out.write(_details("host", "artifact finalization", artifact_timestamp, artifact_content, open_by_default=True))
+    out.write("</main>\n</div>\n")
+    if fragments:
+        out.write(f"<script>{_FRAGMENT_SCRIPT}</script>\n")
+    out.write("</body>\n</html>\n")
+
 
+def render_build_log(*, events: Mapping[str, StageEvent], build_id: str, sections: Mapping[str, str]) -> str:
+    """Render journaled stages and guest console records as one HTML string."""
+    buffer = io.StringIO()
+    records = SectionRecords(sections=dict(sections), fragments={}, metrics={}, simh={}, commands=[])
+    write_build_log(buffer, events=events, build_id=build_id, records=records)
+    return buffer.getvalue()
 
-def render_build_log_files(*, log_path: Path, build_id: str, sections_path: Path | None = None) -> str:
-    """Read build records from disk and render the published HTML log."""
-    return render_build_log(
-        log_text=log_path.read_text(encoding="utf-8"),
-        build_id=build_id,
-        sections=load_console_sections(sections_path),
+
+def write_build_log_files(  # pylint: disable=too-many-arguments
+    out: TextIO,
+    *,
+    journal_path: Path,
+    build_id: str,
+    sections_path: Path | None = None,
+    head_bytes: int = DEFAULT_SECTION_HEAD_BYTES,
+    tail_bytes: int = DEFAULT_SECTION_TAIL_BYTES,
+    fragment_dir: Path | None = None,
+    inline_bytes: int = DEFAULT_INLINE_SECTION_BYTES,
+) -> None:
+    """Read build records from disk and write the published HTML log.
+
+    With ``fragment_dir``, sections larger than ``inline_bytes`` are written
+    there in full and the page loads them on demand.
+    """
+    records = load_section_records(
+        sections_path,
+        head_bytes=head_bytes,
+        tail_bytes=tail_bytes,
+        fragment_dir=fragment_dir,
+        inline_bytes=inline_bytes,
     )
+    write_build_log(out, events=load_journal(journal_path), build_id=build_id, records=records)
 
 
 def main(argv: list[str] | None = None) -> int:
     """Render a build log to stdout for the shell pipeline."""
     parser = argparse.ArgumentParser(description=__doc__)
-    parser.add_argument("log_path", type=Path, help="Host-side vintage pipeline log")
+    parser.add_argument("journal_path", type=Path, help="Vintage pipeline event journal (JSON Lines)")
     parser.add_argument("build_id", help="Public build identifier")
     parser.add_argument("sections_path", nargs="?", type=Path, help="Optional pexpect console JSON Lines file")
+    parser.add_argument(
+        "--section-head-bytes",
+        type=int,
+        default=DEFAULT_SECTION_HEAD_BYTES,
+        help="Bytes kept from the start of each console section",
+    )
+    parser.add_argument(
+        "--section-tail-bytes",
+        type=int,
+        default=DEFAULT_SECTION_TAIL_BYTES,
+        help="Bytes kept from the end of each console section",
+    )
+    parser.add_argument(
+        "--fragment-dir",
+        type=Path,
+        help="Write large console sections here for on-demand loading; must sit beside the page",
+    )
+    parser.add_argument(
+        "--inline-section-bytes",
+        type=int,
+        default=DEFAULT_INLINE_SECTION_BYTES,
+        help="Largest console section inlined when --fragment-dir is set",
+    )
     args = parser.parse_args(argv)
-
-    print(
-        render_build_log_files(
-            log_path=args.log_path,
-            build_id=args.build_id,
-            sections_path=args.sections_path,
-        ),
-        end="",
+    if min(args.section_head_bytes, args.section_tail_bytes, args.inline_section_bytes) < 0:
+        parser.error("section byte budgets must not be negative")
+
+    write_build_log_files(
+        sys.stdout,
+        journal_path=args.journal_path,
+        build_id=args.build_id,
+        sections_path=args.sections_path,
+        head_bytes=args.section_head_bytes,
+        tail_bytes=args.section_tail_bytes,
+        fragment_dir=args.fragment_dir,
+        inline_bytes=args.inline_section_bytes,
     )
     return 0
 
@@ -0,0 +1,146 @@
+"""Record completed vintage stages so a failed build can resume after them.
+
+A checkpoint is written when a runner stage succeeds. It holds the SHA-256 of
+every input and output file of the stage, plus named keys such as the pinned
+image reference. ``vintage-runner.sh --resume`` reuses a stage only when its
+checkpoint exists, every input still hashes the same, the keys match, and every
+output is still present and unmodified.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sys
+from collections.abc import Mapping, Sequence
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import TypedDict
+
+
+class Checkpoint(TypedDict):
+    """One completed stage and the content it consumed and produced."""
+
+    stage: str
+    completed_at: str
+    inputs: dict[str, str]
+    outputs: dict[str, str]
+    keys: dict[str, str]
+
+
+def file_digest(path: Path) -> str | None:
+    """Return the hex SHA-256 of a file, or None when it is missing."""
+    try:
+        with path.open("rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def checkpoint_path(directory: Path, stage: str) -> Path:
+    """Return where a stage's checkpoint is kept."""
+    return directory / f"{stage}.json"
+
+
+def _digests(paths: Sequence[Path]) -> dict[str, str]:
+    digests: dict[str, str] = {}
+    for path in paths:
+        digest = file_digest(path)
+        if digest is None:
+            raise FileNotFoundError(f"{path} does not exist")
+        digests[str(path)] = digest
+    return digests
+
+
+def write_checkpoint(
+    directory: Path,
+    stage: str,
+    *,
+    inputs: Sequence[Path],
+    outputs: Sequence[Path],
+    keys: Mapping[str, str],
+) -> Checkpoint:
+    """Hash a completed stage's files and write its checkpoint.
+
+    Raises:
+        FileNotFoundError: An input or output file is missing.
+    """
+    checkpoint = Checkpoint(
+        stage=stage,
+        completed_at=datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        inputs=_digests(inputs),
+        outputs=_digests(outputs),
+        keys=dict(keys),
+    )
+    directory.mkdir(parents=True, exist_ok=True)
+    path = checkpoint_path(directory, stage)
+    # A stage is complete only once its whole checkpoint is on disk.
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(checkpoint, indent=2) + "\n", encoding="utf-8")
+    tmp.replace(path)
+    return checkpoint
+
+
+def _changed_file(digests: Mapping[str, str]) -> str | None:
+    for name, digest in digests.items():
+        current = file_digest(Path(name))
+        if current is None:
+            return f"{name} is missing"
+        if current != digest:
+            return f"{name} changed"
+    return None
+
+
+def reuse_problem(directory: Path, stage: str, *, inputs: Sequence[Path], keys: Mapping[str, str]) -> str | None:
+    """Return why a stage's checkpoint cannot be reused, or None when it can."""
+    path = checkpoint_path(directory, stage)
+    try:
+        checkpoint = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return "no checkpoint"
+    except (OSError, json.JSONDecodeError) as exc:
+        return f"unreadable checkpoint: {exc}"
+
+    if checkpoint.get("keys") != dict(keys):
+        return "settings changed"
+    recorded_inputs = checkpoint.get("inputs", {})
+    if sorted(recorded_inputs) != sorted(str(path) for path in inputs):
+        return "input files changed"
+    return _changed_file({**recorded_inputs, **checkpoint.get("outputs", {})})
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Write a stage checkpoint or check whether one can be reused."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("write", "Record a completed stage"), ("check", "Exit 0 when a stage can be reused")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("directory", type=Path, help="Checkpoint directory of the build workspace")
+        command.add_argument("stage", help="Runner stage name")
+        command.add_argument("--input", type=Path, action="append", default=[], help="A file the stage reads")
+        command.add_argument("--key", action="append", default=[], metavar="NAME=VALUE", help="A stage setting")
+        if name == "write":
+            command.add_argument("--output", type=Path, action="append", default=[], help="A file the stage writes")
+    args = parser.parse_args(argv)
+
+    keys = dict(key.partition("=")[::2] for key in args.key)
+    if args.command == "write":
+        try:
+            write_checkpoint(args.directory, args.stage, inputs=args.input, outputs=args.output, keys=keys)
+        except OSError as exc:
+            print(f"checkpoint: cannot record {args.stage}: {exc}", file=sys.stderr)
+            return 1
+        print(f"Checkpoint: recorded {args.stage}")
+        return 0
+
+    problem = reuse_problem(args.directory, args.stage, inputs=args.input, keys=keys)
+    if problem is not None:
+        print(f"Checkpoint: rerunning {args.stage} ({problem})")
+        return 1
+    print(f"Checkpoint: reusing {args.stage}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
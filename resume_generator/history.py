@@ -0,0 +1,219 @@
+"""Keep a cross-build history of vintage pipeline timings and render its trends."""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import html
+import json
+import math
+import sys
+from collections.abc import Iterator, Mapping, Sequence
+from pathlib import Path
+from typing import TextIO, TypedDict, cast
+
+from resume_generator.build_log import page_head
+from resume_generator.journal import StageEvent, critical_path_seconds, iter_json_lines, load_journal, stage_timings
+
+# Image fetches journal one of these details; see _pull_or_build in the runner.
+IMAGE_CACHE_HIT = "cache hit"
+PERCENTILES = (50, 90, 99)
+RECENT_BUILDS = 20
+
+
+class HistoryEntry(TypedDict):
+    """One finished build, as appended to the history file."""
+
+    build_id: str
+    git_sha: str
+    completed_at: str
+    result: str
+    critical_path_seconds: float
+    stages: dict[str, float]
+    spool_bytes: int
+    bio_bytes: int
+    image_cache_hits: int
+    image_cache_misses: int
+
+
+def _file_size(path: Path | None) -> int:
+    return path.stat().st_size if path is not None and path.is_file() else 0
+
+
+def build_entry(
+    status: Mapping[str, object],
+    events: Mapping[str, StageEvent],
+    *,
+    spool_bytes: int,
+    bio_bytes: int,
+) -> HistoryEntry:
+    """Combine a build's status record and event journal into one history entry."""
+    timings = stage_timings(events)
+    images = [event for event in events.values() if event.get("source") == "images"]
+    hits = sum(1 for event in images if event.get("detail") == IMAGE_CACHE_HIT)
+    return HistoryEntry(
+        build_id=str(status.get("build_id", "")),
+        git_sha=str(status.get("git_sha", "")),
+        completed_at=str(status.get("completed_at", "")),
+        result=str(status.get("result", "unknown")),
+        critical_path_seconds=round(critical_path_seconds(timings), 3),
+        stages={t.stage: round(t.duration, 3) for t in timings if t.duration is not None},
+        spool_bytes=spool_bytes,
+        bio_bytes=bio_bytes,
+        image_cache_hits=hits,
+        image_cache_misses=len(images) - hits,
+    )
+
+
+def append_history(path: Path, entry: HistoryEntry) -> None:
+    """Append one entry as a JSON line, serialized against concurrent builds."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as history:
+        fcntl.flock(history, fcntl.LOCK_EX)
+        history.write(json.dumps(entry, sort_keys=True) + "\n")
+
+
+# Defaults for fields an older or partial entry lacks.
+_EMPTY_ENTRY = HistoryEntry(
+    build_id="",
+    git_sha="",
+    completed_at="",
+    result="unknown",
+    critical_path_seconds=0.0,
+    stages={},
+    spool_bytes=0,
+    bio_bytes=0,
+    image_cache_hits=0,
+    image_cache_misses=0,
+)
+
+
+def iter_history(path: Path) -> Iterator[HistoryEntry]:
+    """Yield history entries in append order, ignoring malformed lines."""
+    for entry in iter_json_lines(path):
+        if isinstance(entry.get("stages"), dict):
+            yield cast(HistoryEntry, {**_EMPTY_ENTRY, **entry})
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Return the linearly interpolated ``q``th percentile of nonempty ``values``."""
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def stage_percentiles(entries: Sequence[HistoryEntry]) -> dict[str, dict[str, float]]:
+    """Return count and percentile durations for each stage of successful builds."""
+    durations: dict[str, list[float]] = {}
+    for entry in entries:
+        if entry["result"] != "success":
+            continue
+        durations.setdefault("critical-path", []).append(entry["critical_path_seconds"])
+        for stage, seconds in entry["stages"].items():
+            if isinstance(seconds, int | float):
+                durations.setdefault(stage, []).append(float(seconds))
+    return {
+        stage: {"count": float(len(values)), **{f"p{q}": percentile(values, q) for q in PERCENTILES}}
+        for stage, values in durations.items()
+    }
+
+
+_CSS = """
+body { font-family: ui-monospace, SFMono-Regular, Menlo, 'Courier New', monospace;
+       font-size: 12px; background: #0e1510; color: #e7e3d4; margin: 0;
+       padding: clamp(12px, 3vw, 24px); line-height: 1.6; }
+main { margin: 0 auto; max-width: 1100px; }
+h1 { font-size: 15px; margin: 0 0 4px; }
+h2 { color: #a7b2a5; font-size: 12px; margin: 20px 0 6px; }
+p { color: #a7b2a5; margin: 0 0 12px; }
+.table-wrap { overflow-x: auto; }
+table { border-collapse: collapse; min-width: 100%; }
+th, td { border-bottom: 1px solid #334238; padding: 4px 10px; text-align: right; white-space: nowrap; }
+th:first-child, td:first-child { text-align: left; }
+th { color: #9aa69b; font-weight: normal; }
+.failure { color: #d9826b; }
+"""
+
+
+def _seconds(value: float) -> str:
+    return f"{value:.1f} s"
+
+
+def write_trend_page(out: TextIO, entries: Sequence[HistoryEntry]) -> None:
+    """Write a standalone HTML page of per-stage percentiles and recent builds."""
+    percentiles = stage_percentiles(entries)
+    successes = sum(1 for entry in entries if entry["result"] == "success")
+    out.write(page_head("vintage pipeline build history", _CSS))
+    out.write(
+        f"""<body>
+<main>
+<h1>vintage pipeline build history</h1>
+<p>{len(entries)} builds recorded; percentiles use the {successes} successful builds.</p>
+<h2>Stage durations</h2>
+<div class="table-wrap"><table>
+<tr><th>stage</th><th>builds</th>{"".join(f"<th>p{q}</th>" for q in PERCENTILES)}</tr>
+"""
+    )
+    for stage, values in percentiles.items():
+        cells = "".join(f"<td>{_seconds(values[f'p{q}'])}</td>" for q in PERCENTILES)
+        out.write(f"<tr><td>{html.escape(stage)}</td><td>{int(values['count'])}</td>{cells}</tr>\n")
+    out.write(
+        """</table></div>
+<h2>Recent builds</h2>
+<div class="table-wrap"><table>
+<tr><th>build</th><th>completed</th><th>result</th><th>critical path</th>"""
+        "<th>spool bytes</th><th>bio bytes</th><th>image cache hits</th></tr>\n"
+    )
+    for entry in reversed(entries[-RECENT_BUILDS:]):
+        result_class = "" if entry["result"] == "success" else ' class="failure"'
+        out.write(
+            f"<tr><td>{html.escape(entry['build_id'])}</td>"
+            f"<td>{html.escape(entry['completed_at'])}</td>"
+            f"<td{result_class}>{html.escape(entry['result'])}</td>"
+            f"<td>{_seconds(entry['critical_path_seconds'])}</td>"
+            f"<td>{entry['spool_bytes']:,}</td><td>{entry['bio_bytes']:,}</td>"
+            f"<td>{entry['image_cache_hits']}/{entry['image_cache_hits'] + entry['image_cache_misses']}</td></tr>\n"
+        )
+    out.write("</table></div>\n</main>\n</body>\n</html>\n")
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Append a finished build to the history or render the trend page."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    append = commands.add_parser("append", help="Append one finished build")
+    append.add_argument("history_path", type=Path, help="History JSON Lines file")
+    append.add_argument("--status", type=Path, required=True, help="The build's pipeline-status.json")
+    append.add_argument("--events", type=Path, required=True, help="The build's event journal")
+    append.add_argument("--spool", type=Path, help="The build's brad.bio.uu")
+    append.add_argument("--bio", type=Path, help="The build's brad.bio.txt")
+
+    render = commands.add_parser("render", help="Write the trend page to stdout")
+    render.add_argument("history_path", type=Path, help="History JSON Lines file")
+    args = parser.parse_args(argv)
+
+    if args.command == "append":
+        try:
+            status = json.loads(args.status.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            print(f"history: cannot read {args.status}: {exc}", file=sys.stderr)
+            return 1
+        entry = build_entry(
+            status,
+            load_journal(args.events),
+            spool_bytes=_file_size(args.spool),
+            bio_bytes=_file_size(args.bio),
+        )
+        append_history(args.history_path, entry)
+        print(f"Recorded {entry['build_id']} in {args.history_path}")
+        return 0
+
+    write_trend_page(sys.stdout, list(iter_history(args.history_path)))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,203 @@
+"""Read the vintage pipeline's JSON Lines event journal."""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TypedDict
+
+
+class StageEvent(TypedDict, total=False):
+    """One stage as recorded by the runner or a guest driver.
+
+    ``start`` and ``end`` are Unix epoch seconds. A stage that is still running
+    has a ``start`` record only, so ``end`` and ``status`` are absent.
+    """
+
+    source: str
+    stage: str
+    start: float
+    end: float
+    status: str
+    bytes_in: int
+    bytes_out: int
+    detail: str
+
+
+def _number(value: object) -> float | None:
+    if isinstance(value, int | float) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
+def _count(value: object) -> int | None:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return None
+
+
+def _event_from_entry(entry: dict[str, object], stage: str) -> StageEvent:
+    event = StageEvent(stage=stage)
+    if (start := _number(entry.get("start"))) is not None:
+        event["start"] = start
+    if (end := _number(entry.get("end"))) is not None:
+        event["end"] = end
+    if (bytes_in := _count(entry.get("bytes_in"))) is not None:
+        event["bytes_in"] = bytes_in
+    if (bytes_out := _count(entry.get("bytes_out"))) is not None:
+        event["bytes_out"] = bytes_out
+    if isinstance(source := entry.get("source"), str):
+        event["source"] = source
+    if isinstance(status := entry.get("status"), str):
+        event["status"] = status
+    if isinstance(detail := entry.get("detail"), str):
+        event["detail"] = detail
+    return event
+
+
+def iter_json_lines(path: Path | None) -> Iterator[dict[str, object]]:
+    """Yield each JSON object in a JSON Lines file, ignoring malformed lines."""
+    if path is None or not path.is_file():
+        return
+    with path.open(encoding="utf-8") as records:
+        for line in records:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(entry, dict):
+                yield entry
+
+
+def iter_journal(path: Path | None) -> Iterator[tuple[str, StageEvent]]:
+    """Yield ``(type, event)`` records in file order, ignoring malformed lines."""
+    for entry in iter_json_lines(path):
+        record_type = entry.get("type")
+        stage = entry.get("stage")
+        if not isinstance(record_type, str) or record_type not in {"start", "end"}:
+            continue
+        if not isinstance(stage, str) or not stage:
+            continue
+        yield record_type, _event_from_entry(entry, stage)
+
+
+def load_journal(path: Path | None) -> dict[str, StageEvent]:
+    """Return the latest record for each stage, merging its start and end records."""
+    stages: dict[str, StageEvent] = {}
+    for record_type, event in iter_journal(path):
+        name = event["stage"]
+        if record_type == "start" or name not in stages:
+            # A repeated stage replaces the earlier attempt.
+            stages[name] = event
+        else:
+            stages[name].update(event)
+    return stages
+
+
+def journal_spans(path: Path | None) -> list[StageEvent]:
+    """Return every span in start order, each start merged with its own end record.
+
+    Unlike ``load_journal``, a stage that runs more than once, or inside another
+    span of the same name, keeps one span per run. An end record carries its
+    span's source, stage, and start time, which together identify the span.
+    """
+    spans: list[StageEvent] = []
+    running: dict[tuple[str, str, float], StageEvent] = {}
+    for record_type, event in iter_journal(path):
+        if "start" not in event:
+            continue
+        key = (event.get("source", "runner"), event["stage"], event["start"])
+        if record_type == "start":
+            running[key] = event
+            spans.append(event)
+        elif (started := running.pop(key, None)) is not None:
+            started.update(event)
+        else:
+            # The start record was lost; the end record still describes the whole span.
+            spans.append(event)
+    return sorted(spans, key=lambda event: event["start"])
+
+
+@dataclass(frozen=True)
+class StageTiming:
+    """Where one journaled stage sits in the build's timeline.
+
+    ``offset`` is seconds from the first recorded start. ``duration`` is
+    ``None`` for a stage that had not ended when the journal was read.
+    ``parent`` names the runner stage that contains a guest step. Byte counts
+    are ``None`` when the stage did not journal them.
+    """
+
+    stage: str
+    source: str
+    offset: float
+    duration: float | None
+    status: str
+    parent: str | None = None
+    bytes_in: int | None = None
+    bytes_out: int | None = None
+
+
+def stage_timings(events: Mapping[str, StageEvent]) -> list[StageTiming]:
+    """Return timed stages in start order, nesting guest steps under runner stages."""
+    started = sorted(
+        (event for event in events.values() if "start" in event),
+        key=lambda event: event["start"],
+    )
+    if not started:
+        return []
+
+    build_start = started[0]["start"]
+    runner_spans = [
+        (event["stage"], event["start"], event.get("end", float("inf")))
+        for event in started
+        if event.get("source", "runner") == "runner"
+    ]
+    timings: list[StageTiming] = []
+    for event in started:
+        source = event.get("source", "runner")
+        start = event["start"]
+        end = event.get("end")
+        parent = None
+        if source != "runner":
+            parent = next((name for name, lo, hi in runner_spans if lo <= start <= hi), None)
+        timings.append(
+            StageTiming(
+                stage=event["stage"],
+                source=source,
+                offset=start - build_start,
+                duration=max(end - start, 0.0) if end is not None else None,
+                status=event.get("status", "running"),
+                parent=parent,
+                bytes_in=event.get("bytes_in"),
+                bytes_out=event.get("bytes_out"),
+            )
+        )
+    return timings
+
+
+def critical_path_seconds(timings: list[StageTiming]) -> float:
+    """Return the summed duration of completed runner stages, which run in sequence."""
+    return sum(t.duration for t in timings if t.source == "runner" and t.duration is not None)
+
+
+def status_stages(timings: list[StageTiming]) -> dict[str, dict[str, object]]:
+    """Return stage timings keyed and shaped for ``pipeline-status.json``."""
+    stages: dict[str, dict[str, object]] = {}
+    for timing in timings:
+        entry: dict[str, object] = {
+            "source": timing.source,
+            "status": timing.status,
+            "offset_seconds": round(timing.offset, 3),
+            "duration_seconds": round(timing.duration, 3) if timing.duration is not None else None,
+        }
+        if timing.parent is not None:
+            entry["parent"] = timing.parent.replace("-", "_")
+        if timing.bytes_in is not None:
+            entry["bytes_in"] = timing.bytes_in
+        if timing.bytes_out is not None:
+            entry["bytes_out"] = timing.bytes_out
+        stages[timing.stage.replace("-", "_")] = entry
+    return stages
@@ -10,7 +10,8 @@ from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from typing import Any
 
-import yaml
+from resume_generator.tracing import traced
+from resume_generator.yaml_loader import load_yaml
 
 
 class _QuietHandler(SimpleHTTPRequestHandler):
@@ -46,7 +47,8 @@ def load_private_phone(path: Path | None) -> str | None:
     if not path.is_file():
         raise ValueError(f"private resume overlay must be a regular file: {path}")
 
-    data: Any = yaml.safe_load(path.read_text(encoding="utf-8"))
+    # The overlay holds private contact details, so it never enters the parse cache.
+    data: Any = load_yaml(path, cache=False)
     if not isinstance(data, dict):
         raise ValueError(f"private resume overlay must be a mapping: {path}")
 
@@ -60,12 +62,14 @@ def load_private_phone(path: Path | None) -> str | None:
     return phone.strip()
 
 
+@traced("build-pdf", source="pdf")
 def build_pdf(
     *,
     site_dir: Path,
     resume_url_path: str,
     pdf_path: Path,
     private_resume_path: Path | None = None,
+    private_phone: str | None = None,
 ) -> Path:
     """Render a PDF from the generated resume HTML.
 
@@ -75,6 +79,9 @@ def build_pdf(
         pdf_path: Output PDF path. It may be outside `site_dir`.
         private_resume_path: Optional untracked YAML overlay whose `basics.phone`
             is injected into the PDF render only.
+        private_phone: A phone number already loaded from such an overlay, as
+            `BuildSession.private_phone` returns it. It is used when no
+            `private_resume_path` is given.
 
     Returns:
         Path to the generated PDF.
@@ -86,10 +93,12 @@ def build_pdf(
         ValueError: If a private overlay is invalid or its PDF output path is
             inside the public site directory.
     """
-    if private_resume_path is not None and pdf_path.resolve().is_relative_to(site_dir.resolve()):
+    private = private_resume_path is not None or private_phone is not None
+    if private and pdf_path.resolve().is_relative_to(site_dir.resolve()):
         raise ValueError(f"private resume PDF must be written outside the public site directory: {pdf_path}")
 
-    private_phone = load_private_phone(private_resume_path)
+    if private_resume_path is not None:
+        private_phone = load_private_phone(private_resume_path)
     site_dir.mkdir(parents=True, exist_ok=True)
     pdf_path.parent.mkdir(parents=True, exist_ok=True)
 
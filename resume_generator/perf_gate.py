@@ -0,0 +1,303 @@
+"""Compare a vintage build's stage timings and byte counts against a checked-in baseline."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TypedDict
+
+from resume_generator.journal import load_journal, stage_timings, status_stages
+from resume_generator.tables import align_columns
+
+DEFAULT_BASELINE = Path("vintage/perf-baseline.json")
+# A metric regresses when it grows past this fraction of its baseline.
+DEFAULT_TOLERANCE = 0.25
+# Durations also get this much absolute headroom so short stages do not flap.
+DEFAULT_SLACK_SECONDS = 5.0
+CRITICAL_PATH = "critical_path"
+METRICS = ("duration_seconds", "bytes_in", "bytes_out")
+# Image fetches measure the registry and local cache, not the pipeline.
+_UNGATED_SOURCES = frozenset({"images"})
+
+
+class Baseline(TypedDict):
+    """The checked-in reference a build is compared against."""
+
+    source: str
+    tolerance: float
+    slack_seconds: float
+    stages: dict[str, dict[str, float]]
+
+
+@dataclass(frozen=True)
+class Comparison:
+    """One metric of one stage, compared against its baseline value.
+
+    ``verdict`` is ``ok``, ``regressed``, or ``missing`` when the build did not
+    report the metric.
+    """
+
+    stage: str
+    metric: str
+    baseline: float
+    actual: float | None
+    verdict: str
+
+
+def status_from_journal(path: Path) -> dict[str, object]:
+    """Return the timing fields of ``pipeline-status.json`` computed from an event journal.
+
+    Replayed or partial runs produce a journal without a runner status file.
+    """
+    timings = stage_timings(load_journal(path))
+    finished = all(t.status == "ok" for t in timings)
+    return {
+        "result": "success" if timings and finished else "failure",
+        "stages": status_stages(timings),
+    }
+
+
+def _metric(value: object) -> float | None:
+    if isinstance(value, int | float) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
+def _stage_entries(status: Mapping[str, object]) -> dict[str, dict[str, object]]:
+    stages = status.get("stages")
+    if not isinstance(stages, dict):
+        return {}
+    return {name: entry for name, entry in stages.items() if isinstance(entry, dict)}
+
+
+def _gated_critical_path(stages: Mapping[str, Mapping[str, object]]) -> float:
+    # The runner stages run in sequence; the ungated work nested in them is taken back out.
+    runner = sum(
+        duration
+        for entry in stages.values()
+        if entry.get("source") == "runner" and (duration := _metric(entry.get("duration_seconds"))) is not None
+    )
+    ungated = sum(
+        duration
+        for entry in stages.values()
+        if entry.get("source") in _UNGATED_SOURCES
+        and entry.get("parent") is not None
+        and (duration := _metric(entry.get("duration_seconds"))) is not None
+    )
+    return max(runner - ungated, 0.0)
+
+
+def status_metrics(status: Mapping[str, object]) -> dict[str, dict[str, float]]:
+    """Return gated metrics per stage from a status record, including the critical path.
+
+    Image fetches are not gated, and neither is the runner stage that contains
+    them. The critical path sums the runner stages without the fetches, so it
+    does not follow the status record's ``critical_path_seconds``.
+    """
+    stages = _stage_entries(status)
+    containers = {entry.get("parent") for entry in stages.values() if entry.get("source") in _UNGATED_SOURCES}
+    metrics: dict[str, dict[str, float]] = {}
+    for name, entry in stages.items():
+        if entry.get("source") in _UNGATED_SOURCES or name in containers or entry.get("status") != "ok":
+            continue
+        values = {key: value for key in METRICS if (value := _metric(entry.get(key))) is not None}
+        if values:
+            metrics[name] = values
+    if (critical_path := _gated_critical_path(stages)) > 0:
+        metrics[CRITICAL_PATH] = {"duration_seconds": round(critical_path, 3)}
+    return metrics
+
+
+def baseline_from_status(
+    status: Mapping[str, object],
+    *,
+    source: str = "",
+    tolerance: float = DEFAULT_TOLERANCE,
+    slack_seconds: float = DEFAULT_SLACK_SECONDS,
+) -> Baseline:
+    """Return a baseline recording every nonzero metric of a successful build.
+
+    ``source`` says which build the numbers came from; the build ID and commit
+    in ``status`` are appended when present.
+    """
+    stages = {
+        name: {key: value for key, value in values.items() if value > 0}
+        for name, values in status_metrics(status).items()
+    }
+    provenance = [
+        f"{key} {value}" for key in ("build_id", "git_sha") if isinstance(value := status.get(key), str) and value
+    ]
+    return Baseline(
+        source=f"{source} ({', '.join(provenance)})" if provenance else source,
+        tolerance=tolerance,
+        slack_seconds=slack_seconds,
+        stages={name: values for name, values in sorted(stages.items()) if values},
+    )
+
+
+def load_baseline(path: Path) -> Baseline:
+    """Read a baseline file, filling settings it does not name with the defaults.
+
+    Raises:
+        ValueError: The file is not a JSON object with a ``stages`` mapping.
+    """
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(data, dict) or not isinstance(data.get("stages"), dict):
+        raise ValueError(f"{path}: expected an object with a stages mapping")
+    return Baseline(
+        source=str(data.get("source", "")),
+        tolerance=float(data.get("tolerance", DEFAULT_TOLERANCE)),
+        slack_seconds=float(data.get("slack_seconds", DEFAULT_SLACK_SECONDS)),
+        stages={
+            name: {key: float(value) for key, value in values.items() if key in METRICS}
+            for name, values in data["stages"].items()
+            if isinstance(values, dict)
+        },
+    )
+
+
+def compare(
+    status: Mapping[str, object],
+    baseline: Baseline,
+    *,
+    tolerance: float | None = None,
+    slack_seconds: float | None = None,
+) -> list[Comparison]:
+    """Compare every baseline metric with the build's value, in baseline order."""
+    tolerance = baseline["tolerance"] if tolerance is None else tolerance
+    slack = baseline["slack_seconds"] if slack_seconds is None else slack_seconds
+    actual = status_metrics(status)
+    rows: list[Comparison] = []
+    for stage, expected in baseline["stages"].items():
+        for metric, reference in expected.items():
+            value = actual.get(stage, {}).get(metric)
+            limit = reference * (1 + tolerance) + (slack if metric == "duration_seconds" else 0)
+            if value is None:
+                verdict = "missing"
+            elif value > limit:
+                verdict = "regressed"
+            else:
+                verdict = "ok"
+            rows.append(Comparison(stage, metric, reference, value, verdict))
+    return rows
+
+
+def _format_value(metric: str, value: float | None) -> str:
+    if value is None:
+        return "-"
+    return f"{value:.1f} s" if metric == "duration_seconds" else f"{int(value):,}"
+
+
+def _format_change(row: Comparison) -> str:
+    if row.actual is None or not row.baseline:
+        return "-"
+    return f"{100 * (row.actual - row.baseline) / row.baseline:+.1f}%"
+
+
+def format_table(rows: Sequence[Comparison]) -> str:
+    """Return a fixed-width table of baseline and actual values per metric."""
+    table = [("stage", "metric", "baseline", "actual", "change", "verdict")]
+    table += [
+        (
+            row.stage,
+            row.metric,
+            _format_value(row.metric, row.baseline),
+            _format_value(row.metric, row.actual),
+            _format_change(row),
+            row.verdict.upper() if row.verdict == "regressed" else row.verdict,
+        )
+        for row in rows
+    ]
+    # Stage and metric names align left; values and verdicts align right.
+    return align_columns(table)
+
+
+def _read_status(args: argparse.Namespace) -> dict[str, object]:
+    if args.events is not None:
+        return status_from_journal(args.events)
+    data = json.loads(args.status.read_text(encoding="utf-8"))
+    if not isinstance(data, dict):
+        raise ValueError(f"{args.status}: expected a JSON object")
+    return data
+
+
+def _record(args: argparse.Namespace, status: Mapping[str, object]) -> int:
+    # Re-recording keeps the tolerance settings of the baseline it replaces.
+    tolerance, slack_seconds = DEFAULT_TOLERANCE, DEFAULT_SLACK_SECONDS
+    if args.baseline.is_file():
+        previous = load_baseline(args.baseline)
+        tolerance, slack_seconds = previous["tolerance"], previous["slack_seconds"]
+    baseline = baseline_from_status(
+        status,
+        source=f"perf_gate record --events {args.events}"
+        if args.events
+        else f"perf_gate record --status {args.status}",
+        tolerance=tolerance if args.tolerance is None else args.tolerance,
+        slack_seconds=slack_seconds if args.slack_seconds is None else args.slack_seconds,
+    )
+    args.baseline.parent.mkdir(parents=True, exist_ok=True)
+    args.baseline.write_text(json.dumps(baseline, indent=2) + "\n", encoding="utf-8")
+    print(f"Recorded {len(baseline['stages'])} stages in {args.baseline}")
+    return 0
+
+
+def _check(args: argparse.Namespace, status: Mapping[str, object]) -> int:
+    try:
+        baseline = load_baseline(args.baseline)
+    except (OSError, ValueError) as exc:
+        print(f"perf_gate: cannot read baseline: {exc}", file=sys.stderr)
+        return 1
+    if not baseline["stages"]:
+        print(
+            f"perf_gate: {args.baseline} records no stages; run `make perf-baseline` on a successful build first",
+            file=sys.stderr,
+        )
+        return 1
+    print(f"Baseline: {baseline['source'] or 'source not recorded'}")
+    rows = compare(status, baseline, tolerance=args.tolerance, slack_seconds=args.slack_seconds)
+    print(format_table(rows))
+    regressed = [row for row in rows if row.verdict == "regressed"]
+    if regressed:
+        print(f"\n{len(regressed)} metric(s) regressed beyond the baseline tolerance", file=sys.stderr)
+        return 1
+    print(f"\nNo regressions across {len(rows)} baseline metrics")
+    return 0
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Check a build against the baseline, or record a new baseline, and return the exit code."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (
+        ("check", "Fail when a stage regresses past the tolerance"),
+        ("record", "Replace the baseline with this build's metrics"),
+    ):
+        command = commands.add_parser(name, help=help_text)
+        source = command.add_mutually_exclusive_group(required=True)
+        source.add_argument("--status", type=Path, help="The build's pipeline-status.json")
+        source.add_argument("--events", type=Path, help="An event journal, such as one from a replayed run")
+        command.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline JSON file")
+        command.add_argument("--tolerance", type=float, help="Allowed fractional growth per metric")
+        command.add_argument("--slack-seconds", type=float, help="Extra absolute headroom for durations")
+    args = parser.parse_args(argv)
+
+    try:
+        status = _read_status(args)
+    except (OSError, ValueError) as exc:
+        print(f"perf_gate: cannot read build status: {exc}", file=sys.stderr)
+        return 1
+    if status.get("result") != "success":
+        print(f"perf_gate: build result is {status.get('result')!r}; only successful builds compare", file=sys.stderr)
+        return 1
+
+    if args.command == "record":
+        return _record(args, status)
+    return _check(args, status)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
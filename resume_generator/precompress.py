@@ -0,0 +1,148 @@
+"""Write precompressed ``.gz`` and ``.br`` siblings for the rendered site."""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import sys
+import zlib
+from collections.abc import Callable, Iterator, Sequence
+from pathlib import Path
+from typing import TypedDict
+
+import brotli
+
+# Text formats only; images, fonts, and PDFs are already compressed.
+COMPRESSIBLE_SUFFIXES = frozenset({".css", ".html", ".js", ".json", ".map", ".svg", ".txt", ".webmanifest", ".xml"})
+# A sibling must save at least this fraction of the original to be worth serving.
+MIN_SAVINGS_RATIO = 0.05
+ENCODINGS = (".gz", ".br")
+
+
+class CompressedFile(TypedDict):
+    """Sizes for one original file and the siblings written beside it."""
+
+    path: str
+    bytes: int
+    gz: int | None
+    br: int | None
+
+
+class PrecompressReport(TypedDict):
+    """Summary written after a precompression pass."""
+
+    files: list[CompressedFile]
+    skipped: list[str]
+    original_bytes: int
+    gz_bytes: int
+    br_bytes: int
+
+
+def compress_gzip(data: bytes) -> bytes:
+    """Return maximum-level gzip bytes with a fixed header for reproducible output."""
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def compress_brotli(data: bytes) -> bytes:
+    """Return maximum-quality Brotli bytes tuned for text."""
+    return bytes(brotli.compress(data, mode=brotli.MODE_TEXT, quality=11, lgwin=24))
+
+
+def decompress_sibling(path: Path) -> bytes:
+    """Return the decompressed contents of a ``.gz`` or ``.br`` sibling.
+
+    Raises:
+        ValueError: The sibling is corrupt.
+    """
+    data = path.read_bytes()
+    if path.suffix == ".gz":
+        try:
+            return gzip.decompress(data)
+        except (OSError, EOFError, zlib.error) as exc:
+            raise ValueError(f"corrupt gzip data: {exc}") from exc
+    try:
+        return bytes(brotli.decompress(data))
+    except brotli.error as exc:
+        raise ValueError(f"corrupt Brotli data: {exc}") from exc
+
+
+def iter_compressible(site_dir: Path) -> Iterator[Path]:
+    """Yield site files whose suffix marks them as compressible text, in path order."""
+    for path in sorted(site_dir.rglob("*")):
+        if path.is_file() and not path.is_symlink() and path.suffix.lower() in COMPRESSIBLE_SUFFIXES:
+            yield path
+
+
+def _write_sibling(original: Path, suffix: str, data: bytes, compress: Callable[[bytes], bytes]) -> int | None:
+    sibling = original.with_name(original.name + suffix)
+    compressed = compress(data)
+    if len(compressed) > len(data) * (1 - MIN_SAVINGS_RATIO):
+        # A stale sibling would otherwise be served for content it no longer matches.
+        sibling.unlink(missing_ok=True)
+        return None
+    sibling.write_bytes(compressed)
+    return len(compressed)
+
+
+def precompress_site(site_dir: Path) -> PrecompressReport:
+    """Write ``.gz`` and ``.br`` siblings for every compressible file."""
+    report = PrecompressReport(
+        files=[],
+        skipped=[],
+        original_bytes=0,
+        gz_bytes=0,
+        br_bytes=0,
+    )
+    for path in iter_compressible(site_dir):
+        data = path.read_bytes()
+        gz_size = _write_sibling(path, ".gz", data, compress_gzip)
+        br_size = _write_sibling(path, ".br", data, compress_brotli)
+        relative = path.relative_to(site_dir).as_posix()
+        if gz_size is None and br_size is None:
+            report["skipped"].append(relative)
+            continue
+        report["files"].append(CompressedFile(path=relative, bytes=len(data), gz=gz_size, br=br_size))
+        report["original_bytes"] += len(data)
+        report["gz_bytes"] += gz_size if gz_size is not None else len(data)
+        report["br_bytes"] += br_size if br_size is not None else len(data)
+    return report
+
+
+def _percent_saved(original: int, compressed: int) -> str:
+    return f"{100 * (1 - compressed / original):.1f}%" if original else "0.0%"
+
+
+def format_report(report: PrecompressReport) -> str:
+    """Return a short human-readable savings summary."""
+    original = report["original_bytes"]
+    lines = [
+        f"Precompressed {len(report['files'])} files; skipped {len(report['skipped'])} that did not shrink",
+        f"  original {original:,} bytes",
+        f"  gzip     {report['gz_bytes']:,} bytes ({_percent_saved(original, report['gz_bytes'])} saved)",
+        f"  brotli   {report['br_bytes']:,} bytes ({_percent_saved(original, report['br_bytes'])} saved)",
+    ]
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Precompress a rendered site and return the process exit code."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("site_dir", type=Path, help="Hugo destination directory")
+    parser.add_argument("--report", type=Path, help="Write the per-file savings report here as JSON")
+    args = parser.parse_args(argv)
+
+    if not args.site_dir.is_dir():
+        print(f"precompress: {args.site_dir} is not a directory", file=sys.stderr)
+        return 1
+
+    report = precompress_site(args.site_dir)
+    if args.report is not None:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        args.report.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,302 @@
+r"""Load the public site sources once and run build steps against them in one process.
+
+Each step is one of ``STEPS``. Several steps can run in one invocation,
+separated by ``--``, and share one ``BuildSession``, so ``site.yaml`` and
+``resume.yaml`` are parsed at most once however many steps read them. The
+``make`` step runs Makefile targets, such as the Hugo build, between them::
+
+    python -m resume_generator.session contract build/vintage/brad.bio.txt \
+        -- bio-yaml build/vintage/brad.bio.txt hugo/data/bio.yaml \
+        -- make hugo-build-production -- pdf site/resume.pdf \
+        -- verify site --production --build-run-url URL
+
+The first failing step stops the run and its exit code is returned.
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from collections.abc import Callable, Mapping, Sequence
+from datetime import date
+from functools import cached_property
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from . import bio_yaml
+from .pdf import build_pdf, load_private_phone
+from .tracing import span, traced
+from .verify_site import verify_production_site, verify_site
+from .vintage_contract import VintageBioInput, validate_rendered_bio, vintage_input_from_mappings
+from .vintage_yaml import build_vintage_bio, emit_vintage_yaml
+from .yaml_loader import load_yaml
+
+# Errors a step reports as a failed exit code rather than a traceback.
+SOURCE_ERRORS = (OSError, UnicodeError, yaml.YAMLError, ValueError)
+
+
+class BuildSourceError(ValueError):
+    """Raised when a public source file lacks data a build step requires."""
+
+
+def load_mapping(path: Path, *, label: str) -> Mapping[str, Any]:
+    """Parse one YAML source file that must hold a top-level mapping.
+
+    Raises:
+        BuildSourceError: The document is not a mapping.
+    """
+    value = load_yaml(path)
+    if not isinstance(value, Mapping):
+        raise BuildSourceError(f"{label} must contain a top-level mapping: {path}")
+    return value
+
+
+class BuildSession:
+    """The public site and resume sources, each parsed at most once per process.
+
+    Sources are read on first use, so a step that needs only ``resume.yaml``
+    never opens ``site.yaml``. Parse and validation errors propagate from the
+    accessor that first needs the source.
+    """
+
+    def __init__(self, site_path: Path = Path("site.yaml"), resume_path: Path = Path("resume.yaml")) -> None:
+        """Name the source files; nothing is read until an accessor needs it."""
+        self.site_path = site_path
+        self.resume_path = resume_path
+        self._private_phones: dict[Path, str | None] = {}
+        self._rendered_bios: dict[Path, str] = {}
+
+    @cached_property
+    def site(self) -> Mapping[str, Any]:
+        """Return the parsed ``site.yaml`` mapping."""
+        return load_mapping(self.site_path, label="site.yaml")
+
+    @cached_property
+    def resume(self) -> Mapping[str, Any]:
+        """Return the parsed ``resume.yaml`` mapping."""
+        return load_mapping(self.resume_path, label="resume.yaml")
+
+    @cached_property
+    def vintage_input(self) -> VintageBioInput:
+        """Return the validated public strings the vintage pipeline must carry."""
+        return vintage_input_from_mappings(self.site, self.resume)
+
+    @cached_property
+    def public_email(self) -> str:
+        """Return the public ``basics.email`` that the resume PDF must show."""
+        basics = self.resume.get("basics")
+        if not isinstance(basics, Mapping):
+            raise BuildSourceError(f"resume.yaml has no basics mapping: {self.resume_path}")
+        email = basics.get("email")
+        if not isinstance(email, str) or not email.strip():
+            raise BuildSourceError(f"resume.yaml has no public basics.email: {self.resume_path}")
+        return email.strip()
+
+    def validate(self) -> None:
+        """Parse both sources and raise the first error a build step would hit."""
+        _ = self.vintage_input, self.public_email
+
+    def rendered_bio(self, path: Path) -> str:
+        """Return the text of a rendered bio, reading each file once."""
+        if path not in self._rendered_bios:
+            self._rendered_bios[path] = path.read_text(encoding="utf-8")
+        return self._rendered_bios[path]
+
+    def private_phone(self, overlay_path: Path | None) -> str | None:
+        """Return the phone number from an untracked resume overlay, loading each overlay once."""
+        if overlay_path is None:
+            return None
+        if overlay_path not in self._private_phones:
+            self._private_phones[overlay_path] = load_private_phone(overlay_path)
+        return self._private_phones[overlay_path]
+
+    def vintage_yaml(self, build_date: date) -> str:
+        """Return the guest's ``bio.vintage.yaml`` document for ``build_date``."""
+        return emit_vintage_yaml(build_vintage_bio(self.site, self.resume, build_date=build_date))
+
+
+def _step_parser(name: str, description: str) -> argparse.ArgumentParser:
+    return argparse.ArgumentParser(prog=f"{Path(sys.argv[0]).name} {name}", description=description)
+
+
+@traced("check-sources", source="session")
+def _check(session: BuildSession, argv: Sequence[str]) -> int:
+    _step_parser("check", "Parse and validate both public sources").parse_args(argv)
+    try:
+        session.validate()
+    except SOURCE_ERRORS as exc:
+        print(f"session: {exc}", file=sys.stderr)
+        return 1
+    print(f"session: {session.site_path} and {session.resume_path} are valid")
+    return 0
+
+
+@traced("vintage-yaml", source="session")
+def _vintage_yaml(session: BuildSession, argv: Sequence[str]) -> int:
+    parser = _step_parser("vintage-yaml", "Write the guest's bio.vintage.yaml")
+    parser.add_argument("output", type=Path, help="Destination bio.vintage.yaml")
+    parser.add_argument(
+        "--build-date", type=date.fromisoformat, default=None, help="Build date as YYYY-MM-DD (default: today)"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        text = session.vintage_yaml(args.build_date or date.today())
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text, encoding="utf-8")
+    except SOURCE_ERRORS as exc:
+        print(f"vintage-yaml: {exc}", file=sys.stderr)
+        return 1
+    print(f"Wrote: {args.output}  ({len(text.splitlines())} lines)")
+    return 0
+
+
+@traced("vintage-contract", source="session")
+def _contract(session: BuildSession, argv: Sequence[str]) -> int:
+    parser = _step_parser("contract", "Validate a rendered bio against the public sources")
+    parser.add_argument("bio_txt", type=Path, help="Rendered brad.bio.txt")
+    args = parser.parse_args(argv)
+
+    try:
+        validate_rendered_bio(session.rendered_bio(args.bio_txt), session.vintage_input)
+    except SOURCE_ERRORS as exc:
+        print(f"vintage contract: {exc}", file=sys.stderr)
+        return 1
+    print("vintage contract: rendered bio matches site.yaml and resume.yaml basics.summary")
+    return 0
+
+
+@traced("bio-yaml", source="session")
+def _bio_yaml(session: BuildSession, argv: Sequence[str]) -> int:
+    args = bio_yaml.build_parser(prog=f"{Path(sys.argv[0]).name} bio-yaml").parse_args(argv)
+    try:
+        # Shared with a preceding contract step, which read the same rendered bio.
+        text = session.rendered_bio(args.src) if args.src.exists() else ""
+    except (OSError, UnicodeError) as exc:
+        print(f"bio_yaml: {exc}", file=sys.stderr)
+        return 1
+    return bio_yaml.write_bio_yaml(args, text)
+
+
+@traced("resume-pdf", source="session")
+def _pdf(session: BuildSession, argv: Sequence[str]) -> int:
+    parser = _step_parser("pdf", "Print the rendered resume page to PDF")
+    parser.add_argument("output", type=Path, help="Destination PDF")
+    parser.add_argument("--site-dir", type=Path, default=Path("site"), help="Rendered site (default: site)")
+    parser.add_argument("--resume-url-path", default="/resume/", help="Resume page URL path (default: /resume/)")
+    parser.add_argument("--private-resume", type=Path, help="Untracked overlay whose basics.phone is printed")
+    args = parser.parse_args(argv)
+
+    try:
+        # A bad overlay fails before the browser starts.
+        phone = session.private_phone(args.private_resume)
+        build_pdf(
+            site_dir=args.site_dir,
+            resume_url_path=args.resume_url_path,
+            pdf_path=args.output,
+            private_phone=phone,
+        )
+    except (*SOURCE_ERRORS, RuntimeError) as exc:
+        print(f"pdf: {exc}", file=sys.stderr)
+        return 1
+    print(f"Generated {args.output}")
+    return 0
+
+
+@traced("verify-site", source="session")
+def _verify(session: BuildSession, argv: Sequence[str]) -> int:
+    parser = _step_parser("verify", "Verify contracts that only exist in Hugo's rendered output")
+    parser.add_argument("site_dir", type=Path, help="Hugo destination directory")
+    parser.add_argument(
+        "--production", action="store_true", help="Verify production-only artifacts and privacy contracts"
+    )
+    parser.add_argument("--build-run-url", help="Exact GitHub Actions run URL rendered on the homepage")
+    args = parser.parse_args(argv)
+
+    errors = verify_site(args.site_dir)
+    if args.production:
+        if not args.build_run_url:
+            parser.error("--production requires --build-run-url URL")
+        # The PDF must show the public email of the session's resume.yaml.
+        errors.extend(verify_production_site(args.site_dir, session=session, build_run_url=args.build_run_url))
+    if errors:
+        for error in errors:
+            print(f"ERROR: {error}", file=sys.stderr)
+        return 1
+    print(f"Verified rendered site: {args.site_dir}")
+    return 0
+
+
+def _make(_session: BuildSession, argv: Sequence[str]) -> int:
+    parser = _step_parser("make", "Run Makefile targets, such as the Hugo build, between in-process steps")
+    parser.add_argument("targets", nargs="+", help="Makefile targets")
+    args = parser.parse_args(argv)
+
+    command = ["make", "--no-print-directory", *args.targets]
+    with span(f"make-{'-'.join(args.targets)}", source="session") as record:
+        try:
+            returncode = subprocess.run(command, check=False).returncode  # noqa: S603, S607 - make from PATH, never a shell
+        except OSError as exc:
+            print(f"make: cannot run make: {exc}", file=sys.stderr)
+            returncode = 127
+        if returncode != 0:
+            record["status"] = "failed"
+            record["detail"] = f"exit code {returncode}"
+    return returncode
+
+
+STEPS: dict[str, Callable[[BuildSession, Sequence[str]], int]] = {
+    "check": _check,
+    "vintage-yaml": _vintage_yaml,
+    "contract": _contract,
+    "bio-yaml": _bio_yaml,
+    "pdf": _pdf,
+    "make": _make,
+    "verify": _verify,
+}
+
+
+def split_steps(arguments: Sequence[str]) -> list[list[str]]:
+    """Split a command line into one argument list per ``--``-separated step."""
+    steps: list[list[str]] = [[]]
+    for argument in arguments:
+        if argument == "--":
+            steps.append([])
+        else:
+            steps[-1].append(argument)
+    return steps
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run each requested step against one session and return the first failing exit code."""
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        usage="%(prog)s [--site PATH] [--resume PATH] STEP [ARGS...] [-- STEP [ARGS...]]...",
+    )
+    parser.add_argument("--site", type=Path, default=Path("site.yaml"), help="Public site.yaml")
+    parser.add_argument("--resume", type=Path, default=Path("resume.yaml"), help="Public resume.yaml")
+    parser.add_argument("step", choices=STEPS, help="First step to run")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments of the first step")
+    first, *rest = split_steps(sys.argv[1:] if argv is None else argv)
+    args = parser.parse_args(first)
+
+    steps = [(args.step, args.args)]
+    for step in rest:
+        if not step or step[0] not in STEPS:
+            parser.error(f"expected a step name after '--', one of: {', '.join(STEPS)}")
+        steps.append((step[0], step[1:]))
+
+    session = BuildSession(args.site, args.resume)
+    for name, step_argv in steps:
+        code = STEPS[name](session, step_argv)
+        if code != 0:
+            return code
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,20 @@
+"""Lay out the fixed-width text tables of the build reports."""
+
+from __future__ import annotations
+
+from collections.abc import Collection, Sequence
+
+
+def align_columns(table: Sequence[Sequence[str]], *, left: Collection[int] = (0, 1)) -> str:
+    """Return rows of cells as fixed-width lines, the columns in ``left`` aligned left and the rest right.
+
+    Columns are separated by two spaces, and trailing padding is dropped.
+    """
+    widths = [max(len(line[column]) for line in table) for column in range(len(table[0]))]
+    return "\n".join(
+        "  ".join(
+            cell.ljust(width) if column in left else cell.rjust(width)
+            for column, (cell, width) in enumerate(zip(line, widths, strict=True))
+        ).rstrip()
+        for line in table
+    )
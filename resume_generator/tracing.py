@@ -0,0 +1,192 @@
+"""Record build spans in the event journal and export them as Chrome trace events.
+
+Spans use the journal format that the runner and the guest drivers already
+write, so one ``EVENTS_LOG`` file covers the host, both containers, and the
+site build. ``export`` merges journals into trace-event JSON for Perfetto or
+``chrome://tracing``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import os
+import subprocess
+import sys
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from typing import ParamSpec, TypeVar
+
+from resume_generator.journal import StageEvent, journal_spans
+
+EVENTS_LOG_ENV = "EVENTS_LOG"
+# Perfetto lists processes by name; these say where each source's spans ran.
+PROCESS_LABELS = {
+    "runner": "host: vintage-runner.sh",
+    "images": "host: image fetches",
+    "vax_pexpect": "vax container: 4.3BSD guest",
+    "pdp11_pexpect": "pdp11 container: 2.11BSD guest",
+}
+
+# The guest drivers write the same journal records from images without this
+# package installed, so span() mirrors simh_session.journal_stage.
+# pylint: disable=duplicate-code
+
+_P = ParamSpec("_P")
+_R = TypeVar("_R")
+
+
+def _append_event(record: dict[str, object]) -> None:
+    path = os.environ.get(EVENTS_LOG_ENV)
+    if not path:
+        return
+    # Like simh_session.journal_stage, a journal write never fails the step it times.
+    try:
+        with open(path, "a", encoding="utf-8") as journal:
+            journal.write(json.dumps(record) + "\n")
+    except OSError:
+        pass
+
+
+@contextmanager
+def span(stage: str, *, source: str, bytes_in: int = 0) -> Iterator[dict[str, object]]:
+    """Record one step in the ``EVENTS_LOG`` journal when it is set.
+
+    The yielded record may be updated with ``bytes_out`` or ``detail`` before
+    the step ends. An exception marks the step ``failed``, as does setting the
+    record's ``status``.
+
+    Args:
+        stage: Step name. Status records keep its latest run; the trace keeps every run.
+        source: Entry point that ran the step.
+        bytes_in: Payload bytes the step consumed.
+    """
+    record: dict[str, object] = {"source": source, "stage": stage, "start": time.time(), "bytes_in": bytes_in}
+    _append_event({"type": "start", **record})
+    record["bytes_out"] = 0
+    status = "failed"
+    try:
+        yield record
+        status = "ok"
+    finally:
+        _append_event({"type": "end", "status": status, **record, "end": time.time()})
+
+
+def traced(stage: str, *, source: str) -> Callable[[Callable[_P, _R]], Callable[_P, _R]]:
+    """Record each call of the decorated entry point as one span.
+
+    A nonzero integer return value, such as a ``main`` exit code, marks the span
+    ``failed`` as an exception does.
+    """
+
+    def decorate(function: Callable[_P, _R]) -> Callable[_P, _R]:
+        @functools.wraps(function)
+        def wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _R:
+            with span(stage, source=source) as record:
+                result = function(*args, **kwargs)
+                if isinstance(result, int) and not isinstance(result, bool) and result != 0:
+                    record["status"] = "failed"
+                    record["detail"] = f"exit code {result}"
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+def _trace_event(event: StageEvent, *, pid: int, origin: float, trace_end: float) -> dict[str, object]:
+    start = event["start"]
+    end = event.get("end", trace_end)
+    args: dict[str, object] = {"status": event.get("status", "running")}
+    for key in ("bytes_in", "bytes_out", "detail"):
+        if event.get(key):
+            args[key] = event.get(key)
+    return {
+        "name": event["stage"],
+        "cat": event.get("source", "runner"),
+        "ph": "X",
+        "ts": round((start - origin) * 1_000_000),
+        "dur": round(max(end - start, 0.0) * 1_000_000),
+        "pid": pid,
+        "tid": pid,
+        "args": args,
+    }
+
+
+def trace_events(journals: Sequence[Path]) -> list[dict[str, object]]:
+    """Return complete-span and process-name trace events for every journaled span.
+
+    A stage that ran more than once, or nested in a span of the same name, gets
+    one trace event per run. Each source becomes one trace process, numbered in
+    order of its first span.
+    A stage that never ended runs to the last recorded time and keeps the
+    status ``running``.
+    """
+    events = sorted((event for path in journals for event in journal_spans(path)), key=lambda event: event["start"])
+    if not events:
+        return []
+    origin = events[0]["start"]
+    trace_end = max(max(event.get("end", event["start"]) for event in events), origin)
+
+    pids: dict[str, int] = {}
+    spans: list[dict[str, object]] = []
+    for event in events:
+        pid = pids.setdefault(event.get("source", "runner"), len(pids) + 1)
+        spans.append(_trace_event(event, pid=pid, origin=origin, trace_end=trace_end))
+    metadata: list[dict[str, object]] = []
+    for source, pid in pids.items():
+        metadata.append(
+            {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": PROCESS_LABELS.get(source, source)}}
+        )
+        metadata.append({"name": "process_sort_index", "ph": "M", "pid": pid, "args": {"sort_index": pid}})
+    return metadata + spans
+
+
+def write_trace(out: Path, journals: Sequence[Path]) -> int:
+    """Write merged trace-event JSON and return the number of spans."""
+    events = trace_events(journals)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}) + "\n", encoding="utf-8")
+    return sum(1 for event in events if event["ph"] == "X")
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Export journals as a trace, or run one command as a span, and return the exit code."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Merge journals into Chrome trace-event JSON")
+    export.add_argument("journals", type=Path, nargs="+", help="Event journals to merge")
+    export.add_argument("--output", type=Path, required=True, help="Trace JSON file to write")
+
+    run = commands.add_parser("run", help="Run a command and journal it as one span")
+    run.add_argument("stage", help="Span name")
+    run.add_argument("--source", default="make", help="Entry point recorded with the span (default: make)")
+    run.add_argument("argv", nargs=argparse.REMAINDER, help="Command to run, after --")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        count = write_trace(args.output, args.journals)
+        print(f"Wrote {count} spans to {args.output}")
+        return 0
+
+    command = args.argv[1:] if args.argv[:1] == ["--"] else args.argv
+    if not command:
+        parser.error("run requires a command after --")
+    with span(args.stage, source=args.source) as record:
+        try:
+            returncode = subprocess.run(command, check=False).returncode  # noqa: S603 - the caller's own argv, never a shell
+        except OSError as exc:
+            print(f"tracing: cannot run {command[0]}: {exc}", file=sys.stderr)
+            returncode = 127
+        if returncode != 0:
+            record["status"] = "failed"
+            record["detail"] = f"exit code {returncode}"
+    return returncode
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
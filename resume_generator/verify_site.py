@@ -1,21 +1,30 @@
-"""Verify contracts that only exist in Hugo's rendered output."""
+"""Verify contracts that only exist in Hugo's rendered output.
+
+Run it as the ``verify`` step of ``python -m resume_generator.session``, which
+supplies the public ``resume.yaml`` through its build session.
+"""
 
 from __future__ import annotations
 
-import argparse
 import json
 import re
 import shutil
 import subprocess
-import sys
 import xml.etree.ElementTree as ET
 from collections.abc import Sequence
 from html.parser import HTMLParser
 from pathlib import Path
+from typing import TYPE_CHECKING
 from urllib.parse import unquote, urlparse
 
 import yaml
 
+from resume_generator.precompress import ENCODINGS, decompress_sibling
+
+# The session runs this verifier as a step, so the type is only for annotations.
+if TYPE_CHECKING:
+    from resume_generator.session import BuildSession
+
 REQUIRED_FILES = (
     "404.html",
     "about/index.html",
@@ -267,6 +276,40 @@ def verify_linked_artifacts(site_dir: Path, errors: list[str]) -> None:
             errors,
             "index.html: links to missing or empty build.log.html",
         )
+    if is_nonempty_file(site_dir / "build.log.html"):
+        verify_build_log_fragments(site_dir, errors)
+
+
+def verify_build_log_fragments(site_dir: Path, errors: list[str]) -> None:
+    """Require each lazily loaded console section to exist beside the build log."""
+    parser = parse_html(site_dir / "build.log.html")
+    for anchor in parser.anchors:
+        if "fragment-link" not in anchor.get("class", "").split():
+            continue
+        href = anchor.get("href", "")
+        record(
+            bool(href) and is_nonempty_file(site_dir / unquote(href)),
+            errors,
+            f"build.log.html: links to missing or empty console fragment {href!r}",
+        )
+
+
+def verify_precompressed_siblings(site_dir: Path, errors: list[str]) -> None:
+    """Require each ``.gz`` and ``.br`` sibling to decompress to its original's exact bytes."""
+    for sibling in sorted(site_dir.rglob("*")):
+        if not sibling.is_file() or sibling.suffix not in ENCODINGS:
+            continue
+        relative = sibling.relative_to(site_dir).as_posix()
+        original = sibling.with_suffix("")
+        if not original.is_file():
+            errors.append(f"{relative}: precompressed sibling has no original")
+            continue
+        try:
+            decompressed = decompress_sibling(sibling)
+        except ValueError as exc:
+            errors.append(f"{relative}: cannot decompress: {exc}")
+            continue
+        record(decompressed == original.read_bytes(), errors, f"{relative}: does not decompress to {original.name}")
 
 
 def is_nonempty_file(path: Path) -> bool:
@@ -274,24 +317,20 @@ def is_nonempty_file(path: Path) -> bool:
     return path.is_file() and path.stat().st_size > 0
 
 
-def read_public_email(resume_yaml: Path, errors: list[str]) -> str | None:
-    """Read the public resume email, recording malformed input as a contract error."""
+def read_public_email(session: BuildSession, errors: list[str]) -> str | None:
+    """Read the session's public resume email, recording malformed input as a contract error."""
+    resume_yaml = session.resume_path
     if not is_nonempty_file(resume_yaml):
         errors.append(f"resume YAML is missing or empty: {resume_yaml}")
         return None
     try:
-        data = yaml.safe_load(resume_yaml.read_text(encoding="utf-8"))
+        return session.public_email
     except (OSError, UnicodeError, yaml.YAMLError) as error:
         errors.append(f"could not read resume YAML {resume_yaml}: {error}")
-        return None
-    if not isinstance(data, dict) or not isinstance(data.get("basics"), dict):
-        errors.append(f"resume YAML has no basics mapping: {resume_yaml}")
-        return None
-    email = data["basics"].get("email")
-    if not isinstance(email, str) or not email.strip():
-        errors.append(f"resume YAML has no public basics.email: {resume_yaml}")
-        return None
-    return email.strip()
+    except ValueError as error:
+        # BuildSourceError: the resume parsed but lacks a public email.
+        errors.append(str(error))
+    return None
 
 
 def read_build_id(status_path: Path, errors: list[str]) -> str | None:
@@ -398,7 +437,7 @@ def verify_provenance_links(
     )
 
 
-def verify_production_site(site_dir: Path, *, resume_yaml: Path, build_run_url: str) -> list[str]:
+def verify_production_site(site_dir: Path, *, session: BuildSession, build_run_url: str) -> list[str]:
     """Return production-only artifact, privacy, and provenance failures."""
     errors: list[str] = []
     available = {
@@ -416,7 +455,7 @@ def verify_production_site(site_dir: Path, *, resume_yaml: Path, build_run_url:
     record(not raw_bios, errors, f"raw brad.bio.txt was published: {raw_bios!r}")
     verify_html_privacy(site_dir, errors)
 
-    public_email = read_public_email(resume_yaml, errors)
+    public_email = read_public_email(session, errors)
     if available["resume.pdf"]:
         verify_resume_pdf(site_dir, public_email, errors)
 
@@ -442,40 +481,5 @@ def verify_site(site_dir: Path) -> list[str]:
     verify_primary_links(site_dir, errors)
     verify_menu_state(site_dir, errors)
     verify_linked_artifacts(site_dir, errors)
+    verify_precompressed_siblings(site_dir, errors)
     return errors
-
-
-def main(argv: Sequence[str] | None = None) -> int:
-    """Run rendered-site verification from the command line."""
-    parser = argparse.ArgumentParser(description=__doc__)
-    parser.add_argument("site_dir", type=Path, help="Hugo destination directory")
-    parser.add_argument(
-        "--production", action="store_true", help="Verify production-only artifacts and privacy contracts"
-    )
-    parser.add_argument("--resume-yaml", type=Path, help="Public resume YAML used to build the production PDF")
-    parser.add_argument("--build-run-url", help="Exact GitHub Actions run URL rendered on the homepage")
-    args = parser.parse_args(argv)
-
-    errors = verify_site(args.site_dir)
-    if args.production:
-        if args.resume_yaml is None:
-            parser.error("--production requires --resume-yaml PATH")
-        if not args.build_run_url:
-            parser.error("--production requires --build-run-url URL")
-        errors.extend(
-            verify_production_site(
-                args.site_dir,
-                resume_yaml=args.resume_yaml,
-                build_run_url=args.build_run_url,
-            )
-        )
-    if errors:
-        for error in errors:
-            print(f"ERROR: {error}", file=sys.stderr)
-        return 1
-    print(f"Verified rendered site: {args.site_dir}")
-    return 0
-
-
-if __name__ == "__main__":
-    raise SystemExit(main())
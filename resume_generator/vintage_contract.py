@@ -12,6 +12,8 @@ from typing import Any
 import yaml
 
 from .bio_yaml import BioData, parse_bio_txt, require_complete_bio
+from .tracing import traced
+from .yaml_loader import load_yaml
 
 
 class VintageContractError(ValueError):
@@ -81,12 +83,13 @@ def validate_rendered_bio(text: str, expected: VintageBioInput) -> BioData:
 
 
 def _load_mapping(path: Path, *, label: str) -> Mapping[str, Any]:
-    value = yaml.safe_load(path.read_text(encoding="utf-8"))
+    value = load_yaml(path)
     if not isinstance(value, Mapping):
         raise VintageContractError(f"{label} must contain a top-level mapping")
     return value
 
 
+@traced("vintage-contract", source="vintage_contract")
 def main(argv: Sequence[str] | None = None) -> int:
     """Validate a rendered bio file against ``site.yaml`` and ``resume.yaml``."""
     parser = argparse.ArgumentParser(description=__doc__)
@@ -0,0 +1,109 @@
+"""Parse YAML source files with libyaml and reuse parsed documents across runs.
+
+``yaml.CSafeLoader`` is used when PyYAML was built against libyaml, and the
+pure-Python ``yaml.SafeLoader`` otherwise; both accept the same documents.
+
+When ``YAML_CACHE_DIR`` is set, each parsed document is also stored there as
+JSON, keyed by the file's resolved path, its modification time, and the
+SHA-256 of its content. A later process that finds all three unchanged reuses
+the stored document without parsing. Documents JSON cannot represent exactly,
+such as those holding dates, are parsed every time.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+# A PyYAML wheel built without libyaml still loads with the pure-Python parser.
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader  # type: ignore[assignment]
+
+YAML_CACHE_ENV = "YAML_CACHE_DIR"
+# Bump when the entry layout changes so older entries read as misses.
+CACHE_VERSION = 1
+
+
+def parse_yaml(text: str) -> Any:
+    """Parse one YAML document with the fastest available safe loader."""
+    return yaml.load(text, Loader=SafeLoader)  # noqa: S506 - CSafeLoader or SafeLoader
+
+
+def cache_directory() -> Path | None:
+    """Return the parsed-document cache directory, or None when caching is off."""
+    path = os.environ.get(YAML_CACHE_ENV)
+    return Path(path) if path else None
+
+
+def cache_entry_path(directory: Path, source: Path) -> Path:
+    """Return where the parsed document of ``source`` is cached."""
+    key = hashlib.sha256(str(source.resolve()).encode("utf-8")).hexdigest()
+    return directory / f"{key}.json"
+
+
+def _read_entry(entry_path: Path) -> dict[str, Any] | None:
+    try:
+        entry = json.loads(entry_path.read_text(encoding="utf-8"))
+    except (OSError, UnicodeError, json.JSONDecodeError):
+        return None
+    return entry if isinstance(entry, dict) else None
+
+
+def _write_entry(entry_path: Path, entry: dict[str, Any]) -> None:
+    try:
+        text = json.dumps(entry, ensure_ascii=False)
+    except (TypeError, ValueError):
+        return
+    # Non-string keys would come back as strings; only exact round trips are kept.
+    if json.loads(text) != entry:
+        return
+    # Like a journal write, a cache write never fails the step that parsed the file.
+    try:
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = entry_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(text + "\n", encoding="utf-8")
+        tmp.replace(entry_path)
+    except OSError:
+        pass
+
+
+def load_yaml(path: Path, *, cache: bool = True) -> Any:
+    """Parse a YAML file, reusing its cached document when the file is unchanged.
+
+    Args:
+        path: YAML file to read.
+        cache: Whether the document may be read from or written to the
+            ``YAML_CACHE_DIR`` cache. Pass False for private files.
+
+    Raises:
+        OSError: The file cannot be read.
+        UnicodeDecodeError: The file is not UTF-8.
+        yaml.YAMLError: The file is not valid YAML.
+    """
+    mtime_ns = path.stat().st_mtime_ns
+    data = path.read_bytes()
+    directory = cache_directory() if cache else None
+    if directory is None:
+        return parse_yaml(data.decode("utf-8"))
+
+    entry_path = cache_entry_path(directory, path)
+    key = {
+        "version": CACHE_VERSION,
+        "path": str(path.resolve()),
+        "mtime_ns": mtime_ns,
+        "sha256": hashlib.sha256(data).hexdigest(),
+    }
+    entry = _read_entry(entry_path)
+    if entry is not None and "document" in entry and {name: entry.get(name) for name in key} == key:
+        return entry["document"]
+
+    document = parse_yaml(data.decode("utf-8"))
+    _write_entry(entry_path, {**key, "document": document})
+    return document
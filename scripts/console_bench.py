@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""Benchmark file transfers through the VAX guest console.
+
+One guest session is booted with the VAX driver's own boot dialogue. Each
+transfer operation then moves payloads of each size through the console:
+
+``heredoc``
+    ``simh_session.inject_batched_heredoc`` with short text lines.
+``text``
+    ``vax_pexpect.inject_file`` with the same text in one heredoc.
+``uue``
+    ``vax_pexpect.inject_file_uue`` with random binary data.
+``capture``
+    ``vax_pexpect.capture_spool`` of a guest ``uuencode`` spool of random binary data.
+
+The transfer settings are swept as variants: ``simh_session.LINE_DELAY``,
+``simh_session.UUE_CHUNK_SIZE``, and pexpect's ``delaybeforesend``. Each
+measurement reports payload bytes per second and end-to-end seconds, with the
+console bytes sent and received. The guest is ``fake_simh.py`` by default. Pass
+``--simh-bin`` and ``--ini`` for a replay or a real SIMH inside the image.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import itertools
+import json
+import random
+import shutil
+import statistics
+import string
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TypedDict
+
+import pexpect
+import simh_session
+import vax_pexpect
+from simh_session import (
+    ConsoleCounters,
+    ConsoleRecorder,
+    GuestCommandError,
+    TimingProfile,
+    inject_batched_heredoc,
+    make_logger,
+    prepare_disk_overlays,
+    run_checked,
+)
+
+OPERATIONS = ("heredoc", "text", "uue", "capture")
+DEFAULT_SIZES = "1k,16k,256k,1m"
+DEFAULT_RUNS = 3
+DEFAULT_TIMEOUT = 900.0
+DEFAULT_OUTPUT = Path("build/console-bench/results.json")
+# pexpect sleeps this long before every send unless the spawn overrides it.
+PEXPECT_SEND_DELAY = 0.05
+
+_SCRIPTS = Path(__file__).resolve().parent
+_TEXT_LINE = 72
+_TEXT_ALPHABET = string.ascii_letters + string.digits + " ;,.(){}=+-*/<>#@'\""
+_UNITS = {"": 1, "k": 1024, "m": 1024 * 1024}
+# Payloads are staged in the guest's scratch directory, beside the driver's spool.
+_GUEST_TEXT = f"{vax_pexpect.GUEST_TMP}/bench.txt"
+_GUEST_BINARY = f"{vax_pexpect.GUEST_TMP}/bench.bin"
+
+_log = make_logger("console_bench")
+
+
+class Settings(TypedDict):
+    """One transfer variant."""
+
+    line_delay: float
+    chunk_size: int
+    send_delay: float
+
+
+class RunRecord(TypedDict):
+    """One measured transfer."""
+
+    run: int
+    status: str
+    seconds: float
+    bytes_sent: float
+    bytes_received: float
+
+
+@dataclass(frozen=True)
+class Session:
+    """The booted guest, its console counters, and how each measurement runs."""
+
+    child: pexpect.spawn
+    console: ConsoleCounters
+    runs: int
+    timeout: float
+
+
+class Measurement(TypedDict):
+    """Every run of one operation, payload size, and variant, with their medians."""
+
+    operation: str
+    payload_bytes: int
+    settings: Settings
+    runs: list[RunRecord]
+    summary: dict[str, float]
+
+
+def parse_size(text: str) -> int:
+    """Return the byte count of a size such as ``512``, ``16k``, or ``1m``.
+
+    Raises:
+        ValueError: The size is not a positive whole number with an optional k or m suffix.
+    """
+    value = text.strip().lower()
+    unit = value[-1:] if value[-1:] in ("k", "m") else ""
+    number = value[: len(value) - len(unit)]
+    if not number.isdigit() or int(number) == 0:
+        raise ValueError(f"{text!r}: expected a size such as 512, 16k, or 1m")
+    return int(number) * _UNITS[unit]
+
+
+def settings_variants(
+    line_delays: Sequence[float], chunk_sizes: Sequence[int], send_delays: Sequence[float]
+) -> list[Settings]:
+    """Return every combination of the swept transfer settings."""
+    return [
+        Settings(line_delay=line_delay, chunk_size=chunk_size, send_delay=send_delay)
+        for line_delay, chunk_size, send_delay in itertools.product(line_delays, chunk_sizes, send_delays)
+    ]
+
+
+def text_payload(size: int) -> str:
+    """Return ``size`` bytes of deterministic, source-like text in lines of at most 72 characters."""
+    rng = random.Random(size)  # noqa: S311 - a reproducible payload, not a secret
+    lines: list[str] = []
+    remaining = size
+    while remaining > 0:
+        # Each line ends in a letter, so no line is blank or has trailing space.
+        length = max(min(_TEXT_LINE, remaining) - 1, 1)
+        if remaining - length - 1 == 1:
+            # A single leftover byte could only be an empty line.
+            length -= 1
+        lines.append("".join(rng.choice(_TEXT_ALPHABET) for _ in range(length - 1)) + rng.choice(string.ascii_letters))
+        remaining -= length + 1
+    return "\n".join(lines) + "\n"
+
+
+def binary_payload(size: int) -> bytes:
+    """Return ``size`` deterministic pseudorandom bytes."""
+    return random.Random(size).getrandbits(size * 8).to_bytes(size, "little")  # noqa: S311 - reproducible payload
+
+
+def _apply(child: pexpect.spawn, settings: Settings) -> None:
+    simh_session.LINE_DELAY = settings["line_delay"]
+    simh_session.UUE_CHUNK_SIZE = settings["chunk_size"]
+    child.delaybeforesend = settings["send_delay"] or None
+
+
+def _prepare(child: pexpect.spawn, operation: str, size: int, timeout: float) -> Callable[[], object]:
+    """Stage an operation's guest state untimed and return the call to time."""
+    prompt, spool = vax_pexpect.PROMPT, vax_pexpect.SPOOL_PATH
+    run_checked(child, f"rm -f {_GUEST_TEXT} {_GUEST_BINARY} {spool}", prompt, timeout, label="clean up")
+    if operation == "heredoc":
+        lines = text_payload(size).splitlines()
+        return lambda: inject_batched_heredoc(child, _GUEST_TEXT, lines, prompt, timeout)
+    if operation == "text":
+        text = text_payload(size)
+        return lambda: vax_pexpect.inject_file(child, _GUEST_TEXT, text)
+    data = binary_payload(size)
+    if operation == "uue":
+        return lambda: vax_pexpect.inject_file_uue(child, _GUEST_BINARY, data, timeout)
+    vax_pexpect.inject_file_uue(child, _GUEST_BINARY, data, timeout)
+    command = f"uuencode {_GUEST_BINARY} bench.bin > {spool} && test -s {spool}"
+    run_checked(child, command, prompt, timeout, label="uuencode bench.bin")
+    return lambda: vax_pexpect.capture_spool(child)
+
+
+def measure(session: Session, operation: str, size: int, settings: Settings) -> Measurement:
+    """Run one operation ``session.runs`` times under ``settings`` and return every run with the medians."""
+    child, console = session.child, session.console
+    records: list[RunRecord] = []
+    for number in range(1, session.runs + 1):
+        _apply(child, settings)
+        transfer = _prepare(child, operation, size, session.timeout)
+        before = console.snapshot()
+        started = time.monotonic()
+        status = "ok"
+        try:
+            transfer()
+        except (GuestCommandError, pexpect.TIMEOUT) as exc:
+            _log(f"{operation} {size} bytes run {number} failed: {exc}")
+            status = "failed"
+        seconds = time.monotonic() - started
+        after = console.snapshot()
+        records.append(
+            RunRecord(
+                run=number,
+                status=status,
+                seconds=round(seconds, 3),
+                bytes_sent=after["bytes_sent"] - before["bytes_sent"],
+                bytes_received=after["bytes_received"] - before["bytes_received"],
+            )
+        )
+        if status != "ok":
+            # The guest may still be mid-transfer; later runs would measure its backlog.
+            break
+    return Measurement(
+        operation=operation, payload_bytes=size, settings=settings, runs=records, summary=summarize(size, records)
+    )
+
+
+def summarize(size: int, runs: Sequence[RunRecord]) -> dict[str, float]:
+    """Return the median seconds, console bytes, and payload throughput of the successful runs."""
+    ok = [run for run in runs if run["status"] == "ok"]
+    if not ok:
+        return {}
+    seconds = statistics.median(run["seconds"] for run in ok)
+    return {
+        "seconds": round(seconds, 3),
+        "bytes_per_second": round(size / seconds, 1) if seconds > 0 else 0.0,
+        "bytes_sent": statistics.median(run["bytes_sent"] for run in ok),
+        "bytes_received": statistics.median(run["bytes_received"] for run in ok),
+    }
+
+
+def _size_label(size: int) -> str:
+    for suffix, unit in (("m", _UNITS["m"]), ("k", _UNITS["k"])):
+        if size % unit == 0:
+            return f"{size // unit}{suffix}"
+    return str(size)
+
+
+def format_table(results: Sequence[Measurement]) -> str:
+    """Return a fixed-width table of median seconds and throughput per operation, size, and variant."""
+    header = ("operation", "size", "line delay", "chunk", "send delay", "ok", "seconds", "KiB/s", "sent", "received")
+    table = [header]
+    for result in results:
+        summary, settings = result["summary"], result["settings"]
+        ok = sum(1 for run in result["runs"] if run["status"] == "ok")
+        table.append(
+            (
+                result["operation"],
+                _size_label(result["payload_bytes"]),
+                f"{settings['line_delay']:g}",
+                str(settings["chunk_size"]),
+                f"{settings['send_delay']:g}",
+                f"{ok}/{len(result['runs'])}",
+                f"{summary['seconds']:.2f}" if summary else "-",
+                f"{summary['bytes_per_second'] / 1024:.1f}" if summary else "-",
+                f"{summary['bytes_sent']:.0f}" if summary else "-",
+                f"{summary['bytes_received']:.0f}" if summary else "-",
+            )
+        )
+    widths = [max(len(line[column]) for line in table) for column in range(len(header))]
+    # Indexing rather than zip(strict=True) keeps the script runnable by the guest image's Python.
+    return "\n".join(
+        "  ".join(
+            cell.ljust(widths[column]) if column == 0 else cell.rjust(widths[column])
+            for column, cell in enumerate(line)
+        ).rstrip()
+        for line in table
+    )
+
+
+def _parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument(
+        "--simh-bin",
+        default=str(_SCRIPTS / "fake_simh.py"),
+        help="SIMH VAX binary, fake_simh.py, or replay_simh.py (default: fake_simh.py beside this script)",
+    )
+    p.add_argument(
+        "--ini",
+        default=str(_SCRIPTS.parent / "vintage/machines/vax/configs/vax780-pexpect.ini"),
+        help="SIMH VAX ini file (default: the checked-in vax780-pexpect.ini)",
+    )
+    p.add_argument("--workdir", default=None, help="Working directory for SIMH (default: the ini's directory)")
+    p.add_argument(
+        "--disk-overlay-dir",
+        default=None,
+        help="Attach throwaway copy-on-write overlays created under this directory instead of the base disks",
+    )
+    p.add_argument(
+        "--operation",
+        action="append",
+        choices=OPERATIONS,
+        help="Transfer to measure; repeat for several (default: all)",
+    )
+    p.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated payload sizes (default: %(default)s)")
+    p.add_argument(
+        "--line-delay",
+        default=str(simh_session.LINE_DELAY),
+        help="Comma-separated LINE_DELAY seconds to sweep (default: %(default)s)",
+    )
+    p.add_argument(
+        "--chunk-size",
+        default=str(simh_session.UUE_CHUNK_SIZE),
+        help="Comma-separated UUE_CHUNK_SIZE line counts to sweep (default: %(default)s)",
+    )
+    p.add_argument(
+        "--send-delay",
+        default=str(PEXPECT_SEND_DELAY),
+        help="Comma-separated pexpect delaybeforesend seconds to sweep (default: %(default)s)",
+    )
+    p.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Runs per measurement (default: %(default)s)")
+    p.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help="Seconds allowed for one transfer (default: %(default)s)",
+    )
+    p.add_argument("--transcript", default=None, help="Record the session as a transcript for replay_simh.py")
+    p.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Results JSON (default: %(default)s)")
+    return p.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Boot the guest, run every measurement, write the results, print the table, and return the exit code."""
+    args = _parse_args(argv)
+    try:
+        sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+        variants = settings_variants(
+            [float(value) for value in args.line_delay.split(",") if value.strip()],
+            [int(value) for value in args.chunk_size.split(",") if value.strip()],
+            [float(value) for value in args.send_delay.split(",") if value.strip()],
+        )
+    except ValueError as exc:
+        _log(f"ERROR: {exc}")
+        return 2
+    if args.runs < 1 or any(settings["chunk_size"] < 1 for settings in variants):
+        _log("ERROR: --runs and --chunk-size must be at least 1")
+        return 2
+
+    ini_path, workdir = args.ini, args.workdir or str(Path(args.ini).parent)
+    overlay_dir = None
+    if args.disk_overlay_dir:
+        ini_path, overlay_dir = prepare_disk_overlays(ini_path, workdir, args.disk_overlay_dir)
+    _log(f"Spawning: {args.simh_bin} {ini_path}  (cwd={workdir})")
+    started = time.monotonic()
+    child = pexpect.spawn(args.simh_bin, [ini_path], cwd=workdir, timeout=args.timeout, encoding=None)
+    transcript = contextlib.ExitStack()
+    if args.transcript:
+        transcript.enter_context(ConsoleRecorder("vax", args.transcript)).attach(child)
+    console = ConsoleCounters("vax").attach(child)
+
+    results: list[Measurement] = []
+    try:
+        vax_pexpect.boot(child, TimingProfile(None))
+        session = Session(child, console, runs=args.runs, timeout=args.timeout)
+        for operation, size, settings in itertools.product(args.operation or OPERATIONS, sizes, variants):
+            _log(f"Measuring {operation} with {size} bytes: {settings}")
+            results.append(measure(session, operation, size, settings))
+        vax_pexpect.quit_simh(child, started, None)
+    except (GuestCommandError, pexpect.TIMEOUT, pexpect.EOF) as exc:
+        _log(f"ERROR: guest session failed: {exc}")
+        return 1
+    finally:
+        if child.isalive():
+            child.terminate(force=True)
+        transcript.close()
+        if overlay_dir:
+            shutil.rmtree(overlay_dir, ignore_errors=True)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    print(format_table(results))
+    print(f"\nWrote {args.output}")
+    return 0 if all(run["status"] == "ok" for result in results for run in result["runs"]) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
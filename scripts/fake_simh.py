@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""Stand in for a SIMH binary with a scripted 4.3BSD or 2.11BSD console.
+
+Pass this file to either driver as ``--simh-bin``. It reads the ini path that
+the driver spawns SIMH with, picks the machine from it, and boots a fake guest
+on the pexpect pty. The guest supports the login, shell, ``stty``, heredoc,
+``uudecode``, ``cc``, ``nroff``, and SIMH-prompt dialogues that the drivers
+script. Both drivers then run end to end in seconds, without Docker.
+
+The console behaves like a BSD tty in canonical mode. It echoes input,
+applies the ERASE and KILL characters (``#`` and ``@`` until ``stty`` changes
+them), rings the bell when a line reaches the canonical limit and drops the
+extra input, and turns output newlines into CR LF. The guest's ``bradman``
+and ``nroff`` are placeholders: they keep the pipeline's file flow, not the
+real rendering.
+
+Tuning comes from the environment, because the drivers pass SIMH only an ini:
+
+``FAKE_SIMH_MACHINE``
+    ``vax`` or ``pdp11``; by default ``pdp11`` when the ini sets an 11/xx CPU.
+``FAKE_SIMH_BOOT_SECONDS``
+    Delay before the first boot prompt (default: 0).
+``FAKE_SIMH_ECHO_DELAY``
+    Seconds of latency before each input line is echoed and run (default: 0).
+``FAKE_SIMH_LINE_LIMIT``
+    Canonical input line limit in bytes (default: 255).
+``FAKE_SIMH_DURATIONS``
+    Artificial command durations, such as ``cc=20,nroff=45,uudecode=0.5``.
+``FAKE_SIMH_STALLS``
+    Extra delays for only the first run of a command, such as ``uudecode=5``,
+    to rehearse a transient hang that the drivers retry.
+``FAKE_SIMH_MIPS``
+    Emulated speed reported by ``SHOW TIME`` (default: 5).
+``FAKE_SIMH_EXIT_ON_BREAK``
+    When set to 1, exit at the first WRU instead of stopping at the SIMH
+    prompt, as an ini that goes on to ``quit`` after ``run`` would.
+"""
+
+from __future__ import annotations
+
+import binascii
+import contextlib
+import os
+import re
+import shlex
+import sys
+import termios
+import time
+import tty
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path, PurePosixPath
+
+_BREAK = 0x05  # SIMH's default WRU character.
+_SET_PROMPT = re.compile(r'^\s*set\s+prompt\s+"([^"]*)"', re.IGNORECASE | re.MULTILINE)
+_PDP11_CPU = re.compile(r"^\s*set\s+cpu\s+11/", re.IGNORECASE | re.MULTILINE)
+_ASSIGNMENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*=")
+_BACKQUOTE = re.compile(r"`([^`]*)`")
+# Shell operators the drivers' command lines use.
+_SEPARATOR = ";"
+_AND = "&&"
+_OUTPUT = ">"
+_APPEND = ">>"
+_INPUT = "<"
+_HEREDOC = "<<"
+_VARIABLE = re.compile(r"\$(?:\{([A-Za-z_][A-Za-z0-9_]*)\}|([A-Za-z_][A-Za-z0-9_]*|\?))")
+
+# Shell command output goes through a callback, so command substitution can capture it.
+_Output = Callable[[str], None]
+# A command's arguments, its standard input, and its output; returns the exit status.
+_Command = Callable[[list[str], bytes, _Output], int]
+
+_BOOT_BANNERS = {
+    "vax": (
+        "VAX 11/780 simulator (fake)\n"
+        "loading ra(0,0)boot\n"
+        "Boot\n"
+        ": ra(0,0)vmunix\n"
+        "4.3 BSD UNIX #1: Fri Jun  6 19:55:29 PDT 1986\n"
+        "real mem  = 67108864\n"
+        "Automatic reboot in progress...\n\n"
+        "4.3 BSD (fake) (console)\n\n"
+    ),
+    "pdp11": ("PDP-11 simulator (fake)\n\n73Boot from xp(0,0,0) at 0176700\n"),
+}
+_KERNEL_BANNER = (
+    "\n2.11 BSD UNIX #1: Fri Jun  9 08:42:54 PDT 1995\nphys mem  = 4186112\nxp 0 csr 176700 vector 254 attached\n"
+)
+
+
+def _durations(spec: str) -> dict[str, float]:
+    durations: dict[str, float] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, seconds = item.partition("=")
+        durations[name.strip()] = float(seconds)
+    return durations
+
+
+class ShellExit(Exception):
+    """The guest shell exited; the console returns to login."""
+
+
+class FakeGuest:
+    """One fake machine: its tty, its shell, and its in-memory filesystem."""
+
+    def __init__(self, machine: str, sim_prompt: str, environ: dict[str, str]) -> None:
+        """Configure the console and shell from ``environ``."""
+        self.machine = machine
+        self.sim_prompt = sim_prompt
+        self.echo_delay = float(environ.get("FAKE_SIMH_ECHO_DELAY", "0"))
+        self.line_limit = int(environ.get("FAKE_SIMH_LINE_LIMIT", "255"))
+        self.boot_seconds = float(environ.get("FAKE_SIMH_BOOT_SECONDS", "0"))
+        self.durations = _durations(environ.get("FAKE_SIMH_DURATIONS", ""))
+        self.stalls = _durations(environ.get("FAKE_SIMH_STALLS", ""))
+        self.mips = float(environ.get("FAKE_SIMH_MIPS", "5"))
+        self.exit_on_break = environ.get("FAKE_SIMH_EXIT_ON_BREAK") == "1"
+        self.started = time.monotonic()
+        # tty state; 4.3BSD and 2.11BSD start with # and @ as ERASE and KILL.
+        self.echo = True
+        self.erase = ord("#")
+        self.kill = ord("@")
+        # Shell state.
+        self.variables: dict[str, str] = {"PS1": "# ", "?": "0"}
+        self.cwd = "/"
+        self.files: dict[str, bytes] = {"/usr/bin/uudecode": b"", "/usr/bin/uuencode": b"", "/usr/bin/cc": b""}
+        if machine == "pdp11":
+            # nroff lives on /usr, which single-user 2.11BSD leaves unmounted.
+            self.files = {"/bin/sh": b""}
+        self.builtins: dict[str, _Command] = {
+            "exec": self._exec,
+            "true": lambda _args, _stdin, _out: 0,
+            "false": lambda _args, _stdin, _out: 1,
+            "mount": self._mount,
+            "stty": self._stty,
+            "echo": self._echo,
+            "date": self._date,
+            "cd": self._cd,
+            "rm": self._rm,
+            "test": self._test,
+            "cat": self._cat,
+            "ls": self._ls,
+        }
+        # Programs; a command naming one by path also needs the file to exist.
+        self.tools: dict[str, _Command] = {
+            "uudecode": self._uudecode,
+            "uuencode": self._uuencode,
+            "cc": self._cc,
+            "bradman": self._bradman,
+            "nroff": self._nroff,
+        }
+
+    # Console.
+
+    def write(self, text: str) -> None:
+        """Write guest output, mapping newlines to CR LF as the tty does."""
+        os.write(1, text.replace("\n", "\r\n").encode("ascii", errors="replace"))
+
+    def _getc(self) -> int:
+        data = os.read(0, 1)
+        if not data:
+            raise SystemExit(0)
+        return data[0]
+
+    def read_line(self) -> str:
+        """Read one canonical-mode input line, echoing and editing it like a BSD tty."""
+        line = bytearray()
+        while True:
+            ch = self._getc()
+            if ch == _BREAK:
+                self.simh_prompt()
+                continue
+            if ch in (0x0A, 0x0D):
+                time.sleep(self.echo_delay)
+                if self.echo:
+                    self.write("\n")
+                return line.decode("ascii", errors="replace")
+            if ch == self.erase:
+                if line:
+                    line.pop()
+                    if self.echo:
+                        os.write(1, b"\b \b")
+                continue
+            if ch == self.kill:
+                line.clear()
+                if self.echo:
+                    self.write("\n")
+                continue
+            if len(line) >= self.line_limit:
+                os.write(1, b"\a")
+                continue
+            line.append(ch)
+            if self.echo:
+                os.write(1, bytes([ch]))
+
+    def simh_prompt(self) -> None:
+        """Stop at the SIMH command prompt until the simulator continues or quits."""
+        self.write("\nSimulation stopped, PC: 00001234 (fake)\n")
+        if self.exit_on_break:
+            self.write("Goodbye\n")
+            raise SystemExit(0)
+        self.write(self.sim_prompt)
+        saved_echo, self.echo = self.echo, True
+        while True:
+            command = " ".join(self.read_line().lower().split())
+            if command in ("quit", "exit", "q"):
+                self.write("Goodbye\n")
+                raise SystemExit(0)
+            if command in ("continue", "cont", "c", "go"):
+                self.echo = saved_echo
+                return
+            self.write(self._simh_report(command))
+            self.write(self.sim_prompt)
+
+    def _simh_report(self, command: str) -> str:
+        elapsed = time.monotonic() - self.started
+        if command == "show time":
+            return f"Time:\t{elapsed * self.mips * 1e6:.0f}\n"
+        if command == "show clocks":
+            return f"fake clock device\n  Running at:       100Hz\n  Seconds Running:  {elapsed:.0f}\n"
+        if command == "show throttle":
+            return "Throttling:\t\t\tDisabled\n"
+        return "Non-existent parameter\n" if command.startswith("show") else "Unknown command\n"
+
+    # Boot and login.
+
+    def run(self) -> None:
+        """Boot, then serve login and shell sessions until SIMH quits."""
+        time.sleep(self.boot_seconds)
+        self.write(_BOOT_BANNERS[self.machine])
+        if self.machine == "pdp11":
+            self.write("\r: ")
+            self.read_line()
+            self.write(_KERNEL_BANNER)
+            self.shell()
+        while True:
+            self.write("\nlogin: ")
+            if self.read_line().strip() == "root":
+                self.write("4.3 BSD UNIX (fake)\n\n")
+                self.shell()
+
+    def shell(self) -> None:
+        """Run root shell commands until the shell exits."""
+        self.variables["PS1"] = "# "
+        with contextlib.suppress(ShellExit):
+            while True:
+                self.write(self.variables["PS1"])
+                self.run_line(self.read_line())
+
+    # Shell.
+
+    def path(self, name: str) -> str:
+        """Return ``name`` resolved against the shell's working directory."""
+        return str(PurePosixPath(self.cwd, name)) if not name.startswith("/") else str(PurePosixPath(name))
+
+    def _expand(self, word: str) -> str:
+        word = _BACKQUOTE.sub(lambda match: self._capture(match.group(1)).strip(), word)
+        return _VARIABLE.sub(lambda match: self.variables.get(match.group(1) or match.group(2), ""), word)
+
+    def _capture(self, command: str) -> str:
+        output: list[str] = []
+        self.run_and_or(shlex.split(command), output.append)
+        return "".join(output)
+
+    def _tokens(self, line: str) -> list[str]:
+        lexer = shlex.shlex(line, posix=True, punctuation_chars=";&<>|")
+        lexer.whitespace_split = True
+        lexer.commenters = ""
+        return list(lexer)
+
+    def run_line(self, line: str) -> None:
+        """Run one input line: ``;``-separated ``&&`` lists with redirections and heredocs."""
+        try:
+            tokens = self._tokens(line)
+        except ValueError:
+            self.write("sh: syntax error\n")
+            self.variables["?"] = "2"
+            return
+        if _HEREDOC in tokens:
+            at = tokens.index(_HEREDOC)
+            delimiter = tokens[at + 1]
+            body: list[str] = []
+            while True:
+                self.write("> ")
+                text = self.read_line()
+                if text == delimiter:
+                    break
+                body.append(text + "\n")
+            tokens = tokens[:at] + [_INPUT, "\0heredoc"] + tokens[at + 2 :]
+            self.files["\0heredoc"] = "".join(body).encode("ascii", errors="replace")
+        command: list[str] = []
+        for token in tokens + [_SEPARATOR]:
+            if token == _SEPARATOR:
+                if command:
+                    self.run_and_or(command, self.write)
+                command = []
+            else:
+                command.append(token)
+
+    def run_and_or(self, tokens: list[str], out: _Output) -> None:
+        """Run commands joined by ``&&``, stopping at the first failure."""
+        command: list[str] = []
+        for token in tokens + [_AND]:
+            if token != _AND:
+                command.append(token)
+                continue
+            status = self.run_simple(command, out)
+            self.variables["?"] = str(status)
+            command = []
+            if status != 0:
+                return
+
+    def run_simple(self, tokens: list[str], out: _Output) -> int:
+        """Run one simple command with its redirections and return its exit status."""
+        words: list[str] = []
+        stdin = b""
+        target: tuple[str, bool] | None = None
+        items = iter(tokens)
+        for token in items:
+            if token in (_OUTPUT, _APPEND):
+                target = (self.path(self._expand(next(items))), token == _APPEND)
+            elif token == _INPUT:
+                source = next(items)
+                source = source if source == "\0heredoc" else self.path(self._expand(source))
+                stdin = b"" if source == "/dev/null" else self.files.get(source, b"")
+            else:
+                words.append(self._expand(token))
+        while words and _ASSIGNMENT.match(words[0]):
+            name, _, value = words.pop(0).partition("=")
+            self.variables[name] = value
+        if not words:
+            return 0
+
+        name = PurePosixPath(words[0]).name
+        time.sleep(self.durations.get(name, 0.0) + self.stalls.pop(name, 0.0))
+        output: list[str] = []
+        status = self.builtin(words, stdin, output.append)
+        text = "".join(output)
+        if target is None:
+            out(text)
+        else:
+            path, append = target
+            previous = self.files.get(path, b"") if append else b""
+            self.files[path] = previous + text.encode("ascii", errors="replace")
+        return status
+
+    def builtin(self, words: list[str], stdin: bytes, out: _Output) -> int:
+        """Run the commands the drivers use and return the exit status."""
+        name, args = PurePosixPath(words[0]).name, words[1:]
+        if name == "exit":
+            raise ShellExit
+        command = self.builtins.get(name)
+        if command is None:
+            if "/" in words[0] and self.path(words[0]) not in self.files:
+                out(f"{words[0]}: not found\n")
+                return 1
+            command = self.tools.get(name, partial(self._not_found, name))
+        return command(args, stdin, out)
+
+    def _not_found(self, name: str, _args: list[str], _stdin: bytes, out: _Output) -> int:
+        out(f"{name}: not found\n")
+        return 1
+
+    def _exec(self, args: list[str], stdin: bytes, out: _Output) -> int:
+        if args[:1] in (["/bin/sh"], ["sh"]):
+            return 0
+        return self._not_found("exec", args, stdin, out)
+
+    def _mount(self, args: list[str], _stdin: bytes, _out: _Output) -> int:
+        if args == ["/usr"]:
+            self.files.update({"/usr/bin/nroff": b"", "/usr/bin/uudecode": b"", "/usr/bin/uuencode": b""})
+        return 0
+
+    def _echo(self, args: list[str], _stdin: bytes, out: _Output) -> int:
+        out(" ".join(args) + "\n")
+        return 0
+
+    def _date(self, _args: list[str], _stdin: bytes, out: _Output) -> int:
+        out(time.strftime("%a %b %d %H:%M:%S PDT %Y") + "\n")
+        return 0
+
+    def _cd(self, args: list[str], _stdin: bytes, _out: _Output) -> int:
+        self.cwd = self.path(args[0] if args else "/")
+        return 0
+
+    def _rm(self, args: list[str], _stdin: bytes, _out: _Output) -> int:
+        missing = [arg for arg in args if arg != "-f" and self.files.pop(self.path(arg), None) is None]
+        return 1 if missing and "-f" not in args else 0
+
+    def _test(self, args: list[str], stdin: bytes, out: _Output) -> int:
+        if len(args) != 2 or args[0] not in ("-s", "-f"):
+            return self._not_found("test", args, stdin, out)
+        content = self.files.get(self.path(args[1]))
+        return 0 if content is not None and (args[0] == "-f" or content) else 1
+
+    def _cat(self, args: list[str], stdin: bytes, out: _Output) -> int:
+        for arg in args:
+            if self.path(arg) not in self.files:
+                out(f"cat: {arg}: No such file or directory\n")
+                return 1
+            out(self.files[self.path(arg)].decode("ascii", errors="replace"))
+        if not args:
+            out(stdin.decode("ascii", errors="replace"))
+        return 0
+
+    def _ls(self, args: list[str], _stdin: bytes, out: _Output) -> int:
+        for arg in (arg for arg in args if not arg.startswith("-")):
+            if self.path(arg) not in self.files:
+                out(f"{arg} not found\n")
+                return 1
+            size = len(self.files[self.path(arg)])
+            out(f"-rw-r--r--  1 root     {size:8d} {time.strftime('%b %d %H:%M')} {arg}\n")
+        return 0
+
+    def _stty(self, args: list[str], _stdin: bytes, _out: _Output) -> int:
+        items = iter(args)
+        for arg in items:
+            if arg in ("echo", "-echo"):
+                self.echo = arg == "echo"
+            elif arg in ("erase", "kill"):
+                value = next(items, "")
+                setattr(self, arg, ord(value[0]) if value else 0)
+        return 0
+
+    def _uuencode(self, args: list[str], _stdin: bytes, out: _Output) -> int:
+        source, remote = args
+        content = self.files[self.path(source)]
+        lines = [binascii.b2a_uu(content[i : i + 45]).decode("ascii") for i in range(0, len(content), 45)]
+        out(f"begin 644 {remote}\n" + "".join(lines) + "`\nend\n")
+        return 0
+
+    def _cc(self, args: list[str], _stdin: bytes, out: _Output) -> int:
+        source = self.path(args[-1])
+        if source not in self.files:
+            out(f"cc: {args[-1]}: No such file or directory\n")
+            return 1
+        self.files[self.path(args[args.index("-o") + 1] if "-o" in args else "a.out")] = b"\0fake a.out"
+        return 0
+
+    def _nroff(self, args: list[str], _stdin: bytes, out: _Output) -> int:
+        if "/usr/bin/nroff" not in self.files:
+            out("nroff: not found\n")
+            return 1
+        roff = self.files.get(self.path(args[-1]), b"").decode("ascii", errors="replace")
+        out("".join(line + "\n" for line in roff.splitlines() if not line.startswith(".")))
+        return 0
+
+    def _uudecode(self, args: list[str], stdin: bytes, out: _Output) -> int:
+        encoded = self.files.get(self.path(args[0]), b"") if args else stdin
+        lines = encoded.decode("ascii", errors="replace").splitlines()
+        begin = next((i for i, line in enumerate(lines) if line.startswith("begin ")), None)
+        if begin is None:
+            out("uudecode: no begin line\n")
+            return 1
+        decoded = bytearray()
+        for line in lines[begin + 1 :]:
+            if line == "end":
+                self.files[self.path(lines[begin].split(None, 2)[2])] = bytes(decoded)
+                return 0
+            try:
+                decoded += binascii.a2b_uu(line)
+            except binascii.Error:
+                out("uudecode: short file\n")
+                return 1
+        out("uudecode: no end line\n")
+        return 1
+
+    def _bradman(self, args: list[str], _stdin: bytes, out: _Output) -> int:
+        if len(args) % 2:
+            out("usage: bradman -i input.yaml -o output.roff\n")
+            return 1
+        options = dict(zip(args[::2], args[1::2], strict=True))
+        yaml = self.files.get(self.path(options.get("-i", "")))
+        if yaml is None:
+            out("bradman: cannot open input\n")
+            return 1
+        # Keep each quoted scalar as one text line under a placeholder request.
+        values = re.findall(r'^\w+:\s*"(.*)"\s*$', yaml.decode("ascii", errors="replace"), re.MULTILINE)
+        roff = '.\\" fake bradman output\n.nf\n' + "".join(value + "\n" for value in values)
+        self.files[self.path(options.get("-o", "brad.bio.roff"))] = roff.encode("ascii")
+        return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Boot the fake guest named by the ini argument and return SIMH's exit status."""
+    args = sys.argv[1:] if argv is None else argv
+    ini = Path(args[0]).read_text(encoding="ascii") if args else ""
+    prompt_match = _SET_PROMPT.search(ini)
+    machine = os.environ.get("FAKE_SIMH_MACHINE") or ("pdp11" if _PDP11_CPU.search(ini) else "vax")
+    guest = FakeGuest(machine, prompt_match.group(1) if prompt_match else "sim> ", dict(os.environ))
+    saved = termios.tcgetattr(0) if os.isatty(0) else None
+    # SIMH takes the console raw; the fake guest does its own echo and line editing.
+    if saved is not None:
+        tty.setraw(0)
+    try:
+        guest.run()
+    except SystemExit as exc:
+        return int(exc.code or 0)
+    finally:
+        if saved is not None:
+            termios.tcsetattr(0, termios.TCSADRAIN, saved)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
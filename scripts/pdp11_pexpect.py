@@ -4,18 +4,31 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
 import re
 import shlex
+import shutil
 import sys
+import time
 from collections.abc import Sequence
 from pathlib import Path
 
 import pexpect
 from simh_session import (
+    CommandTimer,
+    ConsoleCounters,
+    ConsoleRecorder,
     GuestCommandError,
+    ResourceSampler,
+    RetryPolicy,
+    TimingProfile,
+    capture_simh_counters,
     inject_batched_heredoc,
+    journal_stage,
     log_console_section,
+    log_simh_counters,
     make_logger,
+    prepare_disk_overlays,
     run_checked,
     strip_console,
     validate_uu_spool,
@@ -29,13 +42,16 @@ from simh_session import (
 _PROMPT = "PDPsh> "
 _CAPTURE_BEGIN = re.compile(rb"(?m)^__BRAD_BIO_TXT_BEGIN__\r?$")
 _CAPTURE_END = re.compile(rb"(?m)^__BRAD_BIO_TXT_END__\r?$")
+# SIMH default command prompt; pdp11-pexpect.ini keeps it.
+_SIM_PROMPT = "sim> "
 
 _BOOT_TIMEOUT = 180  # 2.11BSD on PDP-11 boots slowly (~90-120s under SIMH)
 _CMD_TIMEOUT = 60
 _NROFF_TIMEOUT = 600  # nroff on PDP-11 can take 5+ min on emulated hardware
 _UUE_TIMEOUT = 120  # per-batch UUE heredoc + cat timeout
 
-_log = make_logger("pdp11_pexpect")
+_SOURCE = "pdp11_pexpect"
+_log = make_logger(_SOURCE)
 
 
 def _parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
@@ -61,6 +77,32 @@ def _parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
         default="pdp11",
         help="SIMH PDP-11 binary name or path (default: pdp11)",
     )
+    p.add_argument(
+        "--disk-overlay-dir",
+        default=None,
+        help="Attach throwaway copy-on-write overlays created under this directory instead of the base disks",
+    )
+    p.add_argument(
+        "--sample-interval",
+        type=float,
+        default=0.0,
+        help="Seconds between /proc samples of the SIMH process; 0 disables sampling (default: 0)",
+    )
+    p.add_argument(
+        "--command-timing",
+        action="store_true",
+        help="Bracket each checked guest command with the guest's date and record host and guest elapsed time",
+    )
+    p.add_argument(
+        "--transcript",
+        default=None,
+        help="Record the console as an asciicast v2 JSONL transcript at this path, for replay_simh.py",
+    )
+    p.add_argument(
+        "--timing-profile",
+        default=None,
+        help="JSON profile of recorded step durations; adapts timeouts and is updated after success",
+    )
     p.add_argument(
         "--verbose",
         action="store_true",
@@ -69,17 +111,18 @@ def _parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
     return p.parse_args(argv)
 
 
-def _boot(child: pexpect.spawn) -> None:
+def _boot(child: pexpect.spawn, profile: TimingProfile) -> None:
     """Boot 2.11BSD to a root shell with /usr mounted, then set a custom prompt."""
+    boot_timeout = profile.timeout("pdp11-boot", _BOOT_TIMEOUT)
     # Disk revisions use either a CR-prefixed colon prompt or "Boot:".
     _log("Waiting for 2.11BSD boot prompt (\\r: or Boot:)…")
-    child.expect(["\r: ", "Boot:"], timeout=_BOOT_TIMEOUT)
+    child.expect(["\r: ", "Boot:"], timeout=boot_timeout)
     _log("Got boot prompt; pressing Enter to boot unix kernel")
     boot_pre = child.before or b""
     child.sendline("")
 
     _log("Waiting for root # prompt (this takes up to 2 minutes)…")
-    child.expect(["# ", "\\$ "], timeout=_BOOT_TIMEOUT)
+    child.expect(["# ", "\\$ "], timeout=boot_timeout)
     _log("Reached root shell")
     kernel_boot = child.before or b""
 
@@ -111,14 +154,14 @@ def _boot(child: pexpect.spawn) -> None:
     log_console_section("pdp11", "pdp11-boot", strip_console(boot_pre + b"\n" + kernel_boot + b"\n" + mount_out))
 
 
-def _deliver_uu_spool(child: pexpect.spawn, uu_text: str, remote_uu_path: str) -> None:
+def _deliver_uu_spool(child: pexpect.spawn, uu_text: str, remote_uu_path: str, timeout: float = _UUE_TIMEOUT) -> None:
     """Write the VAX-generated UUE spool and decode its troff payload."""
     uue_lines = uu_text.splitlines()
     parent = str(Path(remote_uu_path).parent)
 
     _log(f"[uucp] Delivering spool {remote_uu_path} ({len(uue_lines)} encoded lines) to PDP-11…")
 
-    inject_batched_heredoc(child, remote_uu_path, uue_lines, _PROMPT, _UUE_TIMEOUT)
+    inject_batched_heredoc(child, remote_uu_path, uue_lines, _PROMPT, timeout)
 
     decoded_name = "brad.bio.roff"
     run_checked(
@@ -128,37 +171,45 @@ def _deliver_uu_spool(child: pexpect.spawn, uu_text: str, remote_uu_path: str) -
             f"&& test -s {decoded_name} && rm {shlex.quote(remote_uu_path)}"
         ),
         _PROMPT,
-        _UUE_TIMEOUT,
+        timeout,
         label="decode brad.bio.uu",
     )
     _log(f"[uucp] Spool delivered and decoded: brad.bio.roff at {parent}/brad.bio.roff")
 
 
-def _run_nroff(child: pexpect.spawn) -> str:
+def _run_nroff(
+    child: pexpect.spawn,
+    profile: TimingProfile,
+    console: ConsoleCounters,
+    sampler: ResourceSampler | None,
+) -> str:
     """Render base troff requests and capture the output between marker lines."""
     # Line-printer mode removes terminal controls; /dev/null prevents page prompts.
     _log("Running: nroff -Tlp /tmp/brad.bio.roff < /dev/null > /tmp/brad.bio.txt")
-    nroff_out = run_checked(
-        child,
-        "rm -f /tmp/brad.bio.txt && nroff -Tlp /tmp/brad.bio.roff < /dev/null > /tmp/brad.bio.txt "
-        "&& test -s /tmp/brad.bio.txt && ls -l /tmp/brad.bio.txt",
-        _PROMPT,
-        _NROFF_TIMEOUT,
-        label="render brad.bio.roff",
-    )
+    with journal_stage(_SOURCE, "pdp11-nroff", profile=profile, console=console, resources=sampler):
+        nroff_out = run_checked(
+            child,
+            "rm -f /tmp/brad.bio.txt && nroff -Tlp /tmp/brad.bio.roff < /dev/null > /tmp/brad.bio.txt "
+            "&& test -s /tmp/brad.bio.txt && ls -l /tmp/brad.bio.txt",
+            _PROMPT,
+            profile.timeout("pdp11-nroff", _NROFF_TIMEOUT),
+            label="render brad.bio.roff",
+        )
     _log("nroff complete")
     log_console_section("pdp11", "pdp11-nroff", strip_console(nroff_out))
 
     # Disable echo before sending the marker command to prevent pexpect
     # from matching markers in the command echo rather than actual output.
     _log("Capturing /tmp/brad.bio.txt via markers…")
-    child.sendline("stty -echo")
-    child.expect(_PROMPT, timeout=_CMD_TIMEOUT)
-    child.sendline("echo '__BRAD_BIO_TXT_BEGIN__'; cat /tmp/brad.bio.txt; echo '__BRAD_BIO_TXT_END__'; stty echo")
-    child.expect(_CAPTURE_BEGIN, timeout=_CMD_TIMEOUT)
-    child.expect(_CAPTURE_END, timeout=_CMD_TIMEOUT)
-    raw_bytes: bytes = child.before
-    child.expect(_PROMPT, timeout=_CMD_TIMEOUT)
+    with journal_stage(_SOURCE, "pdp11-capture", profile=profile, console=console, resources=sampler) as event:
+        child.sendline("stty -echo")
+        child.expect(_PROMPT, timeout=_CMD_TIMEOUT)
+        child.sendline("echo '__BRAD_BIO_TXT_BEGIN__'; cat /tmp/brad.bio.txt; echo '__BRAD_BIO_TXT_END__'; stty echo")
+        child.expect(_CAPTURE_BEGIN, timeout=_CMD_TIMEOUT)
+        child.expect(_CAPTURE_END, timeout=_CMD_TIMEOUT)
+        raw_bytes: bytes = child.before
+        child.expect(_PROMPT, timeout=_CMD_TIMEOUT)
+        event["bytes_out"] = len(raw_bytes)
 
     raw = raw_bytes.decode("ascii", errors="replace")
     return raw
@@ -181,6 +232,33 @@ def _clean_nroff_output(raw: str) -> str:
     return "\n".join(lines) + "\n"
 
 
+def _quit_simh(child: pexpect.spawn, started: float, sampler: ResourceSampler | None) -> None:
+    """Record SIMH's speed counters at its command prompt, then quit the simulator.
+
+    The counters are diagnostics only: when SIMH exits or stalls first, they are
+    journaled as unavailable and the stage still succeeds.
+    """
+    try:
+        counters = capture_simh_counters(child, "pdp11", _SIM_PROMPT, time.monotonic() - started, sampler)
+    except pexpect.EOF:
+        # The ini can reach its own quit once WRU stops the guest; the output is already captured.
+        _log("Note: SIMH exited before its speed reports; counters not recorded")
+        log_simh_counters("pdp11", {"unavailable": "SIMH exited before its speed reports"})
+        return
+    except pexpect.TIMEOUT:
+        _log("Note: SIMH did not stop at its command prompt; counters not recorded")
+        log_simh_counters("pdp11", {"unavailable": "SIMH did not stop at its command prompt"})
+        # 2.11BSD can restart login after shell exit instead of returning EOF.
+        child.sendline("exit")
+    else:
+        _log(f"SIMH: {counters.get('mips', '?')} MIPS emulated; {counters.get('throttle', 'throttle unknown')}")
+        child.sendline("quit")
+    try:
+        child.expect(pexpect.EOF, timeout=30)
+    except pexpect.TIMEOUT:
+        _log("Note: SIMH did not exit cleanly within 30s; will force-terminate")
+
+
 def main(argv: Sequence[str] | None = None) -> int:  # pylint: disable=too-many-return-statements
     """Run stage A and return its process exit code."""
     args = _parse_args(argv)
@@ -203,35 +281,72 @@ def main(argv: Sequence[str] | None = None) -> int:  # pylint: disable=too-many-
         return 1
     _log("[uucp] Spool structure validated (begin/end markers present)")
 
-    ini = args.ini
-    workdir = args.workdir
-    _log(f"Spawning: {args.simh_bin} {ini}  (cwd={workdir})")
-
-    child = pexpect.spawn(
-        args.simh_bin,
-        [ini],
-        cwd=workdir,
-        timeout=_BOOT_TIMEOUT,
-        encoding=None,
+    profile = TimingProfile(args.timing_profile)
+    _log(
+        "Timeouts: "
+        f"boot {profile.timeout('pdp11-boot', _BOOT_TIMEOUT):.0f}s, "
+        f"deliver {profile.timeout('pdp11-deliver', _UUE_TIMEOUT):.0f}s, "
+        f"nroff {profile.timeout('pdp11-nroff', _NROFF_TIMEOUT):.0f}s"
     )
 
-    if args.verbose:
-        child.logfile_read = sys.stderr.buffer
-
+    ini = args.ini
+    workdir = args.workdir
+    overlay_dir = None
+    child: pexpect.spawn | None = None
+    transcript = contextlib.ExitStack()
+    sampler: ResourceSampler | None = None
     try:
-        _boot(child)
-        _deliver_uu_spool(child, brad_bio_uu, "/tmp/brad.bio.uu")
-        raw = _run_nroff(child)
-        child.sendline("exit")
-        # 2.11BSD can restart login after shell exit instead of returning EOF.
-        try:
-            child.expect(pexpect.EOF, timeout=30)
-        except pexpect.TIMEOUT:
-            _log("Note: SIMH did not exit cleanly within 30s; will force-terminate")
+        # The overlay directory exists from here on; the finally block removes it.
+        if args.disk_overlay_dir:
+            ini, overlay_dir = prepare_disk_overlays(ini, workdir, args.disk_overlay_dir)
+        _log(f"Spawning: {args.simh_bin} {ini}  (cwd={workdir})")
+
+        started = time.monotonic()
+        child = pexpect.spawn(
+            args.simh_bin,
+            [ini],
+            cwd=workdir,
+            timeout=_BOOT_TIMEOUT,
+            encoding=None,
+        )
+
+        if args.verbose:
+            child.logfile_read = sys.stderr.buffer
+        if args.transcript:
+            transcript.enter_context(ConsoleRecorder("pdp11", args.transcript)).attach(child)
+        console = ConsoleCounters("pdp11").attach(child)
+        if args.command_timing:
+            CommandTimer("pdp11").attach(child)
+        if args.sample_interval > 0:
+            sampler = ResourceSampler("pdp11", child.pid, args.sample_interval).start()
+
+        with journal_stage(_SOURCE, "pdp11-boot", profile=profile, console=console, resources=sampler):
+            _boot(child, profile)
+        with journal_stage(
+            _SOURCE,
+            "pdp11-deliver",
+            bytes_in=len(brad_bio_uu),
+            profile=profile,
+            console=console,
+            resources=sampler,
+        ) as event:
+            deliver_timeout = profile.timeout("pdp11-deliver", _UUE_TIMEOUT)
+            # Delivery rewrites the spool from the start before decoding, so a stalled one can run again.
+            retry = RetryPolicy(retry_on=(pexpect.TIMEOUT,), heredoc_terminator="HEREDOC_EOF")
+            retry.run(
+                child,
+                _PROMPT,
+                "deliver brad.bio.uu",
+                lambda: _deliver_uu_spool(child, brad_bio_uu, "/tmp/brad.bio.uu", deliver_timeout),
+            )
+            if retry.retries:
+                event["detail"] = f"Deliveries retried after a shell resync: {retry.retries}"
+        raw = _run_nroff(child, profile, console, sampler)
+        _quit_simh(child, started, sampler)
     except pexpect.TIMEOUT as exc:
         _log(f"TIMEOUT: {exc}")
         _log("Last SIMH output:")
-        if child.before:
+        if child is not None and child.before:
             _log(child.before.decode("ascii", errors="replace")[-500:])
         return 1
     except pexpect.EOF:
@@ -240,9 +355,18 @@ def main(argv: Sequence[str] | None = None) -> int:  # pylint: disable=too-many-
     except GuestCommandError as exc:
         _log(f"GUEST COMMAND FAILED: {exc}")
         return 1
+    except (OSError, ValueError) as exc:
+        # Overlay setup, the SIMH spawn, and the transcript file fail here.
+        _log(f"ERROR: cannot run SIMH: {exc}")
+        return 1
     finally:
-        if child.isalive():
+        if sampler is not None:
+            sampler.stop()
+        if child is not None and child.isalive():
             child.terminate(force=True)
+        transcript.close()
+        if overlay_dir:
+            shutil.rmtree(overlay_dir, ignore_errors=True)
 
     output = _clean_nroff_output(raw)
 
@@ -254,6 +378,11 @@ def main(argv: Sequence[str] | None = None) -> int:  # pylint: disable=too-many-
     out_path.parent.mkdir(parents=True, exist_ok=True)
     out_path.write_text(output, encoding="utf-8")
     _log(f"Wrote: {args.output} ({len(output.splitlines())} lines)")
+
+    try:
+        profile.save()
+    except OSError as exc:
+        _log(f"Note: could not update timing profile {args.timing_profile}: {exc}")
     return 0
 
 
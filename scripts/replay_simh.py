@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Play a recorded SIMH console transcript back to a driver on a pty.
+
+Pass this file to either driver as ``--simh-bin`` and name a transcript
+recorded with the driver's ``--transcript`` option. The replay writes the
+recorded guest output with its recorded timing. At each recorded input, it
+waits for the driver to send the same bytes. The timing after an input is
+measured from when the driver's bytes arrive, so the guest's recorded
+response time is kept even when the driver itself runs faster or slower.
+
+Input that differs from the recording ends the replay with exit status 3 and
+a note on the console, so the driver fails the way it would on a real guest
+that stopped answering. The driver passes SIMH only an ini, so the replay
+reads its settings from the environment; the flags override them:
+
+``REPLAY_TRANSCRIPT``
+    The transcript to play.
+``REPLAY_SPEED``
+    Playback speed: 1 replays in recorded time, N replays N times faster,
+    and 0 replays without delays (default: 1).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import termios
+import time
+import tty
+from collections.abc import Sequence
+
+from simh_session import load_transcript
+
+_DIVERGED = 3
+
+
+def _parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Replay a recorded SIMH console transcript")
+    p.add_argument(
+        "--transcript",
+        default=os.environ.get("REPLAY_TRANSCRIPT"),
+        help="Transcript recorded with a driver's --transcript (default: $REPLAY_TRANSCRIPT)",
+    )
+    p.add_argument(
+        "--speed",
+        type=float,
+        default=float(os.environ.get("REPLAY_SPEED") or 1),
+        help="Playback speed; 0 replays without delays (default: $REPLAY_SPEED or 1)",
+    )
+    p.add_argument("ini", nargs="?", help="SIMH ini passed by the driver; ignored")
+    return p.parse_args(argv)
+
+
+def _read_exactly(count: int) -> bytes:
+    data = b""
+    while len(data) < count:
+        chunk = os.read(0, count - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def replay(events: list[tuple[float, str, bytes]], speed: float) -> int:
+    """Play ``events`` on stdin and stdout and return the replay's exit status."""
+    anchor_offset, anchor_time = 0.0, time.monotonic()
+    for index, (offset, kind, data) in enumerate(events):
+        if kind == "o":
+            if speed > 0:
+                delay = anchor_time + (offset - anchor_offset) / speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            os.write(1, data)
+            continue
+        received = _read_exactly(len(data))
+        if received != data:
+            note = f"\r\nreplay: input diverged at event {index + 1}: expected {data!r}, got {received!r}\r\n"
+            os.write(1, note.encode("ascii", errors="backslashreplace"))
+            return _DIVERGED
+        anchor_offset, anchor_time = offset, time.monotonic()
+    return 0
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Replay the selected transcript and return its exit status."""
+    args = _parse_args(argv)
+    if not args.transcript:
+        print("replay_simh: set REPLAY_TRANSCRIPT or pass --transcript", file=sys.stderr)
+        return 2
+    try:
+        _, events = load_transcript(args.transcript)
+    except (OSError, ValueError) as exc:
+        print(f"replay_simh: {exc}", file=sys.stderr)
+        return 2
+    saved = termios.tcgetattr(0) if os.isatty(0) else None
+    # Like SIMH, take the console raw: recorded output already holds the guest's echo.
+    if saved is not None:
+        tty.setraw(0)
+    try:
+        return replay(events, args.speed)
+    finally:
+        if saved is not None:
+            termios.tcsetattr(0, termios.TCSADRAIN, saved)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
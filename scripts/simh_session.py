@@ -2,14 +2,21 @@
 
 from __future__ import annotations
 
+import fcntl
+import itertools
 import json
 import os
 import re
 import shlex
+import shutil
 import sys
+import tempfile
+import threading
 import time
-from collections.abc import Callable
-from typing import TYPE_CHECKING
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, TypeVar
 
 if TYPE_CHECKING:
     import pexpect
@@ -21,6 +28,46 @@ LINE_DELAY: float = 0.005
 UUE_CHUNK_SIZE: int = 10
 
 _COMMAND_STATUS_PATTERN = rb"__VINTAGE_RC_([0-9]+)__"
+# Prints the guest clock between timing markers; {} is 0 before a command and 1 after it.
+_COMMAND_CLOCK = 'echo __VINTAGE_T{}_"`date`"__'
+# Guest date(1) output between timing markers; the echoed command line has no clock time.
+_COMMAND_CLOCK_PATTERN = re.compile(rb"__VINTAGE_T([01])_[^\r\n]*?([0-9]{1,2}):([0-9]{2}):([0-9]{2})[^\r\n]*?__\r?\n?")
+
+# SIMH's default WRU character stops the simulator at its command prompt.
+SIMH_BREAK = "\x05"
+# Read at session end; SHOW TIME reports simulated instructions executed.
+SIMH_REPORTS = ("show time", "show clocks", "show throttle")
+_SIMH_TIME = re.compile(r"^Time:\s*([0-9][0-9,.]*(?:e\+?[0-9]+)?)", re.IGNORECASE | re.MULTILINE)
+
+# SIMH ini commands that select a disk format or attach a disk unit.
+_SET_VHD_FORMAT = re.compile(r"^\s*set\s+(?P<unit>\S+)\s+format=vhd\s*$", re.IGNORECASE)
+_ATTACH_DISK = re.compile(
+    r"^\s*att(?:a|ac|ach)?(?P<switches>(?:\s+-[a-z]+)*)\s+(?P<unit>(?:rp|rq|rl|rk|hk)[0-9]+)\s+(?P<path>\S+)\s*$",
+    re.IGNORECASE,
+)
+
+# An adaptive expect timeout is this multiple of a step's recorded p99, never
+# below the floor and never above the driver's fixed worst-case timeout.
+PROFILE_MULTIPLIER: float = 3.0
+PROFILE_FLOOR: float = 30.0
+# Fewer samples than this leave the fixed timeout in place.
+PROFILE_MIN_SAMPLES: int = 3
+# Only the most recent successful runs shape a step's timeout.
+PROFILE_WINDOW: int = 50
+
+# A retried guest step runs at most this many times in total.
+STEP_ATTEMPTS: int = 3
+# Seconds a retry waits for the guest shell to echo its resync marker.
+RESYNC_TIMEOUT: float = 60.0
+# Ctrl-U, the KILL character both drivers set with stty, discards a partial input line.
+SHELL_KILL = "\x15"
+_resync_tokens = itertools.count(1)
+
+_T = TypeVar("_T")
+
+# Linux FICLONE ioctl: share the source extents copy-on-write.
+_FICLONE = 0x40049409
+_CLONE_BLOCK_SIZE = 1 << 20
 
 
 class GuestCommandError(RuntimeError):
@@ -37,6 +84,9 @@ def make_logger(prefix: str) -> Callable[[str], None]:
     return _log
 
 
+_log = make_logger("simh_session")
+
+
 def validate_uu_spool(text: str, label: str = "brad.bio.uu") -> None:
     """Require `begin`, an intervening encoded line, and a final `end` line."""
     lines = [ln for ln in text.splitlines() if ln.strip()]
@@ -77,13 +127,16 @@ def run_checked(
     is followed by an exit-status marker whose literal form is split by shell
     quoting, so the tty's echoed command line cannot satisfy the marker match.
     This uses only Bourne-shell syntax supported by both historical guests.
+    With a ``CommandTimer`` attached to ``child``, the command is also
+    bracketed by the guest's ``date`` and its timing is recorded. The returned
+    output is then the same as without the timer.
 
     Args:
         child: Active pexpect session in bytes mode.
         command: Bourne-shell command to execute inside the guest.
         prompt: Distinctive shell prompt expected after the status marker.
         timeout: Timeout in seconds for the command and following prompt.
-        label: Optional short operation name for failures.
+        label: Optional short operation name for failures and timing records.
 
     Returns:
         Console bytes emitted before the status marker.
@@ -94,10 +147,26 @@ def run_checked(
         pexpect.TIMEOUT: If the status marker or prompt does not arrive in time.
         pexpect.EOF: If SIMH exits while the command is running.
     """
-    wrapped = f'{command}; vintage_rc=$?; echo __VINTAGE_RC_"${{vintage_rc}}__"'
-    child.sendline(wrapped)
+    timer = getattr(child, "command_timer", None)
+    if not isinstance(timer, CommandTimer):
+        timer = None
+    closing = f"; {_COMMAND_CLOCK.format(1)}" if timer is not None else ""
+    started = time.monotonic()
+    opening = b""
+    if timer is not None:
+        # The opening clock goes on its own line to keep the command under the tty line limit.
+        # Its echo, clock, and prompt are read here, so they stay out of the command's output.
+        child.sendline(_COMMAND_CLOCK.format(0))
+        child.expect(_COMMAND_CLOCK_PATTERN, timeout=timeout)
+        opening = child.after if isinstance(child.after, bytes) else b""
+        child.expect(prompt, timeout=timeout)
+    child.sendline(f'{command}; vintage_rc=$?{closing}; echo __VINTAGE_RC_"${{vintage_rc}}__"')
     child.expect(_COMMAND_STATUS_PATTERN, timeout=timeout)
     output = child.before or b""
+    if timer is not None:
+        # The echoed command line loses the closing clock, as the output loses both clocks.
+        output = output.replace(closing.encode("ascii"), b"", 1)
+        output = timer.record(label or command, opening + output, time.monotonic() - started)
     match = child.match
     try:
         status = int(match.group(1))
@@ -111,15 +180,552 @@ def run_checked(
     return output
 
 
-def log_console_section(machine: str, section: str, content: str) -> None:
-    """Append one JSON Lines console record when SECTIONS_LOG is set."""
+def _append_section(record: dict[str, object]) -> None:
     sections_log = os.environ.get("SECTIONS_LOG", "")
     if not sections_log:
         return
     ts = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
-    entry = {"machine": machine, "section": section, "ts": ts, "content": content}
-    with open(sections_log, "a", encoding="utf-8") as f:
-        f.write(json.dumps(entry) + "\n")
+    # Like a journal write, a console record must never fail the step it describes.
+    try:
+        with open(sections_log, "a", encoding="utf-8") as f:
+            f.write(json.dumps({**record, "ts": ts}) + "\n")
+    except OSError:
+        pass
+
+
+def log_console_section(machine: str, section: str, content: str) -> None:
+    """Append one JSON Lines console record when SECTIONS_LOG is set."""
+    _append_section({"kind": "console", "machine": machine, "section": section, "content": content})
+
+
+def log_step_metrics(machine: str, section: str, metrics: dict[str, float]) -> None:
+    """Append one JSON Lines step-metrics record when SECTIONS_LOG is set."""
+    _append_section({"kind": "metrics", "machine": machine, "section": section, "metrics": metrics})
+
+
+def log_simh_counters(machine: str, counters: dict[str, object]) -> None:
+    """Append one JSON Lines SIMH counters record when SECTIONS_LOG is set."""
+    _append_section({"kind": "simh", "machine": machine, "section": f"{machine}-simh", "simh": counters})
+
+
+def simh_counters(
+    reports: dict[str, str],
+    host_seconds: float,
+    cpu_seconds: float | None = None,
+) -> dict[str, object]:
+    """Return emulated speed from SIMH's end-of-session reports.
+
+    ``mips`` divides the simulated instruction count by the host wall time
+    since SIMH started. ``mips_per_cpu_second`` divides it by the CPU time the
+    SIMH process used, so a busy host lowers the first but not the second.
+    """
+    counters: dict[str, object] = {"host_seconds": round(host_seconds, 3)}
+    time_match = _SIMH_TIME.search(reports.get("show time", ""))
+    if time_match is not None:
+        instructions = float(time_match.group(1).replace(",", ""))
+        counters["simulated_instructions"] = instructions
+        if host_seconds > 0:
+            counters["mips"] = round(instructions / host_seconds / 1e6, 3)
+        if cpu_seconds:
+            counters["cpu_seconds"] = round(cpu_seconds, 3)
+            counters["mips_per_cpu_second"] = round(instructions / cpu_seconds / 1e6, 3)
+    throttle = reports.get("show throttle", "").strip().splitlines()
+    if throttle:
+        counters["throttle"] = " ".join(throttle[0].split())
+    return counters
+
+
+def capture_simh_counters(  # pylint: disable=too-many-arguments
+    child: pexpect.spawn,
+    machine: str,
+    sim_prompt: str,
+    host_seconds: float,
+    resources: ResourceSampler | None = None,
+    *,
+    timeout: float = 30,
+) -> dict[str, object]:
+    """Stop the simulator at its command prompt and record its speed reports.
+
+    The reports go to the build log as the ``<machine>-simh`` console section,
+    and the parsed counters as a SIMH counters record. The simulator is left
+    stopped at ``sim_prompt`` for the caller to quit.
+
+    Raises:
+        pexpect.TIMEOUT: If SIMH does not reach its prompt or answer a report.
+        pexpect.EOF: If SIMH has already exited.
+    """
+    prompt = re.escape(sim_prompt).encode("ascii")
+    child.send(SIMH_BREAK)
+    child.expect(prompt, timeout=timeout)
+    reports: dict[str, str] = {}
+    for command in SIMH_REPORTS:
+        child.sendline(command)
+        child.expect(prompt, timeout=timeout)
+        # Drop the echoed command line.
+        reports[command] = strip_console(child.before or b"").partition("\n")[2].strip()
+    cpu_seconds = resources.sample().get("cpu_seconds") if resources is not None else None
+    counters = simh_counters(reports, host_seconds, cpu_seconds)
+    log_console_section(
+        machine,
+        f"{machine}-simh",
+        "\n\n".join(f"{sim_prompt}{command}\n{text}" for command, text in reports.items()),
+    )
+    log_simh_counters(machine, counters)
+    return counters
+
+
+def guest_elapsed_seconds(output: bytes) -> int | None:
+    """Return whole seconds between the guest clock markers in ``output``, if both are present.
+
+    The guest's ``date`` has one-second resolution and no date arithmetic, so
+    a command that spans midnight wraps around one day.
+    """
+    clocks = {
+        match.group(1): int(match.group(2)) * 3600 + int(match.group(3)) * 60 + int(match.group(4))
+        for match in _COMMAND_CLOCK_PATTERN.finditer(output)
+    }
+    if b"0" not in clocks or b"1" not in clocks:
+        return None
+    return (clocks[b"1"] - clocks[b"0"]) % 86400
+
+
+class CommandTimer:
+    """Host and guest elapsed time of each command that ``run_checked`` runs.
+
+    ``attach`` makes ``run_checked`` bracket every command on ``child`` with the
+    guest's ``date``. Each command then gets one SECTIONS_LOG timing record
+    under its label. Host time includes the console round trip and the guest
+    time does not, so their difference is the emulation and pty overhead.
+    """
+
+    def __init__(self, machine: str) -> None:
+        """Prepare to time commands on the named machine."""
+        self.machine = machine
+
+    def attach(self, child: pexpect.spawn) -> CommandTimer:
+        """Time every checked command on ``child`` from now on and return this timer."""
+        child.command_timer = self
+        return self
+
+    def record(self, label: str, output: bytes, host_seconds: float) -> bytes:
+        """Log one command's timing and return its output without the clock markers."""
+        timing: dict[str, float] = {"host_seconds": round(host_seconds, 3)}
+        guest_seconds = guest_elapsed_seconds(output)
+        if guest_seconds is not None:
+            timing["guest_seconds"] = guest_seconds
+            timing["overhead_seconds"] = round(max(host_seconds - guest_seconds, 0.0), 3)
+        _append_section({"kind": "timing", "machine": self.machine, "label": label, "timing": timing})
+        return _COMMAND_CLOCK_PATTERN.sub(b"", output)
+
+
+class ConsoleCounters:
+    """Running totals of console traffic for one spawned SIMH child.
+
+    ``attach`` wraps the child's ``send``, ``read_nonblocking``, and ``expect``
+    so every caller is counted, including the drivers' direct ``expect`` calls.
+    """
+
+    FIELDS = (
+        "bytes_sent",
+        "bytes_received",
+        "lines_sent",
+        "expect_calls",
+        "expect_seconds",
+        "line_delay_seconds",
+    )
+
+    def __init__(self, machine: str) -> None:
+        """Start every total at zero for the named machine."""
+        self.machine = machine
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.lines_sent = 0
+        self.expect_calls = 0
+        self.expect_seconds = 0.0
+        self.line_delay_seconds = 0.0
+
+    def attach(self, child: pexpect.spawn) -> ConsoleCounters:
+        """Count traffic through ``child`` from now on and return these counters."""
+        send = child.send
+        read_nonblocking = child.read_nonblocking
+        expect = child.expect
+
+        def counted_send(s: str | bytes) -> int:
+            written: int = send(s)
+            self.bytes_sent += written
+            if isinstance(s, str):
+                self.lines_sent += s.count("\n")
+            else:
+                self.lines_sent += s.count(b"\n")
+            return written
+
+        def counted_read_nonblocking(*args: object, **kwargs: object) -> bytes:
+            data: bytes = read_nonblocking(*args, **kwargs)
+            self.bytes_received += len(data)
+            return data
+
+        def counted_expect(*args: object, **kwargs: object) -> int:
+            self.expect_calls += 1
+            started = time.monotonic()
+            try:
+                index: int = expect(*args, **kwargs)
+                return index
+            finally:
+                self.expect_seconds += time.monotonic() - started
+
+        # sendline and the expect loop look these up on the instance.
+        child.send = counted_send
+        child.read_nonblocking = counted_read_nonblocking
+        child.expect = counted_expect
+        child.console_counters = self
+        return self
+
+    def snapshot(self) -> dict[str, float]:
+        """Return the current totals."""
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+class ConsoleRecorder:
+    """Timestamped transcript of everything sent to and read from one SIMH child.
+
+    The transcript is asciicast v2 JSONL: a header object, then one
+    ``[offset, "i" | "o", data]`` event per send or read, with the offset in
+    monotonic seconds since ``attach``. Each console byte is stored as the
+    code point of the same value, so ``load_transcript`` recovers the exact
+    bytes. ``replay_simh.py`` plays a transcript back to a driver.
+    """
+
+    def __init__(self, machine: str, path: str | os.PathLike[str]) -> None:
+        """Prepare to record the named machine's console to ``path``."""
+        self.machine = machine
+        self.path = Path(path)
+        self._file: IO[str] | None = None
+        self._started = 0.0
+
+    def __enter__(self) -> ConsoleRecorder:
+        """Create the transcript file; leaving the ``with`` block closes it."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "w", encoding="utf-8")
+        return self
+
+    def __exit__(self, *_exc_info: object) -> None:
+        """Stop recording and close the transcript."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def attach(self, child: pexpect.spawn) -> ConsoleRecorder:
+        """Record traffic through ``child`` from now on and return this recorder.
+
+        Raises:
+            ValueError: If the recorder has not been entered as a context manager.
+        """
+        if self._file is None:
+            raise ValueError(f"{self.path}: transcript is not open")
+        self._started = time.monotonic()
+        header = {"version": 2, "width": 80, "height": 24, "timestamp": int(time.time()), "machine": self.machine}
+        self._file.write(json.dumps(header) + "\n")
+        send = child.send
+        read_nonblocking = child.read_nonblocking
+
+        def recorded_send(s: str | bytes) -> int:
+            written: int = send(s)
+            self._event("i", s if isinstance(s, bytes) else s.encode("utf-8"))
+            return written
+
+        def recorded_read_nonblocking(*args: object, **kwargs: object) -> bytes:
+            data: bytes = read_nonblocking(*args, **kwargs)
+            self._event("o", data)
+            return data
+
+        # sendline and the expect loop look these up on the instance.
+        child.send = recorded_send
+        child.read_nonblocking = recorded_read_nonblocking
+        return self
+
+    def _event(self, kind: str, data: bytes) -> None:
+        if self._file is None or not data:
+            return
+        offset = round(time.monotonic() - self._started, 6)
+        # Flush each event so a transcript survives a killed driver.
+        self._file.write(json.dumps([offset, kind, data.decode("latin-1")]) + "\n")
+        self._file.flush()
+
+
+def load_transcript(path: str | os.PathLike[str]) -> tuple[dict[str, object], list[tuple[float, str, bytes]]]:
+    """Return the header and ``(offset, kind, data)`` events of a ``ConsoleRecorder`` transcript."""
+    with open(path, encoding="utf-8") as f:
+        lines = [line for line in f if line.strip()]
+    if not lines:
+        raise ValueError(f"{path}: transcript is empty")
+    header = json.loads(lines[0])
+    if not isinstance(header, dict) or header.get("version") != 2:
+        raise ValueError(f"{path}: not an asciicast v2 transcript")
+    events: list[tuple[float, str, bytes]] = []
+    for line in lines[1:]:
+        offset, kind, data = json.loads(line)
+        if kind in ("i", "o"):
+            events.append((float(offset), kind, data.encode("latin-1")))
+    return header, events
+
+
+def _phase_metrics(before: dict[str, float], after: dict[str, float], seconds: float) -> dict[str, float]:
+    metrics = {field: round(after[field] - before[field], 3) for field in ConsoleCounters.FIELDS}
+    metrics["seconds"] = round(seconds, 3)
+    return metrics
+
+
+class ResourceSampler:
+    """Periodic ``/proc`` readings of one SIMH process, summarized per step.
+
+    CPU time and context switches are cumulative counters, so a step's usage
+    is the difference between readings at its start and end. Resident memory
+    is sampled every ``interval`` seconds on a daemon thread to find each
+    step's peak. Readings stop changing once the process exits.
+    """
+
+    FIELDS = ("cpu_seconds", "voluntary_ctxt_switches", "nonvoluntary_ctxt_switches")
+
+    def __init__(self, machine: str, pid: int, interval: float, *, proc_root: str = "/proc") -> None:
+        """Prepare to sample ``pid``; call ``start`` to begin."""
+        self.machine = machine
+        self.interval = interval
+        self._stat_path = os.path.join(proc_root, str(pid), "stat")
+        self._status_path = os.path.join(proc_root, str(pid), "status")
+        self._ticks = os.sysconf("SC_CLK_TCK")
+        self._lock = threading.Lock()
+        self._latest: dict[str, float] = {}
+        self._peak_rss_kb = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _read(self) -> dict[str, float] | None:
+        try:
+            with open(self._stat_path, encoding="ascii") as f:
+                stat = f.read()
+            with open(self._status_path, encoding="ascii") as f:
+                status = f.read()
+        except OSError:
+            return None
+        # The command name may contain spaces, so fields are counted after its closing parenthesis.
+        fields = stat[stat.rindex(")") + 2 :].split()
+        reading = {"cpu_seconds": (int(fields[11]) + int(fields[12])) / self._ticks, "rss_kb": 0.0}
+        for line in status.splitlines():
+            name, _, value = line.partition(":")
+            if name == "VmRSS":
+                reading["rss_kb"] = float(value.split()[0])
+            elif name in ("voluntary_ctxt_switches", "nonvoluntary_ctxt_switches"):
+                reading[name] = float(value)
+        return reading
+
+    def sample(self) -> dict[str, float]:
+        """Take one reading now and return the latest available one."""
+        reading = self._read()
+        with self._lock:
+            if reading is not None:
+                self._latest = reading
+                self._peak_rss_kb = max(self._peak_rss_kb, reading["rss_kb"])
+            return dict(self._latest)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self) -> ResourceSampler:
+        """Start sampling in the background and return this sampler."""
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name=f"{self.machine}-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop background sampling."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def begin_step(self) -> dict[str, float]:
+        """Return a reading to measure a step from, restarting the peak at current memory."""
+        reading = self.sample()
+        with self._lock:
+            self._peak_rss_kb = reading.get("rss_kb", 0.0)
+        return reading
+
+    def step_usage(self, before: dict[str, float]) -> dict[str, float]:
+        """Return resources used since ``before``, from ``begin_step``."""
+        after = self.sample()
+        usage = {
+            field: round(after[field] - before[field], 3) for field in self.FIELDS if field in after and field in before
+        }
+        with self._lock:
+            usage["peak_rss_kb"] = self._peak_rss_kb
+        return usage
+
+
+def _append_event(record: dict[str, object]) -> None:
+    events_log = os.environ.get("EVENTS_LOG", "")
+    if not events_log:
+        return
+    # A journal write must never fail the step it describes.
+    try:
+        with open(events_log, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError:
+        pass
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+class TimingProfile:
+    """Expect timeouts derived from step durations recorded by earlier runs.
+
+    The profile is a JSON file of recent successful durations per journal step,
+    with their p50 and p99. Without a path, or before a step has enough
+    samples, every timeout is the driver's fixed default.
+    """
+
+    def __init__(
+        self,
+        path: str | None,
+        *,
+        multiplier: float = PROFILE_MULTIPLIER,
+        floor: float = PROFILE_FLOOR,
+    ) -> None:
+        """Load recorded samples from ``path`` when it exists."""
+        self.path = path
+        self.multiplier = multiplier
+        self.floor = floor
+        self._samples = self._load()
+        self._observed: dict[str, float] = {}
+
+    def _load(self) -> dict[str, list[float]]:
+        if not self.path or not os.path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                steps = json.load(f).get("steps", {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+        samples: dict[str, list[float]] = {}
+        for step, entry in steps.items() if isinstance(steps, dict) else ():
+            values = entry.get("samples") if isinstance(entry, dict) else None
+            if isinstance(values, list):
+                samples[step] = [float(v) for v in values if isinstance(v, (int, float)) and v >= 0]
+        return samples
+
+    def timeout(self, step: str, default: float) -> float:
+        """Return the expect timeout for one step, bounded by ``default``."""
+        samples = self._samples.get(step, [])
+        if len(samples) < PROFILE_MIN_SAMPLES:
+            return default
+        return min(default, max(self.floor, self.multiplier * _percentile(samples, 99)))
+
+    def observe(self, step: str, seconds: float) -> None:
+        """Remember one step's duration from the current run."""
+        self._observed[step] = seconds
+
+    def save(self) -> None:
+        """Merge this run's durations into the profile; call only after a successful run."""
+        if not self.path or not self._observed:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        # Both drivers share one profile, so re-read it under the lock before merging.
+        with open(self.path + ".lock", "w", encoding="utf-8") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            samples = self._load()
+            for step, seconds in self._observed.items():
+                samples[step] = (samples.get(step, []) + [round(seconds, 3)])[-PROFILE_WINDOW:]
+            steps = {
+                step: {
+                    "samples": values,
+                    "p50": round(_percentile(values, 50), 3),
+                    "p99": round(_percentile(values, 99), 3),
+                }
+                for step, values in sorted(samples.items())
+                if values
+            }
+            fd, tmp_path = tempfile.mkstemp(prefix=".timing-profile-", dir=directory)
+            # mkstemp creates the file 0600, and the drivers write it as the container's
+            # root user; the host user that runs the build must still read it.
+            os.fchmod(fd, 0o644)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"steps": steps}, f, indent=2)
+                f.write("\n")
+            os.replace(tmp_path, self.path)
+        self._samples = samples
+
+
+@contextmanager
+def journal_stage(  # pylint: disable=too-many-arguments
+    source: str,
+    stage: str,
+    *,
+    bytes_in: int = 0,
+    profile: TimingProfile | None = None,
+    console: ConsoleCounters | None = None,
+    resources: ResourceSampler | None = None,
+) -> Iterator[dict[str, object]]:
+    """Record one driver step in the EVENTS_LOG journal when it is set.
+
+    The step appends a ``start`` record on entry and an ``end`` record with its
+    status on exit. The body may set ``bytes_out`` and ``detail`` on the
+    yielded record before the ``end`` record is written.
+
+    Args:
+        source: Driver name, matching its logger prefix.
+        stage: Step name, matching its console section where one exists.
+        bytes_in: Payload bytes the step sends into the guest.
+        profile: Timing profile that receives the duration of a successful step.
+        console: Counters whose growth during the step is written to
+            SECTIONS_LOG as the step's console metrics.
+        resources: Sampler whose CPU, context-switch, and peak-memory usage
+            during the step is written with the step's metrics.
+    """
+    start = time.time()
+    counts = console.snapshot() if console is not None else {}
+    usage = resources.begin_step() if resources is not None else {}
+    record: dict[str, object] = {"source": source, "stage": stage, "start": start, "bytes_in": bytes_in}
+    _append_event({"type": "start", **record})
+    record["bytes_out"] = 0
+    status = "failed"
+    try:
+        yield record
+        status = "ok"
+    finally:
+        end = time.time()
+        _append_event({"type": "end", **record, "end": end, "status": status})
+        metrics: dict[str, float] = {}
+        machine = source
+        if console is not None:
+            machine = console.machine
+            metrics.update(_phase_metrics(counts, console.snapshot(), end - start))
+        if resources is not None:
+            machine = resources.machine
+            metrics.update(resources.step_usage(usage))
+            metrics["seconds"] = round(end - start, 3)
+        if metrics:
+            log_step_metrics(machine, stage, metrics)
+    if profile is not None:
+        profile.observe(stage, end - start)
+
+
+def pause_between_lines(child: pexpect.spawn) -> None:
+    """Sleep LINE_DELAY after one heredoc line, counting it on attached console counters."""
+    if not LINE_DELAY:
+        return
+    started = time.monotonic()
+    time.sleep(LINE_DELAY)
+    counters = getattr(child, "console_counters", None)
+    if isinstance(counters, ConsoleCounters):
+        # Sleeps overshoot; count the time actually spent.
+        counters.line_delay_seconds += time.monotonic() - started
 
 
 def inject_batched_heredoc(
@@ -136,8 +742,7 @@ def inject_batched_heredoc(
         child.sendline(f"cat {redirect} {remote_path} << 'HEREDOC_EOF'")
         for line in batch:
             child.sendline(line)
-            if LINE_DELAY:
-                time.sleep(LINE_DELAY)
+            pause_between_lines(child)
         child.sendline("HEREDOC_EOF")
         child.expect(prompt, timeout=timeout)
     if lines:
@@ -148,3 +753,152 @@ def inject_batched_heredoc(
             timeout,
             label=f"write {remote_path}",
         )
+
+
+def resync_shell(
+    child: pexpect.spawn,
+    prompt: str,
+    timeout: float,
+    *,
+    heredoc_terminator: str | None = None,
+) -> None:
+    """Bring an interrupted guest shell back to a fresh prompt.
+
+    Ctrl-U discards any partly sent input line, and ``heredoc_terminator``
+    closes a heredoc the interrupted step left open; with none open, the shell
+    reports it as an unknown command. The shell then echoes a marker unique to
+    this resync. Its literal form is split by quoting, so neither the echoed
+    command line nor output still queued from the interrupted step can
+    satisfy the match.
+
+    Raises:
+        pexpect.TIMEOUT: If the marker or the following prompt does not arrive in time.
+        pexpect.EOF: If SIMH has exited.
+    """
+    token = next(_resync_tokens)
+    child.send(SHELL_KILL)
+    if heredoc_terminator is not None:
+        child.sendline(heredoc_terminator)
+    child.sendline(f'echo __VINTAGE_SYNC_"{token}"__')
+    child.expect(re.escape(f"__VINTAGE_SYNC_{token}__").encode("ascii"), timeout=timeout)
+    child.expect(prompt, timeout=timeout)
+
+
+class RetryPolicy:  # pylint: disable=too-few-public-methods
+    """Bounded in-session retries of one kind of idempotent guest step.
+
+    ``run`` calls a step and, when it raises one of ``retry_on``, resyncs the
+    shell with ``resync_shell`` and calls it again, up to ``attempts`` calls in
+    total. A failed resync, a different exception, or the last attempt's
+    failure propagates unchanged. Only steps that rewrite their guest files
+    from the start are safe to retry.
+    """
+
+    def __init__(
+        self,
+        *,
+        retry_on: tuple[type[BaseException], ...],
+        attempts: int = STEP_ATTEMPTS,
+        resync_timeout: float = RESYNC_TIMEOUT,
+        heredoc_terminator: str | None = None,
+    ) -> None:
+        """Configure which failures are retried and how many calls a step gets."""
+        if attempts < 1:
+            raise ValueError(f"attempts must be at least 1, not {attempts}")
+        self.retry_on = retry_on
+        self.attempts = attempts
+        self.resync_timeout = resync_timeout
+        self.heredoc_terminator = heredoc_terminator
+        self.retries = 0
+
+    def run(self, child: pexpect.spawn, prompt: str, label: str, step: Callable[[], _T]) -> _T:
+        """Return the result of ``step``, retrying it after each transient failure."""
+        attempt = 1
+        while True:
+            try:
+                return step()
+            except self.retry_on as exc:
+                if attempt >= self.attempts:
+                    raise
+                _log(f"{label}: attempt {attempt} of {self.attempts} failed ({type(exc).__name__}); resyncing")
+            resync_shell(child, prompt, self.resync_timeout, heredoc_terminator=self.heredoc_terminator)
+            attempt += 1
+            self.retries += 1
+
+
+def clone_disk_image(source: Path, destination: Path) -> str:
+    """Create a private, writable copy of a disk image as cheaply as the filesystem allows.
+
+    A reflink shares every extent with the source until the guest writes. Where
+    the filesystem cannot reflink, the copy skips zero blocks so unused disk
+    space stays sparse.
+
+    Returns:
+        ``"reflink"`` or ``"sparse"``, naming the copy method used.
+    """
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            return "reflink"
+        except OSError:
+            pass
+        size = os.fstat(src.fileno()).st_size
+        while True:
+            block = src.read(_CLONE_BLOCK_SIZE)
+            if not block:
+                break
+            if block.strip(b"\0"):
+                dst.write(block)
+            else:
+                dst.seek(len(block), os.SEEK_CUR)
+        dst.truncate(size)
+    return "sparse"
+
+
+def prepare_disk_overlays(ini_path: str, workdir: str, overlay_root: str) -> tuple[str, str]:
+    """Write an ini whose disk units attach throwaway overlays instead of their base images.
+
+    VHD units become SIMH differencing disks whose parent is the unchanged base
+    image. Raw units become reflinked or sparse copies. Every other line,
+    including relative paths resolved from ``workdir``, is kept as written.
+
+    Args:
+        ini_path: SIMH ini file that attaches the base disk images.
+        workdir: SIMH working directory used to resolve relative disk paths.
+        overlay_root: Existing directory under which a private overlay
+            directory is created.
+
+    Returns:
+        The rewritten ini path and the overlay directory the caller must remove.
+    """
+    overlay_dir = tempfile.mkdtemp(prefix="simh-overlay-", dir=overlay_root)
+    try:
+        vhd_units: set[str] = set()
+        lines: list[str] = []
+        for line in Path(ini_path).read_text(encoding="ascii").splitlines():
+            format_match = _SET_VHD_FORMAT.match(line)
+            if format_match:
+                vhd_units.add(format_match.group("unit").lower())
+            attach = _ATTACH_DISK.match(line)
+            if attach is None:
+                lines.append(line)
+                continue
+
+            unit = attach.group("unit")
+            base = Path(workdir, attach.group("path")).resolve()
+            overlay = Path(overlay_dir, base.name)
+            if unit.lower() in vhd_units:
+                lines.append(f"attach{attach.group('switches')} -d {unit} {overlay}.diff.vhd {base}")
+                method = "differencing VHD"
+            else:
+                method = clone_disk_image(base, overlay)
+                lines.append(f"attach{attach.group('switches')} {unit} {overlay}")
+            _log(f"Disk overlay for {unit}: {base} -> {overlay_dir} ({method})")
+
+        overlay_ini = Path(overlay_dir, Path(ini_path).name)
+        overlay_ini.write_text("\n".join(lines) + "\n", encoding="ascii")
+    except BaseException:
+        # A half-built overlay directory is never handed to the caller to remove.
+        shutil.rmtree(overlay_dir, ignore_errors=True)
+        raise
+    return str(overlay_ini), overlay_dir
@@ -5,8 +5,10 @@ from __future__ import annotations
 
 import argparse
 import binascii
+import contextlib
 import re
 import shlex
+import shutil
 import sys
 import time
 from collections.abc import Sequence
@@ -14,10 +16,21 @@ from pathlib import Path
 
 import pexpect
 from simh_session import (
+    CommandTimer,
+    ConsoleCounters,
+    ConsoleRecorder,
     GuestCommandError,
+    ResourceSampler,
+    RetryPolicy,
+    TimingProfile,
+    capture_simh_counters,
     inject_batched_heredoc,
+    journal_stage,
     log_console_section,
+    log_simh_counters,
     make_logger,
+    pause_between_lines,
+    prepare_disk_overlays,
     run_checked,
     strip_console,
     validate_uu_spool,
@@ -27,9 +40,16 @@ from simh_session import (
 # where their host-side error handling looks alike.
 # pylint: disable=duplicate-code
 
-_PROMPT = "VAXsh> "
+# console_bench.py drives the guest through PROMPT, boot, inject_file,
+# inject_file_uue, capture_spool, and quit_simh as well.
+PROMPT = "VAXsh> "
+# Guest scratch directory, and the spool that capture_spool reads from it.
+GUEST_TMP = "/tmp"
+SPOOL_PATH = f"{GUEST_TMP}/brad.bio.uu"
 _CAPTURE_BEGIN = re.compile(rb"(?m)^__BRADBIOUU_BEGIN__\r?$")
 _CAPTURE_END = re.compile(rb"(?m)^__BRADBIOUU_END__\r?$")
+# SIMH command prompt set by vax780-pexpect.ini.
+_SIM_PROMPT = "vaxbsd>> "
 
 _BOOT_TIMEOUT = 180  # 4.3BSD on VAX boots in ~60-90 s under SIMH
 _LOGIN_TIMEOUT = 60  # after boot, login prompt appears within ~30 s
@@ -41,7 +61,8 @@ _UUE_TIMEOUT = 180  # UUE heredoc + cat can take longer on slow VAX emulation
 _PEXPECT_INI_CACHE = "/opt/vax-pexpect-ini-path.txt"
 _VAX_BIN_CACHE = "/opt/vax-bin-path.txt"
 
-_log = make_logger("vax_pexpect")
+_SOURCE = "vax_pexpect"
+_log = make_logger(_SOURCE)
 
 
 def _parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
@@ -80,6 +101,32 @@ def _parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
             "then falls back to 'vax780'."
         ),
     )
+    p.add_argument(
+        "--disk-overlay-dir",
+        default=None,
+        help="Attach throwaway copy-on-write overlays created under this directory instead of the base disks",
+    )
+    p.add_argument(
+        "--sample-interval",
+        type=float,
+        default=0.0,
+        help="Seconds between /proc samples of the SIMH process; 0 disables sampling (default: 0)",
+    )
+    p.add_argument(
+        "--command-timing",
+        action="store_true",
+        help="Bracket each checked guest command with the guest's date and record host and guest elapsed time",
+    )
+    p.add_argument(
+        "--transcript",
+        default=None,
+        help="Record the console as an asciicast v2 JSONL transcript at this path, for replay_simh.py",
+    )
+    p.add_argument(
+        "--timing-profile",
+        default=None,
+        help="JSON profile of recorded step durations; adapts timeouts and is updated after success",
+    )
     p.add_argument(
         "--verbose",
         action="store_true",
@@ -121,10 +168,10 @@ def _resolve_simh_config(args: argparse.Namespace) -> tuple[str, str, str]:
     return simh_bin, ini_path, workdir
 
 
-def _boot(child: pexpect.spawn) -> None:
+def boot(child: pexpect.spawn, profile: TimingProfile) -> None:
     """Boot 4.3BSD to a root shell, then set a custom prompt."""
     _log("Waiting for 4.3BSD login: prompt…")
-    child.expect("login:", timeout=_BOOT_TIMEOUT)
+    child.expect("login:", timeout=profile.timeout("vax-boot", _BOOT_TIMEOUT))
     _log("Got login: prompt")
     boot_rom = child.before or b""
 
@@ -151,34 +198,34 @@ def _boot(child: pexpect.spawn) -> None:
     child.expect(["# ", "\\$ "], timeout=_CMD_TIMEOUT)
     _log("stty: ERASE → DEL, KILL → Ctrl-U (safe for UUE injection)")
 
-    child.sendline("PS1='" + _PROMPT + "'")
-    child.expect(_PROMPT, timeout=_CMD_TIMEOUT)
-    _log(f"Custom prompt set: {_PROMPT!r}")
+    child.sendline("PS1='" + PROMPT + "'")
+    child.expect(PROMPT, timeout=_CMD_TIMEOUT)
+    _log(f"Custom prompt set: {PROMPT!r}")
 
     log_console_section("vax", "vax-boot", strip_console(boot_rom + b"\n" + post_login))
 
 
-def _inject_file(child: pexpect.spawn, remote_path: str, content: str) -> None:
+def inject_file(child: pexpect.spawn, remote_path: str, content: str) -> None:
     """Write text lines of at most 200 characters through a quoted heredoc."""
     lines = content.splitlines()
     _log(f"Injecting {len(lines)} lines → {remote_path}")
     child.sendline(f"cat > {remote_path} << 'HEREDOC_EOF'")
     for line in lines:
         child.sendline(line)
-        time.sleep(0.005)
+        pause_between_lines(child)
     child.sendline("HEREDOC_EOF")
-    child.expect(_PROMPT, timeout=_CMD_TIMEOUT)
+    child.expect(PROMPT, timeout=_CMD_TIMEOUT)
     run_checked(
         child,
         f"test -s {shlex.quote(remote_path)}",
-        _PROMPT,
+        PROMPT,
         _CMD_TIMEOUT,
         label=f"write {remote_path}",
     )
     _log(f"Injected {remote_path}")
 
 
-def _inject_file_uue(child: pexpect.spawn, remote_path: str, content: bytes) -> None:
+def inject_file_uue(child: pexpect.spawn, remote_path: str, content: bytes, timeout: float = _UUE_TIMEOUT) -> None:
     """Write arbitrary content as short UUE lines, then decode it in the guest."""
     name = Path(remote_path).name
     parent = str(Path(remote_path).parent)
@@ -192,7 +239,7 @@ def _inject_file_uue(child: pexpect.spawn, remote_path: str, content: bytes) ->
     tmp_uu = f"/tmp/{name}.uu"
     _log(f"UUE-injecting {len(uue_lines)} encoded lines ({len(content)} bytes) → {remote_path}")
 
-    inject_batched_heredoc(child, tmp_uu, uue_lines, _PROMPT, _UUE_TIMEOUT)
+    inject_batched_heredoc(child, tmp_uu, uue_lines, PROMPT, timeout)
 
     run_checked(
         child,
@@ -200,68 +247,102 @@ def _inject_file_uue(child: pexpect.spawn, remote_path: str, content: bytes) ->
             f"cd {shlex.quote(parent)} && rm -f {shlex.quote(name)} && "
             f"uudecode {shlex.quote(tmp_uu)} && test -s {shlex.quote(name)} && rm {shlex.quote(tmp_uu)}"
         ),
-        _PROMPT,
-        _UUE_TIMEOUT,
+        PROMPT,
+        timeout,
         label=f"decode {remote_path}",
     )
     _log(f"UUE-decoded: {remote_path}")
 
 
-def _compile_and_run(child: pexpect.spawn) -> None:
+def _compile_and_run(
+    child: pexpect.spawn,
+    profile: TimingProfile,
+    console: ConsoleCounters,
+    sampler: ResourceSampler | None,
+) -> None:
     """Compile bradman.c with cc and run it to produce brad.bio.roff, then spool it."""
     _log("Compiling: cc -O -o bradman /tmp/bradman.c")
-    compile_out = run_checked(
-        child,
-        "cd /tmp && rm -f bradman && cc -O -o bradman bradman.c && test -f bradman",
-        _PROMPT,
-        _COMPILE_TIMEOUT,
-        label="compile bradman.c",
-    )
+    with journal_stage(_SOURCE, "vax-compile", profile=profile, console=console, resources=sampler):
+        compile_out = run_checked(
+            child,
+            "cd /tmp && rm -f bradman && cc -O -o bradman bradman.c && test -f bradman",
+            PROMPT,
+            profile.timeout("vax-compile", _COMPILE_TIMEOUT),
+            label="compile bradman.c",
+        )
     _log("Compilation complete")
     log_console_section("vax", "vax-compile", strip_console(compile_out))
 
-    _log("Running: ./bradman -i bio.vintage.yaml -o brad.bio.roff")
-    bradman_out = run_checked(
-        child,
-        "cd /tmp && rm -f brad.bio.roff && ./bradman -i bio.vintage.yaml -o brad.bio.roff "
-        "&& test -s brad.bio.roff && ls -l brad.bio.roff",
-        _PROMPT,
-        _CMD_TIMEOUT,
-        label="run bradman",
-    )
-    _log("bradman run complete")
-
-    # The VAX prepares the spool consumed by the PDP-11 stage.
-    _log("Uuencoding: uuencode /tmp/brad.bio.roff brad.bio.roff > /tmp/brad.bio.uu")
-    uu_out = run_checked(
-        child,
-        "rm -f /tmp/brad.bio.uu && uuencode /tmp/brad.bio.roff brad.bio.roff > /tmp/brad.bio.uu "
-        "&& test -s /tmp/brad.bio.uu",
-        _PROMPT,
-        _CMD_TIMEOUT,
-        label="uuencode brad.bio.roff",
-    )
+    with journal_stage(_SOURCE, "vax-run", profile=profile, console=console, resources=sampler):
+        _log("Running: ./bradman -i bio.vintage.yaml -o brad.bio.roff")
+        bradman_out = run_checked(
+            child,
+            "cd /tmp && rm -f brad.bio.roff && ./bradman -i bio.vintage.yaml -o brad.bio.roff "
+            "&& test -s brad.bio.roff && ls -l brad.bio.roff",
+            PROMPT,
+            _CMD_TIMEOUT,
+            label="run bradman",
+        )
+        _log("bradman run complete")
+
+        # The VAX prepares the spool consumed by the PDP-11 stage.
+        _log("Uuencoding: uuencode /tmp/brad.bio.roff brad.bio.roff > /tmp/brad.bio.uu")
+        uu_out = run_checked(
+            child,
+            "rm -f /tmp/brad.bio.uu && uuencode /tmp/brad.bio.roff brad.bio.roff > /tmp/brad.bio.uu "
+            "&& test -s /tmp/brad.bio.uu",
+            PROMPT,
+            _CMD_TIMEOUT,
+            label="uuencode brad.bio.roff",
+        )
     _log("[uucp] brad.bio.roff spooled on VAX as brad.bio.uu")
 
     log_console_section("vax", "vax-run", strip_console(bradman_out + b"\n" + uu_out))
 
 
-def _capture_spool(child: pexpect.spawn) -> str:
+def capture_spool(child: pexpect.spawn) -> str:
     """Capture the VAX-generated spool between marker-only console lines."""
-    _log("[uucp] Capturing /tmp/brad.bio.uu from VAX spool…")
+    _log(f"[uucp] Capturing {SPOOL_PATH} from VAX spool…")
     child.sendline("stty -echo")
-    child.expect(_PROMPT, timeout=_CMD_TIMEOUT)
-    child.sendline("echo '__BRADBIOUU_BEGIN__'; cat /tmp/brad.bio.uu; echo '__BRADBIOUU_END__'; stty echo")
+    child.expect(PROMPT, timeout=_CMD_TIMEOUT)
+    child.sendline(f"echo '__BRADBIOUU_BEGIN__'; cat {SPOOL_PATH}; echo '__BRADBIOUU_END__'; stty echo")
     child.expect(_CAPTURE_BEGIN, timeout=_CMD_TIMEOUT)
     child.expect(_CAPTURE_END, timeout=_CMD_TIMEOUT)
     raw_bytes: bytes = child.before
-    child.expect(_PROMPT, timeout=_CMD_TIMEOUT)
+    child.expect(PROMPT, timeout=_CMD_TIMEOUT)
 
     raw = raw_bytes.decode("ascii", errors="replace")
     return raw.replace("\r\n", "\n").replace("\r", "\n").lstrip("\n")
 
 
-def main(argv: Sequence[str] | None = None) -> int:
+def quit_simh(child: pexpect.spawn, started: float, sampler: ResourceSampler | None) -> None:
+    """Record SIMH's speed counters at its command prompt, then quit the simulator.
+
+    The counters are diagnostics only: when SIMH exits or stalls first, they are
+    journaled as unavailable and the stage still succeeds.
+    """
+    try:
+        counters = capture_simh_counters(child, "vax", _SIM_PROMPT, time.monotonic() - started, sampler)
+    except pexpect.EOF:
+        # The ini can reach its own quit once WRU stops the guest; the output is already captured.
+        _log("Note: SIMH exited before its speed reports; counters not recorded")
+        log_simh_counters("vax", {"unavailable": "SIMH exited before its speed reports"})
+        return
+    except pexpect.TIMEOUT:
+        _log("Note: SIMH did not stop at its command prompt; counters not recorded")
+        log_simh_counters("vax", {"unavailable": "SIMH did not stop at its command prompt"})
+        # 4.3BSD can restart login after shell exit instead of returning EOF.
+        child.sendline("exit")
+    else:
+        _log(f"SIMH: {counters.get('mips', '?')} MIPS emulated; {counters.get('throttle', 'throttle unknown')}")
+        child.sendline("quit")
+    try:
+        child.expect(pexpect.EOF, timeout=30)
+    except pexpect.TIMEOUT:
+        _log("Note: SIMH did not exit cleanly within 30s; will force-terminate")
+
+
+def main(argv: Sequence[str] | None = None) -> int:  # pylint: disable=too-many-return-statements
     """Run stage B and return its process exit code."""
     args = _parse_args(argv)
 
@@ -277,51 +358,99 @@ def main(argv: Sequence[str] | None = None) -> int:
     _log(f"bradman.c: {len(bradman_c.splitlines())} lines")
     _log(f"bio.vintage.yaml: {len(bio_yaml.splitlines())} lines")
 
-    simh_bin, ini_path, workdir = _resolve_simh_config(args)
-    _log(f"Spawning: {simh_bin} {ini_path}  (cwd={workdir})")
-
-    child = pexpect.spawn(
-        simh_bin,
-        [ini_path],
-        cwd=workdir,
-        timeout=_BOOT_TIMEOUT,
-        encoding=None,
+    profile = TimingProfile(args.timing_profile)
+    _log(
+        "Timeouts: "
+        f"boot {profile.timeout('vax-boot', _BOOT_TIMEOUT):.0f}s, "
+        f"inject {profile.timeout('vax-inject', _UUE_TIMEOUT):.0f}s, "
+        f"compile {profile.timeout('vax-compile', _COMPILE_TIMEOUT):.0f}s"
     )
 
-    if args.verbose:
-        child.logfile_read = sys.stderr.buffer
-
+    simh_bin, ini_path, workdir = _resolve_simh_config(args)
+    overlay_dir = None
+    child: pexpect.spawn | None = None
+    transcript = contextlib.ExitStack()
+    sampler: ResourceSampler | None = None
     try:
-        _boot(child)
-        _inject_file(child, "/tmp/bradman.c", bradman_c)
-        # The summary can exceed the guest tty's 256-byte canonical line limit.
-        _inject_file_uue(child, "/tmp/bio.vintage.yaml", bio_yaml.encode("ascii"))
-        _compile_and_run(child)
-        brad_bio_uu = _capture_spool(child)
-        child.sendline("exit")
-        # 4.3BSD can restart login after shell exit instead of returning EOF.
-        try:
-            child.expect(pexpect.EOF, timeout=30)
-        except pexpect.TIMEOUT:
-            _log("Note: SIMH did not exit cleanly within 30s; will force-terminate")
+        # The overlay directory exists from here on; the finally block removes it.
+        if args.disk_overlay_dir:
+            ini_path, overlay_dir = prepare_disk_overlays(ini_path, workdir, args.disk_overlay_dir)
+        _log(f"Spawning: {simh_bin} {ini_path}  (cwd={workdir})")
+
+        started = time.monotonic()
+        child = pexpect.spawn(
+            simh_bin,
+            [ini_path],
+            cwd=workdir,
+            timeout=_BOOT_TIMEOUT,
+            encoding=None,
+        )
+
+        if args.verbose:
+            child.logfile_read = sys.stderr.buffer
+        if args.transcript:
+            transcript.enter_context(ConsoleRecorder("vax", args.transcript)).attach(child)
+        console = ConsoleCounters("vax").attach(child)
+        if args.command_timing:
+            CommandTimer("vax").attach(child)
+        if args.sample_interval > 0:
+            sampler = ResourceSampler("vax", child.pid, args.sample_interval).start()
+
+        with journal_stage(_SOURCE, "vax-boot", profile=profile, console=console, resources=sampler):
+            boot(child, profile)
+        with journal_stage(
+            _SOURCE,
+            "vax-inject",
+            bytes_in=len(bradman_c) + len(bio_yaml),
+            profile=profile,
+            console=console,
+            resources=sampler,
+        ) as event:
+            inject_timeout = profile.timeout("vax-inject", _UUE_TIMEOUT)
+            # Each transfer rewrites its guest file from the start, so a stalled one can run again.
+            retry = RetryPolicy(retry_on=(pexpect.TIMEOUT,), heredoc_terminator="HEREDOC_EOF")
+            retry.run(child, PROMPT, "inject bradman.c", lambda: inject_file(child, "/tmp/bradman.c", bradman_c))
+            # The summary can exceed the guest tty's 256-byte canonical line limit.
+            retry.run(
+                child,
+                PROMPT,
+                "inject bio.vintage.yaml",
+                lambda: inject_file_uue(child, "/tmp/bio.vintage.yaml", bio_yaml.encode("ascii"), inject_timeout),
+            )
+            if retry.retries:
+                event["detail"] = f"Transfers retried after a shell resync: {retry.retries}"
+        _compile_and_run(child, profile, console, sampler)
+        with journal_stage(_SOURCE, "vax-capture", profile=profile, console=console, resources=sampler) as event:
+            brad_bio_uu = capture_spool(child)
+            event["bytes_out"] = len(brad_bio_uu)
+        quit_simh(child, started, sampler)
     except pexpect.TIMEOUT as exc:
         _log(f"TIMEOUT: {exc}")
         _log("Last SIMH output:")
-        if child.before:
+        if child is not None and child.before:
             _log(child.before.decode("ascii", errors="replace")[-500:])
         return 1
     except pexpect.EOF:
         _log("SIMH process exited unexpectedly")
         _log("Last SIMH output:")
-        if child.before:
+        if child is not None and child.before:
             _log(child.before.decode("ascii", errors="replace")[-500:])
         return 1
     except GuestCommandError as exc:
         _log(f"GUEST COMMAND FAILED: {exc}")
         return 1
+    except (OSError, ValueError) as exc:
+        # Overlay setup, the SIMH spawn, and the transcript file fail here.
+        _log(f"ERROR: cannot run SIMH: {exc}")
+        return 1
     finally:
-        if child.isalive():
+        if sampler is not None:
+            sampler.stop()
+        if child is not None and child.isalive():
             child.terminate(force=True)
+        transcript.close()
+        if overlay_dir:
+            shutil.rmtree(overlay_dir, ignore_errors=True)
 
     try:
         validate_uu_spool(brad_bio_uu)
@@ -337,6 +466,11 @@ def main(argv: Sequence[str] | None = None) -> int:
     out_path.write_text(brad_bio_uu, encoding="ascii")
     _log(f"[uucp] Wrote spool: {args.output} ({len(brad_bio_uu.splitlines())} lines)")
 
+    try:
+        profile.save()
+    except OSError as exc:
+        _log(f"Note: could not update timing profile {args.timing_profile}: {exc}")
+
     return 0
 
 
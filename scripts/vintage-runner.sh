@@ -1,34 +1,86 @@
 #!/usr/bin/env bash
 # Usage:
 #   ./scripts/vintage-runner.sh <build-id>
+#   ./scripts/vintage-runner.sh --resume <build-id>
+#
+# --resume reuses the workspace of an earlier run of the same build ID. Stages
+# whose checkpoint still matches their inputs and outputs are skipped; the
+# first stage without one, and every stage after it, runs again.
 #
 # Outputs:
-#   build/vintage/          guest inputs, spool, bio, build log, sections, and status
-#   LOG_DIR                 detailed host log and copied console sections
+#   WORK_DIR                guest inputs, spool, bio, build log, sections, status,
+#                            stage checkpoints, and a Chrome trace-event file
+#                            (trace.json)
+#   LOG_DIR                 detailed host log and copied console sections, events,
+#                            and trace
+#   HISTORY_FILE            one appended timing record per build, and a trend page
 #   stdout                  concise completion status or failure diagnostics
 #
 # Environment:
 #   ROOT_DIR                repository root (default: current directory)
+#   WORK_DIR                per-build workspace, relative to ROOT_DIR unless absolute
+#                            (default: build/vintage/<build-id>)
 #   LOG_DIR                 log directory (default: /tmp/edcloud-vintage)
-#   KEEP_IMAGES             retain local image tags when set to 1 (default: 0)
+#   KEEP_IMAGES             retain local image tags when set to 1 (default: 0);
+#                            tags are removed only after the last concurrent build
 #   ALLOW_LOCAL_IMAGE_BUILD build checked-out Dockerfiles after a pull failure
 #                            when set to 1 (default: 1; production sets 0)
+#   DISK_OVERLAY            attach per-run copy-on-write overlays instead of the
+#                            image's base disks when set to 1 (default: 0)
+#   IMAGE_CACHE_DIR         digest-keyed `docker save` archives checked before
+#                            each pull (default: unset; caching disabled)
+#   IMAGE_CACHE_ZSTD        compress new cache archives with zstd when set to 1
+#                            and zstd is installed (default: 1)
+#   HISTORY_FILE            cross-build history, kept outside the workspace
+#                            (default: ~/.local/state/edcloud-vintage/history.jsonl)
+#   TIMING_PROFILE          per-step guest durations that shorten expect timeouts;
+#                            empty disables it
+#                            (default: ~/.local/state/edcloud-vintage/timing-profile.json)
+#   RESOURCE_SAMPLE_INTERVAL seconds between /proc samples of each SIMH process;
+#                            0 disables sampling (default: 1)
+#   COMMAND_TIMING           1 to record host and guest time of each checked
+#                            guest command; 0 disables (default: 1)
 
 set -euo pipefail
 
+RESUME=0
+if [[ "${1:-}" == "--resume" ]]; then
+  RESUME=1
+  shift
+fi
 BUILD_ID="${1:-}"
 if [[ -z "$BUILD_ID" ]]; then
-  echo "Usage: $0 <build-id>" >&2
+  echo "Usage: $0 [--resume] <build-id>" >&2
+  exit 1
+fi
+# Build IDs name workspaces, log files, and containers.
+if [[ ! "$BUILD_ID" =~ ^[A-Za-z0-9][A-Za-z0-9_.-]*$ ]]; then
+  echo "Invalid build ID: ${BUILD_ID} (use letters, digits, '.', '_', and '-')" >&2
   exit 1
 fi
 
 ROOT_DIR="${ROOT_DIR:-$(pwd)}"
+WORK_DIR="${WORK_DIR:-build/vintage/${BUILD_ID}}"
+[[ "$WORK_DIR" == /* ]] || WORK_DIR="${ROOT_DIR}/${WORK_DIR}"
 LOG_DIR="${LOG_DIR:-/tmp/edcloud-vintage}"
 LOG_FILE="${LOG_DIR}/${BUILD_ID}.log"
 SECTIONS_LOG="${LOG_DIR}/${BUILD_ID}.sections.jsonl"
+# Stage events from the runner and both drivers; the build log renders from it.
+EVENTS_LOG="${WORK_DIR}/events.jsonl"
+# One checkpoint per completed stage, read by --resume.
+CHECKPOINT_DIR="${WORK_DIR}/checkpoints"
 KEEP_IMAGES="${KEEP_IMAGES:-0}"
 ALLOW_LOCAL_IMAGE_BUILD="${ALLOW_LOCAL_IMAGE_BUILD:-1}"
+IMAGE_CACHE_DIR="${IMAGE_CACHE_DIR:-}"
+IMAGE_CACHE_ZSTD="${IMAGE_CACHE_ZSTD:-1}"
+DISK_OVERLAY="${DISK_OVERLAY:-0}"
+HISTORY_FILE="${HISTORY_FILE:-${XDG_STATE_HOME:-${HOME}/.local/state}/edcloud-vintage/history.jsonl}"
+RESOURCE_SAMPLE_INTERVAL="${RESOURCE_SAMPLE_INTERVAL:-1}"
+COMMAND_TIMING="${COMMAND_TIMING:-1}"
+TIMING_PROFILE="${TIMING_PROFILE-${XDG_STATE_HOME:-${HOME}/.local/state}/edcloud-vintage/timing-profile.json}"
 GIT_SHA="${GIT_SHA:-$(git -C "$ROOT_DIR" rev-parse HEAD 2>/dev/null || echo 'unknown')}"
+# One file per build, holding the runner's PID, holds the shared local image tags.
+IMAGE_REFS_DIR="${LOG_DIR}/image-refs"
 
 PDP11_IMAGE="pdp11-pexpect"
 VAX_IMAGE="vax-pexpect"
@@ -37,7 +89,14 @@ VAX_IMAGE="vax-pexpect"
 GHCR_VAX="ghcr.io/brfid/vax-pexpect@sha256:c576baf49fc69a1b4da53abd3e2b3d94541ebcb2fbf864619edcfcd76f4b14f7"
 GHCR_PDP11="ghcr.io/brfid/pdp11-pexpect@sha256:9e44185b9b128a7999292e5780413c46cad19f9af532273b0e739de9c3c8ad77"
 
-mkdir -p "$LOG_DIR"
+if [[ "$RESUME" == "1" && ! -d "$CHECKPOINT_DIR" ]]; then
+  echo "Cannot resume ${BUILD_ID}: no checkpoints in ${WORK_DIR}" >&2
+  exit 1
+fi
+
+mkdir -p "$LOG_DIR" "$WORK_DIR"
+# The journal starts before the first stage, so clear it before any other owned output.
+rm -f "$EVENTS_LOG"
 
 # Keep verbose output in the host log while preserving stdout for concise status.
 exec 3>&1
@@ -47,6 +106,7 @@ on_exit() {
   local code="$1"
 
   if (( code != 0 )); then
+    stage_close failed
     # Failures after environment setup overwrite status from an earlier run.
     set +e
     if [[ -x "${ROOT_DIR}/.venv/bin/python" ]]; then
@@ -57,14 +117,80 @@ on_exit() {
   fi
 
   cleanup
+  stage_close ok
+  cp "$EVENTS_LOG" "${LOG_DIR}/${BUILD_ID}.events.jsonl" 2>/dev/null || true
+  export_trace || echo "Trace: could not export ${BUILD_ID}; continuing" >&3
+  record_history || echo "History: could not record ${BUILD_ID}; continuing" >&3
 
   trap - EXIT
   exit "$code"
 }
 trap 'on_exit $?' EXIT
 
+CURRENT_STAGE=""
+CURRENT_STAGE_START=""
+STAGE_BYTES_IN=0
+STAGE_BYTES_OUT=0
+STAGE_DETAIL=""
+
+epoch_now() {
+  # Bash 5 has microsecond time; older shells record whole seconds.
+  local now="${EPOCHREALTIME:-$(date -u +%s)}"
+  printf '%s' "${now/,/.}"
+}
+
+json_string() {
+  local value="${1//\\/\\\\}"
+  printf '"%s"' "${value//\"/\\\"}"
+}
+
+journal() {
+  # A journal write must never fail the stage it describes.
+  { printf '%s\n' "$1" >> "$EVENTS_LOG"; } 2>/dev/null || true
+}
+
+stage_io() {
+  # Usage: stage_io BYTES_IN BYTES_OUT [DETAIL]
+  STAGE_BYTES_IN="$1"
+  STAGE_BYTES_OUT="$2"
+  STAGE_DETAIL="${3:-}"
+}
+
+file_bytes() {
+  # Usage: file_bytes FILE...; missing files count as zero.
+  local total=0 file
+  for file in "$@"; do
+    if [[ -f "$file" ]]; then
+      total=$(( total + $(wc -c < "$file") ))
+    fi
+  done
+  printf '%d' "$total"
+}
+
+stage_close() {
+  # Usage: stage_close STATUS
+  [[ -n "$CURRENT_STAGE" ]] || return 0
+  journal "$(printf '{"type": "end", "source": "runner", "stage": "%s", "start": %s, "end": %s, "status": "%s", "bytes_in": %d, "bytes_out": %d, "detail": %s}' \
+    "$CURRENT_STAGE" "$CURRENT_STAGE_START" "$(epoch_now)" "$1" \
+    "$STAGE_BYTES_IN" "$STAGE_BYTES_OUT" "$(json_string "$STAGE_DETAIL")")"
+  CURRENT_STAGE=""
+}
+
+journal_step() {
+  # Usage: journal_step SOURCE STAGE START STATUS DETAIL
+  # Records a step that ran outside the stage sequence, such as a parallel fetch.
+  journal "$(printf '{"type": "end", "source": "%s", "stage": "%s", "start": %s, "end": %s, "status": "%s", "bytes_in": 0, "bytes_out": 0, "detail": %s}' \
+    "$1" "$2" "$3" "$(epoch_now)" "$4" "$(json_string "$5")")"
+}
+
 stage() {
+  # Starting a stage completes the previous one; on_exit records a failure.
+  stage_close ok
+  CURRENT_STAGE="$1"
+  CURRENT_STAGE_START="$(epoch_now)"
+  stage_io 0 0
   printf '\n[%s] %s\n' "$(date -u '+%Y-%m-%d %H:%M:%S')" "$1"
+  journal "$(printf '{"type": "start", "source": "runner", "stage": "%s", "start": %s}' "$1" "$CURRENT_STAGE_START")"
 }
 
 require_bin() {
@@ -80,13 +206,46 @@ cleanup() {
   # Remove containers left by an interrupted run.
   if command -v docker >/dev/null 2>&1; then
     docker ps -aq --filter "label=vintage-build-id=${BUILD_ID}" | xargs -r docker rm -f || true
+    release_image_refs || true
+  fi
 
-    if [[ "$KEEP_IMAGES" != "1" ]]; then
-      docker rmi "$PDP11_IMAGE" "$VAX_IMAGE" 2>/dev/null || true
+  rm -f "${WORK_DIR}/bradman.c" || true
+}
+
+acquire_image_refs() {
+  mkdir -p "$IMAGE_REFS_DIR"
+  (
+    if command -v flock >/dev/null 2>&1; then flock 9; fi
+    echo "$$" > "${IMAGE_REFS_DIR}/${BUILD_ID}"
+  ) 9>"${IMAGE_REFS_DIR}.lock"
+}
+
+_prune_dead_image_refs() {
+  # A build killed before cleanup leaves its reference; drop those whose runner is gone.
+  # Call with the refs lock held. A reused PID only keeps the tags longer.
+  local ref pid
+  for ref in "$IMAGE_REFS_DIR"/*; do
+    [[ -f "$ref" ]] || continue
+    pid="$(head -n 1 "$ref" 2>/dev/null)" || pid=""
+    if [[ ! "$pid" =~ ^[0-9]+$ ]] || ! ps -p "$pid" >/dev/null 2>&1; then
+      echo "Dropping stale image reference $(basename "$ref") (runner PID ${pid:-unknown} is gone)"
+      rm -f "$ref"
     fi
-  fi
+  done
+}
+
+release_image_refs() {
+  [[ -e "${IMAGE_REFS_DIR}/${BUILD_ID}" ]] || return 0
 
-  rm -f "${ROOT_DIR}/build/vintage/bradman.c" || true
+  # Concurrent builds share the local tags; the last build to finish removes them.
+  (
+    if command -v flock >/dev/null 2>&1; then flock 9; fi
+    rm -f "${IMAGE_REFS_DIR}/${BUILD_ID}"
+    _prune_dead_image_refs
+    if [[ "$KEEP_IMAGES" != "1" ]] && [[ -z "$(ls -A "$IMAGE_REFS_DIR")" ]]; then
+      docker rmi "$PDP11_IMAGE" "$VAX_IMAGE" 2>/dev/null || true
+    fi
+  ) 9>"${IMAGE_REFS_DIR}.lock"
 }
 
 prepare_host() {
@@ -97,45 +256,248 @@ prepare_host() {
   require_bin python3
 
   cd "$ROOT_DIR"
-  mkdir -p build/vintage
+  mkdir -p "$WORK_DIR"
 
   # Clear all files owned by one run before creating new status or artifacts.
+  # A resumed run keeps the stage outputs its checkpoints describe.
+  if [[ "$RESUME" != "1" ]]; then
+    rm -f \
+      "${WORK_DIR}/bio.vintage.yaml" \
+      "${WORK_DIR}/brad.bio.uu" \
+      "${WORK_DIR}/brad.bio.txt" \
+      "${WORK_DIR}/pdp11.cast" \
+      "${WORK_DIR}/vax.cast"
+    rm -rf "$CHECKPOINT_DIR"
+  fi
   rm -f \
-    build/vintage/bio.vintage.yaml \
-    build/vintage/build.log.html \
-    build/vintage/brad.bio.uu \
-    build/vintage/brad.bio.txt \
-    build/vintage/bradman.c \
-    build/vintage/pipeline-status.json \
-    build/vintage/sections.jsonl
+    "${WORK_DIR}/build.log.html" \
+    "${WORK_DIR}/bradman.c" \
+    "${WORK_DIR}/pipeline-status.json" \
+    "${WORK_DIR}/sections.jsonl" \
+    "${WORK_DIR}/trace.json"
+  rm -rf "${WORK_DIR}/build.log"
 
   if [[ ! -x .venv/bin/python ]]; then
     python3 -m venv .venv
   fi
 
   # A standalone run installs only when the local environment is incomplete.
-  if ! .venv/bin/python -c 'import yaml; import resume_generator.vintage_yaml' >/dev/null 2>&1; then
+  if ! .venv/bin/python -c 'import yaml; import resume_generator.session' >/dev/null 2>&1; then
     .venv/bin/python -m pip install --quiet -e .
   fi
 }
 
+# Stages that write a checkpoint, in run order.
+CHECKPOINT_STAGES=(generate-vintage-yaml stage-b-vax stage-a-pdp11)
+REUSED_STAGES=()
+
+checkpoint_args() {
+  # Usage: checkpoint_args STAGE
+  # Sets CHECKPOINT_ARGS to the files and settings a stage's output depends on,
+  # and CHECKPOINT_OUTPUTS to the files it writes. Paths are relative to ROOT_DIR.
+  case "$1" in
+    generate-vintage-yaml)
+      CHECKPOINT_ARGS=(
+        --input site.yaml --input resume.yaml
+        --input resume_generator/session.py --input resume_generator/vintage_yaml.py
+        --input resume_generator/vintage_contract.py
+        --key "build_date=$(date +%F)"
+      )
+      CHECKPOINT_OUTPUTS=("${WORK_DIR}/bio.vintage.yaml")
+      ;;
+    stage-b-vax)
+      CHECKPOINT_ARGS=(
+        --input "${WORK_DIR}/bio.vintage.yaml" --input vintage/machines/vax/bradman.c
+        --input scripts/vax_pexpect.py --input scripts/simh_session.py
+        --key "image=${GHCR_VAX}"
+      )
+      CHECKPOINT_OUTPUTS=("${WORK_DIR}/brad.bio.uu")
+      ;;
+    stage-a-pdp11)
+      CHECKPOINT_ARGS=(
+        --input "${WORK_DIR}/brad.bio.uu"
+        --input scripts/pdp11_pexpect.py --input scripts/simh_session.py
+        --key "image=${GHCR_PDP11}"
+      )
+      CHECKPOINT_OUTPUTS=("${WORK_DIR}/brad.bio.txt")
+      ;;
+    *)
+      echo "No checkpoint definition for stage $1"
+      return 1
+      ;;
+  esac
+}
+
+stage_reused() {
+  # Usage: stage_reused STAGE
+  local name
+  for name in ${REUSED_STAGES[@]+"${REUSED_STAGES[@]}"}; do
+    [[ "$name" == "$1" ]] && return 0
+  done
+  return 1
+}
+
+plan_resume() {
+  stage "plan-resume"
+  cd "$ROOT_DIR"
+
+  # Stages are reused in order; one changed stage invalidates every later one.
+  local name last_reused="" rerun=0
+  for name in "${CHECKPOINT_STAGES[@]}"; do
+    if (( ! rerun )); then
+      checkpoint_args "$name"
+      if .venv/bin/python -m resume_generator.checkpoint check "$CHECKPOINT_DIR" "$name" "${CHECKPOINT_ARGS[@]}"; then
+        REUSED_STAGES+=("$name")
+        last_reused="$name"
+        continue
+      fi
+      rerun=1
+    fi
+    rm -f "${CHECKPOINT_DIR}/${name}.json" "${CHECKPOINT_DIR}/${name}.sections.jsonl"
+  done
+
+  # Console sections of the reused guest stages feed the new build log.
+  if [[ -n "$last_reused" && -f "${CHECKPOINT_DIR}/${last_reused}.sections.jsonl" ]]; then
+    cp "${CHECKPOINT_DIR}/${last_reused}.sections.jsonl" "${WORK_DIR}/sections.jsonl"
+  fi
+
+  stage_io 0 0 "Reused ${#REUSED_STAGES[@]} of ${#CHECKPOINT_STAGES[@]} checkpointed stages"
+  printf 'Resuming %s: reused %d of %d checkpointed stages\n' \
+    "$BUILD_ID" "${#REUSED_STAGES[@]}" "${#CHECKPOINT_STAGES[@]}" >&3
+}
+
+run_stage() {
+  # Usage: run_stage STAGE FUNCTION
+  # Skips a stage reused by --resume; otherwise runs it and records its checkpoint.
+  if stage_reused "$1"; then
+    stage "$1"
+    checkpoint_args "$1"
+    stage_io 0 "$(file_bytes "${CHECKPOINT_OUTPUTS[@]}")" "Reused checkpoint"
+    return 0
+  fi
+
+  "$2"
+
+  cd "$ROOT_DIR"
+  checkpoint_args "$1"
+  local outputs=() output
+  for output in "${CHECKPOINT_OUTPUTS[@]}"; do
+    outputs+=(--output "$output")
+  done
+  .venv/bin/python -m resume_generator.checkpoint write "$CHECKPOINT_DIR" "$1" \
+    "${CHECKPOINT_ARGS[@]}" "${outputs[@]}"
+  # A resumed build restores the console sections recorded up to its last reused stage.
+  if [[ -f "${WORK_DIR}/sections.jsonl" ]]; then
+    cp "${WORK_DIR}/sections.jsonl" "${CHECKPOINT_DIR}/$1.sections.jsonl"
+  fi
+}
+
+guest_stages_run() {
+  # True while any guest stage still has to run in a container.
+  ! stage_reused stage-b-vax || ! stage_reused stage-a-pdp11
+}
+
+_image_cache_stem() {
+  # Usage: _image_cache_stem GHCR_REFERENCE
+  printf '%s/sha256-%s' "$IMAGE_CACHE_DIR" "${1##*@sha256:}"
+}
+
+_load_cached_image() {
+  # Usage: _load_cached_image LOCAL_TAG GHCR_REFERENCE
+  local local_tag="$1"
+  local ghcr_ref="$2"
+  [[ -n "$IMAGE_CACHE_DIR" ]] || return 1
+
+  local stem expected_id loaded loaded_ref loaded_id
+  stem="$(_image_cache_stem "$ghcr_ref")"
+  [[ -s "${stem}.id" ]] || return 1
+  expected_id="$(<"${stem}.id")"
+
+  if [[ -s "${stem}.tar.zst" ]] && command -v zstd >/dev/null 2>&1; then
+    loaded="$(set -o pipefail; zstd -dcq "${stem}.tar.zst" | docker load)" || return 1
+  elif [[ -s "${stem}.tar" ]]; then
+    loaded="$(docker load -i "${stem}.tar")" || return 1
+  else
+    return 1
+  fi
+
+  # The classic image store does not restore the pinned digest on load, so
+  # the check uses the ID that `docker load` reports. An archive saved by
+  # digest carries no tag and reports `Loaded image ID:`; the containerd store
+  # reports `Loaded image:` with the reference. Docker derives the ID from the
+  # image config, which names every layer's digest, so an archive whose
+  # content differs from the pulled image cannot match the recorded ID.
+  loaded_id="$(sed -n 's/^Loaded image ID: //p' <<<"$loaded" | head -n 1)"
+  if [[ -z "$loaded_id" ]]; then
+    loaded_ref="$(sed -n 's/^Loaded image: //p' <<<"$loaded" | head -n 1)"
+    if [[ -n "$loaded_ref" ]]; then
+      loaded_id="$(docker image inspect --format '{{.Id}}' "$loaded_ref" 2>/dev/null)" || loaded_id=""
+    fi
+  fi
+  if [[ "$loaded_id" != "$expected_id" ]]; then
+    echo "Image cache entry for ${ghcr_ref} loaded ${loaded_id:-no image}, expected ${expected_id}; discarding it"
+    rm -f "${stem}.id" "${stem}.tar" "${stem}.tar.zst"
+    return 1
+  fi
+
+  docker tag "$expected_id" "$local_tag" || return 1
+  echo "Image cache hit: loaded ${local_tag} (${expected_id}) for ${ghcr_ref}"
+}
+
+_save_cached_image() {
+  # Usage: _save_cached_image GHCR_REFERENCE
+  local ghcr_ref="$1"
+  [[ -n "$IMAGE_CACHE_DIR" ]] || return 0
+  mkdir -p "$IMAGE_CACHE_DIR"
+
+  local stem image_id tmp
+  stem="$(_image_cache_stem "$ghcr_ref")"
+  image_id="$(docker image inspect --format '{{.Id}}' "$ghcr_ref")" || return 1
+  tmp="${stem}.tmp.${BUILD_ID}"
+
+  # Write the archive before its ID so a reader never sees a partial entry.
+  # The caller tests this function, which turns errexit off inside it, so
+  # every step checks its own status; pipefail fails the pipe on docker save.
+  if [[ "$IMAGE_CACHE_ZSTD" == "1" ]] && command -v zstd >/dev/null 2>&1; then
+    (set -o pipefail; docker save "$ghcr_ref" | zstd -q -T0 -f -o "$tmp") || { rm -f "$tmp"; return 1; }
+    mv -f "$tmp" "${stem}.tar.zst" || return 1
+  else
+    docker save -o "$tmp" "$ghcr_ref" || { rm -f "$tmp"; return 1; }
+    mv -f "$tmp" "${stem}.tar" || return 1
+  fi
+  printf '%s\n' "$image_id" > "${tmp}.id" || return 1
+  mv -f "${tmp}.id" "${stem}.id" || return 1
+  echo "Image cache: saved ${ghcr_ref} as ${image_id}"
+}
+
 _pull_or_build() {
   # Usage: _pull_or_build LOCAL_TAG GHCR_REFERENCE DOCKERFILE [BUILD_ARGS]
   local local_tag="$1"; shift
   local ghcr_ref="$1"; shift
   local dockerfile="$1"; shift
+  local started
+  started="$(epoch_now)"
+
+  if _load_cached_image "$local_tag" "$ghcr_ref"; then
+    journal_step images "image-${local_tag}" "$started" ok "cache hit"
+    return 0
+  fi
 
   if docker pull "$ghcr_ref" 2>/dev/null; then
     docker tag "$ghcr_ref" "$local_tag"
     echo "Pulled ${local_tag} from ${ghcr_ref}"
+    _save_cached_image "$ghcr_ref" || echo "Image cache: could not save ${ghcr_ref}; continuing"
+    journal_step images "image-${local_tag}" "$started" ok "pulled"
   else
     if [[ "$ALLOW_LOCAL_IMAGE_BUILD" != "1" ]]; then
       echo "Pull failed for pinned image ${ghcr_ref}; local fallback is disabled"
+      journal_step images "image-${local_tag}" "$started" failed "pull failed"
       return 1
     fi
     echo "Pull failed for ${ghcr_ref}; building from the checked-out Dockerfile"
     docker build -f "$dockerfile" -t "$local_tag" "$@" .
     echo "Built ${local_tag} locally"
+    journal_step images "image-${local_tag}" "$started" ok "built"
   fi
 }
 
@@ -143,65 +505,140 @@ build_pexpect_images() {
   stage "build-pexpect-images"
   cd "$ROOT_DIR"
 
-  _pull_or_build \
-    "$PDP11_IMAGE" \
-    "$GHCR_PDP11" \
-    vintage/machines/pdp11/Dockerfile.pdp11-pexpect
+  acquire_image_refs
+
+  # The two images are independent, so fetch them concurrently. A resumed
+  # build fetches only the images of the guest stages it runs again.
+  local pdp11_pid="" vax_pid="" failed=0
+  if ! stage_reused stage-a-pdp11; then
+    _pull_or_build \
+      "$PDP11_IMAGE" \
+      "$GHCR_PDP11" \
+      vintage/machines/pdp11/Dockerfile.pdp11-pexpect &
+    pdp11_pid=$!
+  fi
+
+  if ! stage_reused stage-b-vax; then
+    _pull_or_build \
+      "$VAX_IMAGE" \
+      "$GHCR_VAX" \
+      vintage/machines/vax/Dockerfile.vax-pexpect &
+    vax_pid=$!
+  fi
 
-  _pull_or_build \
-    "$VAX_IMAGE" \
-    "$GHCR_VAX" \
-    vintage/machines/vax/Dockerfile.vax-pexpect
+  if [[ -n "$pdp11_pid" ]]; then
+    wait "$pdp11_pid" || failed=1
+  fi
+  if [[ -n "$vax_pid" ]]; then
+    wait "$vax_pid" || failed=1
+  fi
+  if (( failed )); then
+    echo "Image preparation failed"
+    return 1
+  fi
 
   echo "Images ready: ${PDP11_IMAGE}  ${VAX_IMAGE}"
 }
 
-generate_vintage_yaml() {
-  stage "generate-vintage-yaml"
+start_machine_container() {
+  # Usage: start_machine_container MACHINE IMAGE [DOCKER_RUN_ARGS]
+  local machine="$1"; shift
+  local image="$1"; shift
+
+  # Both drivers read and update the timing profile through its mounted directory.
+  local profile_mount=()
+  if [[ -n "$TIMING_PROFILE" ]]; then
+    mkdir -p "$(dirname "$TIMING_PROFILE")"
+    profile_mount=(-v "$(dirname "$TIMING_PROFILE"):/profile")
+  fi
+
+  # An idle init-reaped process keeps the container up; stages run via exec.
+  docker run -d --rm --init \
+    --name "vintage-${BUILD_ID}-${machine}" \
+    --label "vintage-build-id=${BUILD_ID}" \
+    -v "${WORK_DIR}:/build" \
+    -e "SECTIONS_LOG=/build/sections.jsonl" \
+    -e "EVENTS_LOG=/build/events.jsonl" \
+    ${profile_mount[@]+"${profile_mount[@]}"} \
+    "$@" \
+    --entrypoint sleep \
+    "$image" \
+    infinity >/dev/null
+  echo "Started vintage-${BUILD_ID}-${machine} from ${image}"
+}
+
+start_containers() {
+  stage "start-containers"
   cd "$ROOT_DIR"
 
-  .venv/bin/python - <<'PY'
-from datetime import date
-from pathlib import Path
+  # Each stage runs in the same container for the rest of the build.
+  if ! stage_reused stage-b-vax; then
+    start_machine_container vax "$VAX_IMAGE" \
+      -v "$(pwd)/scripts/vax_pexpect.py:/opt/vax_pexpect.py:ro" \
+      -v "$(pwd)/scripts/simh_session.py:/opt/simh_session.py:ro"
+  fi
 
-import yaml
+  if ! stage_reused stage-a-pdp11; then
+    start_machine_container pdp11 "$PDP11_IMAGE" \
+      -v "$(pwd)/scripts/pdp11_pexpect.py:/opt/pdp11/pdp11_pexpect.py:ro" \
+      -v "$(pwd)/scripts/simh_session.py:/opt/pdp11/simh_session.py:ro"
+  fi
+}
 
-from resume_generator.vintage_yaml import build_vintage_bio, emit_vintage_yaml
+generate_vintage_yaml() {
+  stage "generate-vintage-yaml"
+  cd "$ROOT_DIR"
 
-site = yaml.safe_load(Path("site.yaml").read_text(encoding="utf-8"))
-resume = yaml.safe_load(Path("resume.yaml").read_text(encoding="utf-8"))
-vintage = build_vintage_bio(site, resume, build_date=date.today())
-out_path = Path("build/vintage/bio.vintage.yaml")
-out_path.parent.mkdir(parents=True, exist_ok=True)
-out_path.write_text(emit_vintage_yaml(vintage), encoding="utf-8")
-print(f"Wrote: {out_path}  ({sum(1 for _ in out_path.open())} lines)")
-PY
+  .venv/bin/python -m resume_generator.session vintage-yaml "${WORK_DIR}/bio.vintage.yaml"
+
+  stage_io \
+    "$(file_bytes site.yaml resume.yaml)" \
+    "$(file_bytes "${WORK_DIR}/bio.vintage.yaml")" \
+    "Wrote: bio.vintage.yaml ($(wc -l < "${WORK_DIR}/bio.vintage.yaml") lines)"
 }
 
 stage_b_vax() {
   stage "stage-b-vax"
   cd "$ROOT_DIR"
 
+  local overlay_args=()
+  if [[ "$DISK_OVERLAY" == "1" ]]; then
+    overlay_args=(--disk-overlay-dir /tmp)
+  fi
+  local profile_args=()
+  if [[ -n "$TIMING_PROFILE" ]]; then
+    profile_args=(--timing-profile "/profile/$(basename "$TIMING_PROFILE")")
+  fi
+  local timing_args=()
+  if [[ "$COMMAND_TIMING" == "1" ]]; then
+    timing_args=(--command-timing)
+  fi
+
   # Put both VAX inputs in the bind-mounted build directory.
-  cp vintage/machines/vax/bradman.c build/vintage/bradman.c
+  cp vintage/machines/vax/bradman.c "${WORK_DIR}/bradman.c"
 
-  docker run --rm \
-    --label "vintage-build-id=${BUILD_ID}" \
-    -v "$(pwd)/build/vintage:/build" \
-    -v "$(pwd)/scripts/vax_pexpect.py:/opt/vax_pexpect.py:ro" \
-    -v "$(pwd)/scripts/simh_session.py:/opt/simh_session.py:ro" \
-    -e "SECTIONS_LOG=/build/sections.jsonl" \
-    "$VAX_IMAGE" \
+  # Matches the image entrypoint, which the idle container overrides.
+  docker exec "vintage-${BUILD_ID}-vax" \
+    python3 /opt/vax_pexpect.py \
     --bradman /build/bradman.c \
     --bio-yaml /build/bio.vintage.yaml \
-    --output /build/brad.bio.uu
-
-  if [[ ! -s build/vintage/brad.bio.uu ]]; then
-    echo "Stage B (VAX) failed: build/vintage/brad.bio.uu is missing or empty"
+    --output /build/brad.bio.uu \
+    --transcript /build/vax.cast \
+    --sample-interval "$RESOURCE_SAMPLE_INTERVAL" \
+    ${overlay_args[@]+"${overlay_args[@]}"} \
+    ${profile_args[@]+"${profile_args[@]}"} \
+    ${timing_args[@]+"${timing_args[@]}"}
+
+  if [[ ! -s "${WORK_DIR}/brad.bio.uu" ]]; then
+    echo "Stage B (VAX) failed: ${WORK_DIR}/brad.bio.uu is missing or empty"
     return 1
   fi
 
-  echo "Stage B complete: build/vintage/brad.bio.uu  ($(wc -l < build/vintage/brad.bio.uu) encoded lines)"
+  echo "Stage B complete: ${WORK_DIR}/brad.bio.uu  ($(wc -l < "${WORK_DIR}/brad.bio.uu") encoded lines)"
+  stage_io \
+    "$(file_bytes "${WORK_DIR}/bradman.c" "${WORK_DIR}/bio.vintage.yaml")" \
+    "$(file_bytes "${WORK_DIR}/brad.bio.uu")" \
+    "[uucp] Wrote spool: brad.bio.uu ($(wc -l < "${WORK_DIR}/brad.bio.uu") lines)"
   echo "[uucp] brad.bio.uu spooled on VAX; routing via host to PDP-11"
 }
 
@@ -209,42 +646,68 @@ stage_a_pdp11() {
   stage "stage-a-pdp11"
   cd "$ROOT_DIR"
 
+  local overlay_args=()
+  if [[ "$DISK_OVERLAY" == "1" ]]; then
+    overlay_args=(--disk-overlay-dir /tmp)
+  fi
+  local profile_args=()
+  if [[ -n "$TIMING_PROFILE" ]]; then
+    profile_args=(--timing-profile "/profile/$(basename "$TIMING_PROFILE")")
+  fi
+  local timing_args=()
+  if [[ "$COMMAND_TIMING" == "1" ]]; then
+    timing_args=(--command-timing)
+  fi
+
   echo "[uucp] Delivering brad.bio.uu spool to PDP-11…"
-  docker run --rm \
-    --label "vintage-build-id=${BUILD_ID}" \
-    -v "$(pwd)/build/vintage:/build" \
-    -v "$(pwd)/scripts/pdp11_pexpect.py:/opt/pdp11/pdp11_pexpect.py:ro" \
-    -v "$(pwd)/scripts/simh_session.py:/opt/pdp11/simh_session.py:ro" \
-    -e "SECTIONS_LOG=/build/sections.jsonl" \
-    "$PDP11_IMAGE" \
+  # Matches the image entrypoint, which the idle container overrides.
+  docker exec "vintage-${BUILD_ID}-pdp11" \
+    python3 /opt/pdp11/pdp11_pexpect.py \
+    --ini /opt/pdp11/pdp11-pexpect.ini \
+    --workdir /opt/pdp11 \
     --input /build/brad.bio.uu \
-    --output /build/brad.bio.txt
-
-  if [[ ! -s build/vintage/brad.bio.txt ]]; then
-    echo "Stage A (PDP-11) failed: build/vintage/brad.bio.txt is missing or empty"
+    --output /build/brad.bio.txt \
+    --transcript /build/pdp11.cast \
+    --sample-interval "$RESOURCE_SAMPLE_INTERVAL" \
+    ${overlay_args[@]+"${overlay_args[@]}"} \
+    ${profile_args[@]+"${profile_args[@]}"} \
+    ${timing_args[@]+"${timing_args[@]}"}
+
+  if [[ ! -s "${WORK_DIR}/brad.bio.txt" ]]; then
+    echo "Stage A (PDP-11) failed: ${WORK_DIR}/brad.bio.txt is missing or empty"
     return 1
   fi
 
   echo "[uucp] brad.bio.uu delivered and decoded on PDP-11"
-  echo "Stage A complete: build/vintage/brad.bio.txt  ($(wc -l < build/vintage/brad.bio.txt) lines)"
+  echo "Stage A complete: ${WORK_DIR}/brad.bio.txt  ($(wc -l < "${WORK_DIR}/brad.bio.txt") lines)"
+  stage_io \
+    "$(file_bytes "${WORK_DIR}/brad.bio.uu")" \
+    "$(file_bytes "${WORK_DIR}/brad.bio.txt")" \
+    "Wrote: brad.bio.txt ($(wc -l < "${WORK_DIR}/brad.bio.txt") lines)"
 }
 
 emit_status_json() {
   # Write current-run status after success and again after any later failure.
+  # A successful run closes its last stage so the status carries its duration.
+  stage_close ok
   cd "$ROOT_DIR"
 
-  local status_file="build/vintage/pipeline-status.json"
+  local status_file="${WORK_DIR}/pipeline-status.json"
   local exit_code="${1:-0}"
   local now
   now="$(date -u '+%Y-%m-%dT%H:%M:%SZ')"
 
   local yaml_lines=0 spool_lines=0 bio_lines=0
-  [[ -s build/vintage/bio.vintage.yaml ]] && yaml_lines=$(wc -l < build/vintage/bio.vintage.yaml)
-  [[ -s build/vintage/brad.bio.uu ]] && spool_lines=$(wc -l < build/vintage/brad.bio.uu)
-  [[ -s build/vintage/brad.bio.txt ]] && bio_lines=$(wc -l < build/vintage/brad.bio.txt)
+  [[ -s "${WORK_DIR}/bio.vintage.yaml" ]] && yaml_lines=$(wc -l < "${WORK_DIR}/bio.vintage.yaml")
+  [[ -s "${WORK_DIR}/brad.bio.uu" ]] && spool_lines=$(wc -l < "${WORK_DIR}/brad.bio.uu")
+  [[ -s "${WORK_DIR}/brad.bio.txt" ]] && bio_lines=$(wc -l < "${WORK_DIR}/brad.bio.txt")
 
-  .venv/bin/python - "$exit_code" "$now" "$yaml_lines" "$spool_lines" "$bio_lines" "$BUILD_ID" "$GIT_SHA" > "$status_file" <<'PY'
+  .venv/bin/python - "$exit_code" "$now" "$yaml_lines" "$spool_lines" "$bio_lines" "$BUILD_ID" "$GIT_SHA" "$EVENTS_LOG" "${WORK_DIR}/sections.jsonl" > "$status_file" <<'PY'
 import json, sys
+from pathlib import Path
+
+from resume_generator.build_log import load_section_records, resource_usage
+from resume_generator.journal import critical_path_seconds, load_journal, stage_timings, status_stages
 
 exit_code    = int(sys.argv[1])
 completed_at = sys.argv[2]
@@ -253,6 +716,24 @@ spool_lines  = int(sys.argv[4])
 bio_lines    = int(sys.argv[5])
 build_id     = sys.argv[6]
 git_sha      = sys.argv[7] if len(sys.argv) > 7 else ""
+timings      = stage_timings(load_journal(Path(sys.argv[8]))) if len(sys.argv) > 8 else []
+records      = load_section_records(Path(sys.argv[9])) if len(sys.argv) > 9 else None
+usage        = resource_usage(records["metrics"]) if records else {}
+simh         = records["simh"] if records else {}
+
+# Journaled durations share keys with the artifact counts below.
+stages = status_stages(timings)
+for name, counts in (
+    ("generate_vintage_yaml", {"lines": yaml_lines}),
+    ("stage_b_vax",           {"brad_bio_uu_lines": spool_lines}),
+    ("stage_a_pdp11",         {"brad_bio_txt_lines": bio_lines}),
+):
+    stages[name] = {**counts, **stages.get(name, {})}
+# Sampled SIMH resource usage joins each guest step's timing.
+total_usage = usage.pop("total", None)
+for step, values in usage.items():
+    key = step.replace("-", "_")
+    stages[key] = {**stages.get(key, {}), **values}
 
 status = {
     "pipeline": "edcloud-vintage",
@@ -261,35 +742,71 @@ status = {
     "completed_at": completed_at,
     "exit_code": exit_code,
     "result": "success" if exit_code == 0 else "failure",
-    "stages": {
-        "generate_vintage_yaml": {"lines": yaml_lines},
-        "stage_b_vax":           {"brad_bio_uu_lines": spool_lines},
-        "stage_a_pdp11":         {"brad_bio_txt_lines": bio_lines},
-    },
+    "critical_path_seconds": round(critical_path_seconds(timings), 3),
+    "stages": stages,
 }
+if total_usage:
+    status["resources"] = total_usage
+# Emulated MIPS per machine separates a slow host from a slow guest step.
+if simh:
+    status["simh"] = simh
 print(json.dumps(status, indent=2))
 PY
 }
 
+record_history() {
+  # Append this build's timings to the cross-build history and refresh its trend page.
+  [[ -s "${WORK_DIR}/pipeline-status.json" && -x "${ROOT_DIR}/.venv/bin/python" ]] || return 0
+  # Reused stages take no time, so a resumed build would skew the stage percentiles.
+  if [[ "$RESUME" == "1" ]]; then
+    echo "History: ${BUILD_ID} was resumed; not recording its timings"
+    return 0
+  fi
+  cd "$ROOT_DIR"
+
+  .venv/bin/python -m resume_generator.history append "$HISTORY_FILE" \
+    --status "${WORK_DIR}/pipeline-status.json" \
+    --events "$EVENTS_LOG" \
+    --spool "${WORK_DIR}/brad.bio.uu" \
+    --bio "${WORK_DIR}/brad.bio.txt" &&
+  .venv/bin/python -m resume_generator.history render "$HISTORY_FILE" \
+    > "${HISTORY_FILE%.jsonl}.html"
+}
+
+export_trace() {
+  # Merge the host, container, and guest spans into one Perfetto-readable trace.
+  [[ -s "$EVENTS_LOG" && -x "${ROOT_DIR}/.venv/bin/python" ]] || return 0
+  cd "$ROOT_DIR"
+
+  .venv/bin/python -m resume_generator.tracing export "$EVENTS_LOG" --output "${WORK_DIR}/trace.json" &&
+  cp "${WORK_DIR}/trace.json" "${LOG_DIR}/${BUILD_ID}.trace.json"
+}
+
 write_build_log() {
   stage "finalize-artifacts"
   cd "$ROOT_DIR"
 
-  # The renderer reads console sections beside the host log.
-  if [[ -s build/vintage/sections.jsonl ]]; then
-    cp build/vintage/sections.jsonl "$SECTIONS_LOG"
+  # The renderer reads console sections beside the event journal.
+  if [[ -s "${WORK_DIR}/sections.jsonl" ]]; then
+    cp "${WORK_DIR}/sections.jsonl" "$SECTIONS_LOG"
   fi
 
+  # Large console sections become fragments the page loads when opened.
   .venv/bin/python -m resume_generator.build_log \
-    "$LOG_FILE" \
+    "$EVENTS_LOG" \
     "$BUILD_ID" \
     "$SECTIONS_LOG" \
-    > build/vintage/build.log.html
+    --fragment-dir "${WORK_DIR}/build.log" \
+    > "${WORK_DIR}/build.log.html"
 
-  if [[ ! -s build/vintage/build.log.html ]]; then
-    echo "write-build-log: build/vintage/build.log.html is missing or empty" >&2
+  if [[ ! -s "${WORK_DIR}/build.log.html" ]]; then
+    echo "write-build-log: ${WORK_DIR}/build.log.html is missing or empty" >&2
     return 1
   fi
+  stage_io \
+    "$(file_bytes "$EVENTS_LOG" "$SECTIONS_LOG")" \
+    "$(file_bytes "${WORK_DIR}/build.log.html")" \
+    "Wrote: build.log.html"
 }
 
 verify_final_artifacts() {
@@ -298,8 +815,8 @@ verify_final_artifacts() {
 
   local artifact
   for artifact in brad.bio.txt build.log.html pipeline-status.json; do
-    if [[ ! -s "build/vintage/${artifact}" ]]; then
-      echo "Final artifact is missing or empty: build/vintage/${artifact}" >&2
+    if [[ ! -s "${WORK_DIR}/${artifact}" ]]; then
+      echo "Final artifact is missing or empty: ${WORK_DIR}/${artifact}" >&2
       return 1
     fi
   done
@@ -307,16 +824,22 @@ verify_final_artifacts() {
 
 main() {
   prepare_host
-  build_pexpect_images
-  generate_vintage_yaml
-  stage_b_vax
-  stage_a_pdp11
+  if [[ "$RESUME" == "1" ]]; then
+    plan_resume
+  fi
+  if guest_stages_run; then
+    build_pexpect_images
+    start_containers
+  fi
+  run_stage generate-vintage-yaml generate_vintage_yaml
+  run_stage stage-b-vax stage_b_vax
+  run_stage stage-a-pdp11 stage_a_pdp11
   emit_status_json 0
   write_build_log
   verify_final_artifacts
   printf 'Vintage pipeline complete: build_id=%s artifacts=%s log=%s\n' \
     "$BUILD_ID" \
-    "${ROOT_DIR}/build/vintage" \
+    "$WORK_DIR" \
     "$LOG_FILE" \
     >&3
 }
@@ -0,0 +1,173 @@
+"""Tests for the SIMH configuration benchmark sweep."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from resume_generator.bench import (
+    MACHINES,
+    Sweep,
+    Variant,
+    docker_command,
+    format_table,
+    main,
+    parse_axes,
+    render_ini,
+    run_metrics,
+    variants,
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _template(machine: str) -> str:
+    return (ROOT / MACHINES[machine].template).read_text(encoding="ascii")
+
+
+def test_render_ini_replaces_vax_idle_memory_and_adds_throttle() -> None:
+    rendered = render_ini(_template("vax"), [("memory", "32m"), ("idle", "off"), ("throttle", "50%")])
+    lines = rendered.splitlines()
+
+    assert "set cpu idle=QUASIJARUS" not in lines
+    assert "set cpu 64m" not in lines
+    start = lines.index("set cpu 32m")
+    assert lines[start : start + 3] == ["set cpu 32m", "set cpu noidle", "set throttle 50%"]
+    # Everything else in the template is kept in order.
+    assert lines[start + 3] == 'set prompt "vaxbsd>> "'
+    assert lines[-1] == "quit"
+
+
+def test_render_ini_keeps_settings_it_does_not_replace() -> None:
+    rendered = render_ini(_template("pdp11"), [("cpu-model", "11/94"), ("memory", "template")])
+    lines = rendered.splitlines()
+
+    # Setting the model resets memory, so the kept size follows the new model.
+    assert lines.index("set cpu 11/94") < lines.index("set cpu 4M")
+    assert "set cpu 11/73 4M" not in lines
+    assert render_ini(_template("pdp11"), []) == _template("pdp11")
+
+    with pytest.raises(ValueError, match="unknown axes: clock"):
+        render_ini(_template("pdp11"), [("clock", "fast")])
+
+
+def test_variants_cover_every_combination_of_the_swept_axes() -> None:
+    axes = parse_axes(["vax.idle=QUASIJARUS,off", "vax.memory=32m, 64m"], ["vax", "pdp11"])
+
+    assert [v.name for v in variants("vax", axes["vax"])] == [
+        "memory=32m idle=QUASIJARUS",
+        "memory=32m idle=off",
+        "memory=64m idle=QUASIJARUS",
+        "memory=64m idle=off",
+    ]
+    assert [v.name for v in variants("pdp11", axes["pdp11"])] == ["template"]
+    assert Variant("pdp11", (("cpu-model", "11/94"), ("throttle", "50%"))).slug == "cpu-model=11_94,throttle=50_"
+
+    with pytest.raises(ValueError, match="MACHINE.AXIS"):
+        parse_axes(["pdp11.idle=on"], ["vax"])
+
+
+def test_docker_command_runs_the_driver_on_the_variant_ini(tmp_path: Path) -> None:
+    variant = Variant("pdp11", (("throttle", "off"),))
+    sweep = Sweep(ROOT, tmp_path, tmp_path / "scratch", sample_interval=0.5)
+    command = docker_command(MACHINES["pdp11"], variant, sweep, tmp_path / variant.slug / "run-2")
+
+    assert command[:4] == ["docker", "run", "--rm", "--init"]
+    assert f"{tmp_path}:/bench" in command
+    assert f"{tmp_path / 'scratch'}:/overlays" in command
+    assert "EVENTS_LOG=/bench/throttle=off/run-2/events.jsonl" in command
+    driver = command.index("pdp11-pexpect")
+    assert command[driver + 1 :] == [
+        "/opt/pdp11/pdp11_pexpect.py",
+        *("--ini", "/bench/throttle=off/pdp11-pexpect.ini", "--workdir", "/opt/pdp11"),
+        *("--disk-overlay-dir", "/overlays", "--sample-interval", "0.5"),
+        *("--input", "/bench/inputs/brad.bio.uu", "--output", "/bench/throttle=off/run-2/brad.bio.txt"),
+    ]
+
+
+def _write_run(run_dir: Path, machine: str, boot: float, work: float) -> None:
+    steps = MACHINES[machine].steps
+    boot_step, work_step = steps["boot"], next(step for column, step in steps.items() if column != "boot")
+    run_dir.mkdir(parents=True, exist_ok=True)
+    (run_dir / "events.jsonl").write_text(
+        f'{{"type": "end", "source": "{machine}_pexpect", "stage": "{boot_step}", "start": 0, "end": {boot}, '
+        '"status": "ok"}\n'
+        f'{{"type": "end", "source": "{machine}_pexpect", "stage": "{work_step}", "start": {boot}, '
+        f'"end": {boot + work}, "status": "ok"}}\n',
+        encoding="utf-8",
+    )
+    (run_dir / "sections.jsonl").write_text(
+        f'{{"kind": "metrics", "machine": "{machine}", "section": "{boot_step}", '
+        f'"metrics": {{"cpu_seconds": {boot / 2}}}}}\n'
+        f'{{"kind": "metrics", "machine": "{machine}", "section": "{work_step}", '
+        f'"metrics": {{"cpu_seconds": {work / 2}}}}}\n',
+        encoding="utf-8",
+    )
+
+
+def test_run_metrics_reads_step_wall_and_cpu_seconds(tmp_path: Path) -> None:
+    _write_run(tmp_path, "vax", 40.0, 12.0)
+
+    assert run_metrics(tmp_path / "events.jsonl", tmp_path / "sections.jsonl", MACHINES["vax"]) == {
+        "boot_seconds": 40.0,
+        "boot_cpu_seconds": 20.0,
+        "compile_seconds": 12.0,
+        "compile_cpu_seconds": 6.0,
+        "total_cpu_seconds": 26.0,
+    }
+
+
+def test_main_sweeps_variants_and_tabulates_medians(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    inputs = tmp_path / "build"
+    inputs.mkdir()
+    (inputs / "brad.bio.uu").write_text("begin 644 brad.bio.roff\n`\nend\n", encoding="ascii")
+    bench_dir = tmp_path / "bench"
+    boots = iter([30.0, 50.0, 40.0, 20.0, 22.0, 24.0])
+    clock = [0.0]
+
+    def fake_run(command: list[str], check: bool) -> subprocess.CompletedProcess[str]:
+        events = next(arg for arg in command if arg.startswith("EVENTS_LOG=")).removeprefix("EVENTS_LOG=/bench/")
+        boot = next(boots)
+        _write_run(bench_dir / Path(events).parent, "pdp11", boot, 10.0)
+        clock[0] += boot + 15.0
+        return subprocess.CompletedProcess(command, 0)
+
+    monkeypatch.setattr("resume_generator.bench.subprocess.run", fake_run)
+    monkeypatch.setattr("resume_generator.bench.time.monotonic", lambda: clock[0])
+
+    argv = ["--inputs", str(inputs), "--machine", "pdp11", "--axis", "pdp11.throttle=template,off"]
+    assert main([*argv, "--output-dir", str(bench_dir)]) == 0
+    assert (bench_dir / "overlays").is_dir()
+
+    ini = (bench_dir / "throttle=off" / "pdp11-pexpect.ini").read_text(encoding="ascii").splitlines()
+    assert ini[0] == "; Benchmark variant of vintage/machines/pdp11/configs/pdp11-pexpect.ini: throttle=off"
+    assert ini.index("set nothrottle") < ini.index("set cpu 11/73 4M")
+    results = json.loads((bench_dir / "results.json").read_text(encoding="utf-8"))
+    assert [r["variant"] for r in results] == ["throttle=template", "throttle=off"]
+    assert results[0]["summary"]["boot_seconds"] == 40.0
+    assert results[1]["summary"]["boot_cpu_seconds"] == 11.0
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split()[:5] == ["machine", "variant", "ok", "boot", "wall"]
+    # The fastest variant comes first.
+    assert lines[1].split() == ["pdp11", "throttle=off", "3/3", "22.0", "-", "10.0", "37.0", "11.0", "-", "5.0", "16.0"]
+
+
+def test_format_table_marks_failed_runs() -> None:
+    table = format_table(
+        [
+            {
+                "machine": "vax",
+                "variant": "template",
+                "runs": [{"run": 1, "status": "failed", "metrics": {"total_seconds": 3.0}}],
+                "summary": {},
+            }
+        ]
+    )
+
+    assert table.splitlines()[1].split() == ["vax", "template", "0/1", *["-"] * 8]
@@ -2,31 +2,80 @@
 
 from __future__ import annotations
 
+import io
+import json
+from datetime import UTC, datetime
 from pathlib import Path
 
 import pytest
 
-from resume_generator.build_log import load_console_sections, main, render_build_log, render_build_log_files
+from resume_generator.build_log import (
+    cap_section,
+    load_command_timings,
+    load_console_sections,
+    load_section_records,
+    load_simh_counters,
+    load_step_metrics,
+    main,
+    render_build_log,
+    resource_usage,
+    write_build_log_files,
+)
+from resume_generator.journal import load_journal
 
 ROOT = Path(__file__).resolve().parents[1]
 
-SAMPLE_LOG = """\
-[2026-08-19 12:00:00] prepare-host
-[2026-08-19 12:00:01] generate-vintage-yaml
-Wrote: build/vintage/bio.vintage.yaml (5 lines)
-[2026-08-19 12:00:02] stage-b-vax
-[vax_pexpect] 2026-08-19 12:00:03  Compiling: cc -O -o bradman /tmp/bradman.c
-[uucp] Wrote spool: build/vintage/brad.bio.uu (6 lines)
-[2026-08-19 12:00:04] stage-a-pdp11
-[pdp11_pexpect] 2026-08-19 12:00:05  nroff complete
-Wrote: build/vintage/brad.bio.txt (5 lines) <unsafe>
-[2026-08-19 12:00:06] finalize-artifacts
-"""
-
-
-def test_render_build_log_combines_host_and_guest_records() -> None:
+_T0 = datetime(2026, 8, 19, 12, 0, 0, tzinfo=UTC).timestamp()
+
+SAMPLE_JOURNAL_RECORDS = [
+    {"type": "start", "source": "runner", "stage": "prepare-host", "start": _T0},
+    {"type": "end", "source": "runner", "stage": "prepare-host", "start": _T0, "end": _T0 + 1, "status": "ok"},
+    {"type": "start", "source": "runner", "stage": "generate-vintage-yaml", "start": _T0 + 1},
+    {
+        "type": "end",
+        "source": "runner",
+        "stage": "generate-vintage-yaml",
+        "start": _T0 + 1,
+        "end": _T0 + 2,
+        "status": "ok",
+        "detail": "Wrote: bio.vintage.yaml (5 lines)",
+    },
+    {"type": "start", "source": "runner", "stage": "stage-b-vax", "start": _T0 + 2},
+    {"type": "start", "source": "vax_pexpect", "stage": "vax-compile", "start": _T0 + 3},
+    {"type": "end", "source": "vax_pexpect", "stage": "vax-compile", "start": _T0 + 3, "end": _T0 + 3.5},
+    {
+        "type": "end",
+        "source": "runner",
+        "stage": "stage-b-vax",
+        "start": _T0 + 2,
+        "end": _T0 + 4,
+        "status": "ok",
+        "detail": "[uucp] Wrote spool: brad.bio.uu (6 lines)",
+    },
+    {"type": "start", "source": "runner", "stage": "stage-a-pdp11", "start": _T0 + 4},
+    {"type": "start", "source": "pdp11_pexpect", "stage": "pdp11-nroff", "start": _T0 + 4.5},
+    {"type": "end", "source": "pdp11_pexpect", "stage": "pdp11-nroff", "start": _T0 + 4.5, "end": _T0 + 5},
+    {
+        "type": "end",
+        "source": "runner",
+        "stage": "stage-a-pdp11",
+        "start": _T0 + 4,
+        "end": _T0 + 6,
+        "status": "ok",
+        "detail": "Wrote: brad.bio.txt (5 lines) <unsafe>",
+    },
+    {"type": "start", "source": "runner", "stage": "finalize-artifacts", "start": _T0 + 6},
+]
+
+
+def _write_journal(path: Path) -> Path:
+    path.write_text("".join(json.dumps(record) + "\n" for record in SAMPLE_JOURNAL_RECORDS), encoding="utf-8")
+    return path
+
+
+def test_render_build_log_combines_host_and_guest_records(tmp_path: Path) -> None:
     rendered = render_build_log(
-        log_text=SAMPLE_LOG,
+        events=load_journal(_write_journal(tmp_path / "events.jsonl")),
         build_id="build-20260819-120000",
         sections={
             "vax-boot": "VAX boot <ok>",
@@ -44,15 +93,33 @@ def test_render_build_log_combines_host_and_guest_records() -> None:
     assert '<a href="/">Home</a>' in rendered
     assert ">Site source</a>" in rendered
     assert "2026-08-19 12:00:03" in rendered
+    assert "2026-08-19 12:00:05" in rendered
     assert "VAX boot &lt;ok&gt;" in rendered
-    assert "Wrote: build/vintage/brad.bio.txt (5 lines) &lt;unsafe&gt;" in rendered
+    assert "Wrote: bio.vintage.yaml (5 lines)" in rendered
+    assert "[uucp] Wrote spool: brad.bio.uu (6 lines)" in rendered
+    assert "Wrote: brad.bio.txt (5 lines) &lt;unsafe&gt;" in rendered
     assert "nroff &rarr; brad.bio.txt" in rendered
     assert "artifact finalization" in rendered
     assert "artifacts finalized" in rendered
 
 
+def test_render_build_log_draws_a_stage_waterfall(tmp_path: Path) -> None:
+    rendered = render_build_log(
+        events=load_journal(_write_journal(tmp_path / "events.jsonl")),
+        build_id="build-waterfall",
+        sections={},
+    )
+
+    waterfall = rendered.split('<section class="waterfall"', maxsplit=1)[1].split("</section>", maxsplit=1)[0]
+    assert rendered.index('<section class="waterfall"') < rendered.index("<details")
+    assert "critical path 6.0 s" in waterfall
+    assert "stage-b-vax 2.0 s &rarr; stage-a-pdp11 2.0 s &rarr; finalize-artifacts running" in waterfall
+    assert '<div class="wf-row guest"><span class="wf-name">vax-compile</span>' in waterfall
+    assert 'style="left: 50.00%; width: 8.33%"' in waterfall
+
+
 def test_render_build_log_includes_responsive_and_keyboard_styles() -> None:
-    rendered = render_build_log(log_text="", build_id="build-empty", sections={})
+    rendered = render_build_log(events={}, build_id="build-empty", sections={})
 
     assert "a:focus-visible" in rendered
     assert "summary:focus-visible" in rendered
@@ -62,9 +129,10 @@ def test_render_build_log_includes_responsive_and_keyboard_styles() -> None:
 
 
 def test_render_build_log_marks_missing_console_sections() -> None:
-    rendered = render_build_log(log_text="", build_id="build-empty", sections={})
+    rendered = render_build_log(events={}, build_id="build-empty", sections={})
     assert rendered.count("(no console output captured)") == 5
     assert rendered.count("(no events)") == 3
+    assert "waterfall" not in rendered.split("</style>", maxsplit=1)[1]
 
 
 def test_load_console_sections_ignores_malformed_entries(tmp_path: Path) -> None:
@@ -72,10 +140,11 @@ def test_load_console_sections_ignores_malformed_entries(tmp_path: Path) -> None
     sections_path.write_text(
         "\n".join(
             [
-                '{"section": "vax-boot", "content": "booted"}',
+                '{"kind": "console", "section": "vax-boot", "content": "booted"}',
                 "not json",
                 '["not", "an", "object"]',
-                '{"section": 123, "content": "ignored"}',
+                '{"kind": "console", "section": 123, "content": "ignored"}',
+                '{"section": "pdp11-boot", "content": "no kind"}',
             ]
         ),
         encoding="utf-8",
@@ -85,32 +154,277 @@ def test_load_console_sections_ignores_malformed_entries(tmp_path: Path) -> None
     assert load_console_sections(tmp_path / "missing.jsonl") == {}
 
 
-def test_render_build_log_files_reads_inputs(tmp_path: Path) -> None:
-    log_path = tmp_path / "pipeline.log"
-    log_path.write_text(SAMPLE_LOG, encoding="utf-8")
+def test_cap_section_keeps_head_and_tail_with_an_elision_notice() -> None:
+    content = "A" * 100 + "B" * 1000 + "C" * 50
+
+    capped = cap_section(content, head_bytes=100, tail_bytes=50)
+
+    assert capped == "A" * 100 + "\n[... 1,000 bytes elided ...]\n" + "C" * 50
+    assert cap_section(content, head_bytes=1000, tail_bytes=150) == content
+
+
+def test_cap_section_never_splits_a_multibyte_character() -> None:
+    capped = cap_section("é" * 10, head_bytes=3, tail_bytes=3)
+
+    assert capped == "é\n[... 16 bytes elided ...]\né"
+
+
+def test_load_console_sections_caps_each_section(tmp_path: Path) -> None:
     sections_path = tmp_path / "sections.jsonl"
-    sections_path.write_text('{"section": "vax-boot", "content": "booted"}\n', encoding="utf-8")
+    sections_path.write_text(
+        "".join(
+            json.dumps(record) + "\n"
+            for record in (
+                {"kind": "console", "section": "vax-boot", "content": "panic\n" * 10_000},
+                {"kind": "console", "section": "pdp11-nroff", "content": "short"},
+            )
+        ),
+        encoding="utf-8",
+    )
+
+    sections = load_console_sections(sections_path, head_bytes=12, tail_bytes=6)
+
+    assert sections["vax-boot"] == "panic\npanic\n\n[... 59,982 bytes elided ...]\npanic\n"
+    assert sections["pdp11-nroff"] == "short"
+
 
-    rendered = render_build_log_files(
-        log_path=log_path,
+def test_write_build_log_files_streams_inputs(tmp_path: Path) -> None:
+    journal_path = _write_journal(tmp_path / "events.jsonl")
+    sections_path = tmp_path / "sections.jsonl"
+    sections_path.write_text('{"kind": "console", "section": "vax-boot", "content": "booted"}\n', encoding="utf-8")
+
+    out = io.StringIO()
+    write_build_log_files(
+        out,
+        journal_path=journal_path,
         build_id="build-from-files",
         sections_path=sections_path,
     )
+    rendered = out.getvalue()
 
     assert "<title>build-from-files: vintage pipeline log</title>" in rendered
     assert "booted" in rendered
 
 
+def test_write_build_log_files_tabulates_console_metrics(tmp_path: Path) -> None:
+    journal_path = _write_journal(tmp_path / "events.jsonl")
+    sections_path = tmp_path / "sections.jsonl"
+    sections_path.write_text(
+        '{"kind": "console", "section": "vax-inject", "content": "injected"}\n'
+        '{"kind": "metrics", "machine": "vax", "section": "vax-inject", '
+        '"metrics": {"bytes_sent": 20480, "bytes_received": 40960, '
+        '"lines_sent": 400, "expect_calls": 42, "expect_seconds": 3.25, "line_delay_seconds": 2.5, "seconds": 8.0}}\n'
+        '{"kind": "metrics", "section": "vax-boot", "metrics": "not a mapping"}\n',
+        encoding="utf-8",
+    )
+
+    assert list(load_step_metrics(sections_path)) == ["vax-inject"]
+    # Metrics records carry no console content.
+    assert load_console_sections(sections_path) == {"vax-inject": "injected"}
+
+    out = io.StringIO()
+    write_build_log_files(out, journal_path=journal_path, build_id="build-io", sections_path=sections_path)
+    rendered = out.getvalue()
+
+    assert "I/O per guest step" in rendered
+    row = next(line for line in rendered.splitlines() if line.startswith("vax-inject"))
+    assert row.removesuffix("</pre>").split() == [
+        *("vax-inject", "20,480", "B", "40,960", "B", "400", "42"),
+        *("3.2", "s", "2.5", "s", "2,560", "B/s"),
+    ]
+    assert "I/O per guest step" not in render_build_log(events={}, build_id="no-metrics", sections={})
+
+
+def test_resource_usage_totals_sampled_steps_and_adds_table_columns(tmp_path: Path) -> None:
+    journal_path = _write_journal(tmp_path / "events.jsonl")
+    sections_path = tmp_path / "sections.jsonl"
+    sections_path.write_text(
+        '{"kind": "metrics", "machine": "vax", "section": "vax-boot", '
+        '"metrics": {"bytes_sent": 5, "cpu_seconds": 30.5, '
+        '"peak_rss_kb": 65536, "voluntary_ctxt_switches": 100, "nonvoluntary_ctxt_switches": 20, "seconds": 40}}\n'
+        '{"kind": "metrics", "machine": "vax", "section": "vax-compile", '
+        '"metrics": {"cpu_seconds": 9.5, "peak_rss_kb": 70000, '
+        '"voluntary_ctxt_switches": 50, "nonvoluntary_ctxt_switches": 5}}\n'
+        '{"kind": "metrics", "machine": "vax", "section": "vax-inject", "metrics": {"bytes_sent": 2048}}\n',
+        encoding="utf-8",
+    )
+
+    usage = resource_usage(load_step_metrics(sections_path))
+
+    assert list(usage) == ["vax-boot", "vax-compile", "total"]
+    assert usage["total"] == {
+        "cpu_seconds": 40.0,
+        "peak_rss_kb": 70000,
+        "voluntary_ctxt_switches": 150,
+        "nonvoluntary_ctxt_switches": 25,
+    }
+    assert resource_usage({}) == {}
+
+    out = io.StringIO()
+    write_build_log_files(out, journal_path=journal_path, build_id="build-rss", sections_path=sections_path)
+    header = next(line for line in out.getvalue().splitlines() if "ctx switches" in line)
+    assert "peak rss" in header
+    row = next(line for line in out.getvalue().splitlines() if line.startswith("vax-boot"))
+    assert row.split()[-5:] == ["30.5", "s", "64.0", "MiB", "120"]
+
+
+def test_write_build_log_files_shows_simh_speed(tmp_path: Path) -> None:
+    journal_path = _write_journal(tmp_path / "events.jsonl")
+    sections_path = tmp_path / "sections.jsonl"
+    sections_path.write_text(
+        '{"kind": "console", "machine": "vax", "section": "vax-simh", '
+        '"content": "vaxbsd>> show time\\nTime: 1500000000"}\n'
+        '{"kind": "simh", "machine": "vax", "section": "vax-simh", "simh": {"simulated_instructions": 1500000000, '
+        '"host_seconds": 100.0, "mips": 15.0, "throttle": "Throttling: Disabled", "extra": 1}}\n'
+        '{"kind": "simh", "machine": "pdp11", "section": "pdp11-simh", "simh": "not a mapping"}\n'
+        '{"kind": "simh", "machine": "pdp11", "section": "pdp11-simh", "simh": {"unavailable": "SIMH exited"}}\n',
+        encoding="utf-8",
+    )
+
+    assert load_simh_counters(sections_path) == {
+        "vax": {
+            "simulated_instructions": 1500000000,
+            "host_seconds": 100.0,
+            "mips": 15.0,
+            "throttle": "Throttling: Disabled",
+        },
+        "pdp11": {"unavailable": "SIMH exited"},
+    }
+    # Counters are not a guest step's I/O.
+    assert "vax-simh" not in load_step_metrics(sections_path)
+
+    out = io.StringIO()
+    write_build_log_files(out, journal_path=journal_path, build_id="build-simh", sections_path=sections_path)
+    rendered = out.getvalue()
+
+    assert "SIMH speed at session end" in rendered
+    row = next(line for line in rendered.splitlines() if line.startswith("vax "))
+    assert row.split() == ["vax", "1,500,000,000", "100.0", "15.00", "-", "Throttling:", "Disabled"]
+    row = next(line for line in rendered.splitlines() if line.startswith("pdp11 "))
+    assert row.split() == ["pdp11", "-", "-", "-", "-", "not", "recorded:", "SIMH", "exited"]
+    assert "vaxbsd&gt;&gt; show time" in rendered
+
+
+def test_write_build_log_files_tabulates_command_timings(tmp_path: Path) -> None:
+    journal_path = _write_journal(tmp_path / "events.jsonl")
+    sections_path = tmp_path / "sections.jsonl"
+    sections_path.write_text(
+        '{"kind": "timing", "machine": "vax", "label": "compile bradman.c", '
+        '"timing": {"host_seconds": 92.5, "guest_seconds": 60, '
+        '"overhead_seconds": 32.5}}\n'
+        '{"kind": "timing", "machine": "pdp11", "label": "mount /usr", "timing": {"host_seconds": 1.2}}\n'
+        '{"kind": "timing", "machine": "pdp11", "label": "broken", "timing": "not a mapping"}\n',
+        encoding="utf-8",
+    )
+
+    timings = load_command_timings(sections_path)
+    assert [timing["label"] for timing in timings] == ["compile bradman.c", "mount /usr"]
+
+    out = io.StringIO()
+    write_build_log_files(out, journal_path=journal_path, build_id="build-cmd", sections_path=sections_path)
+    rendered = out.getvalue()
+
+    assert "host and guest time per command" in rendered
+    row = next(line for line in rendered.splitlines() if line.startswith("vax "))
+    assert row.split() == ["vax", "compile", "bradman.c", "92.5", "s", "60.0", "s", "32.5", "s"]
+    row = next(line for line in rendered.splitlines() if line.startswith("pdp11 "))
+    assert row.removesuffix("</pre>").split()[-3:] == ["s", "-", "-"]
+
+
 def test_main_renders_build_log_to_stdout(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
-    log_path = tmp_path / "pipeline.log"
-    log_path.write_text(SAMPLE_LOG, encoding="utf-8")
+    journal_path = _write_journal(tmp_path / "events.jsonl")
 
-    result = main([str(log_path), "build-from-cli"])
+    result = main([str(journal_path), "build-from-cli"])
 
     assert result == 0
     assert "<title>build-from-cli: vintage pipeline log</title>" in capsys.readouterr().out
 
 
+def test_write_build_log_files_moves_large_sections_to_fragments(tmp_path: Path) -> None:
+    journal_path = _write_journal(tmp_path / "events.jsonl")
+    sections_path = tmp_path / "sections.jsonl"
+    boot = "VAX boot <rom>\n" * 1000
+    sections_path.write_text(
+        json.dumps({"kind": "console", "section": "vax-boot", "content": boot})
+        + "\n"
+        + json.dumps({"kind": "console", "section": "pdp11-nroff", "content": "short"})
+        + "\n"
+        + json.dumps({"kind": "console", "section": "../escape", "content": "x" * 100})
+        + "\n",
+        encoding="utf-8",
+    )
+    fragment_dir = tmp_path / "build.log"
+
+    out = io.StringIO()
+    write_build_log_files(
+        out,
+        journal_path=journal_path,
+        build_id="build-lazy",
+        sections_path=sections_path,
+        fragment_dir=fragment_dir,
+        inline_bytes=64,
+    )
+    rendered = out.getvalue()
+
+    assert (fragment_dir / "vax-boot.txt").read_text(encoding="utf-8") == boot.strip() + "\n"
+    assert sorted(path.name for path in fragment_dir.iterdir()) == ["vax-boot.txt"]
+    assert '<span data-src="build.log/vax-boot.txt">' in rendered
+    assert '<noscript><a class="fragment-link" href="build.log/vax-boot.txt">vax-boot.txt</a></noscript>' in rendered
+    assert "VAX boot &lt;rom&gt;" not in rendered
+    assert "short" in rendered
+    assert 'details.addEventListener("toggle"' in rendered
+
+
+def test_a_later_inline_record_removes_the_sections_earlier_fragment(tmp_path: Path) -> None:
+    sections_path = tmp_path / "sections.jsonl"
+    sections_path.write_text(
+        json.dumps({"kind": "console", "section": "vax-boot", "content": "x" * 100})
+        + "\n"
+        + json.dumps({"kind": "console", "section": "vax-boot", "content": "retried"})
+        + "\n",
+        encoding="utf-8",
+    )
+    fragment_dir = tmp_path / "build.log"
+
+    records = load_section_records(sections_path, fragment_dir=fragment_dir, inline_bytes=64)
+
+    assert records["sections"] == {"vax-boot": "retried"}
+    assert records["fragments"] == {}
+    assert list(fragment_dir.iterdir()) == []
+
+
+def test_render_build_log_omits_the_loader_without_fragments() -> None:
+    rendered = render_build_log(events={}, build_id="build-inline", sections={"vax-boot": "booted"})
+
+    assert "<script>" not in rendered
+    assert "data-src" not in rendered
+
+
+def test_main_applies_section_byte_budgets(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    journal_path = _write_journal(tmp_path / "events.jsonl")
+    sections_path = tmp_path / "sections.jsonl"
+    sections_path.write_text(
+        json.dumps({"kind": "console", "section": "pdp11-boot", "content": "x" * 5000}) + "\n", encoding="utf-8"
+    )
+
+    result = main(
+        [
+            str(journal_path),
+            "build-capped",
+            str(sections_path),
+            "--section-head-bytes",
+            "10",
+            "--section-tail-bytes",
+            "0",
+        ]
+    )
+
+    assert result == 0
+    out = capsys.readouterr().out
+    assert "x" * 10 + "\n[... 4,990 bytes elided ...]</pre>" in out
+    assert "x" * 11 not in out
+
+
 def test_404_template_provides_semantic_recovery_routes() -> None:
     template = (ROOT / "hugo" / "layouts" / "404.html").read_text(encoding="utf-8")
 
@@ -0,0 +1,76 @@
+"""Tests for stage checkpoints used by resumed vintage builds."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from resume_generator.checkpoint import checkpoint_path, file_digest, main, reuse_problem, write_checkpoint
+
+
+@pytest.fixture
+def stage_files(tmp_path: Path) -> tuple[Path, Path]:
+    source = tmp_path / "bio.vintage.yaml"
+    source.write_text("bioName: Brad\n", encoding="utf-8")
+    output = tmp_path / "brad.bio.uu"
+    output.write_text("begin 644 brad.bio\nend\n", encoding="utf-8")
+    return source, output
+
+
+def test_file_digest_hashes_content_and_reports_missing_files(tmp_path: Path) -> None:
+    path = tmp_path / "empty"
+    path.write_bytes(b"")
+    assert file_digest(path) == "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"
+    assert file_digest(tmp_path / "missing") is None
+
+
+def test_written_checkpoint_is_reused_while_inputs_and_outputs_are_unchanged(
+    tmp_path: Path, stage_files: tuple[Path, Path]
+) -> None:
+    source, output = stage_files
+    directory = tmp_path / "checkpoints"
+    checkpoint = write_checkpoint(directory, "stage-b-vax", inputs=[source], outputs=[output], keys={"image": "vax@1"})
+
+    assert json.loads(checkpoint_path(directory, "stage-b-vax").read_text(encoding="utf-8")) == checkpoint
+    assert checkpoint["outputs"] == {str(output): file_digest(output)}
+    assert reuse_problem(directory, "stage-b-vax", inputs=[source], keys={"image": "vax@1"}) is None
+
+
+def test_checkpoint_is_not_reused_after_any_recorded_content_changes(
+    tmp_path: Path, stage_files: tuple[Path, Path]
+) -> None:
+    source, output = stage_files
+    directory = tmp_path / "checkpoints"
+    write_checkpoint(directory, "stage-b-vax", inputs=[source], outputs=[output], keys={"image": "vax@1"})
+
+    assert reuse_problem(directory, "stage-a-pdp11", inputs=[source], keys={}) == "no checkpoint"
+    assert reuse_problem(directory, "stage-b-vax", inputs=[source], keys={"image": "vax@2"}) == "settings changed"
+    assert reuse_problem(directory, "stage-b-vax", inputs=[], keys={"image": "vax@1"}) == "input files changed"
+
+    output.write_text("begin 644 brad.bio\n`\nend\n", encoding="utf-8")
+    assert reuse_problem(directory, "stage-b-vax", inputs=[source], keys={"image": "vax@1"}) == f"{output} changed"
+    source.write_text("bioName: Bradley\n", encoding="utf-8")
+    assert reuse_problem(directory, "stage-b-vax", inputs=[source], keys={"image": "vax@1"}) == f"{source} changed"
+    source.unlink()
+    assert reuse_problem(directory, "stage-b-vax", inputs=[source], keys={"image": "vax@1"}) == f"{source} is missing"
+
+
+def test_cli_writes_and_checks_a_stage(
+    tmp_path: Path, stage_files: tuple[Path, Path], capsys: pytest.CaptureFixture[str]
+) -> None:
+    source, output = stage_files
+    directory = str(tmp_path / "checkpoints")
+    stage_args = ["stage-b-vax", "--input", str(source), "--key", "image=vax@1"]
+
+    assert main(["check", directory, *stage_args]) == 1
+    assert "Checkpoint: rerunning stage-b-vax (no checkpoint)" in capsys.readouterr().out
+    assert main(["write", directory, *stage_args, "--output", str(output)]) == 0
+    assert main(["check", directory, *stage_args]) == 0
+    assert "Checkpoint: reusing stage-b-vax" in capsys.readouterr().out
+
+    # A stage that did not write its output leaves no checkpoint behind.
+    assert main(["write", directory, "stage-a-pdp11", "--output", str(tmp_path / "brad.bio.txt")]) == 1
+    assert "cannot record stage-a-pdp11" in capsys.readouterr().err
+    assert not checkpoint_path(Path(directory), "stage-a-pdp11").exists()
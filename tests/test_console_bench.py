@@ -0,0 +1,85 @@
+"""Tests for the console transfer benchmark."""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+# scripts/ is not a package; add it to the path so we can import the benchmark.
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from console_bench import (  # noqa: E402
+    Measurement,
+    Settings,
+    binary_payload,
+    format_table,
+    main,
+    parse_size,
+    settings_variants,
+    summarize,
+    text_payload,
+)
+
+
+def test_payloads_have_the_requested_size_and_are_deterministic() -> None:
+    assert [parse_size(size) for size in ("512", "16k", "1M")] == [512, 16384, 1048576]
+    with pytest.raises(ValueError, match="expected a size"):
+        parse_size("0k")
+
+    for size in (2, 73, 1024, 5000):
+        text = text_payload(size)
+        assert len(text) == size
+        assert all(0 < len(line) <= 72 and not line.endswith(" ") for line in text.splitlines())
+    assert text_payload(1024) == text_payload(1024)
+    assert len(binary_payload(1000)) == 1000
+    assert binary_payload(1000) == binary_payload(1000)
+
+
+def test_summary_and_table_report_medians_of_successful_runs() -> None:
+    settings = settings_variants([0.005], [10, 20], [0.05, 0.0])
+    assert len(settings) == 4
+    assert settings[1] == Settings(line_delay=0.005, chunk_size=10, send_delay=0.0)
+
+    runs = [
+        {"run": 1, "status": "ok", "seconds": 2.0, "bytes_sent": 1100.0, "bytes_received": 1200.0},
+        {"run": 2, "status": "ok", "seconds": 4.0, "bytes_sent": 1100.0, "bytes_received": 1300.0},
+        {"run": 3, "status": "failed", "seconds": 90.0, "bytes_sent": 5.0, "bytes_received": 5.0},
+    ]
+    summary = summarize(3072, runs)  # type: ignore[arg-type]
+    assert summary == {"seconds": 3.0, "bytes_per_second": 1024.0, "bytes_sent": 1100.0, "bytes_received": 1250.0}
+
+    records: list[Any] = runs
+    results = [
+        Measurement(operation="uue", payload_bytes=3072, settings=settings[0], runs=records, summary=summary),
+        Measurement(operation="text", payload_bytes=1 << 20, settings=settings[1], runs=records[2:], summary={}),
+    ]
+    lines = format_table(results).splitlines()
+    assert lines[0].split()[:2] == ["operation", "size"]
+    assert lines[1].split() == ["uue", "3k", "0.005", "10", "0.05", "2/3", "3.00", "1.0", "1100", "1250"]
+    assert lines[2].split() == ["text", "1m", "0.005", "10", "0", "0/1", "-", "-", "-", "-"]
+
+
+def test_main_measures_every_operation_against_the_fake_guest(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    for name in ("BOOT_SECONDS", "ECHO_DELAY", "LINE_LIMIT", "DURATIONS", "STALLS", "MACHINE"):
+        monkeypatch.delenv(f"FAKE_SIMH_{name}", raising=False)
+    monkeypatch.delenv("SECTIONS_LOG", raising=False)
+    monkeypatch.delenv("EVENTS_LOG", raising=False)
+    output = tmp_path / "results.json"
+
+    argv = ["--sizes", "1k", "--runs", "1", "--line-delay", "0", "--send-delay", "0", "--output", str(output)]
+    assert main(argv) == 0
+
+    results = json.loads(output.read_text(encoding="utf-8"))
+    assert [r["operation"] for r in results] == ["heredoc", "text", "uue", "capture"]
+    for result in results:
+        assert result["settings"] == {"line_delay": 0.0, "chunk_size": 10, "send_delay": 0.0}
+        assert result["runs"][0]["status"] == "ok"
+        assert result["summary"]["bytes_per_second"] > 0
+    uue, capture = results[2]["summary"], results[3]["summary"]
+    # A UUE upload sends more than the payload; a capture mostly receives.
+    assert uue["bytes_sent"] > 1024
+    assert capture["bytes_received"] > 1024 > capture["bytes_sent"]
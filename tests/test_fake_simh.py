@@ -0,0 +1,200 @@
+"""Tests for the scripted fake SIMH guest."""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pexpect
+import pytest
+
+# scripts/ is not a package; add it to the path so we can import the drivers.
+SCRIPTS = Path(__file__).parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+import pdp11_pexpect  # noqa: E402
+import vax_pexpect  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+FAKE_SIMH = str(SCRIPTS / "fake_simh.py")
+VAX_INI = str(ROOT / "vintage/machines/vax/configs/vax780-pexpect.ini")
+PDP11_INI = str(ROOT / "vintage/machines/pdp11/configs/pdp11-pexpect.ini")
+
+
+@pytest.fixture(autouse=True)
+def _fast_fake(monkeypatch: pytest.MonkeyPatch) -> None:
+    for name in ("BOOT_SECONDS", "ECHO_DELAY", "LINE_LIMIT", "DURATIONS", "STALLS", "MACHINE", "EXIT_ON_BREAK"):
+        monkeypatch.delenv(f"FAKE_SIMH_{name}", raising=False)
+    monkeypatch.setattr("simh_session.LINE_DELAY", 0.0)
+
+
+def test_drivers_run_end_to_end_against_the_fake_guest(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    sections = tmp_path / "sections.jsonl"
+    monkeypatch.setenv("SECTIONS_LOG", str(sections))
+    monkeypatch.delenv("EVENTS_LOG", raising=False)
+    bradman = tmp_path / "bradman.c"
+    bradman.write_text("main() { return 0; }\n", encoding="ascii")
+    bio_yaml = tmp_path / "bio.vintage.yaml"
+    # The profile is longer than the guest's canonical line limit.
+    bio_yaml.write_text(
+        'schemaVersion: "v1"\nbuildDate: "2026-10-19"\nbioName: "Brad # @ Fidler"\n'
+        f'bioHeadline: "Engineer"\nbioProfile: "{" ".join(["words"] * 60)}"\n',
+        encoding="ascii",
+    )
+    spool, text = tmp_path / "brad.bio.uu", tmp_path / "brad.bio.txt"
+    common = ["--workdir", str(tmp_path), "--simh-bin", FAKE_SIMH, "--command-timing"]
+
+    assert (
+        vax_pexpect.main(
+            ["--ini", VAX_INI, "--bradman", str(bradman), "--bio-yaml", str(bio_yaml), "--output", str(spool), *common]
+        )
+        == 0
+    )
+    assert pdp11_pexpect.main(["--ini", PDP11_INI, "--input", str(spool), "--output", str(text), *common]) == 0
+
+    assert text.read_text(encoding="ascii").splitlines() == [
+        "v1",
+        "2026-10-19",
+        "Brad # @ Fidler",
+        "Engineer",
+        " ".join(["words"] * 60),
+    ]
+    records = [json.loads(line) for line in sections.read_text(encoding="utf-8").splitlines()]
+    assert {r["section"] for r in records if "simh" in r} == {"vax-simh", "pdp11-simh"}
+    assert "compile bradman.c" in {r["label"] for r in records if "timing" in r}
+    # Timed commands log the same console text as untimed ones: no clock commands, clocks, or extra prompts.
+    consoles = {r["section"]: r["content"] for r in records if r.get("kind") == "console"}
+    assert consoles["vax-compile"] == (
+        "cd /tmp && rm -f bradman && cc -O -o bradman bradman.c && test -f bradman"
+        '; vintage_rc=$?; echo __VINTAGE_RC_"${vintage_rc}__"'
+    )
+    nroff = consoles["pdp11-nroff"].splitlines()
+    assert nroff[0] == (
+        "rm -f /tmp/brad.bio.txt && nroff -Tlp /tmp/brad.bio.roff < /dev/null > /tmp/brad.bio.txt"
+        ' && test -s /tmp/brad.bio.txt && ls -l /tmp/brad.bio.txt; vintage_rc=$?; echo __VINTAGE_RC_"${vintage_rc}__"'
+    )
+    assert len(nroff) == 2 and nroff[1].endswith(" /tmp/brad.bio.txt")
+    assert not [name for name, content in consoles.items() if "VINTAGE_T" in content or "sh> echo" in content]
+
+
+def test_drivers_retry_a_stalled_transfer_in_the_same_session(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    events = tmp_path / "events.jsonl"
+    monkeypatch.setenv("EVENTS_LOG", str(events))
+    monkeypatch.delenv("SECTIONS_LOG", raising=False)
+    # The first uudecode on each guest hangs past the transfer timeout, then completes.
+    monkeypatch.setenv("FAKE_SIMH_STALLS", "uudecode=2")
+    monkeypatch.setattr(vax_pexpect, "_UUE_TIMEOUT", 1)
+    monkeypatch.setattr(pdp11_pexpect, "_UUE_TIMEOUT", 1)
+    bradman = tmp_path / "bradman.c"
+    bradman.write_text("main() { return 0; }\n", encoding="ascii")
+    bio_yaml = tmp_path / "bio.vintage.yaml"
+    bio_yaml.write_text(
+        'schemaVersion: "v1"\nbuildDate: "2026-10-19"\nbioName: "Brad"\nbioHeadline: "Engineer"\nbioProfile: "Hi"\n',
+        encoding="ascii",
+    )
+    spool, text = tmp_path / "brad.bio.uu", tmp_path / "brad.bio.txt"
+    common = ["--workdir", str(tmp_path), "--simh-bin", FAKE_SIMH]
+
+    assert (
+        vax_pexpect.main(
+            ["--ini", VAX_INI, "--bradman", str(bradman), "--bio-yaml", str(bio_yaml), "--output", str(spool), *common]
+        )
+        == 0
+    )
+    assert pdp11_pexpect.main(["--ini", PDP11_INI, "--input", str(spool), "--output", str(text), *common]) == 0
+
+    assert text.read_text(encoding="ascii").splitlines() == ["v1", "2026-10-19", "Brad", "Engineer", "Hi"]
+    ends = {
+        record["stage"]: record
+        for record in map(json.loads, events.read_text(encoding="utf-8").splitlines())
+        if record["type"] == "end"
+    }
+    assert ends["vax-inject"]["detail"] == "Transfers retried after a shell resync: 1"
+    assert ends["pdp11-deliver"]["detail"] == "Deliveries retried after a shell resync: 1"
+    assert {record["status"] for record in ends.values()} == {"ok"}
+
+
+def test_drivers_succeed_when_simh_exits_before_its_speed_reports(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    sections = tmp_path / "sections.jsonl"
+    monkeypatch.setenv("SECTIONS_LOG", str(sections))
+    monkeypatch.delenv("EVENTS_LOG", raising=False)
+    # Like an ini that reaches its own quit once WRU stops the guest.
+    monkeypatch.setenv("FAKE_SIMH_EXIT_ON_BREAK", "1")
+    bradman = tmp_path / "bradman.c"
+    bradman.write_text("main() { return 0; }\n", encoding="ascii")
+    bio_yaml = tmp_path / "bio.vintage.yaml"
+    bio_yaml.write_text(
+        'schemaVersion: "v1"\nbuildDate: "2026-10-19"\nbioName: "Brad"\nbioHeadline: "Engineer"\nbioProfile: "Hi"\n',
+        encoding="ascii",
+    )
+    spool, text = tmp_path / "brad.bio.uu", tmp_path / "brad.bio.txt"
+    common = ["--workdir", str(tmp_path), "--simh-bin", FAKE_SIMH]
+
+    assert (
+        vax_pexpect.main(
+            ["--ini", VAX_INI, "--bradman", str(bradman), "--bio-yaml", str(bio_yaml), "--output", str(spool), *common]
+        )
+        == 0
+    )
+    assert pdp11_pexpect.main(["--ini", PDP11_INI, "--input", str(spool), "--output", str(text), *common]) == 0
+
+    assert text.read_text(encoding="ascii").splitlines() == ["v1", "2026-10-19", "Brad", "Engineer", "Hi"]
+    records = [json.loads(line) for line in sections.read_text(encoding="utf-8").splitlines()]
+    assert {r["machine"]: r["simh"] for r in records if r["kind"] == "simh"} == {
+        machine: {"unavailable": "SIMH exited before its speed reports"} for machine in ("vax", "pdp11")
+    }
+
+
+def test_driver_reports_a_failed_overlay_setup_and_leaves_no_overlay(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    spool = tmp_path / "brad.bio.uu"
+    spool.write_text("begin 644 brad.bio.txt\n`\nend\n", encoding="ascii")
+    overlay_root = tmp_path / "overlays"
+    overlay_root.mkdir()
+    ini = tmp_path / "pdp11.ini"
+    ini.write_text("attach rp0 missing.dsk\nboot rp0\n", encoding="ascii")
+
+    assert (
+        pdp11_pexpect.main(
+            ["--ini", str(ini), "--input", str(spool), "--output", str(tmp_path / "out.txt")]
+            + ["--workdir", str(tmp_path), "--simh-bin", FAKE_SIMH, "--disk-overlay-dir", str(overlay_root)]
+        )
+        == 1
+    )
+    assert "ERROR: cannot run SIMH" in capsys.readouterr().err
+    assert not any(overlay_root.iterdir())
+
+
+def _login(**env: str) -> pexpect.spawn:
+    child = pexpect.spawn(FAKE_SIMH, [VAX_INI], env={**os.environ, **env}, timeout=5, encoding=None)
+    child.expect("login: ")
+    child.sendline("root")
+    child.expect("# ")
+    return child
+
+
+def test_fake_tty_edits_lines_and_enforces_the_line_limit() -> None:
+    child = _login(FAKE_SIMH_LINE_LIMIT="20")
+    try:
+        # The BSD defaults: # erases one character and @ kills the line.
+        child.sendline("echo nope@echo ab#c")
+        child.expect(rb"\r\nac\r\n# ")
+        child.sendline("echo " + "x" * 30)
+        child.expect(b"\a")
+        child.expect(rb"\r\n(x+)\r\n# ")
+        assert len(child.match.group(1)) == 15
+
+        child.sendline("false; echo rc=$?")
+        child.expect(rb"rc=1\r\n# ")
+        child.send("\x05")
+        child.expect(b"vaxbsd>> ")
+        child.sendline("quit")
+        child.expect(pexpect.EOF)
+    finally:
+        child.close(force=True)
+    assert child.exitstatus == 0
@@ -0,0 +1,116 @@
+"""Tests for the cross-build timing history."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from resume_generator.history import (
+    HistoryEntry,
+    append_history,
+    build_entry,
+    iter_history,
+    main,
+    percentile,
+    stage_percentiles,
+)
+from resume_generator.journal import StageEvent
+
+
+def _entry(build_id: str, boot: float, *, result: str = "success") -> HistoryEntry:
+    return HistoryEntry(
+        build_id=build_id,
+        git_sha="abc123",
+        completed_at="2026-08-19T12:00:00Z",
+        result=result,
+        critical_path_seconds=boot + 60,
+        stages={"pdp11-boot": boot},
+        spool_bytes=4096,
+        bio_bytes=1024,
+        image_cache_hits=1,
+        image_cache_misses=1,
+    )
+
+
+def test_percentile_interpolates_between_ranks() -> None:
+    assert percentile([10.0], 99) == 10.0
+    assert percentile([10.0, 20.0, 30.0, 40.0], 50) == 25.0
+    assert percentile([40.0, 10.0, 30.0, 20.0], 90) == pytest.approx(37.0)
+
+
+def test_build_entry_combines_status_journal_and_cache_hits() -> None:
+    events = {
+        "build-pexpect-images": StageEvent(stage="build-pexpect-images", source="runner", start=0.0, end=30.0),
+        "image-vax-pexpect": StageEvent(
+            stage="image-vax-pexpect", source="images", start=1.0, end=2.0, detail="cache hit"
+        ),
+        "image-pdp11-pexpect": StageEvent(
+            stage="image-pdp11-pexpect", source="images", start=1.0, end=29.0, detail="pulled"
+        ),
+        "stage-a-pdp11": StageEvent(stage="stage-a-pdp11", source="runner", start=30.0, end=170.0),
+        "cleanup": StageEvent(stage="cleanup", source="runner", start=170.0),
+    }
+    status = {"build_id": "build-1", "git_sha": "abc123", "completed_at": "now", "result": "success"}
+
+    entry = build_entry(status, events, spool_bytes=10, bio_bytes=5)
+
+    assert entry["critical_path_seconds"] == 170.0
+    assert entry["stages"] == {
+        "build-pexpect-images": 30.0,
+        "image-vax-pexpect": 1.0,
+        "image-pdp11-pexpect": 28.0,
+        "stage-a-pdp11": 140.0,
+    }
+    assert (entry["image_cache_hits"], entry["image_cache_misses"]) == (1, 1)
+    assert (entry["spool_bytes"], entry["bio_bytes"]) == (10, 5)
+
+
+def test_history_round_trips_and_skips_malformed_lines(tmp_path: Path) -> None:
+    history_path = tmp_path / "state" / "history.jsonl"
+    append_history(history_path, _entry("build-1", 100.0))
+    with history_path.open("a", encoding="utf-8") as history:
+        history.write("not json\n")
+        history.write('{"build_id": "partial", "stages": {"pdp11-boot": 90}}\n')
+    append_history(history_path, _entry("build-2", 120.0))
+
+    entries = list(iter_history(history_path))
+
+    assert [entry["build_id"] for entry in entries] == ["build-1", "partial", "build-2"]
+    assert entries[1]["result"] == "unknown"
+    assert list(iter_history(tmp_path / "missing.jsonl")) == []
+
+
+def test_stage_percentiles_use_only_successful_builds() -> None:
+    entries = [_entry("a", 100.0), _entry("b", 110.0), _entry("c", 500.0, result="failure"), _entry("d", 120.0)]
+
+    percentiles = stage_percentiles(entries)
+
+    assert percentiles["pdp11-boot"]["count"] == 3
+    assert percentiles["pdp11-boot"]["p50"] == 110.0
+    assert percentiles["critical-path"]["p50"] == 170.0
+
+
+def test_main_appends_and_renders_a_trend_page(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    status_path = tmp_path / "pipeline-status.json"
+    status_path.write_text(json.dumps({"build_id": "build-<1>", "result": "success"}), encoding="utf-8")
+    events_path = tmp_path / "events.jsonl"
+    events_path.write_text(
+        '{"type": "end", "source": "runner", "stage": "stage-b-vax", "start": 0, "end": 75.5, "status": "ok"}\n',
+        encoding="utf-8",
+    )
+    spool_path = tmp_path / "brad.bio.uu"
+    spool_path.write_text("begin 644 brad.bio.roff\n", encoding="utf-8")
+    history_path = tmp_path / "history.jsonl"
+
+    append_args = ["append", str(history_path), "--status", str(status_path), "--events", str(events_path)]
+    assert main([*append_args, "--spool", str(spool_path)]) == 0
+    assert main(["render", str(history_path)]) == 0
+
+    page = capsys.readouterr().out.split("\n", maxsplit=1)[1]
+    assert "<tr><td>stage-b-vax</td><td>1</td><td>75.5 s</td><td>75.5 s</td><td>75.5 s</td></tr>" in page
+    assert "<td>build-&lt;1&gt;</td>" in page
+    assert "<td>24</td><td>0</td>" in page
+    status_path.unlink()
+    assert main(append_args) == 1
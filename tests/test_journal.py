@@ -0,0 +1,159 @@
+"""Tests for the vintage pipeline event journal reader."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from resume_generator.journal import (
+    StageEvent,
+    StageTiming,
+    critical_path_seconds,
+    journal_spans,
+    load_journal,
+    stage_timings,
+    status_stages,
+)
+
+
+def test_load_journal_merges_start_and_end_records(tmp_path: Path) -> None:
+    journal_path = tmp_path / "events.jsonl"
+    journal_path.write_text(
+        "\n".join(
+            [
+                '{"type": "start", "source": "runner", "stage": "stage-b-vax", "start": 10}',
+                '{"type": "start", "source": "vax_pexpect", "stage": "vax-boot", "start": 11.5}',
+                '{"type": "end", "source": "vax_pexpect", "stage": "vax-boot", "start": 11.5, "end": 40.25,'
+                ' "status": "ok", "bytes_in": 0, "bytes_out": 0}',
+                '{"type": "end", "source": "runner", "stage": "stage-b-vax", "start": 10, "end": 90,'
+                ' "status": "failed", "bytes_in": 2048, "bytes_out": 0, "detail": ""}',
+                '{"type": "start", "source": "runner", "stage": "cleanup", "start": 90}',
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    events = load_journal(journal_path)
+
+    assert list(events) == ["stage-b-vax", "vax-boot", "cleanup"]
+    assert events["vax-boot"] == {
+        "source": "vax_pexpect",
+        "stage": "vax-boot",
+        "start": 11.5,
+        "end": 40.25,
+        "status": "ok",
+        "bytes_in": 0,
+        "bytes_out": 0,
+    }
+    assert events["stage-b-vax"]["status"] == "failed"
+    assert events["stage-b-vax"]["bytes_in"] == 2048
+    assert "end" not in events["cleanup"]
+
+
+def test_load_journal_ignores_malformed_records(tmp_path: Path) -> None:
+    journal_path = tmp_path / "events.jsonl"
+    journal_path.write_text(
+        "\n".join(
+            [
+                "not json",
+                '["not", "an", "object"]',
+                '{"type": "progress", "stage": "vax-boot", "start": 1}',
+                '{"type": "start", "stage": "", "start": 1}',
+                '{"type": "start", "stage": "vax-boot", "start": "soon", "bytes_in": true}',
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    assert load_journal(journal_path) == {"vax-boot": {"stage": "vax-boot"}}
+    assert load_journal(tmp_path / "missing.jsonl") == {}
+    assert load_journal(None) == {}
+
+
+def test_load_journal_keeps_the_latest_attempt(tmp_path: Path) -> None:
+    journal_path = tmp_path / "events.jsonl"
+    journal_path.write_text(
+        '{"type": "start", "stage": "pdp11-boot", "start": 1}\n'
+        '{"type": "end", "stage": "pdp11-boot", "start": 1, "end": 2, "status": "failed"}\n'
+        '{"type": "start", "stage": "pdp11-boot", "start": 3}\n',
+        encoding="utf-8",
+    )
+
+    assert load_journal(journal_path) == {"pdp11-boot": {"stage": "pdp11-boot", "start": 3.0}}
+
+
+def _event(stage: str, start: float, end: float | None = None, source: str = "runner") -> StageEvent:
+    event = StageEvent(stage=stage, source=source, start=start)
+    if end is not None:
+        event["end"] = end
+        event["status"] = "ok"
+    return event
+
+
+def test_journal_spans_keep_every_run_of_a_stage(tmp_path: Path) -> None:
+    journal_path = tmp_path / "events.jsonl"
+    journal_path.write_text(
+        '{"type": "start", "source": "session", "stage": "bio-yaml", "start": 1.0}\n'
+        '{"type": "start", "source": "session", "stage": "bio-yaml", "start": 2.0}\n'
+        '{"type": "end", "source": "session", "stage": "bio-yaml", "start": 2.0, "end": 3.0, "status": "ok"}\n'
+        '{"type": "end", "source": "session", "stage": "bio-yaml", "start": 1.0, "end": 4.0, "status": "ok"}\n'
+        '{"type": "start", "source": "make", "stage": "hugo-build", "start": 5.0}\n'
+        '{"type": "end", "source": "make", "stage": "hugo-build", "start": 5.0, "end": 6.0, "status": "ok"}\n'
+        '{"type": "end", "source": "make", "stage": "hugo-build", "start": 7.0, "end": 8.0, "status": "failed"}\n'
+        '{"type": "start", "source": "make", "stage": "hugo-build", "start": 9.0}\n',
+        encoding="utf-8",
+    )
+
+    spans = [
+        (span["stage"], span["start"], span.get("end"), span.get("status")) for span in journal_spans(journal_path)
+    ]
+
+    # The nested run ends first but still pairs with its own start; a lost start keeps its end record.
+    assert spans == [
+        ("bio-yaml", 1.0, 4.0, "ok"),
+        ("bio-yaml", 2.0, 3.0, "ok"),
+        ("hugo-build", 5.0, 6.0, "ok"),
+        ("hugo-build", 7.0, 8.0, "failed"),
+        ("hugo-build", 9.0, None, None),
+    ]
+    assert journal_spans(None) == []
+
+
+def test_stage_timings_nest_guest_steps_under_runner_stages() -> None:
+    events = {
+        "prepare-host": _event("prepare-host", 100.0, 103.0),
+        "stage-a-pdp11": _event("stage-a-pdp11", 103.0, 263.0),
+        "pdp11-boot": _event("pdp11-boot", 104.0, 214.0, source="pdp11_pexpect"),
+        "pdp11-nroff": _event("pdp11-nroff", 214.0, 254.0, source="pdp11_pexpect"),
+        "finalize-artifacts": _event("finalize-artifacts", 263.0),
+    }
+
+    timings = stage_timings(events)
+
+    assert [t.stage for t in timings] == list(events)
+    assert timings[2] == StageTiming(
+        stage="pdp11-boot",
+        source="pdp11_pexpect",
+        offset=4.0,
+        duration=110.0,
+        status="ok",
+        parent="stage-a-pdp11",
+    )
+    assert timings[3].duration == 40.0
+    assert timings[4].duration is None
+    assert timings[4].status == "running"
+    assert critical_path_seconds(timings) == 163.0
+
+    stages = status_stages(timings)
+    assert stages["pdp11_nroff"] == {
+        "source": "pdp11_pexpect",
+        "status": "ok",
+        "offset_seconds": 114.0,
+        "duration_seconds": 40.0,
+        "parent": "stage_a_pdp11",
+    }
+    assert stages["finalize_artifacts"]["duration_seconds"] is None
+
+
+def test_stage_timings_are_empty_without_started_stages() -> None:
+    assert stage_timings({}) == []
+    assert stage_timings({"vax-boot": StageEvent(stage="vax-boot")}) == []
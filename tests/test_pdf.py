@@ -176,6 +176,16 @@ def test_load_private_phone_rejects_invalid_overlay(tmp_path: Path) -> None:
         load_private_phone(private_resume)
 
 
+def test_load_private_phone_never_writes_the_yaml_cache(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    cache = tmp_path / "cache"
+    monkeypatch.setenv("YAML_CACHE_DIR", str(cache))
+    private_resume = tmp_path / "resume.private.yaml"
+    private_resume.write_text('basics:\n  phone: " +1 555 0100 "\n', encoding="utf-8")
+
+    assert load_private_phone(private_resume) == "+1 555 0100"
+    assert not cache.exists()
+
+
 def test_build_pdf_rejects_resolved_private_output_inside_site_before_creating_directories(tmp_path: Path) -> None:
     site_dir = tmp_path / "site"
     other_dir = tmp_path / "other"
@@ -196,6 +206,20 @@ def test_build_pdf_rejects_resolved_private_output_inside_site_before_creating_d
     assert not pdf_path.resolve().parent.exists()
 
 
+def test_build_pdf_keeps_a_preloaded_private_phone_out_of_the_site(tmp_path: Path) -> None:
+    site_dir = tmp_path / "site"
+
+    with pytest.raises(ValueError, match="private resume PDF must be written outside"):
+        build_pdf(
+            site_dir=site_dir,
+            resume_url_path="/resume/",
+            pdf_path=site_dir / "resume.pdf",
+            private_phone="+1-555-0100",
+        )
+
+    assert not site_dir.exists()
+
+
 def test_build_pdf_rejects_missing_private_overlay_before_creating_directories(tmp_path: Path) -> None:
     site_dir = tmp_path / "site"
     pdf_path = tmp_path / "local" / "bradley-fidler-resume.pdf"
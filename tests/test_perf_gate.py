@@ -0,0 +1,180 @@
+"""Tests for the vintage pipeline performance regression gate."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from resume_generator.perf_gate import (
+    DEFAULT_BASELINE,
+    Baseline,
+    baseline_from_status,
+    compare,
+    format_table,
+    load_baseline,
+    main,
+    status_from_journal,
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _status(boot: float, *, inject_bytes: int = 10_000) -> dict[str, object]:
+    return {
+        "result": "success",
+        # The image fetch inside build_pexpect_images is neither gated nor on the gated critical path.
+        "critical_path_seconds": boot + 145,
+        "stages": {
+            "build_pexpect_images": {"source": "runner", "status": "ok", "duration_seconds": 95.0},
+            "stage_b_vax": {"source": "runner", "status": "ok", "duration_seconds": boot + 50},
+            "vax_boot": {"source": "vax_pexpect", "status": "ok", "duration_seconds": boot, "bytes_in": 0},
+            "vax_inject": {"source": "vax_pexpect", "status": "ok", "duration_seconds": 20.0, "bytes_in": inject_bytes},
+            "image_vax_pexpect": {
+                "source": "images",
+                "status": "ok",
+                "duration_seconds": 90.0,
+                "parent": "build_pexpect_images",
+            },
+        },
+    }
+
+
+def _baseline() -> Baseline:
+    return baseline_from_status(_status(40.0), tolerance=0.25, slack_seconds=5.0)
+
+
+def test_baseline_records_nonzero_metrics_of_gated_stages() -> None:
+    baseline = _baseline()
+
+    assert baseline["stages"] == {
+        "critical_path": {"duration_seconds": 95.0},
+        "stage_b_vax": {"duration_seconds": 90.0},
+        "vax_boot": {"duration_seconds": 40.0},
+        "vax_inject": {"duration_seconds": 20.0, "bytes_in": 10_000.0},
+    }
+
+
+def test_compare_flags_growth_beyond_tolerance_and_slack() -> None:
+    rows = {(row.stage, row.metric): row for row in compare(_status(56.0, inject_bytes=12_600), _baseline())}
+
+    # 40 s * 1.25 + 5 s of slack allows 55 s.
+    assert rows[("vax_boot", "duration_seconds")].verdict == "regressed"
+    assert rows[("stage_b_vax", "duration_seconds")].verdict == "ok"
+    # Byte counts get no slack: 10,000 * 1.25 allows 12,500.
+    assert rows[("vax_inject", "bytes_in")].verdict == "regressed"
+    assert rows[("vax_inject", "duration_seconds")].verdict == "ok"
+
+
+def test_compare_reports_missing_metrics_and_accepts_a_tolerance_override() -> None:
+    status = _status(56.0)
+    del status["stages"]["stage_b_vax"]  # type: ignore[attr-defined]
+
+    rows = {(row.stage, row.metric): row for row in compare(status, _baseline(), tolerance=0.5)}
+
+    assert rows[("stage_b_vax", "duration_seconds")].verdict == "missing"
+    assert rows[("stage_b_vax", "duration_seconds")].actual is None
+    assert rows[("vax_boot", "duration_seconds")].verdict == "ok"
+
+
+def test_format_table_shows_change_and_verdict() -> None:
+    table = format_table(compare(_status(56.0), _baseline()))
+    lines = table.splitlines()
+
+    assert lines[0].split() == ["stage", "metric", "baseline", "actual", "change", "verdict"]
+    boot = next(line for line in lines if line.startswith("vax_boot "))
+    assert boot.split()[-4:] == ["56.0", "s", "+40.0%", "REGRESSED"]
+
+
+def test_status_from_journal_supports_replayed_runs(tmp_path: Path) -> None:
+    journal = tmp_path / "events.jsonl"
+    journal.write_text(
+        '{"type": "start", "source": "vax_pexpect", "stage": "vax-boot", "start": 10, "bytes_in": 0}\n'
+        '{"type": "end", "source": "vax_pexpect", "stage": "vax-boot", "start": 10, "end": 52, '
+        '"status": "ok", "bytes_in": 0, "bytes_out": 0}\n',
+        encoding="utf-8",
+    )
+
+    status = status_from_journal(journal)
+
+    assert status["result"] == "success"
+    assert status["stages"] == {
+        "vax_boot": {
+            "source": "vax_pexpect",
+            "status": "ok",
+            "offset_seconds": 0.0,
+            "duration_seconds": 42.0,
+            "bytes_in": 0,
+            "bytes_out": 0,
+        }
+    }
+
+
+def test_main_checks_and_records_baselines(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    baseline_path = tmp_path / "perf-baseline.json"
+    status_path = tmp_path / "pipeline-status.json"
+    status_path.write_text(json.dumps(_status(40.0)), encoding="utf-8")
+
+    assert main(["record", "--status", str(status_path), "--baseline", str(baseline_path), "--tolerance", "0.1"]) == 0
+    assert load_baseline(baseline_path)["tolerance"] == 0.1
+    assert main(["check", "--status", str(status_path), "--baseline", str(baseline_path)]) == 0
+    assert "No regressions across 5 baseline metrics" in capsys.readouterr().out
+
+    status_path.write_text(json.dumps(_status(60.0)), encoding="utf-8")
+    assert main(["check", "--status", str(status_path), "--baseline", str(baseline_path)]) == 1
+    assert "regressed beyond the baseline tolerance" in capsys.readouterr().err
+
+    # Re-recording keeps the tolerance of the baseline it replaces.
+    assert main(["record", "--status", str(status_path), "--baseline", str(baseline_path)]) == 0
+    assert load_baseline(baseline_path)["tolerance"] == 0.1
+
+
+def test_main_refuses_failed_builds(tmp_path: Path) -> None:
+    status_path = tmp_path / "pipeline-status.json"
+    status_path.write_text(json.dumps({**_status(40.0), "result": "failure"}), encoding="utf-8")
+
+    assert main(["check", "--status", str(status_path), "--baseline", str(ROOT / DEFAULT_BASELINE)]) == 1
+
+
+def test_main_refuses_a_baseline_with_no_recorded_stages(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    baseline_path = tmp_path / "perf-baseline.json"
+    baseline_path.write_text(json.dumps({"source": "not recorded", "stages": {}}), encoding="utf-8")
+    status_path = tmp_path / "pipeline-status.json"
+    status_path.write_text(json.dumps(_status(40.0)), encoding="utf-8")
+
+    assert main(["check", "--status", str(status_path), "--baseline", str(baseline_path)]) == 1
+    assert "records no stages" in capsys.readouterr().err
+
+
+def test_recorded_baselines_say_which_build_they_came_from(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    baseline_path = tmp_path / "perf-baseline.json"
+    status_path = tmp_path / "pipeline-status.json"
+    status_path.write_text(json.dumps({**_status(40.0), "build_id": "ci-42", "git_sha": "abc123"}), encoding="utf-8")
+
+    assert main(["record", "--status", str(status_path), "--baseline", str(baseline_path)]) == 0
+    assert (
+        load_baseline(baseline_path)["source"]
+        == f"perf_gate record --status {status_path} (build_id ci-42, git_sha abc123)"
+    )
+    assert main(["check", "--status", str(status_path), "--baseline", str(baseline_path)]) == 0
+    assert f"Baseline: perf_gate record --status {status_path}" in capsys.readouterr().out
+
+
+def test_checked_in_baseline_states_its_source() -> None:
+    baseline = load_baseline(ROOT / DEFAULT_BASELINE)
+
+    # Every number in the checked-in baseline must come from a recorded run, and CI checks against it.
+    assert baseline["stages"]
+    assert "perf_gate record" in baseline["source"]
+
+
+def test_ci_checks_the_fake_guest_replay_against_the_baseline() -> None:
+    workflow = (ROOT / ".github" / "workflows" / "ci.yml").read_text(encoding="utf-8")
+    makefile = (ROOT / "Makefile").read_text(encoding="utf-8")
+    baseline = load_baseline(ROOT / DEFAULT_BASELINE)
+
+    assert "make perf-replay\n          make perf-check PERF_EVENTS=build/perf-replay/events.jsonl" in workflow
+    assert "PERF_REPLAY_DIR ?= build/perf-replay" in makefile
+    assert '--simh-bin "$(abspath scripts/fake_simh.py)"' in makefile
+    assert "--events build/perf-replay/events.jsonl" in baseline["source"]
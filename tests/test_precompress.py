@@ -0,0 +1,82 @@
+"""Tests for precompressed site siblings."""
+
+from __future__ import annotations
+
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+from resume_generator.precompress import decompress_sibling, main, precompress_site
+
+
+def _write_site(site_dir: Path) -> None:
+    (site_dir / "posts").mkdir(parents=True)
+    (site_dir / "index.html").write_text("<p>vintage pipeline</p>\n" * 200, encoding="utf-8")
+    (site_dir / "posts" / "index.xml").write_text("<item>entry</item>\n" * 100, encoding="utf-8")
+    (site_dir / "robots.txt").write_text("User-agent: *\n", encoding="utf-8")
+    (site_dir / "resume.pdf").write_bytes(b"%PDF-1.7\n" + bytes(range(256)) * 8)
+
+
+def test_precompress_site_writes_gzip_siblings_that_round_trip(tmp_path: Path) -> None:
+    site_dir = tmp_path / "site"
+    _write_site(site_dir)
+
+    report = precompress_site(site_dir)
+
+    assert [entry["path"] for entry in report["files"]] == ["index.html", "posts/index.xml"]
+    for relative in ("index.html", "posts/index.xml"):
+        original = site_dir / relative
+        sibling = original.with_name(original.name + ".gz")
+        assert decompress_sibling(sibling) == original.read_bytes()
+    assert report["gz_bytes"] < report["original_bytes"]
+    # Tiny files and already-compressed formats get no sibling.
+    assert report["skipped"] == ["robots.txt"]
+    assert not (site_dir / "robots.txt.gz").exists()
+    assert not (site_dir / "resume.pdf.gz").exists()
+
+
+def test_precompress_site_is_reproducible_and_removes_stale_siblings(tmp_path: Path) -> None:
+    site_dir = tmp_path / "site"
+    _write_site(site_dir)
+    (site_dir / "robots.txt.gz").write_bytes(gzip.compress(b"stale"))
+
+    precompress_site(site_dir)
+    first = (site_dir / "index.html.gz").read_bytes()
+    precompress_site(site_dir)
+
+    assert (site_dir / "index.html.gz").read_bytes() == first
+    assert not (site_dir / "robots.txt.gz").exists()
+
+
+def test_precompress_site_writes_brotli_siblings(tmp_path: Path) -> None:
+    site_dir = tmp_path / "site"
+    _write_site(site_dir)
+
+    report = precompress_site(site_dir)
+
+    sibling = site_dir / "index.html.br"
+    assert decompress_sibling(sibling) == (site_dir / "index.html").read_bytes()
+    assert report["br_bytes"] < report["original_bytes"]
+
+
+def test_decompress_sibling_rejects_corrupt_data(tmp_path: Path) -> None:
+    sibling = tmp_path / "index.html.gz"
+    sibling.write_bytes(b"not gzip")
+
+    with pytest.raises(ValueError, match="corrupt gzip data"):
+        decompress_sibling(sibling)
+
+
+def test_main_writes_a_savings_report(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    site_dir = tmp_path / "site"
+    _write_site(site_dir)
+    report_path = tmp_path / "build" / "precompress-report.json"
+
+    assert main([str(site_dir), "--report", str(report_path)]) == 0
+
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert report["files"][0]["path"] == "index.html"
+    assert "Precompressed 2 files; skipped 1 that did not shrink" in capsys.readouterr().out
+    assert main([str(tmp_path / "missing")]) == 1
@@ -99,13 +99,22 @@ def test_deploy_uses_the_shared_production_verifier() -> None:
     assert ".venv/bin/python -m pip install -e '.[dev]'" in workflow
     assert "run: make check" in workflow
     assert workflow.index("run: make check") < workflow.index("name: Run vintage pipeline")
-    assert "make resume-pdf-public" in workflow
     assert "make sync-site-data sync-resume-data" not in workflow
     assert "PYTHON=python" not in workflow
-    assert ".venv/bin/python scripts/verify_site.py site" in workflow
-    assert "--production" in workflow
-    assert "--resume-yaml resume.yaml" in workflow
-    assert '--build-run-url "$BUILD_RUN_URL"' in workflow
+    # One session runs the contract, bio data, Hugo build, public PDF, and verification in order.
+    session = workflow.split(".venv/bin/python -m resume_generator.session", maxsplit=1)[1].split("\n\n", maxsplit=1)[0]
+    steps = [
+        "contract build/vintage/brad.bio.txt",
+        "-- bio-yaml build/vintage/brad.bio.txt hugo/data/bio.yaml",
+        "-- make hugo-build-production",
+        "-- pdf site/resume.pdf",
+        "-- make precompress-site",
+        '-- verify site --production --build-run-url "$BUILD_RUN_URL"',
+    ]
+    assert [session.index(step) for step in steps] == sorted(session.index(step) for step in steps)
+    assert "--private-resume" not in session
+    assert "resume_generator.vintage_contract" not in workflow
+    assert "resume_generator.bio_yaml" not in workflow
     assert "private_resume_path" not in workflow
     assert "deployments: write" not in workflow
 
@@ -0,0 +1,146 @@
+"""Tests for console transcripts and their replay."""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import pexpect
+import pytest
+
+from resume_generator.perf_gate import status_from_journal
+
+# scripts/ is not a package; add it to the path so we can import the drivers.
+SCRIPTS = Path(__file__).parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+import vax_pexpect  # noqa: E402
+from simh_session import ConsoleRecorder, load_transcript  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+REPLAY_SIMH = str(SCRIPTS / "replay_simh.py")
+VAX_INI = str(ROOT / "vintage/machines/vax/configs/vax780-pexpect.ini")
+
+
+class _FakeChild:
+    def __init__(self) -> None:
+        self.incoming = [b"login: ", b"\xff# "]
+
+    def send(self, s: str | bytes) -> int:
+        return len(s)
+
+    def read_nonblocking(self, size: int = 1, timeout: float | None = None) -> bytes:
+        return self.incoming.pop(0)
+
+
+def test_recorder_writes_an_asciicast_transcript_that_round_trips_bytes(tmp_path: Path) -> None:
+    path = tmp_path / "console" / "vax.cast"
+    child = _FakeChild()
+    with pytest.raises(ValueError, match="transcript is not open"):
+        ConsoleRecorder("vax", path).attach(child)
+    with ConsoleRecorder("vax", path) as recorder:
+        recorder.attach(child)
+        assert child.read_nonblocking() == b"login: "
+        assert child.send("root\n") == 5
+        child.read_nonblocking()
+    # Traffic after the recorder closes is not written.
+    child.send("late\n")
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    header = json.loads(lines[0])
+    assert (header["version"], header["machine"]) == (2, "vax")
+    assert [json.loads(line)[1:] for line in lines[1:]] == [["o", "login: "], ["i", "root\n"], ["o", "\xff# "]]
+    _, events = load_transcript(path)
+    assert [(kind, data) for _, kind, data in events] == [("o", b"login: "), ("i", b"root\n"), ("o", b"\xff# ")]
+    assert [offset for offset, _, _ in events] == sorted(offset for offset, _, _ in events)
+
+
+def _write_transcript(path: Path, events: list[list[object]]) -> None:
+    header = {"version": 2, "width": 80, "height": 24, "timestamp": 0, "machine": "vax"}
+    path.write_text("".join(json.dumps(record) + "\n" for record in [header, *events]), encoding="utf-8")
+
+
+def _replay(transcript: Path, speed: str) -> pexpect.spawn:
+    env = {**os.environ, "REPLAY_TRANSCRIPT": str(transcript), "REPLAY_SPEED": speed}
+    return pexpect.spawn(REPLAY_SIMH, [VAX_INI], env=env, timeout=5, encoding=None)
+
+
+@pytest.mark.parametrize(("speed", "shortest", "longest"), [("1", 0.4, 5.0), ("8", 0.0, 0.35)])
+def test_replay_scales_recorded_gaps_from_the_last_input(
+    tmp_path: Path, speed: str, shortest: float, longest: float
+) -> None:
+    transcript = tmp_path / "vax.cast"
+    _write_transcript(transcript, [[0.0, "o", "login: "], [5.0, "i", "root\n"], [5.4, "o", "# "]])
+    child = _replay(transcript, speed)
+    try:
+        child.expect(b"login: ")
+        # The recorded five seconds before the input do not delay the replay.
+        started = time.monotonic()
+        child.send(b"root\n")
+        child.expect(b"# ")
+        elapsed = time.monotonic() - started
+        child.expect(pexpect.EOF)
+    finally:
+        child.close(force=True)
+    assert shortest <= elapsed < longest
+    assert child.exitstatus == 0
+
+
+def test_replay_stops_when_the_driver_sends_different_input(tmp_path: Path) -> None:
+    transcript = tmp_path / "vax.cast"
+    _write_transcript(transcript, [[0.0, "o", "login: "], [1.0, "i", "root\n"], [1.1, "o", "# "]])
+    child = _replay(transcript, "0")
+    try:
+        child.expect(b"login: ")
+        child.send(b"guest")
+        child.expect(rb"input diverged at event 2: expected b'root\\n', got b'guest'")
+        child.expect(pexpect.EOF)
+    finally:
+        child.close(force=True)
+    assert child.exitstatus == 3
+
+
+def test_recorded_driver_session_replays_without_the_guest(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    for name in ("BOOT_SECONDS", "ECHO_DELAY", "LINE_LIMIT", "DURATIONS", "STALLS", "MACHINE"):
+        monkeypatch.delenv(f"FAKE_SIMH_{name}", raising=False)
+    monkeypatch.delenv("SECTIONS_LOG", raising=False)
+    monkeypatch.delenv("EVENTS_LOG", raising=False)
+    monkeypatch.setattr("simh_session.LINE_DELAY", 0.0)
+    bradman = tmp_path / "bradman.c"
+    bradman.write_text("main() { return 0; }\n", encoding="ascii")
+    bio_yaml = tmp_path / "bio.vintage.yaml"
+    bio_yaml.write_text(
+        'schemaVersion: "v1"\nbuildDate: "2026-10-19"\nbioName: "Brad"\nbioHeadline: "Engineer"\nbioProfile: "Hi"\n',
+        encoding="ascii",
+    )
+    transcript = tmp_path / "vax.cast"
+
+    def run(simh_bin: str, output: Path, *extra: str) -> int:
+        return vax_pexpect.main(
+            [
+                *("--ini", VAX_INI, "--workdir", str(tmp_path), "--simh-bin", simh_bin),
+                *("--bradman", str(bradman), "--bio-yaml", str(bio_yaml), "--output", str(output), *extra),
+            ]
+        )
+
+    assert run(str(SCRIPTS / "fake_simh.py"), tmp_path / "recorded.uu", "--transcript", str(transcript)) == 0
+
+    events_log = tmp_path / "events.jsonl"
+    monkeypatch.setenv("EVENTS_LOG", str(events_log))
+    monkeypatch.setenv("REPLAY_TRANSCRIPT", str(transcript))
+    monkeypatch.setenv("REPLAY_SPEED", "0")
+    assert run(REPLAY_SIMH, tmp_path / "replayed.uu") == 0
+    assert (tmp_path / "replayed.uu").read_bytes() == (tmp_path / "recorded.uu").read_bytes()
+    # The replayed run's journal feeds the performance gate.
+    status = status_from_journal(events_log)
+    assert status["result"] == "success"
+    stages = status["stages"]
+    assert isinstance(stages, dict)
+    assert {"vax_boot", "vax_inject", "vax_capture"} <= set(stages)
+
+    # A changed input no longer matches the recorded session.
+    bio_yaml.write_text(bio_yaml.read_text(encoding="ascii").replace("Hi", "Hello"), encoding="ascii")
+    assert run(REPLAY_SIMH, tmp_path / "changed.uu") == 1
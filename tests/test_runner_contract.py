@@ -64,7 +64,8 @@ def test_publish_paths_use_the_shared_semantic_validator() -> None:
     """Manual validation and deployment must enforce one output contract."""
     for name in ("deploy.yml", "vintage-validate.yml"):
         workflow = (WORKFLOWS / name).read_text(encoding="utf-8")
-        assert ".venv/bin/python -m resume_generator.vintage_contract" in workflow
+        session = workflow.split(".venv/bin/python -m resume_generator.session", maxsplit=1)[1]
+        assert session.lstrip(" \\\n").startswith("contract ")
 
 
 def test_workflows_consume_direct_runner_artifacts() -> None:
@@ -102,7 +103,201 @@ def test_runner_clears_owned_generated_outputs_before_each_run() -> None:
         "pipeline-status.json",
         "sections.jsonl",
     ):
-        assert f"build/vintage/{output}" in runner
+        assert f'"${{WORK_DIR}}/{output}"' in runner
+
+
+def test_runner_isolates_each_build() -> None:
+    """Concurrent builds must not share a workspace, container name, or image-tag lifetime."""
+    runner = RUNNER.read_text(encoding="utf-8")
+
+    assert 'WORK_DIR="${WORK_DIR:-build/vintage/${BUILD_ID}}"' in runner
+    assert '-v "${WORK_DIR}:/build"' in runner
+    assert '--name "vintage-${BUILD_ID}-${machine}"' in runner
+    assert "$(pwd)/build/vintage" not in runner
+
+    # Shared tags are removed only by the last build holding a reference.
+    cleanup = runner.split("cleanup() {", maxsplit=1)[1].split("\n}\n", maxsplit=1)[0]
+    assert "docker rmi" not in cleanup
+    assert "release_image_refs" in cleanup
+
+
+def test_runner_drops_image_references_of_killed_builds() -> None:
+    """A build killed before cleanup must not pin the shared image tags forever."""
+    runner = RUNNER.read_text(encoding="utf-8")
+    acquire = runner.split("acquire_image_refs() {", maxsplit=1)[1].split("\n}\n", maxsplit=1)[0]
+    prune = runner.split("_prune_dead_image_refs() {", maxsplit=1)[1].split("\n}\n", maxsplit=1)[0]
+    release = runner.split("release_image_refs() {", maxsplit=1)[1].split("\n}\n", maxsplit=1)[0]
+
+    assert 'echo "$$" > "${IMAGE_REFS_DIR}/${BUILD_ID}"' in acquire
+    assert '! ps -p "$pid"' in prune
+    assert 'rm -f "$ref"' in prune
+    # Dead references are dropped under the lock before the last-build check.
+    assert release.index("_prune_dead_image_refs") < release.index('ls -A "$IMAGE_REFS_DIR"')
+    assert release.index("flock 9") < release.index("_prune_dead_image_refs")
+
+
+def test_runner_dispatches_stages_to_long_lived_labelled_containers() -> None:
+    """Each machine container starts once, carries the cleanup label, and runs stages through exec."""
+    runner = RUNNER.read_text(encoding="utf-8")
+    start = runner.split("start_machine_container() {", maxsplit=1)[1].split("\n}\n", maxsplit=1)[0]
+
+    assert "docker run -d --rm --init" in start
+    assert '--label "vintage-build-id=${BUILD_ID}"' in start
+    assert "--entrypoint sleep" in start
+    assert runner.count("docker run ") == 1
+    assert 'docker exec "vintage-${BUILD_ID}-vax"' in runner
+    assert 'docker exec "vintage-${BUILD_ID}-pdp11"' in runner
+    assert runner.index("    start_containers\n") < runner.index("  run_stage stage-b-vax stage_b_vax\n")
+
+    # Exec replaces each image's entrypoint, including the PDP-11 defaults it pins.
+    for dockerfile, command in (
+        (ROOT / "vintage" / "machines" / "vax" / "Dockerfile.vax-pexpect", "python3 /opt/vax_pexpect.py"),
+        (ROOT / "vintage" / "machines" / "pdp11" / "Dockerfile.pdp11-pexpect", "python3 /opt/pdp11/pdp11_pexpect.py"),
+    ):
+        assert command in runner
+        assert "ENTRYPOINT" in dockerfile.read_text(encoding="utf-8")
+    assert "--ini /opt/pdp11/pdp11-pexpect.ini" in runner
+    assert "--workdir /opt/pdp11" in runner
+
+
+def test_runner_checks_the_digest_keyed_image_cache_before_pulling() -> None:
+    """Cached archives must be verified against the pinned pull and fetched in parallel on a miss."""
+    runner = RUNNER.read_text(encoding="utf-8")
+    pull_or_build = runner.split("_pull_or_build() {", maxsplit=1)[1].split("\n}\n", maxsplit=1)[0]
+
+    assert pull_or_build.index("_load_cached_image") < pull_or_build.index("docker pull")
+    assert "_save_cached_image" in pull_or_build
+    assert 'printf \'%s/sha256-%s\' "$IMAGE_CACHE_DIR" "${1##*@sha256:}"' in runner
+    load_cached = runner.split("_load_cached_image() {", maxsplit=1)[1].split("\n}\n", maxsplit=1)[0]
+    save_cached = runner.split("_save_cached_image() {", maxsplit=1)[1].split("\n}\n", maxsplit=1)[0]
+    # A hit is checked by the ID docker load reports, which the classic image store yields without RepoDigests.
+    assert "sed -n 's/^Loaded image ID: //p' <<<\"$loaded\"" in load_cached
+    assert "sed -n 's/^Loaded image: //p' <<<\"$loaded\"" in load_cached
+    assert 'if [[ "$loaded_id" != "$expected_id" ]]; then' in load_cached
+    assert '"$ghcr_ref" 2>/dev/null' not in load_cached
+    # A failed save never publishes an .id file for a partial archive.
+    assert '(set -o pipefail; docker save "$ghcr_ref" | zstd' in save_cached
+    assert save_cached.index('|| { rm -f "$tmp"; return 1; }') < save_cached.index('"${stem}.id" || return 1')
+    assert 'wait "$pdp11_pid"' in runner
+    assert 'wait "$vax_pid"' in runner
+    # Hosted runners start empty, so both workflows restore the cache keyed by the pinned digests.
+    for name in ("deploy.yml", "vintage-validate.yml"):
+        workflow = (WORKFLOWS / name).read_text(encoding="utf-8")
+        assert "IMAGE_CACHE_DIR: ${{ runner.temp }}/vintage-images" in workflow
+        assert "grep -E '^GHCR_(VAX|PDP11)=' scripts/vintage-runner.sh" in workflow
+        assert workflow.index("uses: actions/cache@") < workflow.index("bash scripts/vintage-runner.sh")
+
+
+def test_runner_journals_stages_for_the_build_log() -> None:
+    """The build log renders from stage events, not from the free-form host log."""
+    runner = RUNNER.read_text(encoding="utf-8")
+    on_exit = runner.split("on_exit() {", maxsplit=1)[1].split("\n}\n", maxsplit=1)[0]
+    write_build_log = runner.split("write_build_log() {", maxsplit=1)[1].split("\n}\n", maxsplit=1)[0]
+
+    assert 'EVENTS_LOG="${WORK_DIR}/events.jsonl"' in runner
+    assert '-e "EVENTS_LOG=/build/events.jsonl"' in runner
+    assert runner.index('rm -f "$EVENTS_LOG"') < runner.index('exec >"$LOG_FILE"')
+    assert on_exit.index("stage_close failed") < on_exit.index("cleanup")
+    assert '"$EVENTS_LOG"' in write_build_log
+    assert '"$LOG_FILE"' not in write_build_log
+
+
+def test_status_json_carries_journaled_stage_timings() -> None:
+    """pipeline-status.json reports the same stage durations as the build-log waterfall."""
+    runner = RUNNER.read_text(encoding="utf-8")
+    emit = runner.split("emit_status_json() {", maxsplit=1)[1].split("\n}\n", maxsplit=1)[0]
+
+    assert emit.index("stage_close ok") < emit.index(".venv/bin/python")
+    assert '"$EVENTS_LOG" "${WORK_DIR}/sections.jsonl" > "$status_file"' in emit
+    assert "stages = status_stages(timings)" in emit
+    assert '"critical_path_seconds": round(critical_path_seconds(timings), 3)' in emit
+
+
+def test_runner_samples_simh_resources_into_the_status() -> None:
+    """Both guest stages sample SIMH, and the status merges usage into their steps."""
+    runner = RUNNER.read_text(encoding="utf-8")
+    emit = runner.split("emit_status_json() {", maxsplit=1)[1].split("\nPY\n", maxsplit=1)[0]
+
+    assert 'RESOURCE_SAMPLE_INTERVAL="${RESOURCE_SAMPLE_INTERVAL:-1}"' in runner
+    assert runner.count('--sample-interval "$RESOURCE_SAMPLE_INTERVAL"') == 2
+    assert 'COMMAND_TIMING="${COMMAND_TIMING:-1}"' in runner
+    assert runner.count('${timing_args[@]+"${timing_args[@]}"}') == 2
+    assert '"${WORK_DIR}/sections.jsonl" > "$status_file"' in emit
+    assert "load_section_records(Path(sys.argv[9]))" in emit
+    assert 'resource_usage(records["metrics"])' in emit
+    assert 'status["resources"] = total_usage' in emit
+    assert 'status["simh"] = simh' in emit
+
+
+def test_large_console_sections_are_published_as_fragments() -> None:
+    """The runner writes fragments beside the log, and both workflows carry them."""
+    runner = RUNNER.read_text(encoding="utf-8")
+
+    assert 'rm -rf "${WORK_DIR}/build.log"' in runner
+    assert '--fragment-dir "${WORK_DIR}/build.log"' in runner
+    deploy = (WORKFLOWS / "deploy.yml").read_text(encoding="utf-8")
+    assert "rm -rf hugo/static/build.log" in deploy
+    assert "cp -R build/vintage/build.log hugo/static/build.log" in deploy
+    validate = (WORKFLOWS / "vintage-validate.yml").read_text(encoding="utf-8")
+    assert "cp -R build/vintage/build.log out/build.log" in validate
+
+
+def test_runner_records_each_build_in_the_cross_build_history() -> None:
+    """History outlives the workspace and counts image-cache hits from the journal."""
+    runner = RUNNER.read_text(encoding="utf-8")
+    on_exit = runner.split("on_exit() {", maxsplit=1)[1].split("\n}\n", maxsplit=1)[0]
+    pull_or_build = runner.split("_pull_or_build() {", maxsplit=1)[1].split("\n}\n", maxsplit=1)[0]
+
+    assert "/edcloud-vintage/history.jsonl}" in runner
+    assert on_exit.index("cleanup") < on_exit.index("record_history ||")
+    assert 'journal_step images "image-${local_tag}" "$started" ok "cache hit"' in pull_or_build
+    assert "resume_generator.history append" in runner
+    assert "resume_generator.history render" in runner
+    # Hosted runners start empty, so both workflows carry the history between runs.
+    for name in ("deploy.yml", "vintage-validate.yml"):
+        workflow = (WORKFLOWS / name).read_text(encoding="utf-8")
+        assert "HISTORY_FILE: ${{ runner.temp }}/vintage-history/history.jsonl" in workflow
+        assert "restore-keys: vintage-history-" in workflow
+        assert workflow.index("uses: actions/cache/restore@") < workflow.index("bash scripts/vintage-runner.sh")
+        assert workflow.index("bash scripts/vintage-runner.sh") < workflow.index("uses: actions/cache/save@")
+
+
+def test_runner_exports_a_chrome_trace_after_cleanup() -> None:
+    """The trace spans every stage, so it is merged after the last one closes."""
+    runner = RUNNER.read_text(encoding="utf-8")
+    on_exit = runner.split("on_exit() {", maxsplit=1)[1].split("\n}\n", maxsplit=1)[0]
+
+    assert on_exit.index("stage_close ok") < on_exit.index("export_trace ||")
+    assert 'resume_generator.tracing export "$EVENTS_LOG" --output "${WORK_DIR}/trace.json"' in runner
+    deploy = (WORKFLOWS / "deploy.yml").read_text(encoding="utf-8")
+    assert deploy.count("EVENTS_LOG: build/vintage/events.jsonl") == 2
+    assert "resume_generator.tracing export build/vintage/events.jsonl" in deploy
+
+
+def test_runner_shares_the_timing_profile_with_both_drivers() -> None:
+    """Drivers read and update one profile through a mounted state directory."""
+    runner = RUNNER.read_text(encoding="utf-8")
+
+    assert "/edcloud-vintage/timing-profile.json}" in runner
+    assert 'profile_mount=(-v "$(dirname "$TIMING_PROFILE"):/profile")' in runner
+    assert runner.count('${profile_args[@]+"${profile_args[@]}"}') == 2
+    for script in PEXPECT_SCRIPTS[:2]:
+        source = script.read_text(encoding="utf-8")
+        assert "--timing-profile" in source
+        assert "profile.save()" in source
+    # Hosted runners start empty, so both workflows carry the profile between runs.
+    for name in ("deploy.yml", "vintage-validate.yml"):
+        workflow = (WORKFLOWS / name).read_text(encoding="utf-8")
+        assert "TIMING_PROFILE: ${{ runner.temp }}/vintage-profile/timing-profile.json" in workflow
+        assert "restore-keys: vintage-profile-" in workflow
+        assert "key: vintage-profile-${{ github.run_id }}-${{ github.run_attempt }}" in workflow
+
+
+def test_workflows_pin_the_workspace_they_consume() -> None:
+    """Workflows run one build per job and read artifacts from a fixed path."""
+    for name in ("deploy.yml", "vintage-validate.yml"):
+        workflow = (WORKFLOWS / name).read_text(encoding="utf-8")
+        assert "WORK_DIR: build/vintage" in workflow
 
 
 def test_image_recipes_pin_external_inputs() -> None:
@@ -144,3 +339,21 @@ def test_docker_context_is_a_strict_allowlist() -> None:
         "!vintage/machines/vax/configs/",
         "!vintage/machines/vax/configs/vax780-pexpect.ini",
     }
+
+
+def test_runner_resumes_from_the_first_stage_without_a_valid_checkpoint() -> None:
+    """A resumed build keeps checkpointed outputs and reruns everything after the first changed stage."""
+    runner = RUNNER.read_text(encoding="utf-8")
+    prepare = runner.split("prepare_host() {", maxsplit=1)[1].split("\n}\n", maxsplit=1)[0]
+    plan = runner.split("plan_resume() {", maxsplit=1)[1].split("\n}\n", maxsplit=1)[0]
+    main = runner.split("main() {", maxsplit=1)[1].split("\n}\n", maxsplit=1)[0]
+
+    assert 'rm -rf "$CHECKPOINT_DIR"' in prepare.split('if [[ "$RESUME" != "1" ]]; then', maxsplit=1)[1]
+    assert "resume_generator.checkpoint check" in plan
+    assert "resume_generator.checkpoint write" in runner
+    assert 'rm -f "${CHECKPOINT_DIR}/${name}.json"' in plan
+    for name in ("generate-vintage-yaml", "stage-b-vax", "stage-a-pdp11"):
+        assert f"run_stage {name} {name.replace('-', '_')}" in main
+    assert main.index("plan_resume") < main.index("build_pexpect_images")
+    assert '--key "image=${GHCR_VAX}"' in runner
+    assert '--key "image=${GHCR_PDP11}"' in runner
@@ -0,0 +1,209 @@
+"""Tests for the single-process build session."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from resume_generator import session as session_module
+from resume_generator import yaml_loader
+from resume_generator.session import BuildSession, BuildSourceError, main, split_steps
+from resume_generator.vintage_contract import VintageBioInput, VintageContractError
+
+SITE = 'name: "Bradley Fidler"\nheadline: "Principal Technical Writer"\n'
+RESUME = 'basics:\n  email: " brad@example.com "\n  summary: "First sentence. Second sentence."\n'
+RENDERED = "Bradley Fidler\nPrincipal Technical Writer\n\nFirst  sentence. Second\nsentence.\n"
+
+
+@pytest.fixture
+def sources(tmp_path: Path) -> tuple[Path, Path]:
+    site, resume = tmp_path / "site.yaml", tmp_path / "resume.yaml"
+    site.write_text(SITE, encoding="utf-8")
+    resume.write_text(RESUME, encoding="utf-8")
+    return site, resume
+
+
+@pytest.fixture
+def parses(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """Record each YAML document the session parses."""
+    calls: list[str] = []
+    parse_yaml = yaml_loader.parse_yaml
+
+    def counted(text: str) -> Any:
+        calls.append(text)
+        return parse_yaml(text)
+
+    monkeypatch.delenv(yaml_loader.YAML_CACHE_ENV, raising=False)
+    monkeypatch.setattr(yaml_loader, "parse_yaml", counted)
+    return calls
+
+
+def test_session_parses_each_source_once_for_every_accessor(sources: tuple[Path, Path], parses: list[str]) -> None:
+    session = BuildSession(*sources)
+
+    assert session.vintage_input == VintageBioInput(
+        name="Bradley Fidler", headline="Principal Technical Writer", summary="First sentence. Second sentence."
+    )
+    assert session.public_email == "brad@example.com"
+    assert 'bioName: "Bradley Fidler"' in session.vintage_yaml(date(2026, 10, 19))
+    assert parses == [SITE, RESUME]
+
+
+def test_session_reads_only_the_sources_an_accessor_needs(tmp_path: Path, sources: tuple[Path, Path]) -> None:
+    session = BuildSession(tmp_path / "missing.yaml", sources[1])
+
+    assert session.public_email == "brad@example.com"
+    with pytest.raises(FileNotFoundError):
+        _ = session.vintage_input
+
+
+def test_session_rejects_sources_without_the_required_fields(tmp_path: Path, sources: tuple[Path, Path]) -> None:
+    site, resume = sources
+    resume.write_text("basics:\n  summary: Hi\n", encoding="utf-8")
+    with pytest.raises(BuildSourceError, match="no public basics.email"):
+        BuildSession(site, resume).validate()
+
+    resume.write_text("- not a mapping\n", encoding="utf-8")
+    with pytest.raises(BuildSourceError, match="resume.yaml must contain a top-level mapping"):
+        _ = BuildSession(site, resume).public_email
+
+    site.write_text('name: " padded "\nheadline: "H"\n', encoding="utf-8")
+    resume.write_text(RESUME, encoding="utf-8")
+    with pytest.raises(VintageContractError, match="site.yaml name"):
+        BuildSession(site, resume).validate()
+
+
+def test_session_loads_each_private_overlay_once(tmp_path: Path) -> None:
+    overlay = tmp_path / "resume.private.yaml"
+    overlay.write_text('basics:\n  phone: "+1-555-0100"\n', encoding="utf-8")
+    session = BuildSession()
+
+    assert session.private_phone(None) is None
+    assert session.private_phone(overlay) == "+1-555-0100"
+    overlay.unlink()
+    assert session.private_phone(overlay) == "+1-555-0100"
+
+
+def test_session_reads_each_rendered_bio_once(tmp_path: Path) -> None:
+    bio_txt = tmp_path / "brad.bio.txt"
+    bio_txt.write_text(RENDERED, encoding="utf-8")
+    session = BuildSession()
+
+    assert session.rendered_bio(bio_txt) == RENDERED
+    bio_txt.unlink()
+    assert session.rendered_bio(bio_txt) == RENDERED
+
+
+def test_split_steps_separates_arguments_at_each_double_dash() -> None:
+    assert split_steps(["contract", "bio.txt", "--", "bio-yaml", "a", "b"]) == [
+        ["contract", "bio.txt"],
+        ["bio-yaml", "a", "b"],
+    ]
+
+
+def test_cli_runs_several_steps_against_one_parse(
+    tmp_path: Path, sources: tuple[Path, Path], parses: list[str], capsys: pytest.CaptureFixture[str]
+) -> None:
+    site, resume = sources
+    bio_txt = tmp_path / "brad.bio.txt"
+    bio_txt.write_text(RENDERED, encoding="utf-8")
+    vintage = tmp_path / "out" / "bio.vintage.yaml"
+    bio_data = tmp_path / "bio.yaml"
+
+    code = main(
+        [
+            *("--site", str(site), "--resume", str(resume)),
+            *("check", "--", "vintage-yaml", str(vintage), "--build-date", "2026-10-19"),
+            *("--", "contract", str(bio_txt), "--", "bio-yaml", str(bio_txt), str(bio_data)),
+            *("--build-log", str(tmp_path / "missing.html")),
+        ]
+    )
+
+    assert code == 0
+    assert parses == [SITE, RESUME]
+    assert 'buildDate: "2026-10-19"' in vintage.read_text(encoding="utf-8")
+    assert 'name: "Bradley Fidler"' in bio_data.read_text(encoding="utf-8")
+    out = capsys.readouterr().out
+    assert f"Wrote: {vintage}  (5 lines)" in out
+    assert "vintage contract: rendered bio matches" in out
+
+
+def test_cli_stops_at_the_first_failing_step(
+    tmp_path: Path, sources: tuple[Path, Path], capsys: pytest.CaptureFixture[str]
+) -> None:
+    site, resume = sources
+    bio_txt = tmp_path / "brad.bio.txt"
+    bio_txt.write_text(RENDERED.replace("Bradley", "Brad"), encoding="utf-8")
+    bio_data = tmp_path / "bio.yaml"
+
+    args = ["--site", str(site), "--resume", str(resume), "contract", str(bio_txt)]
+    assert main([*args, "--", "bio-yaml", str(bio_txt), str(bio_data)]) == 1
+    assert "vintage contract: rendered bio does not match" in capsys.readouterr().err
+    assert not bio_data.exists()
+
+    with pytest.raises(SystemExit):
+        main([*args, "--", "publish"])
+
+
+def test_pdf_step_passes_the_session_overlay_phone(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    overlay = tmp_path / "resume.private.yaml"
+    overlay.write_text('basics:\n  phone: "+1-555-0100"\n', encoding="utf-8")
+    calls: list[dict[str, object]] = []
+
+    def fake_build_pdf(**kwargs: object) -> Path:
+        calls.append(kwargs)
+        return Path(str(kwargs["pdf_path"]))
+
+    monkeypatch.setattr(session_module, "build_pdf", fake_build_pdf)
+    output = tmp_path / "local" / "resume.pdf"
+
+    assert main(["pdf", str(output), "--site-dir", str(tmp_path / "site"), "--private-resume", str(overlay)]) == 0
+    assert calls == [
+        {
+            "site_dir": tmp_path / "site",
+            "resume_url_path": "/resume/",
+            "pdf_path": output,
+            "private_phone": "+1-555-0100",
+        }
+    ]
+    assert f"Generated {output}" in capsys.readouterr().out
+
+    assert main(["pdf", str(output), "--private-resume", str(tmp_path / "absent.yaml")]) == 1
+    assert "private resume overlay does not exist" in capsys.readouterr().err
+
+
+def test_make_step_runs_targets_between_journaled_steps(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    events = tmp_path / "events.jsonl"
+    monkeypatch.setenv("EVENTS_LOG", str(events))
+    commands: list[list[str]] = []
+
+    def fake_run(command: list[str], *, check: bool) -> subprocess.CompletedProcess[bytes]:
+        assert not check
+        commands.append(command)
+        return subprocess.CompletedProcess(command, 2 if "broken" in command else 0)
+
+    monkeypatch.setattr(session_module.subprocess, "run", fake_run)
+    monkeypatch.setattr(session_module, "build_pdf", lambda **kwargs: kwargs["pdf_path"])
+    output = tmp_path / "site" / "resume.pdf"
+
+    assert main(["make", "hugo-build-production", "--", "pdf", str(output)]) == 0
+    assert main(["make", "broken", "--", "pdf", str(output)]) == 2
+    assert commands == [
+        ["make", "--no-print-directory", "hugo-build-production"],
+        ["make", "--no-print-directory", "broken"],
+    ]
+    ends = [
+        record for record in map(json.loads, events.read_text(encoding="utf-8").splitlines()) if record["type"] == "end"
+    ]
+    assert [(record["stage"], record["status"]) for record in ends] == [
+        ("make-hugo-build-production", "ok"),
+        ("resume-pdf", "ok"),
+        ("make-broken", "failed"),
+    ]
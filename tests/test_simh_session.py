@@ -2,11 +2,14 @@
 
 from __future__ import annotations
 
+import json
+import os
 import re
 import sys
 from pathlib import Path
 from unittest.mock import MagicMock
 
+import pexpect
 import pytest
 
 # scripts/ is not a package; add it to the path so we can import simh_session.
@@ -15,15 +18,30 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
 from pdp11_pexpect import _CAPTURE_BEGIN as PDP_CAPTURE_BEGIN
 from pdp11_pexpect import _CAPTURE_END as PDP_CAPTURE_END
 from simh_session import (
+    PROFILE_FLOOR,
+    PROFILE_WINDOW,
     UUE_CHUNK_SIZE,
+    CommandTimer,
+    ConsoleCounters,
     GuestCommandError,
+    ResourceSampler,
+    RetryPolicy,
+    TimingProfile,
+    capture_simh_counters,
+    clone_disk_image,
+    guest_elapsed_seconds,
     inject_batched_heredoc,
+    journal_stage,
     make_logger,
+    prepare_disk_overlays,
+    resync_shell,
     run_checked,
+    simh_counters,
     validate_uu_spool,
 )
 from vax_pexpect import _CAPTURE_BEGIN as VAX_CAPTURE_BEGIN
 from vax_pexpect import _CAPTURE_END as VAX_CAPTURE_END
+from vax_pexpect import quit_simh as vax_quit_simh
 
 VALID_UUE = (
     "begin 644 brad.bio.roff\n"
@@ -173,3 +191,471 @@ def test_run_checked_raises_for_nonzero_guest_status() -> None:
 
     with pytest.raises(GuestCommandError, match="guest exit status 7"):
         run_checked(child, "false", "PDPsh> ", 60, label="expected failure")
+
+
+def test_prepare_disk_overlays_attaches_private_copies(tmp_path: Path) -> None:
+    base_dir = tmp_path / "image"
+    base_dir.mkdir()
+    raw = base_dir / "RA81.000"
+    raw.write_bytes(b"boot" + b"\0" * (3 << 20) + b"tail")
+    (base_dir / "RA81VHD.001").write_bytes(b"vhd parent")
+    ini = base_dir / "vax.ini"
+    ini.write_text(
+        "set rq0 ra81\natt rq0 RA81.000\nset rq1 format=vhd\natt rq1 RA81VHD.001\nattach lpt printer.txt\nboot rq0\n",
+        encoding="ascii",
+    )
+    overlay_root = tmp_path / "overlays"
+    overlay_root.mkdir()
+
+    overlay_ini, overlay_dir = prepare_disk_overlays(str(ini), str(base_dir), str(overlay_root))
+
+    lines = Path(overlay_ini).read_text(encoding="ascii").splitlines()
+    copy = Path(overlay_dir) / "RA81.000"
+    assert lines[0] == "set rq0 ra81"
+    assert lines[1] == f"attach rq0 {copy}"
+    assert lines[3] == f"attach -d rq1 {copy.parent / 'RA81VHD.001'}.diff.vhd {base_dir / 'RA81VHD.001'}"
+    assert lines[4:] == ["attach lpt printer.txt", "boot rq0"]
+    assert copy.read_bytes() == raw.read_bytes()
+    assert Path(overlay_dir).parent == overlay_root
+
+    # Guest writes reach only the overlay.
+    with copy.open("r+b") as disk:
+        disk.write(b"BOOT")
+    assert raw.read_bytes().startswith(b"boot")
+
+
+def test_prepare_disk_overlays_removes_its_directory_when_a_base_disk_is_missing(tmp_path: Path) -> None:
+    ini = tmp_path / "vax.ini"
+    ini.write_text("att rq0 RA81.000\nboot rq0\n", encoding="ascii")
+    overlay_root = tmp_path / "overlays"
+    overlay_root.mkdir()
+
+    with pytest.raises(FileNotFoundError):
+        prepare_disk_overlays(str(ini), str(tmp_path), str(overlay_root))
+    assert not any(overlay_root.iterdir())
+
+
+def test_clone_disk_image_keeps_zero_blocks_sparse(tmp_path: Path) -> None:
+    source = tmp_path / "disk.img"
+    with source.open("wb") as disk:
+        disk.write(b"data")
+        disk.seek(16 << 20)
+        disk.write(b"end")
+    destination = tmp_path / "copy.img"
+
+    method = clone_disk_image(source, destination)
+
+    assert method in {"reflink", "sparse"}
+    assert destination.read_bytes() == source.read_bytes()
+    if method == "sparse":
+        assert destination.stat().st_blocks * 512 < destination.stat().st_size
+
+
+def test_journal_stage_records_start_and_end(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    events_path = tmp_path / "events.jsonl"
+    monkeypatch.setenv("EVENTS_LOG", str(events_path))
+
+    with journal_stage("vax_pexpect", "vax-capture", bytes_in=3) as record:
+        record["bytes_out"] = 42
+    with pytest.raises(GuestCommandError), journal_stage("vax_pexpect", "vax-run"):
+        raise GuestCommandError("bradman exited 1")
+
+    records = [json.loads(line) for line in events_path.read_text(encoding="utf-8").splitlines()]
+    assert [(r["type"], r["stage"]) for r in records] == [
+        ("start", "vax-capture"),
+        ("end", "vax-capture"),
+        ("start", "vax-run"),
+        ("end", "vax-run"),
+    ]
+    assert records[1]["status"] == "ok"
+    assert records[1]["bytes_in"] == 3
+    assert records[1]["bytes_out"] == 42
+    assert records[1]["end"] >= records[1]["start"]
+    assert records[3]["status"] == "failed"
+
+
+def test_journal_stage_is_silent_without_events_log(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("EVENTS_LOG", raising=False)
+
+    with journal_stage("pdp11_pexpect", "pdp11-boot") as record:
+        record["detail"] = "booted"
+
+
+def test_timing_profile_keeps_default_until_enough_samples(tmp_path: Path) -> None:
+    profile_path = tmp_path / "timing-profile.json"
+    profile_path.write_text(json.dumps({"steps": {"vax-boot": {"samples": [10.0, 12.0]}}}), encoding="utf-8")
+
+    assert TimingProfile(None).timeout("vax-boot", 300) == 300
+    assert TimingProfile(str(tmp_path / "missing.json")).timeout("vax-boot", 300) == 300
+    assert TimingProfile(str(profile_path)).timeout("vax-boot", 300) == 300
+
+
+def test_timing_profile_scales_p99_between_floor_and_default(tmp_path: Path) -> None:
+    profile_path = tmp_path / "timing-profile.json"
+    steps = {
+        "vax-boot": {"samples": [40.0, 50.0, 60.0]},
+        "vax-inject": {"samples": [1.0, 1.0, 2.0]},
+        "vax-compile": {"samples": [200.0, 250.0, 300.0]},
+    }
+    profile_path.write_text(json.dumps({"steps": steps}), encoding="utf-8")
+    profile = TimingProfile(str(profile_path), multiplier=3.0)
+
+    assert profile.timeout("vax-boot", 300) == pytest.approx(3.0 * 59.8)
+    assert profile.timeout("vax-inject", 120) == PROFILE_FLOOR
+    assert profile.timeout("vax-compile", 300) == 300
+
+
+def test_timing_profile_save_merges_and_windows_samples(tmp_path: Path) -> None:
+    profile_path = tmp_path / "state" / "timing-profile.json"
+    profile_path.parent.mkdir()
+    old = [float(n) for n in range(PROFILE_WINDOW)]
+    profile_path.write_text(json.dumps({"steps": {"pdp11-boot": {"samples": old}}}), encoding="utf-8")
+
+    profile = TimingProfile(str(profile_path))
+    profile.observe("pdp11-boot", 99.0)
+    profile.observe("pdp11-nroff", 7.25)
+    profile.save()
+
+    steps = json.loads(profile_path.read_text(encoding="utf-8"))["steps"]
+    assert steps["pdp11-boot"]["samples"] == old[1:] + [99.0]
+    assert steps["pdp11-nroff"] == {"samples": [7.25], "p50": 7.25, "p99": 7.25}
+    # The container's root user writes the profile; the host user reads it afterwards.
+    assert profile_path.stat().st_mode & 0o777 == 0o644
+
+
+def test_journal_stage_feeds_profile_only_on_success(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("EVENTS_LOG", raising=False)
+    profile_path = tmp_path / "timing-profile.json"
+    profile = TimingProfile(str(profile_path))
+
+    with journal_stage("vax_pexpect", "vax-boot", profile=profile):
+        pass
+    with pytest.raises(GuestCommandError), journal_stage("vax_pexpect", "vax-run", profile=profile):
+        raise GuestCommandError("bradman exited 1")
+    profile.save()
+
+    steps = json.loads(profile_path.read_text(encoding="utf-8"))["steps"]
+    assert list(steps) == ["vax-boot"]
+
+
+class _FakeChild:
+    """Just enough of pexpect.spawn for the console counters to wrap."""
+
+    def __init__(self) -> None:
+        self.sent = b""
+        self.before = b""
+        self.match = re.search(rb"__VINTAGE_RC_([0-9]+)__", b"__VINTAGE_RC_0__")
+
+    def send(self, s: str | bytes) -> int:
+        data = s.encode("ascii") if isinstance(s, str) else s
+        self.sent += data
+        return len(data)
+
+    def sendline(self, s: str = "") -> int:
+        # pexpect.spawn.sendline looks up send on the instance, as here.
+        return self.send(s + "\n")
+
+    def read_nonblocking(self, size: int = 1, timeout: float = -1) -> bytes:
+        return b"VAXsh> "[:size]
+
+    def expect(self, pattern: object, timeout: float = -1) -> int:
+        self.read_nonblocking(7, timeout)
+        return 0
+
+
+def test_console_counters_record_each_phase(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    sections_path = tmp_path / "sections.jsonl"
+    monkeypatch.setenv("SECTIONS_LOG", str(sections_path))
+    monkeypatch.delenv("EVENTS_LOG", raising=False)
+    monkeypatch.setattr("simh_session.LINE_DELAY", 0.001)
+    child = _FakeChild()
+    console = ConsoleCounters("vax").attach(child)
+
+    with journal_stage("vax_pexpect", "vax-boot", console=console):
+        child.sendline("root")
+        child.expect("VAXsh> ")
+    with journal_stage("vax_pexpect", "vax-inject", console=console):
+        inject_batched_heredoc(child, "/tmp/x", ["a", "b"], "VAXsh> ", 5)
+
+    records = [json.loads(line) for line in sections_path.read_text(encoding="utf-8").splitlines()]
+    assert [(r["machine"], r["section"]) for r in records] == [("vax", "vax-boot"), ("vax", "vax-inject")]
+    boot = records[0]["metrics"]
+    assert boot["bytes_sent"] == 5
+    assert boot["lines_sent"] == 1
+    assert boot["expect_calls"] == 1
+    assert boot["bytes_received"] == 7
+    assert boot["line_delay_seconds"] == 0
+    inject = records[1]["metrics"]
+    # Heredoc start, two lines, terminator, then run_checked's test -s command.
+    assert inject["lines_sent"] == 5
+    assert inject["bytes_sent"] == len(child.sent) - 5
+    assert inject["line_delay_seconds"] >= 0.002
+    assert inject["seconds"] >= inject["line_delay_seconds"]
+
+
+def _write_proc(proc_root: Path, pid: int, *, utime: int, stime: int, rss_kb: int, switches: int) -> None:
+    proc = proc_root / str(pid)
+    proc.mkdir(parents=True, exist_ok=True)
+    # The command name holds spaces and a parenthesis, as SIMH binaries may not.
+    (proc / "stat").write_text(
+        f"{pid} (vax (sim) x) S 1 1 1 0 -1 4194304 100 0 0 0 {utime} {stime} 0 0 20 0 1 0 1 1 1\n",
+        encoding="ascii",
+    )
+    (proc / "status").write_text(
+        f"Name:\tvax\nVmRSS:\t  {rss_kb} kB\nvoluntary_ctxt_switches:\t{switches}\nnonvoluntary_ctxt_switches:\t3\n",
+        encoding="ascii",
+    )
+
+
+def test_resource_sampler_reports_step_deltas_and_peak_memory(tmp_path: Path) -> None:
+    ticks = os.sysconf("SC_CLK_TCK")
+    _write_proc(tmp_path, 42, utime=ticks, stime=0, rss_kb=1000, switches=10)
+    sampler = ResourceSampler("vax", 42, 60.0, proc_root=str(tmp_path))
+
+    before = sampler.begin_step()
+    _write_proc(tmp_path, 42, utime=2 * ticks, stime=ticks, rss_kb=5000, switches=15)
+    sampler.sample()
+    _write_proc(tmp_path, 42, utime=3 * ticks, stime=ticks, rss_kb=2000, switches=25)
+
+    usage = sampler.step_usage(before)
+    assert usage == {
+        "cpu_seconds": 3.0,
+        "voluntary_ctxt_switches": 15,
+        "nonvoluntary_ctxt_switches": 0,
+        "peak_rss_kb": 5000,
+    }
+    # The next step's peak starts from current memory, not the previous step's.
+    assert sampler.step_usage(sampler.begin_step())["peak_rss_kb"] == 2000
+
+
+def test_resource_sampler_keeps_last_reading_after_exit(tmp_path: Path) -> None:
+    _write_proc(tmp_path, 7, utime=0, stime=0, rss_kb=800, switches=1)
+    sampler = ResourceSampler("pdp11", 7, 0.01, proc_root=str(tmp_path)).start()
+    before = sampler.begin_step()
+    for path in (tmp_path / "7").iterdir():
+        path.unlink()
+    sampler.stop()
+
+    assert sampler.step_usage(before)["cpu_seconds"] == 0
+    assert sampler.step_usage(before)["peak_rss_kb"] == 800
+
+
+@pytest.mark.skipif(not Path("/proc/self/stat").is_file(), reason="needs procfs")
+def test_resource_sampler_reads_a_live_process() -> None:
+    sampler = ResourceSampler("host", os.getpid(), 60.0)
+    usage = sampler.step_usage(sampler.begin_step())
+
+    assert usage["cpu_seconds"] >= 0
+    assert usage["peak_rss_kb"] > 0
+
+
+def test_journal_stage_records_sampled_resources(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    sections_path = tmp_path / "sections.jsonl"
+    monkeypatch.setenv("SECTIONS_LOG", str(sections_path))
+    monkeypatch.delenv("EVENTS_LOG", raising=False)
+    _write_proc(tmp_path, 9, utime=0, stime=0, rss_kb=1024, switches=2)
+    sampler = ResourceSampler("pdp11", 9, 60.0, proc_root=str(tmp_path))
+
+    with journal_stage("pdp11_pexpect", "pdp11-nroff", resources=sampler):
+        _write_proc(tmp_path, 9, utime=os.sysconf("SC_CLK_TCK"), stime=0, rss_kb=2048, switches=4)
+
+    record = json.loads(sections_path.read_text(encoding="utf-8"))
+    assert (record["machine"], record["section"]) == ("pdp11", "pdp11-nroff")
+    assert record["metrics"]["cpu_seconds"] == 1.0
+    assert record["metrics"]["peak_rss_kb"] == 2048
+    assert record["metrics"]["voluntary_ctxt_switches"] == 2
+    assert "seconds" in record["metrics"]
+
+
+_SIMH_REPLIES = {
+    "show time": b"show time\r\nTime:\t1234500000\r\n",
+    "show clocks": b"show clocks\r\nclk: Calibrated Ticks 100Hz\r\n",
+    "show throttle": b"show throttle\r\nThrottling:\t\tDisabled\r\n",
+}
+
+
+class _SimPromptChild:
+    """Answers SIMH reports at its command prompt after the break character."""
+
+    def __init__(self, *, stops: bool = True) -> None:
+        self.stops = stops
+        self.sent: list[str] = []
+        self.before = b""
+
+    def send(self, s: str) -> int:
+        self.sent.append(s)
+        return len(s)
+
+    def sendline(self, s: str = "") -> int:
+        return self.send(s + "\n")
+
+    def expect(self, pattern: object, timeout: float = -1) -> int:
+        if not self.stops:
+            raise pexpect.TIMEOUT("no sim> prompt")
+        if pattern is pexpect.EOF:
+            return 0
+        self.before = _SIMH_REPLIES.get(self.sent[-1].strip(), b"\r\nSimulation stopped, PC: 00001234\r\n")
+        return 0
+
+
+def test_simh_counters_derive_emulated_mips() -> None:
+    counters = simh_counters(
+        {"show time": "Time:\t1,500,000,000", "show throttle": "Throttle:   50%\nmore"},
+        host_seconds=100.0,
+        cpu_seconds=60.0,
+    )
+
+    assert counters == {
+        "host_seconds": 100.0,
+        "simulated_instructions": 1.5e9,
+        "mips": 15.0,
+        "cpu_seconds": 60.0,
+        "mips_per_cpu_second": 25.0,
+        "throttle": "Throttle: 50%",
+    }
+    # Older SIMH builds lack SHOW TIME; the wall time is still recorded.
+    assert simh_counters({"show time": "Non-existent parameter"}, host_seconds=5.0) == {"host_seconds": 5.0}
+
+
+def test_capture_simh_counters_records_reports_and_counters(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    sections_path = tmp_path / "sections.jsonl"
+    monkeypatch.setenv("SECTIONS_LOG", str(sections_path))
+    child = _SimPromptChild()
+
+    counters = capture_simh_counters(child, "vax", "vaxbsd>> ", 123.45)
+
+    assert child.sent == ["\x05", "show time\n", "show clocks\n", "show throttle\n"]
+    assert counters["mips"] == 10.0
+    assert counters["throttle"] == "Throttling: Disabled"
+    section, record = (json.loads(line) for line in sections_path.read_text(encoding="utf-8").splitlines())
+    assert section["section"] == "vax-simh"
+    assert "vaxbsd>> show clocks\nclk: Calibrated Ticks 100Hz" in section["content"]
+    assert record["simh"] == counters
+
+
+def test_quit_simh_falls_back_to_shell_exit(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SECTIONS_LOG", str(tmp_path / "sections.jsonl"))
+    stopped = _SimPromptChild()
+    vax_quit_simh(stopped, 0.0, None)
+    assert stopped.sent[-1] == "quit\n"
+
+    running = _SimPromptChild(stops=False)
+    vax_quit_simh(running, 0.0, None)
+    assert running.sent == ["\x05", "exit\n"]
+
+
+def test_guest_elapsed_seconds_reads_date_markers() -> None:
+    output = (
+        b'echo __VINTAGE_T0_"`date`"__\r\n'
+        b"__VINTAGE_T0_Sun Oct 19 23:59:30 PDT 1986__\r\n"
+        b"cc output\r\n"
+        b"__VINTAGE_T1_Mon Oct 20 00:01:05 PDT 1986__\r\n"
+    )
+
+    # The command crossed midnight.
+    assert guest_elapsed_seconds(output) == 95
+    assert guest_elapsed_seconds(b"__VINTAGE_T0_Sun Oct 19 23:59:30 PDT 1986__\r\n") is None
+
+
+class _ScriptedChild(_FakeChild):
+    """A child whose successive expect calls find the given console text."""
+
+    def __init__(self, *replies: bytes) -> None:
+        super().__init__()
+        self.replies = list(replies)
+        self.after = b""
+
+    def expect(self, pattern: object, timeout: float = -1) -> int:
+        reply = self.replies.pop(0)
+        match = re.search(pattern, reply) if isinstance(pattern, bytes | re.Pattern) else None
+        self.before, self.after = (reply[: match.start()], match.group(0)) if match else (reply, b"")
+        self.match = match
+        return 0
+
+
+def test_run_checked_times_commands_with_an_attached_timer(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    sections_path = tmp_path / "sections.jsonl"
+    monkeypatch.setenv("SECTIONS_LOG", str(sections_path))
+    command = "cc -O -o bradman bradman.c"
+    echoed = f'{command}; vintage_rc=$?; echo __VINTAGE_T1_"`date`"__; echo __VINTAGE_RC_"${{vintage_rc}}__"'
+    child = _ScriptedChild(
+        b'echo __VINTAGE_T0_"`date`"__\r\n__VINTAGE_T0_Sun Oct 19 12:00:00 PDT 1986__\r\n',
+        b"VAXsh> ",
+        echoed.encode("ascii") + b"\r\ncompiled\r\n__VINTAGE_T1_Sun Oct 19 12:01:30 PDT 1986__\r\n__VINTAGE_RC_0__",
+        b"\r\nVAXsh> ",
+    )
+    CommandTimer("vax").attach(child)
+
+    output = run_checked(child, command, "VAXsh> ", 60, label="compile bradman.c")
+
+    # The output is exactly what the untimed command would have returned.
+    assert output == f'{command}; vintage_rc=$?; echo __VINTAGE_RC_"${{vintage_rc}}__"\r\ncompiled\r\n'.encode("ascii")
+    lines = child.sent.decode("ascii").splitlines()
+    assert lines[0] == 'echo __VINTAGE_T0_"`date`"__'
+    assert lines[1] == echoed
+    # Both lines stay under the guest tty's 256-byte canonical line limit.
+    assert all(len(line) < 256 for line in lines)
+    record = json.loads(sections_path.read_text(encoding="utf-8"))
+    assert (record["machine"], record["label"]) == ("vax", "compile bradman.c")
+    assert record["timing"]["guest_seconds"] == 90
+    assert record["timing"]["overhead_seconds"] == 0
+    assert record["timing"]["host_seconds"] >= 0
+
+
+def test_resync_shell_kills_the_line_and_waits_for_a_fresh_marker() -> None:
+    child = _make_mock_child()
+
+    resync_shell(child, "VAXsh> ", 5, heredoc_terminator="HEREDOC_EOF")
+    resync_shell(child, "VAXsh> ", 5)
+
+    assert child.send.call_args_list[0].args == ("\x15",)
+    sent = [c.args[0] for c in child.sendline.call_args_list]
+    assert sent[0] == "HEREDOC_EOF"
+    match = re.fullmatch(r'echo __VINTAGE_SYNC_"([0-9]+)"__', sent[1])
+    assert match is not None
+    # The echoed command line cannot match; each resync waits for its own marker.
+    marker = child.expect.call_args_list[0].args[0]
+    assert marker == f"__VINTAGE_SYNC_{match.group(1)}__".encode("ascii")
+    assert not re.search(marker, sent[1].encode("ascii"))
+    assert sent[2] != sent[1]
+    assert child.expect.call_args_list[1].args == ("VAXsh> ",)
+
+
+def test_retry_policy_resyncs_and_reruns_a_timed_out_step() -> None:
+    child = _make_mock_child()
+    outcomes: list[object] = [pexpect.TIMEOUT("stalled"), "done"]
+
+    def step() -> object:
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    policy = RetryPolicy(retry_on=(pexpect.TIMEOUT,), heredoc_terminator="HEREDOC_EOF")
+    assert policy.run(child, "VAXsh> ", "inject", step) == "done"
+    assert policy.retries == 1
+    child.send.assert_called_once_with("\x15")
+
+
+def test_retry_policy_gives_up_after_its_attempts() -> None:
+    child = _make_mock_child()
+    calls = 0
+
+    def step() -> None:
+        nonlocal calls
+        calls += 1
+        raise pexpect.TIMEOUT("stalled")
+
+    with pytest.raises(pexpect.TIMEOUT):
+        RetryPolicy(retry_on=(pexpect.TIMEOUT,), attempts=2).run(child, "VAXsh> ", "inject", step)
+    assert calls == 2
+    assert child.send.call_count == 1
+
+    # Failures outside retry_on are not transient and propagate at once.
+    with pytest.raises(GuestCommandError):
+        RetryPolicy(retry_on=(pexpect.TIMEOUT,)).run(
+            child, "VAXsh> ", "decode", lambda: (_ for _ in ()).throw(GuestCommandError("bad spool"))
+        )
+    assert child.send.call_count == 1
+    with pytest.raises(ValueError, match="at least 1"):
+        RetryPolicy(retry_on=(pexpect.TIMEOUT,), attempts=0)
@@ -0,0 +1,22 @@
+"""Tests for fixed-width report tables."""
+
+from __future__ import annotations
+
+from resume_generator.tables import align_columns
+
+
+def test_align_columns_pads_named_columns_left_and_the_rest_right() -> None:
+    table = [("machine", "MIPS", "throttle"), ("vax", "15.00", "Disabled"), ("pdp11", "2.5", "-")]
+
+    assert align_columns(table, left=(0, 2)).splitlines() == [
+        "machine   MIPS  throttle",
+        "vax      15.00  Disabled",
+        "pdp11      2.5  -",
+    ]
+
+
+def test_align_columns_aligns_the_first_two_columns_left_by_default() -> None:
+    assert align_columns([("stage", "metric", "value"), ("vax_boot", "s", "1.0")]).splitlines() == [
+        "stage     metric  value",
+        "vax_boot  s         1.0",
+    ]
@@ -0,0 +1,145 @@
+"""Tests for build spans and the Chrome trace-event export."""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from resume_generator.journal import load_journal
+from resume_generator.tracing import main, span, trace_events, traced, write_trace
+
+
+def _records(path: Path) -> list[dict[str, object]]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_span_journals_start_and_end(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    events_path = tmp_path / "events.jsonl"
+    monkeypatch.setenv("EVENTS_LOG", str(events_path))
+
+    with span("build-pdf", source="pdf", bytes_in=10) as record:
+        record["bytes_out"] = 2048
+    with pytest.raises(RuntimeError), span("verify-site", source="verify_site"):
+        raise RuntimeError("missing font")
+
+    records = _records(events_path)
+    assert [(r["type"], r["stage"]) for r in records] == [
+        ("start", "build-pdf"),
+        ("end", "build-pdf"),
+        ("start", "verify-site"),
+        ("end", "verify-site"),
+    ]
+    assert records[1]["status"] == "ok"
+    assert records[1]["bytes_out"] == 2048
+    assert records[3]["status"] == "failed"
+
+
+def test_traced_marks_nonzero_exit_codes_failed(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    events_path = tmp_path / "events.jsonl"
+    monkeypatch.setenv("EVENTS_LOG", str(events_path))
+
+    @traced("bio-yaml", source="bio_yaml")
+    def entry_point(code: int) -> int:
+        return code
+
+    assert entry_point(0) == 0
+    assert load_journal(events_path)["bio-yaml"]["status"] == "ok"
+    assert entry_point(2) == 2
+    event = load_journal(events_path)["bio-yaml"]
+    assert event["status"] == "failed"
+    assert event["detail"] == "exit code 2"
+
+
+def test_span_is_silent_without_events_log(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("EVENTS_LOG", raising=False)
+
+    with span("hugo-build", source="make") as record:
+        record["detail"] = "built"
+
+
+def test_trace_events_merge_journals_into_one_process_per_source(tmp_path: Path) -> None:
+    runner = tmp_path / "events.jsonl"
+    runner.write_text(
+        '{"type": "start", "source": "runner", "stage": "stage-b-vax", "start": 100.0}\n'
+        '{"type": "start", "source": "vax_pexpect", "stage": "vax-boot", "start": 101.0}\n'
+        '{"type": "end", "source": "vax_pexpect", "stage": "vax-boot", "start": 101.0, "end": 141.5, '
+        '"status": "ok", "bytes_in": 0, "bytes_out": 0}\n'
+        '{"type": "end", "source": "runner", "stage": "stage-b-vax", "start": 100.0, "end": 150.0, '
+        '"status": "ok", "bytes_in": 10, "bytes_out": 20, "detail": "Wrote spool"}\n',
+        encoding="utf-8",
+    )
+    site = tmp_path / "site.jsonl"
+    site.write_text('{"type": "start", "source": "make", "stage": "hugo-build", "start": 160.0}\n', encoding="utf-8")
+
+    events = trace_events([runner, site])
+
+    names = {event["pid"]: event["args"] for event in events if event["name"] == "process_name"}
+    assert names == {
+        1: {"name": "host: vintage-runner.sh"},
+        2: {"name": "vax container: 4.3BSD guest"},
+        3: {"name": "make"},
+    }
+    spans = {event["name"]: event for event in events if event["ph"] == "X"}
+    assert spans["stage-b-vax"]["ts"] == 0
+    assert spans["stage-b-vax"]["dur"] == 50_000_000
+    assert spans["stage-b-vax"]["args"] == {"status": "ok", "bytes_in": 10, "bytes_out": 20, "detail": "Wrote spool"}
+    assert spans["vax-boot"]["pid"] == 2
+    assert spans["vax-boot"]["ts"] == 1_000_000
+    assert spans["vax-boot"]["dur"] == 40_500_000
+    # An unfinished span ends at the last recorded time.
+    assert spans["hugo-build"]["dur"] == 0
+    assert spans["hugo-build"]["args"] == {"status": "running"}
+
+
+def test_trace_events_keep_repeated_and_nested_spans(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    events_path = tmp_path / "events.jsonl"
+    monkeypatch.setenv("EVENTS_LOG", str(events_path))
+
+    with span("vintage-contract", source="session"), span("vintage-contract", source="session"):
+        pass
+    with span("hugo-build", source="make"):
+        pass
+    with span("hugo-build", source="make"):
+        pass
+
+    spans = [event for event in trace_events([events_path]) if event["ph"] == "X"]
+
+    assert [event["name"] for event in spans] == ["vintage-contract"] * 2 + ["hugo-build"] * 2
+    (outer_ts, outer_dur), (inner_ts, inner_dur) = [(event["ts"], event["dur"]) for event in spans[:2]]
+    assert isinstance(outer_ts, int) and isinstance(outer_dur, int)
+    assert isinstance(inner_ts, int) and isinstance(inner_dur, int)
+    assert outer_ts <= inner_ts
+    assert inner_ts + inner_dur <= outer_ts + outer_dur
+    assert all(event["args"] == {"status": "ok"} for event in spans)
+
+
+def test_main_exports_a_trace_file(tmp_path: Path) -> None:
+    journal = tmp_path / "events.jsonl"
+    journal.write_text(
+        '{"type": "end", "source": "runner", "stage": "prepare-host", "start": 1.0, "end": 2.0, "status": "ok"}\n',
+        encoding="utf-8",
+    )
+    out = tmp_path / "trace" / "trace.json"
+
+    assert main(["export", str(journal), "--output", str(out)]) == 0
+
+    trace = json.loads(out.read_text(encoding="utf-8"))
+    assert trace["displayTimeUnit"] == "ms"
+    assert [event["ph"] for event in trace["traceEvents"]] == ["M", "M", "X"]
+    assert write_trace(out, [tmp_path / "missing.jsonl"]) == 0
+
+
+def test_main_runs_a_command_as_a_span(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    events_path = tmp_path / "events.jsonl"
+    monkeypatch.setenv("EVENTS_LOG", str(events_path))
+
+    assert main(["run", "hugo-build", "--", sys.executable, "-c", "raise SystemExit(3)"]) == 3
+    event = load_journal(events_path)["hugo-build"]
+    assert event["source"] == "make"
+    assert event["status"] == "failed"
+    assert event["detail"] == "exit code 3"
+
+    assert main(["run", "missing", "--", str(tmp_path / "no-such-command")]) == 127
@@ -1,27 +1,16 @@
 from __future__ import annotations
 
-import importlib.util
+import gzip
 import subprocess
 from collections.abc import Sequence
 from pathlib import Path
-from types import ModuleType
 
 import pytest
 from pytest import MonkeyPatch
 
-
-def _load_verifier() -> ModuleType:
-    path = Path(__file__).resolve().parents[1] / "scripts" / "verify_site.py"
-    spec = importlib.util.spec_from_file_location("verify_site_under_test", path)
-    if spec is None or spec.loader is None:
-        raise RuntimeError(f"could not load verifier from {path}")
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
-
-
-verifier = _load_verifier()
-
+from resume_generator import session as build_session
+from resume_generator import verify_site as verifier
+from resume_generator.session import BuildSession
 
 RUN_URL = "https://github.com/example/site/actions/runs/123456"
 BUILD_ID = "build-20260822-120000"
@@ -54,15 +43,15 @@ def test_default_main_does_not_run_production_checks(
     capsys: pytest.CaptureFixture[str],
 ) -> None:
     site_dir = tmp_path / "site"
-    monkeypatch.setattr(verifier, "verify_site", lambda _site_dir: [])
+    monkeypatch.setattr(build_session, "verify_site", lambda _site_dir: [])
 
     def _unexpected_production_check(*args: object, **kwargs: object) -> list[str]:
         del args, kwargs
         raise AssertionError("default verification must not run production checks")
 
-    monkeypatch.setattr(verifier, "verify_production_site", _unexpected_production_check)
+    monkeypatch.setattr(build_session, "verify_production_site", _unexpected_production_check)
 
-    assert verifier.main([str(site_dir)]) == 0
+    assert build_session.main(["verify", str(site_dir)]) == 0
     assert capsys.readouterr().out == f"Verified rendered site: {site_dir}\n"
 
 
@@ -97,6 +86,48 @@ def test_linked_build_log_must_exist_in_rendered_tree(tmp_path: Path) -> None:
     assert errors == []
 
 
+def test_build_log_fragments_must_exist_beside_the_log(tmp_path: Path) -> None:
+    site_dir = tmp_path / "site"
+    site_dir.mkdir()
+    (site_dir / "index.html").write_text('<a href="/build.log.html">build log</a>\n', encoding="utf-8")
+    (site_dir / "build.log.html").write_text(
+        '<noscript><a class="fragment-link" href="build.log/vax-boot.txt">vax-boot.txt</a></noscript>\n',
+        encoding="utf-8",
+    )
+    errors: list[str] = []
+
+    verifier.verify_linked_artifacts(site_dir, errors)
+
+    assert errors == ["build.log.html: links to missing or empty console fragment 'build.log/vax-boot.txt'"]
+
+    (site_dir / "build.log").mkdir()
+    (site_dir / "build.log" / "vax-boot.txt").write_text("booted\n", encoding="utf-8")
+    errors = []
+    verifier.verify_linked_artifacts(site_dir, errors)
+    assert errors == []
+
+
+def test_precompressed_siblings_must_match_their_originals(tmp_path: Path) -> None:
+    site_dir = tmp_path / "site"
+    site_dir.mkdir()
+    (site_dir / "index.html").write_text("<p>home</p>\n", encoding="utf-8")
+    (site_dir / "index.html.gz").write_bytes(gzip.compress(b"<p>home</p>\n"))
+    (site_dir / "index.xml.gz").write_bytes(gzip.compress(b"<rss/>"))
+    (site_dir / "build.log.html").write_text("log\n", encoding="utf-8")
+    (site_dir / "build.log.html.gz").write_bytes(gzip.compress(b"stale log\n"))
+    (site_dir / "robots.txt").write_text("User-agent: *\n", encoding="utf-8")
+    (site_dir / "robots.txt.gz").write_bytes(b"not gzip")
+    errors: list[str] = []
+
+    verifier.verify_precompressed_siblings(site_dir, errors)
+
+    assert errors == [
+        "build.log.html.gz: does not decompress to build.log.html",
+        "index.xml.gz: precompressed sibling has no original",
+        "robots.txt.gz: cannot decompress: corrupt gzip data: Not a gzipped file (b'no')",
+    ]
+
+
 def test_feed_check_allows_literal_entities_but_rejects_double_escaped_quotes(tmp_path: Path) -> None:
     site_dir = tmp_path / "site"
     post = site_dir / "posts" / "example" / "index.html"
@@ -125,36 +156,29 @@ def test_feed_check_allows_literal_entities_but_rejects_double_escaped_quotes(tm
     assert all("double-escaped entity" in error for error in errors)
 
 
-def test_production_main_passes_explicit_inputs_to_production_checks(
+def test_production_main_passes_the_session_resume_to_production_checks(
     tmp_path: Path,
     monkeypatch: MonkeyPatch,
 ) -> None:
     site_dir = tmp_path / "site"
     resume_yaml = tmp_path / "resume.yaml"
     calls: list[tuple[Path, Path, str]] = []
-    monkeypatch.setattr(verifier, "verify_site", lambda _site_dir: [])
+    monkeypatch.setattr(build_session, "verify_site", lambda _site_dir: [])
 
     def _verify_production_site(
         checked_site_dir: Path,
         *,
-        resume_yaml: Path,
+        session: BuildSession,
         build_run_url: str,
     ) -> list[str]:
-        calls.append((checked_site_dir, resume_yaml, build_run_url))
+        calls.append((checked_site_dir, session.resume_path, build_run_url))
         return []
 
-    monkeypatch.setattr(verifier, "verify_production_site", _verify_production_site)
+    monkeypatch.setattr(build_session, "verify_production_site", _verify_production_site)
 
     assert (
-        verifier.main(
-            [
-                str(site_dir),
-                "--production",
-                "--resume-yaml",
-                str(resume_yaml),
-                "--build-run-url",
-                RUN_URL,
-            ]
+        build_session.main(
+            ["--resume", str(resume_yaml), "verify", str(site_dir), "--production", "--build-run-url", RUN_URL]
         )
         == 0
     )
@@ -176,7 +200,10 @@ def test_production_site_accepts_complete_public_artifacts(tmp_path: Path, monke
 
     monkeypatch.setattr(verifier, "run_external", _run_external)
 
-    assert verifier.verify_production_site(site_dir, resume_yaml=resume_yaml, build_run_url=RUN_URL) == []
+    assert (
+        verifier.verify_production_site(site_dir, session=BuildSession(resume_path=resume_yaml), build_run_url=RUN_URL)
+        == []
+    )
 
 
 def test_production_site_collects_privacy_status_and_provenance_errors(
@@ -207,7 +234,9 @@ def test_production_site_collects_privacy_status_and_provenance_errors(
 
     monkeypatch.setattr(verifier, "run_external", _run_external)
 
-    errors = verifier.verify_production_site(site_dir, resume_yaml=resume_yaml, build_run_url=RUN_URL)
+    errors = verifier.verify_production_site(
+        site_dir, session=BuildSession(resume_path=resume_yaml), build_run_url=RUN_URL
+    )
 
     assert any("application.PDF" in error for error in errors)
     assert any("raw brad.bio.txt" in error for error in errors)
@@ -238,7 +267,9 @@ def test_production_site_reports_missing_artifacts_without_running_pdf_tools(
 
     monkeypatch.setattr(verifier, "run_external", _unexpected_command)
 
-    errors = verifier.verify_production_site(site_dir, resume_yaml=resume_yaml, build_run_url=RUN_URL)
+    errors = verifier.verify_production_site(
+        site_dir, session=BuildSession(resume_path=resume_yaml), build_run_url=RUN_URL
+    )
 
     assert "missing or empty production artifact: resume.pdf" in errors
     assert "missing or empty production artifact: build.log.html" in errors
@@ -0,0 +1,105 @@
+"""Tests for the shared YAML loader and its parsed-document cache."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any
+
+import pytest
+import yaml
+
+from resume_generator import yaml_loader
+from resume_generator.yaml_loader import cache_entry_path, load_yaml, parse_yaml
+
+
+@pytest.fixture
+def cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    directory = tmp_path / "cache"
+    monkeypatch.setenv(yaml_loader.YAML_CACHE_ENV, str(directory))
+    return directory
+
+
+@pytest.fixture
+def parses(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """Record each document the loader actually parses."""
+    calls: list[str] = []
+    parse = yaml_loader.parse_yaml
+
+    def counted(text: str) -> Any:
+        calls.append(text)
+        return parse(text)
+
+    monkeypatch.setattr(yaml_loader, "parse_yaml", counted)
+    return calls
+
+
+def test_parse_yaml_prefers_libyaml_and_stays_safe() -> None:
+    if hasattr(yaml, "CSafeLoader"):
+        assert yaml_loader.SafeLoader is yaml.CSafeLoader
+    assert parse_yaml("name: Brad\nitems: [1, 2]\n") == {"name": "Brad", "items": [1, 2]}
+    with pytest.raises(yaml.YAMLError):
+        parse_yaml("!!python/object/apply:os.system ['true']\n")
+
+
+def test_load_yaml_reuses_the_cached_document_of_an_unchanged_file(
+    tmp_path: Path, cache: Path, parses: list[str]
+) -> None:
+    source = tmp_path / "site.yaml"
+    source.write_text("name: Brad\n", encoding="utf-8")
+
+    assert load_yaml(source) == {"name": "Brad"}
+    assert load_yaml(source) == {"name": "Brad"}
+    assert parses == ["name: Brad\n"]
+    assert cache_entry_path(cache, source).is_file()
+
+
+def test_load_yaml_reparses_after_a_content_or_mtime_change(tmp_path: Path, cache: Path, parses: list[str]) -> None:
+    source = tmp_path / "site.yaml"
+    source.write_text("name: Brad\n", encoding="utf-8")
+    load_yaml(source)
+
+    source.write_text("name: Bradley\n", encoding="utf-8")
+    assert load_yaml(source) == {"name": "Bradley"}
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert load_yaml(source) == {"name": "Bradley"}
+    assert parses == ["name: Brad\n", "name: Bradley\n", "name: Bradley\n"]
+
+
+def test_load_yaml_parses_documents_json_cannot_hold_every_time(tmp_path: Path, cache: Path, parses: list[str]) -> None:
+    dated, numbered = tmp_path / "dated.yaml", tmp_path / "numbered.yaml"
+    dated.write_text("start: 2020-01-01\n", encoding="utf-8")
+    numbered.write_text("1: one\n", encoding="utf-8")
+
+    for _ in range(2):
+        assert load_yaml(dated)["start"].year == 2020
+        assert load_yaml(numbered) == {1: "one"}
+    assert len(parses) == 4
+    assert not cache.exists()
+
+
+def test_load_yaml_treats_a_corrupt_entry_as_a_miss(tmp_path: Path, cache: Path, parses: list[str]) -> None:
+    source = tmp_path / "site.yaml"
+    source.write_text("name: Brad\n", encoding="utf-8")
+    cache.mkdir()
+    cache_entry_path(cache, source).write_text("{not json", encoding="utf-8")
+
+    assert load_yaml(source) == {"name": "Brad"}
+    assert load_yaml(source) == {"name": "Brad"}
+    assert len(parses) == 1
+
+
+def test_load_yaml_skips_the_cache_when_disabled(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, parses: list[str]
+) -> None:
+    source = tmp_path / "site.yaml"
+    source.write_text("name: Brad\n", encoding="utf-8")
+    cache = tmp_path / "cache"
+    monkeypatch.setenv(yaml_loader.YAML_CACHE_ENV, str(cache))
+
+    load_yaml(source, cache=False)
+    monkeypatch.delenv(yaml_loader.YAML_CACHE_ENV)
+    load_yaml(source)
+    assert len(parses) == 2
+    assert not cache.exists()